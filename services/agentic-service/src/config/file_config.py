@@ -6,7 +6,7 @@ Everything you need to know about file handling in one place.
 """
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 
 @dataclass
@@ -15,6 +15,7 @@ class FileProcessingConfig:
     
     # File size limits
     max_file_size_bytes: int = 100 * 1024 * 1024  # 100MB
+    spool_threshold_bytes: int = 32 * 1024 * 1024  # Larger downloads go to a temp file
     
     # Allowed file extensions
     allowed_extensions: List[str] = None
@@ -30,6 +31,27 @@ class FileProcessingConfig:
     base_delay: float = 1.0
     backoff_factor: float = 2.0
     
+    # Resilience configuration
+    request_timeout_seconds: float = 600.0  # Total budget for one vectorization request
+    circuit_failure_threshold: int = 5  # Consecutive transient failures that open a circuit
+    circuit_recovery_timeout: float = 30.0  # Seconds before an open circuit is probed again
+    
+    # Batch vectorization workers
+    batch_fetch_workers: int = 8
+    batch_extract_workers: int = 4
+    batch_embed_workers: int = 4
+    embedding_batch_size: int = 128  # Chunks packed into one embedding request (API max 2048)
+    
+    # OCR fallback for image-only PDF pages
+    ocr_enabled: bool = False
+    ocr_language: str = "eng"
+    ocr_dpi: int = 200
+    ocr_max_workers: int = 2
+    ocr_max_concurrent_pages: int = 4
+    ocr_page_timeout_seconds: float = 30.0
+    ocr_cache_size: int = 1024
+    ocr_cache_dir: Optional[str] = None
+    
     def __post_init__(self):
         """Post-initialization validation and defaults."""
         if self.allowed_extensions is None:
@@ -53,6 +75,24 @@ class FileProcessingConfig:
         
         if self.max_retries < 0:
             raise ValueError("max_retries cannot be negative")
+        
+        if self.request_timeout_seconds <= 0:
+            raise ValueError("request_timeout_seconds must be positive")
+        
+        if self.circuit_failure_threshold <= 0:
+            raise ValueError("circuit_failure_threshold must be positive")
+        
+        if min(self.batch_fetch_workers, self.batch_extract_workers, self.batch_embed_workers) <= 0:
+            raise ValueError("batch worker counts must be positive")
+        
+        if not 0 < self.embedding_batch_size <= 2048:
+            raise ValueError("embedding_batch_size must be between 1 and 2048")
+        
+        if self.ocr_max_workers <= 0 or self.ocr_max_concurrent_pages <= 0:
+            raise ValueError("OCR worker and page limits must be positive")
+        
+        if self.ocr_page_timeout_seconds <= 0:
+            raise ValueError("ocr_page_timeout_seconds must be positive")
 
     @classmethod
     def from_app_config(cls, app_config) -> 'FileProcessingConfig':
@@ -67,10 +107,26 @@ class FileProcessingConfig:
         """
         return cls(
             max_file_size_bytes=getattr(app_config, 'MAX_FILE_SIZE_BYTES', 100 * 1024 * 1024),
+            spool_threshold_bytes=getattr(app_config, 'SPOOL_THRESHOLD_BYTES', 32 * 1024 * 1024),
             allowed_extensions=getattr(app_config, 'ALLOWED_FILE_EXTENSIONS', None),
             max_tokens_per_chunk=getattr(app_config, 'MAX_TOKENS_PER_CHUNK', 512),
             opensearch_index_name=getattr(app_config, 'OPENSEARCH_INDEX_NAME', None),
             max_retries=3,
             base_delay=1.0,
-            backoff_factor=2.0
+            backoff_factor=2.0,
+            request_timeout_seconds=getattr(app_config, 'REQUEST_TIMEOUT_SECONDS', 600.0),
+            circuit_failure_threshold=getattr(app_config, 'CIRCUIT_FAILURE_THRESHOLD', 5),
+            circuit_recovery_timeout=getattr(app_config, 'CIRCUIT_RECOVERY_TIMEOUT', 30.0),
+            batch_fetch_workers=getattr(app_config, 'BATCH_FETCH_WORKERS', 8),
+            batch_extract_workers=getattr(app_config, 'BATCH_EXTRACT_WORKERS', 4),
+            batch_embed_workers=getattr(app_config, 'BATCH_EMBED_WORKERS', 4),
+            embedding_batch_size=getattr(app_config, 'EMBEDDING_BATCH_SIZE', 128),
+            ocr_enabled=getattr(app_config, 'OCR_ENABLED', False),
+            ocr_language=getattr(app_config, 'OCR_LANGUAGE', 'eng'),
+            ocr_dpi=getattr(app_config, 'OCR_DPI', 200),
+            ocr_max_workers=getattr(app_config, 'OCR_MAX_WORKERS', 2),
+            ocr_max_concurrent_pages=getattr(app_config, 'OCR_MAX_CONCURRENT_PAGES', 4),
+            ocr_page_timeout_seconds=getattr(app_config, 'OCR_PAGE_TIMEOUT_SECONDS', 30.0),
+            ocr_cache_size=getattr(app_config, 'OCR_CACHE_SIZE', 1024),
+            ocr_cache_dir=getattr(app_config, 'OCR_CACHE_DIR', None)
         )
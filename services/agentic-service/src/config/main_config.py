@@ -6,6 +6,7 @@ from typing import List
 class AppSettings:
     """Non-sensitive application settings."""
     MAX_FILE_SIZE_BYTES = 100 * 1024 * 1024  # 100MB
+    SPOOL_THRESHOLD_BYTES = 32 * 1024 * 1024  # 32MB - larger files are parsed from /tmp
     ALLOWED_FILE_EXTENSIONS = ["pdf", "docx", "txt", "md", "pptx", "xlsx"]
     MAX_TOKENS_PER_CHUNK = 512
     OPENSEARCH_PORT = 443
@@ -15,6 +16,20 @@ class AppSettings:
     OPENSEARCH_TIMEOUT = 60
     EMBEDDING_MODEL = "text-embedding-3-small"
     LOG_LEVEL = "INFO"
+    REQUEST_TIMEOUT_SECONDS = 600
+    CIRCUIT_FAILURE_THRESHOLD = 5
+    CIRCUIT_RECOVERY_TIMEOUT = 30
+    BATCH_FETCH_WORKERS = 8
+    BATCH_EXTRACT_WORKERS = 4
+    BATCH_EMBED_WORKERS = 4
+    EMBEDDING_BATCH_SIZE = 128
+    OCR_ENABLED = False
+    OCR_LANGUAGE = "eng"
+    OCR_DPI = 200
+    OCR_MAX_WORKERS = 2
+    OCR_MAX_CONCURRENT_PAGES = 4
+    OCR_PAGE_TIMEOUT_SECONDS = 30
+    OCR_CACHE_SIZE = 1024
 
 
 class Config:
@@ -45,6 +60,7 @@ class Config:
         # Application settings with environment-aware defaults
         self.OPENSEARCH_ENABLED = self._get_opensearch_enabled_default()
         self.FORCE_OPENSEARCH_LOCAL = os.getenv("FORCE_OPENSEARCH_LOCAL", "false").lower() == "true"
+        self.RESPONSE_STREAMING_ENABLED = self._get_response_streaming_default()
         
         # Settings from AppSettings (with possible env overrides)
         self.OPENSEARCH_PORT = int(os.getenv("OPENSEARCH_PORT", str(AppSettings.OPENSEARCH_PORT)))
@@ -57,6 +73,28 @@ class Config:
         self.MAX_TOKENS_PER_CHUNK = int(os.getenv("MAX_TOKENS_PER_CHUNK", str(AppSettings.MAX_TOKENS_PER_CHUNK)))
         self.ALLOWED_FILE_EXTENSIONS = AppSettings.ALLOWED_FILE_EXTENSIONS
         self.MAX_FILE_SIZE_BYTES = int(os.getenv("MAX_FILE_SIZE_BYTES", str(AppSettings.MAX_FILE_SIZE_BYTES)))
+        self.SPOOL_THRESHOLD_BYTES = int(os.getenv("SPOOL_THRESHOLD_BYTES", str(AppSettings.SPOOL_THRESHOLD_BYTES)))
+        
+        # Resilience settings
+        self.REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", str(AppSettings.REQUEST_TIMEOUT_SECONDS)))
+        self.CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", str(AppSettings.CIRCUIT_FAILURE_THRESHOLD)))
+        self.CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv("CIRCUIT_RECOVERY_TIMEOUT", str(AppSettings.CIRCUIT_RECOVERY_TIMEOUT)))
+        
+        # Batch vectorization settings
+        self.BATCH_FETCH_WORKERS = int(os.getenv("BATCH_FETCH_WORKERS", str(AppSettings.BATCH_FETCH_WORKERS)))
+        self.BATCH_EXTRACT_WORKERS = int(os.getenv("BATCH_EXTRACT_WORKERS", str(AppSettings.BATCH_EXTRACT_WORKERS)))
+        self.BATCH_EMBED_WORKERS = int(os.getenv("BATCH_EMBED_WORKERS", str(AppSettings.BATCH_EMBED_WORKERS)))
+        self.EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", str(AppSettings.EMBEDDING_BATCH_SIZE)))
+        
+        # OCR fallback settings (requires the tesseract binary in the image)
+        self.OCR_ENABLED = os.getenv("OCR_ENABLED", str(AppSettings.OCR_ENABLED)).lower() == "true"
+        self.OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", AppSettings.OCR_LANGUAGE)
+        self.OCR_DPI = int(os.getenv("OCR_DPI", str(AppSettings.OCR_DPI)))
+        self.OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS", str(AppSettings.OCR_MAX_WORKERS)))
+        self.OCR_MAX_CONCURRENT_PAGES = int(os.getenv("OCR_MAX_CONCURRENT_PAGES", str(AppSettings.OCR_MAX_CONCURRENT_PAGES)))
+        self.OCR_PAGE_TIMEOUT_SECONDS = float(os.getenv("OCR_PAGE_TIMEOUT_SECONDS", str(AppSettings.OCR_PAGE_TIMEOUT_SECONDS)))
+        self.OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", str(AppSettings.OCR_CACHE_SIZE)))
+        self.OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR") or None
         
         # Other settings
         self.EMBEDDING_MODEL = AppSettings.EMBEDDING_MODEL
@@ -99,6 +137,15 @@ class Config:
             return True
         return False
     
+    def _get_response_streaming_default(self) -> bool:
+        """Get default response streaming setting based on how the app is served."""
+        env_value = os.getenv("RESPONSE_STREAMING_ENABLED", "").lower()
+        if env_value:
+            return env_value == "true"
+        
+        # The Lambda handler (Mangum) buffers whole responses
+        return not self.IS_LAMBDA
+    
     def validate_config(self) -> List[str]:
         """Validate critical configuration values."""
         errors = []
@@ -141,6 +188,7 @@ class Config:
         logger.info(f"Max File Size: {self.MAX_FILE_SIZE_BYTES / (1024*1024):.0f}MB")
         logger.info(f"Allowed Extensions: {', '.join(self.ALLOWED_FILE_EXTENSIONS)}")
         logger.info(f"Is Lambda: {self.IS_LAMBDA}")
+        logger.info(f"Response Streaming: {self.RESPONSE_STREAMING_ENABLED}")
         logger.info(f"Is Testing: {self.IS_TESTING}")
         logger.info("=============================")
 
@@ -5,20 +5,26 @@ A clean, focused controller that orchestrates file operations beautifully.
 No more 900+ line monsters - just elegant coordination.
 """
 
-from io import BytesIO
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Any, AsyncIterator
 from fastapi import HTTPException
 
 from core.logging import setup_logger, log_exception, log_structured
 from core.environment import get_environment_type
+from core.retry import configure_circuit_breaker, request_deadline
+from core.progress import ProgressEvent, report_progress, stream_progress
 from infrastructure.aws.s3_client import S3Client
 from infrastructure.aws.opensearch_client import OpenSearchClient
 from infrastructure.openai.client import OpenAIClient
 from services.file_processor import FileProcessor
+from services.ocr_service import OCRService
 from services.embedding_service import EmbeddingService
 from services.vectorization_service import VectorizationService
+from services.batch_vectorization_service import BatchVectorizationService
 from config.file_config import FileProcessingConfig
-from models.responses import VectorizationResponse, S3FileResponse
+from core.file_buffer import FileBuffer
+from models.responses import VectorizationResponse, BatchVectorizationResponse, S3FileResponse
+from schemas.vectorize_schemas import VectorizeRequest
 from config import config
 
 
@@ -42,6 +48,7 @@ class FileController:
         
         # Load configuration
         self.config = FileProcessingConfig.from_app_config(config)
+        self._configure_circuit_breakers()
         
         # Initialize infrastructure clients
         self.s3_client = self._create_s3_client()
@@ -49,7 +56,8 @@ class FileController:
         self.openai_client = self._create_openai_client()
         
         # Initialize services
-        self.file_processor = FileProcessor(self.config.allowed_extensions)
+        self.ocr_service = self._create_ocr_service()
+        self.file_processor = FileProcessor(self.config.allowed_extensions, self.ocr_service)
         self.embedding_service = EmbeddingService(self.openai_client, self.config.max_tokens_per_chunk)
         self.vectorization_service = VectorizationService(
             self.file_processor,
@@ -57,16 +65,51 @@ class FileController:
             self.opensearch_client,
             self.config.opensearch_index_name
         )
+        self.batch_vectorization_service = BatchVectorizationService(
+            self.s3_client,
+            self.file_processor,
+            self.openai_client,
+            self.opensearch_client,
+            self.config.opensearch_index_name,
+            max_tokens_per_chunk=self.config.max_tokens_per_chunk,
+            fetch_workers=self.config.batch_fetch_workers,
+            extract_workers=self.config.batch_extract_workers,
+            embed_workers=self.config.batch_embed_workers,
+            embedding_batch_size=self.config.embedding_batch_size
+        )
         
         logger.info("FileController initialization completed successfully")
 
+    def _configure_circuit_breakers(self) -> None:
+        """Apply circuit breaker settings to every external dependency."""
+        for dependency in ("openai", "s3", "opensearch"):
+            configure_circuit_breaker(
+                dependency,
+                failure_threshold=self.config.circuit_failure_threshold,
+                recovery_timeout=self.config.circuit_recovery_timeout
+            )
+
+    def _create_ocr_service(self) -> OCRService:
+        """Create the OCR fallback (disabled unless configured and installed)."""
+        return OCRService(
+            enabled=self.config.ocr_enabled,
+            language=self.config.ocr_language,
+            dpi=self.config.ocr_dpi,
+            max_workers=self.config.ocr_max_workers,
+            max_concurrent_pages=self.config.ocr_max_concurrent_pages,
+            page_timeout_seconds=self.config.ocr_page_timeout_seconds,
+            cache_size=self.config.ocr_cache_size,
+            cache_dir=self.config.ocr_cache_dir
+        )
+
     def _create_s3_client(self) -> S3Client:
         """Create and configure S3 client."""
         try:
             return S3Client(
                 region=config.REGION,
                 access_key_id=config.ACCESS_KEY_ID,
-                secret_access_key=config.SECRET_ACCESS_KEY
+                secret_access_key=config.SECRET_ACCESS_KEY,
+                spool_threshold_bytes=self.config.spool_threshold_bytes
             )
         except Exception as e:
             log_exception(logger, "Failed to initialize S3 client", e)
@@ -116,6 +159,10 @@ class FileController:
                 detail="OpenAI configuration error. Please check API key configuration."
             )
 
+    def shutdown(self) -> None:
+        """Release worker pools; called from the app lifespan on shutdown."""
+        self.ocr_service.shutdown()
+
     def get_files_by_names(self, file_names: List[str]) -> S3FileResponse:
         """
         Retrieve multiple files from S3 by their names.
@@ -173,7 +220,7 @@ class FileController:
 
     async def vectorize_files(
         self, 
-        file_streams_dict: Dict[str, BytesIO], 
+        file_streams_dict: Dict[str, FileBuffer], 
         material_id: str, 
         category: int
     ) -> VectorizationResponse:
@@ -181,7 +228,7 @@ class FileController:
         Process file streams and create embeddings for text chunks.
         
         Args:
-            file_streams_dict: Dictionary of filename -> file_stream from S3
+            file_streams_dict: Dictionary of filename -> file_buffer from S3
             material_id: Unique identifier for the material
             category: Category number for the material
             
@@ -192,12 +239,65 @@ class FileController:
             HTTPException: If critical errors occur during processing
         """
         try:
-            return await self.vectorization_service.vectorize_files(
-                file_streams_dict, material_id, category
-            )
+            with request_deadline(self.config.request_timeout_seconds):
+                return await self.vectorization_service.vectorize_files(
+                    file_streams_dict, material_id, category
+                )
         except Exception as e:
             log_exception(logger, "Vectorization process failed", e)
             raise HTTPException(
                 status_code=500,
                 detail=f"Vectorization failed: {str(e)}"
             )
+
+    async def vectorize_materials(self, materials: List[VectorizeRequest]) -> BatchVectorizationResponse:
+        """
+        Vectorize many materials in one pipelined pass.
+        
+        Args:
+            materials: Materials to vectorize
+            
+        Returns:
+            BatchVectorizationResponse with per-material results
+            
+        Raises:
+            HTTPException: If the batch cannot run at all
+        """
+        if not config.S3_BUCKET_NAME:
+            raise HTTPException(
+                status_code=500, 
+                detail="S3 bucket name not configured. Please set AWS_S3_BUCKET_NAME environment variable."
+            )
+        
+        try:
+            with request_deadline(self.config.request_timeout_seconds):
+                return await self.batch_vectorization_service.vectorize_materials(
+                    materials, config.S3_BUCKET_NAME, self.config.max_file_size_bytes
+                )
+        except Exception as e:
+            log_exception(logger, "Batch vectorization failed", e)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Batch vectorization failed: {str(e)}"
+            )
+
+    async def stream_vectorization(self, request: VectorizeRequest) -> AsyncIterator[ProgressEvent]:
+        """
+        Run the single-material pipeline while yielding progress events.
+        
+        S3 retrieval runs in a worker thread so fetch events stream out as
+        each file lands instead of after the whole download loop.
+        
+        Args:
+            request: Vectorization request
+            
+        Yields:
+            Progress event dicts, ending with 'completed' or 'failed'
+        """
+        async def run() -> VectorizationResponse:
+            report_progress("started", material_id=request.id, total_files=len(request.uploaded_file))
+            s3_response = await asyncio.to_thread(self.get_files_by_names, request.uploaded_file)
+            return await self.vectorize_files(s3_response.file_streams, request.id, request.category)
+        
+        async for event in stream_progress(run):
+            yield event
@@ -105,6 +105,16 @@ class OpenSearchOperationError(OperationError):
     pass
 
 
+class CircuitOpenError(OperationError):
+    """Raised when a dependency's circuit breaker is open and calls fail fast."""
+    pass
+
+
+class DeadlineExceededError(OperationError):
+    """Raised when the request deadline budget is exhausted before a call."""
+    pass
+
+
 # =============================================================================
 # HTTP-Related Errors
 # =============================================================================
@@ -204,6 +214,10 @@ def get_error_status_code(error: Exception) -> int:
         return error.status_code
     elif isinstance(error, ValidationError):
         return 400
+    elif isinstance(error, CircuitOpenError):
+        return 503
+    elif isinstance(error, DeadlineExceededError):
+        return 504
     elif isinstance(error, ConfigurationError):
         return 500
     elif isinstance(error, OperationError):
@@ -235,5 +249,7 @@ EXCEPTION_STATUS_CODES = {
     OperationError: 500,
     S3OperationError: 500,
     OpenSearchOperationError: 500,
+    CircuitOpenError: 503,
+    DeadlineExceededError: 504,
     InternalServerError: 500,
 }
@@ -0,0 +1,92 @@
+"""
+📦 File Buffer
+
+A single, shared home for downloaded file bytes.
+Hands the same buffer (or a temp-file path) from S3 to the parsers without copying.
+"""
+
+import hashlib
+import os
+from io import BytesIO
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+
+@dataclass
+class FileBuffer:
+    """
+    Downloaded file content held either in memory or on local disk.
+
+    In-memory content is kept as immutable ``bytes``: CPython's ``BytesIO``
+    shares an unmodified ``bytes`` object instead of copying it, and PyMuPDF
+    reads it directly, so one allocation serves every consumer. Large files
+    are spooled to a temporary file and parsed from its path instead.
+    """
+    filename: str
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+
+    def __post_init__(self):
+        if self.data is None and self.path is None:
+            raise ValueError("FileBuffer needs either data or a path")
+
+    @classmethod
+    def from_stream(cls, filename: str, stream: BinaryIO) -> 'FileBuffer':
+        """
+        Wrap an existing stream (e.g. an uploaded file).
+
+        ``BytesIO.getvalue()`` returns the shared buffer when it was never
+        written to after construction, so this does not copy in that case.
+        """
+        stream.seek(0)
+        data = stream.getvalue() if isinstance(stream, BytesIO) else stream.read()
+        return cls(filename=filename, data=data)
+
+    @property
+    def in_memory(self) -> bool:
+        """Whether the content lives in memory rather than on disk."""
+        return self.data is not None
+
+    @property
+    def size(self) -> int:
+        """Content size in bytes (no copy)."""
+        if self.data is not None:
+            return len(self.data)
+        return os.path.getsize(self.path)
+
+    def view(self) -> memoryview:
+        """Zero-copy read-only view of in-memory content."""
+        if self.data is None:
+            raise ValueError(f"{self.filename} is spooled to disk; use path instead")
+        return memoryview(self.data)
+
+    def open(self) -> BinaryIO:
+        """
+        Open a fresh file-like reader over the content.
+
+        Returns:
+            A BytesIO sharing the in-memory buffer, or a binary file handle
+        """
+        if self.data is not None:
+            return BytesIO(self.data)
+        return open(self.path, 'rb')
+
+    def sha256(self) -> str:
+        """Hex digest of the content, read in blocks when spooled to disk."""
+        digest = hashlib.sha256()
+        if self.data is not None:
+            digest.update(self.data)
+        else:
+            with open(self.path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    def release(self) -> None:
+        """Drop the buffer reference and delete any temp file."""
+        self.data = None
+        if self.path:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,122 @@
+"""
+📡 Progress Reporting
+
+Lightweight pipeline progress events for streaming responses.
+Stages report what they just finished; whoever is listening decides what to do with it.
+"""
+
+import asyncio
+import contextvars
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+
+
+ProgressEvent = Dict[str, Any]
+ProgressSink = Callable[[ProgressEvent], None]
+
+
+_progress_sink: contextvars.ContextVar[Optional[ProgressSink]] = contextvars.ContextVar(
+    'progress_sink', default=None
+)
+
+
+@contextmanager
+def progress_sink(sink: ProgressSink) -> Iterator[None]:
+    """
+    Route progress events reported inside the block to ``sink``.
+
+    Like the request deadline, the sink lives in a context variable, so tasks
+    and ``asyncio.to_thread`` calls started inside the block report to it too.
+
+    Args:
+        sink: Callable receiving each event dict
+    """
+    token = _progress_sink.set(sink)
+    try:
+        yield
+    finally:
+        _progress_sink.reset(token)
+
+
+def report_progress(event: str, **fields: Any) -> None:
+    """
+    Report a pipeline event. A no-op when nobody is listening.
+
+    Args:
+        event: Event name (e.g. 'file_fetched', 'indexed')
+        **fields: JSON-serializable event details
+    """
+    sink = _progress_sink.get()
+    if sink is None:
+        return
+    sink({"event": event, "timestamp": round(time.time(), 3), **fields})
+
+
+def format_ndjson(event: ProgressEvent) -> str:
+    """Serialize an event as one NDJSON line."""
+    return json.dumps(event, default=str) + "\n"
+
+
+def format_sse(event: ProgressEvent) -> str:
+    """Serialize an event as a Server-Sent Events message."""
+    return f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def stream_progress(
+    operation: Callable[[], Awaitable[Any]],
+    heartbeat_seconds: float = 15.0
+) -> AsyncIterator[ProgressEvent]:
+    """
+    Run ``operation`` and yield its progress events as they happen.
+
+    An ``accepted`` event is yielded immediately so clients get the first
+    byte without waiting on the pipeline. The final event is ``completed``
+    (with the operation's result) or ``failed``. Events reported from worker
+    threads are handed to the event loop thread-safely. If the consumer goes
+    away, the operation is cancelled.
+
+    Args:
+        operation: Zero-argument coroutine function running the pipeline
+        heartbeat_seconds: Idle interval after which a heartbeat is emitted
+
+    Yields:
+        Event dicts
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def sink(event: ProgressEvent) -> None:
+        loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    async def run() -> Any:
+        with progress_sink(sink):
+            return await operation()
+
+    started = time.monotonic()
+    yield {"event": "accepted", "timestamp": round(time.time(), 3)}
+
+    task = asyncio.create_task(run())
+    try:
+        while not task.done() or not queue.empty():
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, task}, timeout=heartbeat_seconds, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield getter.result()
+            else:
+                getter.cancel()
+                if not done:
+                    yield {"event": "heartbeat", "elapsed_seconds": round(time.monotonic() - started, 3)}
+
+        try:
+            result = task.result()
+        except Exception as e:
+            detail = getattr(e, 'detail', None) or str(e)
+            yield {"event": "failed", "error": detail, "elapsed_seconds": round(time.monotonic() - started, 3)}
+        else:
+            payload = result.model_dump() if hasattr(result, 'model_dump') else result
+            yield {"event": "completed", "result": payload, "elapsed_seconds": round(time.monotonic() - started, 3)}
+    finally:
+        if not task.done():
+            task.cancel()
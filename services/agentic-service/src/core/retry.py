@@ -1,51 +1,470 @@
 """
 🔄 Retry Utilities for Agentic Service
 
-Elegant retry decorators with exponential backoff.
-Because sometimes the first try isn't the charm.
+Elegant retry decorators with jittered exponential backoff, deadline budgets,
+error classification and per-dependency circuit breakers.
+Because sometimes the first try isn't the charm - and sometimes it never will be.
 """
 
 import asyncio
+import contextvars
 import functools
-from typing import Tuple, Callable, Any
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Tuple, Callable, Dict, Optional, Iterator
+
 from core.logging import setup_logger
+from core.exceptions import AgenticServiceError, CircuitOpenError, DeadlineExceededError
 
 logger = setup_logger(__name__)
 
 
+# =============================================================================
+# Error Classification
+# =============================================================================
+
+# HTTP status codes that signal a transient condition worth retrying
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+# Provider error codes (e.g. botocore) that signal throttling or transient faults
+RETRYABLE_ERROR_CODES = frozenset({
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottled',
+    'SlowDown', 'RequestTimeout', 'RequestTimeoutException', 'InternalError',
+    'ServiceUnavailable', 'TooManyRequestsException', 'PriorRequestNotComplete',
+})
+
+# Exception class names that are transient regardless of status code
+RETRYABLE_ERROR_NAMES = frozenset({
+    'APIConnectionError', 'APITimeoutError', 'RateLimitError', 'InternalServerError',
+    'ConnectionTimeout', 'ConnectTimeoutError', 'ReadTimeoutError', 'EndpointConnectionError',
+    'ConnectionClosedError', 'ConnectionError', 'Timeout', 'ReadTimeout', 'ConnectTimeout',
+})
+
+
+def _extract_status_code(error: Exception) -> Optional[int]:
+    """Best-effort extraction of an HTTP status code from provider exceptions."""
+    status_code = getattr(error, 'status_code', None)
+    if isinstance(status_code, int):
+        return status_code
+
+    # botocore ClientError keeps the status inside the response dictionary
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict):
+        status_code = response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+        if isinstance(status_code, int):
+            return status_code
+    return None
+
+
+def _extract_error_code(error: Exception) -> Optional[str]:
+    """Best-effort extraction of a provider error code (e.g. botocore 'SlowDown')."""
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict):
+        return response.get('Error', {}).get('Code')
+    return None
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Classify an exception as transient (retryable) or fatal.
+
+    Uses duck typing so that core stays free of provider imports: OpenAI,
+    botocore and opensearch-py exceptions all expose either a status code,
+    an error code or a recognisable class name.
+
+    Args:
+        error: The exception to classify
+
+    Returns:
+        True if retrying may succeed, False if the error is permanent
+    """
+    if isinstance(error, (CircuitOpenError, DeadlineExceededError)):
+        return False
+
+    # Service errors raised with ``from`` are classified by what they wrap
+    if isinstance(error, AgenticServiceError):
+        cause = error.__cause__
+        return isinstance(cause, Exception) and is_retryable_error(cause)
+
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+
+    error_code = _extract_error_code(error)
+    if error_code in RETRYABLE_ERROR_CODES:
+        return True
+
+    status_code = _extract_status_code(error)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+# =============================================================================
+# Deadline Budget
+# =============================================================================
+
+_request_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    'request_deadline', default=None
+)
+
+
+@contextmanager
+def request_deadline(timeout_seconds: Optional[float]) -> Iterator[None]:
+    """
+    Bound every retried call made inside the block by a shared time budget.
+
+    The deadline is stored in a context variable, so tasks created inside the
+    block (``asyncio.create_task`` copies the context) share the same budget.
+    Nested scopes can only tighten the deadline, never extend it.
+
+    Args:
+        timeout_seconds: Total budget in seconds (None disables the budget)
+    """
+    if timeout_seconds is None:
+        yield
+        return
+
+    new_deadline = time.monotonic() + timeout_seconds
+    current_deadline = _request_deadline.get()
+    if current_deadline is not None:
+        new_deadline = min(new_deadline, current_deadline)
+
+    token = _request_deadline.set(new_deadline)
+    try:
+        yield
+    finally:
+        _request_deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """
+    Get the remaining request budget in seconds.
+
+    Returns:
+        Seconds left (may be negative once exceeded), or None without a deadline
+    """
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+# =============================================================================
+# Circuit Breaker
+# =============================================================================
+
+class CircuitBreaker:
+    """
+    Per-dependency circuit breaker.
+
+    closed    -> calls flow; consecutive transient failures are counted
+    open      -> calls fail fast with CircuitOpenError until recovery_timeout passes
+    half_open -> a limited number of trial calls probe the dependency
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        """
+        Initialize circuit breaker.
+
+        Args:
+            name: Dependency name (e.g. 'openai', 's3', 'opensearch')
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds to stay open before probing again
+            half_open_max_calls: Concurrent trial calls allowed while half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = self.CLOSED
+        self._failure_count = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        # Thread lock: S3 calls run synchronously and may come from executors
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current breaker state, promoting open -> half_open once the timeout elapsed."""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+    def before_call(self) -> None:
+        """
+        Reserve permission to call the dependency.
+
+        Raises:
+            CircuitOpenError: If the circuit is open or the half-open probe slots are taken
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return
+            retry_after = max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+        raise CircuitOpenError(
+            f"Circuit for '{self.name}' is open; failing fast",
+            details={"dependency": self.name, "retry_after_seconds": round(retry_after, 3)}
+        )
+
+    def record_success(self) -> None:
+        """Record a successful call and close the circuit."""
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit for '{self.name}' closed after successful probe")
+            self._state = self.CLOSED
+            self._failure_count = 0
+            self._half_open_calls = 0
+
+    def record_failure(self) -> None:
+        """Record a transient failure, opening the circuit when the threshold is reached."""
+        with self._lock:
+            self._failure_count += 1
+            state = self._current_state()
+            if state == self.HALF_OPEN or self._failure_count >= self.failure_threshold:
+                if state != self.OPEN:
+                    logger.warning(
+                        f"Circuit for '{self.name}' opened after {self._failure_count} consecutive failures"
+                    )
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._half_open_calls = 0
+
+    def release(self) -> None:
+        """Release a half-open probe slot for a call that ended with a non-transient error."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def reset(self) -> None:
+        """Force the breaker back to closed (used by tests and admin tooling)."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failure_count = 0
+            self._half_open_calls = 0
+            self._opened_at = 0.0
+
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """
+    Get (or lazily create) the shared circuit breaker for a dependency.
+
+    Args:
+        name: Dependency name
+        **kwargs: CircuitBreaker settings, only applied on first creation
+
+    Returns:
+        Shared CircuitBreaker instance
+    """
+    with _registry_lock:
+        breaker = _circuit_breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **kwargs)
+            _circuit_breakers[name] = breaker
+        return breaker
+
+
+def configure_circuit_breaker(name: str, failure_threshold: int, recovery_timeout: float) -> CircuitBreaker:
+    """
+    Apply settings to a dependency's shared circuit breaker.
+
+    Args:
+        name: Dependency name
+        failure_threshold: Consecutive failures that open the circuit
+        recovery_timeout: Seconds to stay open before probing again
+
+    Returns:
+        The configured CircuitBreaker
+    """
+    breaker = get_circuit_breaker(name)
+    breaker.failure_threshold = failure_threshold
+    breaker.recovery_timeout = recovery_timeout
+    return breaker
+
+
+def get_circuit_states() -> Dict[str, str]:
+    """Snapshot of all known breaker states, keyed by dependency name."""
+    with _registry_lock:
+        breakers = list(_circuit_breakers.values())
+    return {breaker.name: breaker.state for breaker in breakers}
+
+
+# =============================================================================
+# Decorators
+# =============================================================================
+
+def compute_backoff(attempt: int, base_delay: float, backoff_factor: float, max_delay: float, jitter: bool = True) -> float:
+    """
+    Compute the sleep before the next attempt.
+
+    Full jitter draws uniformly from [0, capped exponential delay], which
+    spreads concurrent retries instead of having them fire in lockstep.
+
+    Args:
+        attempt: Zero-based attempt number that just failed
+        base_delay: Initial delay in seconds
+        backoff_factor: Multiplier for delay between retries
+        max_delay: Upper bound for a single delay
+        jitter: Whether to apply full jitter
+
+    Returns:
+        Delay in seconds
+    """
+    delay = min(max_delay, base_delay * (backoff_factor ** attempt))
+    if jitter:
+        return random.uniform(0, delay)
+    return delay
+
+
 def async_retry(
     max_retries: int = 3,
     exceptions: Tuple[type, ...] = (Exception,),
     backoff_factor: float = 2.0,
-    base_delay: float = 1.0
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    jitter: bool = True,
+    retry_if: Optional[Callable[[Exception], bool]] = is_retryable_error,
+    dependency: Optional[str] = None,
+    call_timeout: Optional[float] = None
 ):
     """
-    Retry decorator for async functions with exponential backoff.
-    
+    Retry decorator for async functions with jittered exponential backoff.
+
     Args:
-        max_retries: Maximum number of retry attempts
-        exceptions: Tuple of exceptions to retry on
+        max_retries: Maximum number of attempts
+        exceptions: Tuple of exceptions to consider for retrying
         backoff_factor: Multiplier for delay between retries
         base_delay: Initial delay in seconds
-        
+        max_delay: Upper bound for a single delay
+        jitter: Whether to apply full jitter to delays
+        retry_if: Classifier deciding whether a caught exception is transient
+            (None retries every exception in ``exceptions``)
+        dependency: Name of the circuit breaker guarding the call
+        call_timeout: Per-attempt timeout in seconds, capped by the request deadline
+
     Returns:
         Decorated function with retry logic
     """
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
+            breaker = get_circuit_breaker(dependency) if dependency else None
+
             for attempt in range(max_retries):
+                budget = remaining_budget()
+                if budget is not None and budget <= 0:
+                    raise DeadlineExceededError(
+                        f"Request deadline exceeded before calling {func.__name__}",
+                        details={"dependency": dependency, "attempt": attempt + 1}
+                    )
+
+                if breaker:
+                    breaker.before_call()
+
+                timeout = call_timeout
+                if budget is not None:
+                    timeout = budget if timeout is None else min(timeout, budget)
+
                 try:
-                    return await func(*args, **kwargs)
+                    if timeout is None:
+                        result = await func(*args, **kwargs)
+                    else:
+                        result = await asyncio.wait_for(func(*args, **kwargs), timeout=timeout)
                 except exceptions as e:
-                    if attempt == max_retries - 1:
+                    retryable = retry_if is None or retry_if(e)
+                    if breaker:
+                        if retryable:
+                            breaker.record_failure()
+                        else:
+                            breaker.release()
+
+                    if not retryable or attempt == max_retries - 1:
+                        raise
+
+                    delay = compute_backoff(attempt, base_delay, backoff_factor, max_delay, jitter)
+                    budget = remaining_budget()
+                    if budget is not None and delay >= budget:
+                        # Sleeping would burn the rest of the budget - surface the real error now
+                        raise
+
+                    if breaker and breaker.state == CircuitBreaker.OPEN:
+                        # Dependency is down: fail fast instead of parking a sleeping coroutine
                         raise
-                    delay = base_delay * (backoff_factor ** attempt)
+
                     logger.warning(
                         f"Attempt {attempt + 1} failed for {func.__name__}: {e}. "
-                        f"Retrying in {delay}s..."
+                        f"Retrying in {delay:.2f}s..."
                     )
                     await asyncio.sleep(delay)
+                except BaseException:
+                    # Cancellation or an unhandled error type: free any half-open probe slot
+                    if breaker:
+                        breaker.release()
+                    raise
+                else:
+                    if breaker:
+                        breaker.record_success()
+                    return result
             return None
         return wrapper
     return decorator
+
+
+def circuit_protected(dependency: str, retry_if: Callable[[Exception], bool] = is_retryable_error):
+    """
+    Guard a synchronous call with a dependency circuit breaker (no retries).
+
+    Used for blocking clients such as boto3, which already retry internally:
+    the breaker only adds fail-fast behaviour once the dependency is down.
+
+    Args:
+        dependency: Name of the circuit breaker
+        retry_if: Classifier deciding which failures count against the breaker
+
+    Returns:
+        Decorated function
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            breaker = get_circuit_breaker(dependency)
+            breaker.before_call()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if retry_if(e):
+                    breaker.record_failure()
+                else:
+                    breaker.release()
+                raise
+            breaker.record_success()
+            return result
+        return wrapper
+    return decorator
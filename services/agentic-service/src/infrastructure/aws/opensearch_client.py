@@ -5,9 +5,12 @@ Elegant OpenSearch operations with environment-aware configuration.
 Smart enough to know when it should work and when to gracefully skip.
 """
 
+import asyncio
+import json
+
 from opensearchpy import OpenSearch, OpenSearchException
 from requests.exceptions import Timeout, ConnectionError
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from fastapi import HTTPException
 
 from core.logging import setup_logger, log_exception
@@ -18,6 +21,14 @@ from core.retry import async_retry
 
 logger = setup_logger(__name__)
 
+# Per-request timeouts (seconds), enforced by the client and by core.retry alike
+INDEX_TIMEOUT = 60.0
+BULK_TIMEOUT = 120.0
+
+# Bulk request limits; OpenSearch rejects bodies above http.max_content_length (100MB by default)
+BULK_MAX_DOCUMENTS = 50
+BULK_MAX_BYTES = 20 * 1024 * 1024
+
 
 class OpenSearchClient:
     """Professional OpenSearch client with environment-aware behavior."""
@@ -177,7 +188,7 @@ class OpenSearchClient:
         """Check if OpenSearch client is available."""
         return self.client is not None
 
-    @async_retry(max_retries=3, exceptions=(OpenSearchException, ConnectionError, Timeout))
+    @async_retry(max_retries=3, exceptions=(Exception,), dependency="opensearch", call_timeout=INDEX_TIMEOUT)
     async def index_document(self, index_name: str, document: Dict[str, Any], doc_id: str) -> Dict:
         """
         Index a document to OpenSearch with retry logic.
@@ -197,16 +208,149 @@ class OpenSearchClient:
             raise OpenSearchOperationError("OpenSearch client not available")
             
         try:
-            return self.client.index(
+            # opensearch-py is blocking: run it off the event loop, bounded by its own request timeout
+            return await asyncio.to_thread(
+                self.client.index,
                 index=index_name,
                 body=document,
                 id=doc_id,
                 refresh=True,
-                timeout=60
+                timeout=60,
+                request_timeout=INDEX_TIMEOUT
             )
         except Exception as e:
             log_exception(logger, f"Failed to index document {doc_id}", e)
-            raise OpenSearchOperationError(f"Indexing failed: {str(e)}")
+            raise OpenSearchOperationError(f"Indexing failed: {str(e)}") from e
+
+    @async_retry(max_retries=3, exceptions=(Exception,), dependency="opensearch", call_timeout=BULK_TIMEOUT)
+    async def _send_bulk(self, body: str, refresh: bool) -> Dict:
+        """Send one pre-serialized NDJSON bulk request; retried on its own."""
+        return await asyncio.to_thread(
+            self.client.bulk, body=body, refresh=refresh, timeout=120, request_timeout=BULK_TIMEOUT
+        )
+
+    @async_retry(max_retries=3, exceptions=(Exception,), dependency="opensearch", call_timeout=INDEX_TIMEOUT)
+    async def _refresh_index(self, index_name: str) -> None:
+        await asyncio.to_thread(self.client.indices.refresh, index=index_name, request_timeout=INDEX_TIMEOUT)
+
+    @staticmethod
+    def _bulk_chunks(index_name: str, documents: Dict[str, Dict[str, Any]], max_documents: int, max_bytes: int) -> List[Tuple[List[str], str]]:
+        """
+        Split documents into NDJSON bulk bodies of at most ``max_documents``
+        documents and (unless a single document is larger) ``max_bytes`` bytes.
+        """
+        chunks: List[Tuple[List[str], str]] = []
+        doc_ids: List[str] = []
+        lines: List[str] = []
+        size = 0
+        for doc_id, document in documents.items():
+            entry = json.dumps({"index": {"_index": index_name, "_id": doc_id}}) + "\n" + json.dumps(document) + "\n"
+            entry_size = len(entry.encode("utf-8"))
+            if doc_ids and (len(doc_ids) >= max_documents or size + entry_size > max_bytes):
+                chunks.append((doc_ids, "".join(lines)))
+                doc_ids, lines, size = [], [], 0
+            doc_ids.append(doc_id)
+            lines.append(entry)
+            size += entry_size
+        if doc_ids:
+            chunks.append((doc_ids, "".join(lines)))
+        return chunks
+
+    async def bulk_index_documents(
+        self,
+        index_name: str,
+        documents: Dict[str, Dict[str, Any]],
+        max_documents_per_request: int = BULK_MAX_DOCUMENTS,
+        max_bytes_per_request: int = BULK_MAX_BYTES
+    ) -> Dict[str, Optional[str]]:
+        """
+        Index many documents in bulk requests bounded by document count and
+        size, with a single refresh once the last one is in.
+        
+        Each request is retried on its own, so a transient failure resends one
+        chunk rather than the whole batch; a chunk that still fails marks only
+        its own documents as failed.
+        
+        Args:
+            index_name: Index name
+            documents: Document ID -> document data
+            max_documents_per_request: Documents per bulk request
+            max_bytes_per_request: Body size per bulk request (keep below http.max_content_length)
+            
+        Returns:
+            Document ID -> error message (None when indexed successfully)
+            
+        Raises:
+            OpenSearchOperationError: If the client is not available
+        """
+        if not self.is_available():
+            raise OpenSearchOperationError("OpenSearch client not available")
+        
+        results: Dict[str, Optional[str]] = {doc_id: None for doc_id in documents}
+        chunks = self._bulk_chunks(index_name, documents, max_documents_per_request, max_bytes_per_request)
+        indexed = 0
+        for doc_ids, body in chunks:
+            try:
+                response = await self._send_bulk(body, refresh=False)
+            except Exception as e:
+                log_exception(logger, f"Bulk indexing of {len(doc_ids)} documents failed", e)
+                for doc_id in doc_ids:
+                    results[doc_id] = f"Bulk indexing failed: {str(e)}"
+                continue
+            indexed += len(doc_ids)
+            for item in response.get("items", []):
+                action = item.get("index", {})
+                if action.get("error"):
+                    error = action["error"]
+                    reason = error.get("reason", str(error)) if isinstance(error, dict) else str(error)
+                    results[action.get("_id")] = f"Indexing failed: {reason}"
+        
+        if indexed:
+            try:
+                await self._refresh_index(index_name)
+            except Exception as e:
+                # The documents are stored; they become searchable at the next periodic refresh
+                log_exception(logger, f"Refreshing {index_name} after bulk indexing failed", e)
+        logger.info(f"Bulk indexed {len(documents)} documents in {len(chunks)} requests")
+        return results
+
+    async def bulk_index_material_data(self, index_name: str, materials: Dict[str, Dict[str, Any]]) -> Dict[str, Optional[str]]:
+        """
+        Bulk index material data to OpenSearch if available.
+        
+        Mirrors index_material_data: a missing client is fatal in Lambda and a
+        skipped step elsewhere.
+        
+        Args:
+            index_name: Index name
+            materials: Material ID -> material data
+            
+        Returns:
+            Material ID -> error message (None when indexed or skipped)
+            
+        Raises:
+            OpenSearchConfigurationError: If the client is missing in production
+        """
+        if not materials:
+            return {}
+        
+        if not self.is_available():
+            logger.warning(f"OpenSearch client not available in {self.environment} environment, skipping bulk indexing")
+            if self.environment == 'lambda':
+                error = OpenSearchConfigurationError("OpenSearch client not initialized in production environment")
+                log_exception(logger, "OpenSearch client not initialized in Lambda environment", error)
+                raise error
+            return {material_id: None for material_id in materials}
+        
+        if not index_name:
+            raise OpenSearchConfigurationError("Index name not configured")
+        
+        logger.info(f"Bulk indexing {len(materials)} materials in OpenSearch")
+        try:
+            return await self.bulk_index_documents(index_name, materials)
+        except Exception as e:
+            log_exception(logger, "Failed to bulk index data to OpenSearch", e)
+            return {material_id: f"Indexing failed: {str(e)}" for material_id in materials}
 
     async def index_material_data(self, index_name: str, material_data: Dict[str, Any], material_id: str) -> None:
         """
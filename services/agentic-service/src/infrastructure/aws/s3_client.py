@@ -5,15 +5,19 @@ Elegant S3 operations with proper error handling and connection management.
 Makes S3 operations feel effortless and reliable.
 """
 
+import os
+import tempfile
 import boto3
 from botocore.exceptions import ClientError, BotoCoreError
-from io import BytesIO
 from typing import Dict, Any, Optional, Tuple, List
 from fastapi import HTTPException
 
 from core.logging import setup_logger, log_exception, log_structured
-from core.exceptions import S3ConfigurationError, S3OperationError
+from core.exceptions import S3ConfigurationError, S3OperationError, CircuitOpenError
 from core.environment import get_environment_type
+from core.retry import circuit_protected
+from core.file_buffer import FileBuffer
+from core.progress import report_progress
 
 
 logger = setup_logger(__name__)
@@ -22,7 +26,13 @@ logger = setup_logger(__name__)
 class S3Client:
     """Professional S3 client with comprehensive error handling."""
     
-    def __init__(self, region: str, access_key_id: str = None, secret_access_key: str = None):
+    def __init__(
+        self,
+        region: str,
+        access_key_id: str = None,
+        secret_access_key: str = None,
+        spool_threshold_bytes: Optional[int] = None
+    ):
         """
         Initialize S3 client with proper error handling.
         
@@ -30,9 +40,12 @@ class S3Client:
             region: AWS region
             access_key_id: Optional AWS access key
             secret_access_key: Optional AWS secret key
+            spool_threshold_bytes: Files larger than this are downloaded to a
+                temp file instead of memory (None keeps everything in memory)
         """
         self.environment = get_environment_type()
         self.region = region
+        self.spool_threshold_bytes = spool_threshold_bytes
         self.client = self._initialize_client(access_key_id, secret_access_key)
         
     def _initialize_client(self, access_key_id: str, secret_access_key: str) -> boto3.client:
@@ -85,6 +98,7 @@ class S3Client:
                 detail="AWS service configuration error. Please check your AWS settings."
             )
 
+    @circuit_protected("s3")
     def get_file_metadata(self, bucket_name: str, filename: str) -> Dict[str, Any]:
         """
         Get file metadata from S3.
@@ -110,35 +124,54 @@ class S3Client:
         except ClientError as e:
             error_code = e.response['Error']['Code']
             if error_code == '404':
-                raise S3OperationError(f"File '{filename}' not found in bucket '{bucket_name}'")
+                raise S3OperationError(f"File '{filename}' not found in bucket '{bucket_name}'") from e
             elif error_code == 'AccessDenied':
-                raise S3OperationError(f"Access denied to file '{filename}'")
+                raise S3OperationError(f"Access denied to file '{filename}'") from e
             else:
-                raise S3OperationError(f"S3 error: {e.response['Error']['Message']}")
+                raise S3OperationError(f"S3 error: {e.response['Error']['Message']}") from e
 
-    def download_file(self, bucket_name: str, filename: str) -> BytesIO:
+    @circuit_protected("s3")
+    def download_file(self, bucket_name: str, filename: str, size_hint: Optional[int] = None) -> FileBuffer:
         """
-        Download file from S3.
+        Download file from S3 into a single buffer, or a temp file when large.
         
         Args:
             bucket_name: S3 bucket name
             filename: File key in S3
+            size_hint: Known object size (from metadata) used to pick memory vs disk
             
         Returns:
-            File content as BytesIO stream
+            FileBuffer owning the downloaded content
             
         Raises:
             S3OperationError: If download fails
         """
         try:
+            if self.spool_threshold_bytes is not None and size_hint is not None \
+                    and size_hint > self.spool_threshold_bytes:
+                return self._download_to_temp_file(bucket_name, filename)
+            
             file_obj = self.client.get_object(Bucket=bucket_name, Key=filename)
-            file_content = file_obj['Body'].read()
-            return BytesIO(file_content)
+            # One bytes allocation; FileBuffer hands it on without further copies
+            return FileBuffer(filename=filename, data=file_obj['Body'].read())
         except ClientError as e:
             error_message = e.response['Error']['Message']
-            raise S3OperationError(f"Download error for '{filename}': {error_message}")
+            raise S3OperationError(f"Download error for '{filename}': {error_message}") from e
+
+    def _download_to_temp_file(self, bucket_name: str, filename: str) -> FileBuffer:
+        """Stream an object straight to local disk (e.g. /tmp on Lambda)."""
+        suffix = os.path.splitext(filename)[1]
+        fd, path = tempfile.mkstemp(prefix="agentic-", suffix=suffix)
+        os.close(fd)
+        try:
+            self.client.download_file(bucket_name, filename, path)
+        except Exception:
+            os.remove(path)
+            raise
+        logger.info(f"Spooled {filename} to temporary file {path}")
+        return FileBuffer(filename=filename, path=path)
 
-    def get_file_safely(self, bucket_name: str, filename: str, max_size_bytes: int) -> Tuple[Optional[BytesIO], Optional[Dict], Optional[str]]:
+    def get_file_safely(self, bucket_name: str, filename: str, max_size_bytes: int) -> Tuple[Optional[FileBuffer], Optional[Dict], Optional[str]]:
         """
         Safely retrieve a file with size validation and error handling.
         
@@ -148,7 +181,7 @@ class S3Client:
             max_size_bytes: Maximum allowed file size
             
         Returns:
-            Tuple of (file_stream, metadata, error_message)
+            Tuple of (file_buffer, metadata, error_message)
         """
         try:
             if not filename or not filename.strip():
@@ -165,21 +198,22 @@ class S3Client:
                         f"maximum allowed size ({max_size_bytes} bytes)"
                     )
                 
-            except S3OperationError as e:
+            except (S3OperationError, CircuitOpenError) as e:
                 return None, None, str(e)
 
             # Download file
             try:
-                file_stream = self.download_file(bucket_name, filename)
+                file_buffer = self.download_file(bucket_name, filename, size_hint=metadata['size_bytes'])
                 
                 # Update metadata with actual size
-                metadata['actual_size'] = len(file_stream.getvalue())
+                metadata['actual_size'] = file_buffer.size
+                metadata['in_memory'] = file_buffer.in_memory
                 metadata['last_modified'] = metadata['last_modified'].isoformat()
                 
                 logger.info(f"Successfully retrieved {filename} from S3 ({metadata['actual_size']} bytes)")
-                return file_stream, metadata, None
+                return file_buffer, metadata, None
                 
-            except S3OperationError as e:
+            except (S3OperationError, CircuitOpenError) as e:
                 return None, None, str(e)
                 
         except Exception as e:
@@ -196,20 +230,22 @@ class S3Client:
             max_size_bytes: Maximum allowed file size per file
             
         Returns:
-            Dictionary containing file streams, metadata, and any errors
+            Dictionary containing file buffers, metadata, and any errors
         """
         file_streams = {}
         file_metadata = {}
         failed_files = []
 
         for filename in filenames:
-            file_stream, metadata, error = self.get_file_safely(bucket_name, filename, max_size_bytes)
+            file_buffer, metadata, error = self.get_file_safely(bucket_name, filename, max_size_bytes)
             
             if error:
                 failed_files.append({"filename": filename, "error": error})
+                report_progress("file_failed", filename=filename, error=error)
             else:
-                file_streams[filename] = file_stream
+                file_streams[filename] = file_buffer
                 file_metadata[filename] = metadata
+                report_progress("file_fetched", filename=filename, size_bytes=metadata.get('actual_size'))
 
         # Log summary
         log_structured(
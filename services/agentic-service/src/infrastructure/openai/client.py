@@ -16,6 +16,10 @@ from core.retry import async_retry
 
 logger = setup_logger(__name__)
 
+# Per-request timeouts (seconds), enforced by the SDK and by core.retry alike
+EMBEDDING_TIMEOUT = 30.0
+BATCH_EMBEDDING_TIMEOUT = 60.0
+
 
 class OpenAIClient:
     """Professional OpenAI client with comprehensive error handling."""
@@ -31,13 +35,16 @@ class OpenAIClient:
         self.model = model
         self.client = self._initialize_client(api_key)
         
-    def _initialize_client(self, api_key: str) -> openai.OpenAI:
+    def _initialize_client(self, api_key: str) -> openai.AsyncOpenAI:
         """Initialize OpenAI client with validation."""
         try:
             if not api_key:
                 raise OpenAIConfigurationError("OpenAI API key is not configured")
             
-            client = openai.OpenAI(api_key=api_key)
+            # Retries are owned by core.retry (jitter, deadline, circuit breaker);
+            # disable the SDK's own retry loop so attempts don't multiply.
+            # The async client lets core.retry's per-call timeout cancel a hung request.
+            client = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
             logger.info("OpenAI client configured successfully")
             return client
             
@@ -48,11 +55,14 @@ class OpenAIClient:
                 detail="OpenAI configuration error. Please check API key configuration."
             )
 
-    @async_retry(max_retries=3, exceptions=(Exception,))
+    @async_retry(max_retries=3, exceptions=(Exception,), dependency="openai", call_timeout=EMBEDDING_TIMEOUT)
     async def create_embedding(self, text: str) -> List[float]:
         """
         Create embedding for text with retry logic.
         
+        Only transient failures (timeouts, rate limits, 5xx) are retried;
+        authentication and request errors surface immediately.
+        
         Args:
             text: Text to create embedding for
             
@@ -64,9 +74,10 @@ class OpenAIClient:
         """
         try:
             logger.debug(f"Creating embedding for text (length: {len(text)})")
-            response = self.client.embeddings.create(
+            response = await self.client.embeddings.create(
                 input=text,
-                model=self.model
+                model=self.model,
+                timeout=EMBEDDING_TIMEOUT
             )
             
             if not response or not response.data or not response.data[0].embedding:
@@ -95,3 +106,41 @@ class OpenAIClient:
             else:
                 log_exception(logger, "Unexpected error creating embedding", e)
                 raise
+
+    @async_retry(max_retries=3, exceptions=(Exception,), dependency="openai", call_timeout=BATCH_EMBEDDING_TIMEOUT)
+    async def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Create embeddings for many texts in a single API request.
+        
+        The embeddings endpoint accepts a list of inputs, so packing chunks
+        (even from different materials) into one call saves a round trip per chunk.
+        
+        Args:
+            texts: Texts to embed (at most 2048 per request)
+            
+        Returns:
+            Embedding vectors, in the same order as ``texts``
+            
+        Raises:
+            EmbeddingCreationError: If the response is incomplete
+        """
+        if not texts:
+            return []
+        
+        logger.debug(f"Creating {len(texts)} embeddings in one request")
+        response = await self.client.embeddings.create(
+            input=texts,
+            model=self.model,
+            timeout=BATCH_EMBEDDING_TIMEOUT
+        )
+        
+        if not response or not response.data or len(response.data) != len(texts):
+            raise EmbeddingCreationError("Incomplete batch response from OpenAI API")
+        
+        # The API echoes an index per input; don't rely on response ordering
+        embeddings = [None] * len(texts)
+        for item in response.data:
+            if not item.embedding:
+                raise EmbeddingCreationError("Empty embedding returned from OpenAI API")
+            embeddings[item.index] = item.embedding
+        return embeddings
@@ -1,4 +1,5 @@
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
@@ -24,7 +25,15 @@ if config_errors:
         raise ValueError(f"Configuration errors: {config_errors}")
     
 
-from routers.file_routes import router as file_router
+from routers.file_routes import router as file_router, file_controller
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stops the OCR worker pool; Lambda runs with lifespan="off" and its workers end with the sandbox
+    file_controller.shutdown()
+
 
 # Create FastAPI instance
 app = FastAPI(
@@ -32,7 +41,8 @@ app = FastAPI(
     description="🚀 Beautifully restructured service for file processing, vectorization, and AI-powered document analysis",
     version="2.0.0",
     docs_url="/docs" if not config.IS_LAMBDA else None,  # Disable docs in Lambda
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -5,7 +5,7 @@ Clean, well-defined response models for API endpoints.
 Clear data structures that speak for themselves.
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, validator
 
 
@@ -38,6 +38,32 @@ class VectorizationResponse(BaseModel):
     warnings: Optional[Dict[str, Any]] = None
 
 
+class MaterialVectorizationResult(BaseModel):
+    """Per-material outcome of a batch vectorization."""
+    material_id: str
+    category: int
+    success: bool
+    total_documents: int = 0
+    total_chunks: int = 0
+    processed_files: int = 0
+    total_files: int = 0
+    error: Optional[str] = None
+    warnings: Optional[Dict[str, Any]] = None
+
+
+class BatchVectorizationResponse(BaseModel):
+    """Response for batch vectorization operations."""
+    status: int
+    message: str
+    total_materials: int
+    succeeded: int
+    failed: int
+    total_chunks: int
+    embedding_requests: int
+    processing_time: float
+    results: List[MaterialVectorizationResult]
+
+
 class S3FileResponse(BaseModel):
     """Response for S3 file operations."""
     file_streams: Dict[str, Any]
@@ -5,10 +5,15 @@ Clean, focused routes that showcase the new architecture.
 Simple, elegant, and easy to understand.
 """
 
-from fastapi import APIRouter
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from config import config
 from controllers.file_controller import FileController
-from schemas.vectorize_schemas import VectorizeRequest
-from models.responses import VectorizationResponse
+from schemas.vectorize_schemas import VectorizeRequest, BatchVectorizeRequest
+from models.responses import VectorizationResponse, BatchVectorizationResponse
+from core.progress import format_ndjson, format_sse
 
 
 router = APIRouter(prefix="/agentic", tags=["files"])
@@ -40,3 +45,66 @@ async def vectorize_files(request: VectorizeRequest) -> VectorizationResponse:
         request.id, 
         request.category
     )
+
+
+@router.post("/vectorize/stream")
+async def stream_vectorize_files(
+    request: VectorizeRequest,
+    event_format: Literal["ndjson", "sse"] = Query(
+        "ndjson", alias="format", description="Event framing: NDJSON lines or Server-Sent Events"
+    )
+) -> StreamingResponse:
+    """
+    Streaming variant of /vectorize that reports progress as the pipeline runs.
+    
+    Emits 'accepted' immediately, then file_fetched, file_extracted,
+    embedding_batch and indexed events, and finally 'completed' with the
+    same payload /vectorize returns (or 'failed').
+    
+    For long-running servers (uvicorn, containers) only: the Lambda handler
+    buffers the whole response, so it answers 501 there and Lambda clients
+    use /vectorize.
+    
+    Args:
+        request: Vectorization request with file names and metadata
+        event_format: 'ndjson' (default) or 'sse', from the 'format' query parameter
+        
+    Returns:
+        StreamingResponse of progress events
+    """
+    if not config.RESPONSE_STREAMING_ENABLED:
+        raise HTTPException(
+            status_code=501,
+            detail="Streaming is not available in this deployment; use POST /agentic/vectorize"
+        )
+    
+    formatter = format_sse if event_format == "sse" else format_ndjson
+    media_type = "text/event-stream" if event_format == "sse" else "application/x-ndjson"
+    
+    async def body():
+        async for event in file_controller.stream_vectorization(request):
+            yield formatter(event)
+    
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/vectorize/batch", response_model=BatchVectorizationResponse)
+async def vectorize_materials(request: BatchVectorizeRequest) -> BatchVectorizationResponse:
+    """
+    Vectorize many materials in one call (e.g. a course catalog import).
+    
+    Files from all materials share the same fetch, extract and embed workers,
+    embedding requests are packed across materials, and everything is bulk
+    indexed with a single refresh.
+    
+    Args:
+        request: Materials, each with its own ID, category and file names
+        
+    Returns:
+        BatchVectorizationResponse with a result per material
+    """
+    return await file_controller.vectorize_materials(request.materials)
@@ -6,6 +6,10 @@ class VectorizeRequest(BaseModel):
     category: int = Field(..., description="Category to identify course(0) or quiz(1)")
     uploaded_file: List[str]
 
+class BatchVectorizeRequest(BaseModel):
+    """Schema for vectorizing many materials in one call"""
+    materials: List[VectorizeRequest] = Field(..., min_length=1, max_length=500, description="Materials to vectorize")
+
 class ChunkData(BaseModel):
     """Schema for individual chunk data in OpenSearch requests"""
     chunk_id: int = Field(..., description="Unique identifier for the chunk")
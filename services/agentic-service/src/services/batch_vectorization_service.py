@@ -0,0 +1,382 @@
+"""
+📚 Batch Vectorization Service
+
+Vectorizes many materials in one pass (e.g. a whole course catalog import).
+Fetch, extract and embed workers are shared across materials, embedding
+requests are packed across material boundaries, and everything is bulk
+indexed at the end with a single refresh.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from core.logging import setup_logger, log_exception, log_structured
+from core.exceptions import OpenSearchConfigurationError
+from core.file_buffer import FileBuffer
+from core.progress import report_progress
+from infrastructure.aws.s3_client import S3Client
+from infrastructure.aws.opensearch_client import OpenSearchClient
+from infrastructure.openai.client import OpenAIClient
+from services.file_processor import FileProcessor
+from services.text_service import split_into_chunks
+from schemas.vectorize_schemas import VectorizeRequest, ChunkData, DocumentData, MaterialData
+from models.responses import BatchVectorizationResponse, MaterialVectorizationResult
+
+
+logger = setup_logger(__name__)
+
+# Queue sentinel telling a worker to stop
+_STOP = object()
+
+
+@dataclass
+class _MaterialState:
+    """Progress of one material while its files move through the pipeline."""
+    request: VectorizeRequest
+    processing_errors: List[Dict] = field(default_factory=list)
+    embedding_errors: List[Dict] = field(default_factory=list)
+    chunks: Dict[str, List[ChunkData]] = field(default_factory=dict)
+    processed_files: int = 0
+
+
+@dataclass
+class _ChunkJob:
+    """A chunk waiting for its embedding."""
+    material: _MaterialState
+    filename: str
+    chunk: Dict
+
+
+class BatchVectorizationService:
+    """Pipelined multi-material vectorization with shared workers."""
+
+    def __init__(
+        self,
+        s3_client: S3Client,
+        file_processor: FileProcessor,
+        openai_client: OpenAIClient,
+        opensearch_client: OpenSearchClient,
+        opensearch_index_name: str,
+        max_tokens_per_chunk: int = 512,
+        fetch_workers: int = 8,
+        extract_workers: int = 4,
+        embed_workers: int = 4,
+        embedding_batch_size: int = 128,
+        embedding_batch_linger_seconds: float = 0.05
+    ):
+        """
+        Initialize batch vectorization service.
+
+        Args:
+            s3_client: S3 client used by the fetch workers
+            file_processor: File processor used by the extract workers
+            openai_client: OpenAI client used by the embed workers
+            opensearch_client: OpenSearch client for the final bulk index
+            opensearch_index_name: OpenSearch index name
+            max_tokens_per_chunk: Maximum tokens per chunk
+            fetch_workers: Concurrent S3 downloads
+            extract_workers: Concurrent content extractions
+            embed_workers: Concurrent embedding requests
+            embedding_batch_size: Maximum chunks packed into one embedding request
+            embedding_batch_linger_seconds: How long a partial batch waits for more chunks
+        """
+        self.s3_client = s3_client
+        self.file_processor = file_processor
+        self.openai_client = openai_client
+        self.opensearch_client = opensearch_client
+        self.opensearch_index_name = opensearch_index_name
+        self.max_tokens_per_chunk = max_tokens_per_chunk
+        self.fetch_workers = fetch_workers
+        self.extract_workers = extract_workers
+        self.embed_workers = embed_workers
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_batch_linger_seconds = embedding_batch_linger_seconds
+
+    async def vectorize_materials(
+        self,
+        materials: List[VectorizeRequest],
+        bucket_name: str,
+        max_file_size_bytes: int
+    ) -> BatchVectorizationResponse:
+        """
+        Vectorize many materials and bulk index them.
+
+        A failing file or material never fails the batch; every material gets
+        its own result.
+
+        Args:
+            materials: Materials to vectorize
+            bucket_name: S3 bucket holding the uploaded files
+            max_file_size_bytes: Per-file size limit
+
+        Returns:
+            BatchVectorizationResponse with per-material results
+        """
+        start_time = datetime.now()
+        states = [_MaterialState(request=material) for material in materials]
+        logger.info(
+            f"Starting batch vectorization for {len(states)} materials "
+            f"({sum(len(m.uploaded_file) for m in materials)} files)"
+        )
+
+        fetch_queue: asyncio.Queue = asyncio.Queue()
+        extract_queue: asyncio.Queue = asyncio.Queue(maxsize=self.extract_workers * 2)
+        embed_queue: asyncio.Queue = asyncio.Queue()
+        embedding_requests = [0]
+
+        for state in states:
+            for filename in dict.fromkeys(state.request.uploaded_file):
+                fetch_queue.put_nowait((state, filename))
+
+        fetchers = [
+            asyncio.create_task(self._fetch_worker(fetch_queue, extract_queue, bucket_name, max_file_size_bytes))
+            for _ in range(self.fetch_workers)
+        ]
+        extractors = [
+            asyncio.create_task(self._extract_worker(extract_queue, embed_queue))
+            for _ in range(self.extract_workers)
+        ]
+        embedders = [
+            asyncio.create_task(self._embed_worker(embed_queue, embedding_requests))
+            for _ in range(self.embed_workers)
+        ]
+
+        try:
+            # Stop each stage once the one before it has drained
+            for _ in fetchers:
+                fetch_queue.put_nowait(_STOP)
+            await asyncio.gather(*fetchers)
+            for _ in extractors:
+                await extract_queue.put(_STOP)
+            await asyncio.gather(*extractors)
+            for _ in embedders:
+                embed_queue.put_nowait(_STOP)
+            await asyncio.gather(*embedders)
+        except BaseException:
+            for task in fetchers + extractors + embedders:
+                task.cancel()
+            self._release_pending(extract_queue)
+            raise
+
+        results = await self._index_materials(states)
+
+        succeeded = sum(1 for result in results if result.success)
+        total_chunks = sum(result.total_chunks for result in results if result.success)
+        processing_time = (datetime.now() - start_time).total_seconds()
+
+        log_structured(
+            logger, 'INFO', "Batch vectorization completed",
+            total_materials=len(results),
+            succeeded=succeeded,
+            total_chunks=total_chunks,
+            embedding_requests=embedding_requests[0],
+            processing_time_seconds=f"{processing_time:.3f}"
+        )
+
+        return BatchVectorizationResponse(
+            status=200,
+            message="Batch vectorization completed",
+            total_materials=len(results),
+            succeeded=succeeded,
+            failed=len(results) - succeeded,
+            total_chunks=total_chunks,
+            embedding_requests=embedding_requests[0],
+            processing_time=processing_time,
+            results=results
+        )
+
+    async def _fetch_worker(
+        self,
+        fetch_queue: asyncio.Queue,
+        extract_queue: asyncio.Queue,
+        bucket_name: str,
+        max_file_size_bytes: int
+    ) -> None:
+        """Download files from S3 (blocking boto3 calls run in a thread)."""
+        while True:
+            job = await fetch_queue.get()
+            if job is _STOP:
+                return
+            state, filename = job
+            file_buffer, _, error = await asyncio.to_thread(
+                self.s3_client.get_file_safely, bucket_name, filename, max_file_size_bytes
+            )
+            if error:
+                state.processing_errors.append({"filename": filename, "error": error})
+                report_progress("file_failed", material_id=state.request.id, filename=filename, error=error)
+                continue
+            report_progress("file_fetched", material_id=state.request.id, filename=filename, size_bytes=file_buffer.size)
+            # Bounded queue: downloads pause while extraction catches up, capping buffered files
+            await extract_queue.put((state, filename, file_buffer))
+
+    async def _extract_worker(self, extract_queue: asyncio.Queue, embed_queue: asyncio.Queue) -> None:
+        """Extract content, split it into chunks and queue them for embedding."""
+        while True:
+            job = await extract_queue.get()
+            if job is _STOP:
+                return
+            state, filename, file_buffer = job
+            try:
+                result = await self.file_processor.process_single_file(filename, file_buffer)
+                if not result.success:
+                    state.processing_errors.append({"filename": filename, "error": result.error})
+                    continue
+
+                file_chunks = await asyncio.to_thread(
+                    split_into_chunks, result.content, source_info=filename, max_tokens=self.max_tokens_per_chunk
+                )
+            except Exception as e:
+                log_exception(logger, f"Failed to extract {filename}", e)
+                state.processing_errors.append({"filename": filename, "error": f"Failed to extract content: {str(e)}"})
+                report_progress("file_failed", material_id=state.request.id, filename=filename, error=str(e))
+                continue
+
+            state.processed_files += 1
+            valid_chunks = [chunk for chunk in file_chunks if chunk.get("chunk_text", "").strip()]
+            if not valid_chunks:
+                state.embedding_errors.append({"filename": filename, "error": f"No chunks generated for file: {filename}"})
+                continue
+
+            state.chunks[filename] = []
+            for chunk in valid_chunks:
+                embed_queue.put_nowait(_ChunkJob(material=state, filename=filename, chunk=chunk))
+
+    async def _next_batch(self, embed_queue: asyncio.Queue) -> Tuple[List[_ChunkJob], bool]:
+        """
+        Collect up to ``embedding_batch_size`` chunks from any material.
+
+        Returns:
+            Tuple of (batch, stop_requested)
+        """
+        batch: List[_ChunkJob] = []
+        job = await embed_queue.get()
+        if job is _STOP:
+            return batch, True
+        batch.append(job)
+
+        loop = asyncio.get_running_loop()
+        linger_until = loop.time() + self.embedding_batch_linger_seconds
+        while len(batch) < self.embedding_batch_size:
+            try:
+                job = embed_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = linger_until - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    job = await asyncio.wait_for(embed_queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            if job is _STOP:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    async def _embed_worker(self, embed_queue: asyncio.Queue, embedding_requests: List[int]) -> None:
+        """Embed packed batches of chunks and file them under their materials."""
+        stop = False
+        while not stop:
+            batch, stop = await self._next_batch(embed_queue)
+            if not batch:
+                continue
+
+            embedding_requests[0] += 1
+            batch_number = embedding_requests[0]
+            try:
+                embeddings = await self.openai_client.create_embeddings([job.chunk["chunk_text"] for job in batch])
+            except Exception as e:
+                log_exception(logger, f"Failed to embed a batch of {len(batch)} chunks", e)
+                for job in batch:
+                    job.material.embedding_errors.append({
+                        "filename": job.filename,
+                        "chunk_id": job.chunk["chunk_id"],
+                        "error": f"Failed to create embedding: {str(e)}"
+                    })
+                continue
+
+            for job, embedding in zip(batch, embeddings):
+                job.material.chunks[job.filename].append(ChunkData(
+                    chunk_id=job.chunk["chunk_id"],
+                    embedding=embedding,
+                    chunk_text=job.chunk["chunk_text"]
+                ))
+            report_progress("embedding_batch", batch=batch_number, chunks=len(batch))
+
+    @staticmethod
+    def _build_documents(state: _MaterialState) -> List[DocumentData]:
+        """Assemble documents in request order with chunks in chunk order."""
+        documents = []
+        for filename in dict.fromkeys(state.request.uploaded_file):
+            chunks = state.chunks.get(filename)
+            if not chunks:
+                continue
+            documents.append(DocumentData(
+                document_id=len(documents) + 1,
+                document_source=filename,
+                chunks=sorted(chunks, key=lambda chunk: chunk.chunk_id)
+            ))
+        return documents
+
+    async def _index_materials(self, states: List[_MaterialState]) -> List[MaterialVectorizationResult]:
+        """Bulk index every material that produced documents and build the results."""
+        results: Dict[int, MaterialVectorizationResult] = {}
+        to_index: Dict[str, Dict] = {}
+        index_positions: Dict[str, int] = {}
+
+        for position, state in enumerate(states):
+            request = state.request
+            documents = self._build_documents(state)
+            warnings = None
+            if state.processing_errors or state.embedding_errors:
+                warnings = {
+                    "processing_errors": state.processing_errors or None,
+                    "embedding_errors": state.embedding_errors or None
+                }
+
+            results[position] = MaterialVectorizationResult(
+                material_id=request.id,
+                category=request.category,
+                success=bool(documents),
+                total_documents=len(documents),
+                total_chunks=sum(len(doc.chunks) for doc in documents),
+                processed_files=state.processed_files,
+                total_files=len(request.uploaded_file),
+                error=None if documents else "No documents could be vectorized",
+                warnings=warnings
+            )
+
+            if documents:
+                material_data = MaterialData(id=request.id, category=request.category, documents=documents)
+                # A repeated material ID in the same batch: the last one wins, as with sequential calls
+                if request.id in index_positions:
+                    superseded = results[index_positions[request.id]]
+                    superseded.success = False
+                    superseded.error = "Superseded by a later entry with the same material ID"
+                to_index[request.id] = material_data.model_dump()
+                index_positions[request.id] = position
+
+        try:
+            index_errors = await self.opensearch_client.bulk_index_material_data(self.opensearch_index_name, to_index)
+        except OpenSearchConfigurationError as e:
+            index_errors = {material_id: str(e) for material_id in to_index}
+
+        for material_id, error in index_errors.items():
+            if error:
+                result = results[index_positions[material_id]]
+                result.success = False
+                result.error = error
+        report_progress("indexed", materials=sum(1 for error in index_errors.values() if not error))
+
+        return [results[position] for position in range(len(states))]
+
+    @staticmethod
+    def _release_pending(extract_queue: asyncio.Queue) -> None:
+        """Release buffers of downloads that never reached extraction."""
+        while not extract_queue.empty():
+            job = extract_queue.get_nowait()
+            if job is not _STOP:
+                _, _, file_buffer = job
+                if isinstance(file_buffer, FileBuffer):
+                    file_buffer.release()
@@ -11,6 +11,7 @@ from dataclasses import dataclass
 
 from core.logging import setup_logger, log_exception
 from core.exceptions import EmbeddingCreationError
+from core.progress import report_progress
 from infrastructure.openai.client import OpenAIClient
 from services.text_service import split_into_chunks
 from schemas.vectorize_schemas import ChunkData, DocumentData
@@ -18,6 +19,9 @@ from schemas.vectorize_schemas import ChunkData, DocumentData
 
 logger = setup_logger(__name__)
 
+# Chunks per reported "batch N of M" progress event
+PROGRESS_BATCH_SIZE = 16
+
 
 @dataclass
 class EmbeddingResult:
@@ -110,6 +114,25 @@ class EmbeddingService:
             task = asyncio.create_task(self.create_single_embedding(filename, chunk_idx, chunk))
             tasks.append(task)
         
+        # Report progress in fixed-size batches as chunks complete
+        total_batches = -(-len(tasks) // PROGRESS_BATCH_SIZE)
+        completed = 0
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                await next_done
+            except Exception:
+                pass  # collected with the results below
+            completed += 1
+            if completed % PROGRESS_BATCH_SIZE == 0 or completed == len(tasks):
+                report_progress(
+                    "embedding_batch",
+                    filename=filename,
+                    batch=-(-completed // PROGRESS_BATCH_SIZE),
+                    total_batches=total_batches,
+                    chunks_embedded=completed,
+                    total_chunks=len(tasks)
+                )
+        
         # Process results
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
@@ -6,13 +6,15 @@ Transforms messy files into clean, structured content.
 """
 
 import asyncio
-from io import BytesIO
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 
 from core.logging import setup_logger, log_exception
 from core.exceptions import FileProcessingError, ContentExtractionError, FileValidationError
-from services.file_service import extract_content_with_tags
+from core.file_buffer import FileBuffer
+from core.progress import report_progress
+from services.file_service import extract_content_with_tags, extract_pdf_pages, render_pdf_pages, tag_pdf_pages
+from services.ocr_service import OCRService
 
 
 logger = setup_logger(__name__)
@@ -31,14 +33,16 @@ class ProcessedFile:
 class FileProcessor:
     """Professional file processor with validation and error handling."""
     
-    def __init__(self, allowed_extensions: List[str]):
+    def __init__(self, allowed_extensions: List[str], ocr_service: Optional[OCRService] = None):
         """
         Initialize file processor.
         
         Args:
             allowed_extensions: List of allowed file extensions
+            ocr_service: Optional OCR fallback for image-only PDF pages
         """
         self.allowed_extensions = allowed_extensions
+        self.ocr_service = ocr_service
 
     def validate_file_extension(self, filename: str) -> str:
         """
@@ -65,32 +69,35 @@ class FileProcessor:
         
         return extension
 
-    async def process_single_file(self, filename: str, file_stream: BytesIO) -> ProcessedFile:
+    async def process_single_file(self, filename: str, file_buffer: FileBuffer) -> ProcessedFile:
         """
         Process a single file and extract its content.
         
+        The buffer is released before returning, whatever the outcome, so the
+        raw bytes (or temp file) don't outlive the extracted text.
+        
         Args:
             filename: Name of the file
-            file_stream: File content stream
+            file_buffer: Downloaded file content
             
         Returns:
             ProcessedFile result
         """
         try:
-            # Reset stream position
-            file_stream.seek(0)
-            
+            return await self._process_buffer(filename, file_buffer)
+        finally:
+            file_buffer.release()
+
+    async def _process_buffer(self, filename: str, file_buffer: FileBuffer) -> ProcessedFile:
+        try:
             # Validate extension
             extension = self.validate_file_extension(filename)
 
-            # Create mock UploadFile object for compatibility
-            class MockUploadFile:
-                def __init__(self, file_stream, filename):
-                    self.file = file_stream
-                    self.filename = filename
-            
-            mock_file = MockUploadFile(file_stream, filename)
-            structured_content = extract_content_with_tags(mock_file, extension)
+            if extension == "pdf" and self.ocr_service and self.ocr_service.enabled:
+                structured_content = await self._extract_pdf_with_ocr(filename, file_buffer)
+            else:
+                # Parsing is CPU-bound; keep it off the event loop so downloads and embedding calls keep flowing
+                structured_content = await asyncio.to_thread(extract_content_with_tags, file_buffer, extension)
             
             if not structured_content or not structured_content.strip():
                 return ProcessedFile(
@@ -101,6 +108,12 @@ class FileProcessor:
                 )
             
             logger.info(f"Successfully extracted content from {filename} ({len(structured_content)} characters)")
+            report_progress(
+                "file_extracted",
+                filename=filename,
+                pages=structured_content.count('<page number=') or structured_content.count('<slide number='),
+                characters=len(structured_content)
+            )
             return ProcessedFile(
                 filename=filename,
                 content=structured_content,
@@ -124,12 +137,46 @@ class FileProcessor:
                 error=f"Failed to extract content: {str(e)}"
             )
 
-    async def process_multiple_files(self, file_streams_dict: Dict[str, BytesIO]) -> Tuple[Dict[str, str], List[Dict]]:
+    async def _extract_pdf_with_ocr(self, filename: str, file_buffer: FileBuffer) -> str:
+        """
+        Extract a PDF, OCR'ing only the pages that have no text layer.
+        
+        Pages already in the OCR cache are filled in without being rendered;
+        the rest are rendered in a worker thread and the buffer is released
+        before OCR starts.
+        
+        Args:
+            filename: Name of the file
+            file_buffer: Downloaded file content (released after rendering)
+            
+        Returns:
+            Tagged content
+        """
+        try:
+            pages = await asyncio.to_thread(extract_pdf_pages, file_buffer, find_image_pages=True)
+            document_digest = None
+            if any(page.needs_ocr for page in pages):
+                document_digest = await asyncio.to_thread(file_buffer.sha256)
+                missing = self.ocr_service.apply_cached(pages, document_digest)
+                if missing:
+                    images = await asyncio.to_thread(
+                        render_pdf_pages, file_buffer, [page.number for page in missing], self.ocr_service.dpi
+                    )
+                    for page in missing:
+                        page.image_png = images[page.number]
+        finally:
+            file_buffer.release()
+        
+        if document_digest is not None:
+            pages = await self.ocr_service.fill_missing_text(filename, pages, document_digest)
+        return tag_pdf_pages(pages)
+
+    async def process_multiple_files(self, file_streams_dict: Dict[str, FileBuffer]) -> Tuple[Dict[str, str], List[Dict]]:
         """
         Process multiple files in parallel.
         
         Args:
-            file_streams_dict: Dictionary of filename -> file_stream
+            file_streams_dict: Dictionary of filename -> file_buffer
             
         Returns:
             Tuple of (successful_files_content, processing_errors)
@@ -142,8 +189,8 @@ class FileProcessor:
         
         # Process files in parallel for better performance
         tasks = []
-        for filename, file_stream in file_streams_dict.items():
-            task = asyncio.create_task(self.process_single_file(filename, file_stream))
+        for filename, file_buffer in file_streams_dict.items():
+            task = asyncio.create_task(self.process_single_file(filename, file_buffer))
             tasks.append(task)
         
         results = await asyncio.gather(*tasks, return_exceptions=True)
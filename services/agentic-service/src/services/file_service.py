@@ -1,37 +1,111 @@
 import fitz  # PyMuPDF
 from docx import Document
 from pptx import Presentation
-from io import BytesIO
+from typing import Dict, List, Union
 from fastapi import UploadFile
 
+from core.file_buffer import FileBuffer
+from services.ocr_service import PdfPage
 
-def extract_content_with_tags(file: UploadFile, extension: str) -> str:
+
+def _to_file_buffer(file: Union[FileBuffer, UploadFile]) -> FileBuffer:
+    """Normalize legacy UploadFile-style inputs into a FileBuffer."""
+    if isinstance(file, FileBuffer):
+        return file
+    return FileBuffer.from_stream(getattr(file, 'filename', '') or '', file.file)
+
+
+def _open_pdf(source: FileBuffer) -> fitz.Document:
+    """Open a PDF from the shared bytes (or the temp file) without copying."""
+    if source.in_memory:
+        return fitz.open(stream=source.data, filetype="pdf")
+    return fitz.open(source.path, filetype="pdf")
+
+
+def extract_pdf_pages(file: Union[FileBuffer, UploadFile], find_image_pages: bool = False) -> List[PdfPage]:
+    """
+    Extract the text layer of every PDF page.
+
+    Args:
+        file: FileBuffer (or uploaded file object) holding the PDF
+        find_image_pages: Flag pages that have images but no text, for OCR
+
+    Returns:
+        List[PdfPage]: One entry per page, in order
+    """
+    pages = []
+    pdf_document = _open_pdf(_to_file_buffer(file))
+    try:
+        for page_number, page in enumerate(pdf_document, start=1):
+            page_text = page.get_text()
+            image_only = find_image_pages and not page_text.strip() and bool(page.get_images(full=False))
+            pages.append(PdfPage(number=page_number, text=page_text, image_only=image_only))
+    finally:
+        pdf_document.close()
+    return pages
+
+
+def render_pdf_pages(file: Union[FileBuffer, UploadFile], page_numbers: List[int], dpi: int = 200) -> Dict[int, bytes]:
+    """
+    Render selected PDF pages to PNG for OCR.
+
+    Args:
+        file: FileBuffer (or uploaded file object) holding the PDF
+        page_numbers: 1-based page numbers to render
+        dpi: Render resolution
+
+    Returns:
+        Dict[int, bytes]: Page number -> PNG image
+    """
+    images = {}
+    pdf_document = _open_pdf(_to_file_buffer(file))
+    try:
+        for page_number in page_numbers:
+            images[page_number] = pdf_document[page_number - 1].get_pixmap(dpi=dpi).tobytes("png")
+    finally:
+        pdf_document.close()
+    return images
+
+
+def tag_pdf_pages(pages: List[PdfPage]) -> str:
+    """
+    Wrap extracted PDF pages in page tags.
+
+    Args:
+        pages: Pages from extract_pdf_pages
+
+    Returns:
+        str: Tagged content
+    """
+    tagged_content = ""
+    for page in pages:
+        source_attr = ' source="ocr"' if page.ocr_applied else ''
+        tagged_content += f'<page number="{page.number}"{source_attr}>{page.text}</page>\n'
+    return tagged_content
+
+
+def extract_content_with_tags(file: Union[FileBuffer, UploadFile], extension: str) -> str:
     """
     Extract content from uploaded files and add structured tags.
-    
+
     Args:
-        file: The uploaded file object
+        file: FileBuffer (or uploaded file object) holding the content
         extension: File extension (pdf, docx, pptx)
-        
+
     Returns:
         str: Tagged content extracted from the file
     """
+    source = _to_file_buffer(file)
     tagged_content = ""
 
     if extension == "pdf":
-        # Reset file pointer to beginning
-        file.file.seek(0)
-        pdf_document = fitz.open(stream=file.file.read(), filetype="pdf")
-        for page_number, page in enumerate(pdf_document, start=1):
-            page_text = page.get_text()
-            tagged_content += f'<page number="{page_number}">{page_text}</page>\n'
-        pdf_document.close()
+        # PyMuPDF reads the shared bytes (or the temp file) directly - no extra copy
+        tagged_content += tag_pdf_pages(extract_pdf_pages(source))
 
     elif extension == "docx":
-        # Reset file pointer to beginning
-        file.file.seek(0)
-        doc = Document(file.file)
-        
+        with source.open() as stream:
+            doc = Document(stream)
+
         # Process paragraphs
         for paragraph in doc.paragraphs:
             if paragraph.style.name.startswith("Heading"):
@@ -39,7 +113,7 @@ def extract_content_with_tags(file: UploadFile, extension: str) -> str:
                 tagged_content += f'<heading level="{level}">{paragraph.text}</heading>\n'
             else:
                 tagged_content += f'<paragraph>{paragraph.text}</paragraph>\n'
-        
+
         # Process tables
         for table in doc.tables:
             table_rows = ""
@@ -49,21 +123,20 @@ def extract_content_with_tags(file: UploadFile, extension: str) -> str:
             tagged_content += f'<table>{table_rows}</table>\n'
 
     elif extension == "pptx":
-        # Reset file pointer to beginning
-        file.file.seek(0)
-        presentation = Presentation(file.file)
-        
+        with source.open() as stream:
+            presentation = Presentation(stream)
+
         for slide_number, slide in enumerate(presentation.slides, start=1):
             slide_title = ""
             slide_content = ""
-            
+
             for shape in slide.shapes:
                 if hasattr(shape, "text") and shape.text.strip():
                     if hasattr(slide.shapes, 'title') and shape == slide.shapes.title:
                         slide_title = f'<slide_title>{shape.text}</slide_title>'
                     else:
                         slide_content += f'<slide_content>{shape.text}</slide_content>'
-            
+
             tagged_content += f'<slide number="{slide_number}">{slide_title}{slide_content}</slide>\n'
 
-    return tagged_content
\ No newline at end of file
+    return tagged_content
@@ -0,0 +1,284 @@
+"""
+🔎 OCR Service
+
+Optional OCR fallback for image-only PDF pages (scanned lecture notes).
+Runs Tesseract in a worker pool, one page at a time, and remembers what it read
+per document page, so pages already read are not even rendered again.
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from core.logging import setup_logger, log_exception, log_structured
+from core.environment import is_lambda_environment
+
+try:
+    import pytesseract
+except ImportError:  # OCR is optional - the service degrades to text-layer extraction
+    pytesseract = None
+
+
+logger = setup_logger(__name__)
+
+# Extra time allowed on top of Tesseract's own timeout before the page is abandoned
+OCR_TIMEOUT_GRACE_SECONDS = 5.0
+
+
+@dataclass
+class PdfPage:
+    """A PDF page's extracted text plus, once rendered for OCR, its image."""
+    number: int
+    text: str
+    image_only: bool = False
+    image_png: Optional[bytes] = None
+    ocr_applied: bool = False
+
+    @property
+    def needs_ocr(self) -> bool:
+        """Whether the page has no text layer but something to read."""
+        return self.image_only and not self.text.strip()
+
+
+def _run_tesseract(image_png: bytes, language: str, timeout_seconds: float) -> str:
+    """
+    OCR a rendered page inside a worker.
+
+    Module-level so it can be pickled into a process pool. Tesseract's own
+    timeout kills the subprocess, so a stuck page never pins a worker.
+    """
+    from io import BytesIO
+    from PIL import Image
+
+    with Image.open(BytesIO(image_png)) as image:
+        return pytesseract.image_to_string(image, lang=language, timeout=timeout_seconds)
+
+
+class OCRCache:
+    """Bounded LRU cache of OCR text keyed by document page, optionally persisted to disk."""
+
+    def __init__(self, max_entries: int = 1024, cache_dir: Optional[str] = None):
+        """
+        Initialize OCR cache.
+
+        Args:
+            max_entries: Maximum entries kept in memory
+            cache_dir: Optional directory for persisting results across invocations
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up cached OCR text."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        if self.cache_dir and os.path.exists(self._disk_path(key)):
+            with open(self._disk_path(key), encoding='utf-8') as f:
+                text = f.read()
+            self._remember(key, text)
+            return text
+        return None
+
+    def put(self, key: str, text: str) -> None:
+        """Store OCR text."""
+        self._remember(key, text)
+        if self.cache_dir:
+            try:
+                with open(self._disk_path(key), 'w', encoding='utf-8') as f:
+                    f.write(text)
+            except OSError as e:
+                logger.warning(f"Could not persist OCR cache entry {key}: {e}")
+
+    def __len__(self) -> int:
+        """Entries held in memory."""
+        return len(self._entries)
+
+    def _remember(self, key: str, text: str) -> None:
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class OCRService:
+    """OCR fallback for pages without a text layer, executed off the event loop."""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        language: str = "eng",
+        dpi: int = 200,
+        max_workers: int = 2,
+        max_concurrent_pages: int = 4,
+        page_timeout_seconds: float = 30.0,
+        cache_size: int = 1024,
+        cache_dir: Optional[str] = None
+    ):
+        """
+        Initialize OCR service.
+
+        Args:
+            enabled: Whether OCR fallback is requested by configuration
+            language: Tesseract language string (e.g. 'eng', 'vie+eng')
+            dpi: Resolution used when rendering pages for OCR
+            max_workers: Worker pool size
+            max_concurrent_pages: Pages OCR'd at once across all files
+            page_timeout_seconds: Time limit for a single page
+            cache_size: In-memory cache entries
+            cache_dir: Optional on-disk cache directory
+        """
+        self.language = language
+        self.dpi = dpi
+        self.max_workers = max_workers
+        self.page_timeout_seconds = page_timeout_seconds
+        self.cache = OCRCache(cache_size, cache_dir)
+        self.enabled = enabled and self._engine_available()
+
+        self._semaphore = asyncio.Semaphore(max_concurrent_pages)
+        self._executor: Optional[Executor] = None
+
+    @staticmethod
+    def _engine_available() -> bool:
+        """Check that both pytesseract and the tesseract binary are installed."""
+        if pytesseract is None:
+            logger.warning("OCR requested but pytesseract is not installed - OCR fallback disabled")
+            return False
+        if shutil.which("tesseract") is None:
+            logger.warning("OCR requested but the tesseract binary was not found - OCR fallback disabled")
+            return False
+        return True
+
+    def _get_executor(self) -> Executor:
+        """
+        Lazily create the worker pool.
+
+        Lambda has no /dev/shm, so multiprocessing primitives are unavailable;
+        threads are used there instead - Tesseract runs as a subprocess either way.
+        """
+        if self._executor is None:
+            if is_lambda_environment():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ocr")
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def cache_key(self, document_digest: str, page_number: int) -> str:
+        """Key of a document page (plus settings that change the output), known before rendering."""
+        return hashlib.sha256(f"{document_digest}|{page_number}|{self.dpi}|{self.language}".encode()).hexdigest()
+
+    def apply_cached(self, pages: List[PdfPage], document_digest: str) -> List[PdfPage]:
+        """
+        Fill in cached OCR text, in place.
+
+        Args:
+            pages: Pages from extract_pdf_pages
+            document_digest: Content hash of the PDF (FileBuffer.sha256)
+
+        Returns:
+            The pages that still need OCR, i.e. the only ones worth rendering
+        """
+        if not self.enabled:
+            return []
+        missing = []
+        for page in pages:
+            if not page.needs_ocr:
+                continue
+            cached = self.cache.get(self.cache_key(document_digest, page.number))
+            if cached is None:
+                missing.append(page)
+            elif cached.strip():
+                page.text = cached
+                page.ocr_applied = True
+        return missing
+
+    async def ocr_page(self, filename: str, page: PdfPage, key: str) -> Optional[str]:
+        """
+        OCR a single rendered page, honouring the concurrency cap and timeout.
+
+        Args:
+            filename: Source filename (for logging)
+            page: Page with a rendered image
+            key: Cache key the result is stored under
+
+        Returns:
+            Recognised text, or None if OCR failed or timed out
+        """
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            try:
+                text = await asyncio.wait_for(
+                    loop.run_in_executor(
+                        self._get_executor(), _run_tesseract,
+                        page.image_png, self.language, self.page_timeout_seconds
+                    ),
+                    timeout=self.page_timeout_seconds + OCR_TIMEOUT_GRACE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"OCR timed out for page {page.number} of {filename}")
+                return None
+            except Exception as e:
+                log_exception(logger, f"OCR failed for page {page.number} of {filename}", e)
+                return None
+
+        self.cache.put(key, text)
+        return text
+
+    async def fill_missing_text(self, filename: str, pages: List[PdfPage], document_digest: str) -> List[PdfPage]:
+        """
+        Run OCR on every rendered page that has no text layer, in place.
+
+        Args:
+            filename: Source filename
+            pages: Pages from extract_pdf_pages, rendered where apply_cached found no text
+            document_digest: Content hash of the PDF (FileBuffer.sha256)
+
+        Returns:
+            The same pages, with OCR text filled in where it succeeded
+        """
+        targets = [page for page in pages if page.needs_ocr and page.image_png is not None]
+        if not self.enabled or not targets:
+            return pages
+
+        results = await asyncio.gather(*(
+            self.ocr_page(filename, page, self.cache_key(document_digest, page.number)) for page in targets
+        ))
+
+        recognised = 0
+        for page, text in zip(targets, results):
+            page.image_png = None  # rendered image is no longer needed
+            if text and text.strip():
+                page.text = text
+                page.ocr_applied = True
+                recognised += 1
+
+        log_structured(
+            logger, 'INFO', "OCR fallback completed",
+            filename=filename,
+            image_only_pages=len(targets),
+            recognised_pages=recognised
+        )
+        return pages
+
+    def stats(self) -> Dict[str, int]:
+        """Basic counters for debugging."""
+        return {"cached_pages": len(self.cache)}
+
+    def shutdown(self) -> None:
+        """Stop the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -6,12 +6,13 @@ The conductor that makes all the pieces work together beautifully.
 """
 
 from datetime import datetime
-from io import BytesIO
 from typing import Dict, List
 from fastapi import HTTPException
 
 from core.logging import setup_logger, log_exception, log_structured
 from core.exceptions import ValidationError, ProcessingError
+from core.file_buffer import FileBuffer
+from core.progress import report_progress
 from services.file_processor import FileProcessor
 from services.embedding_service import EmbeddingService
 from infrastructure.aws.opensearch_client import OpenSearchClient
@@ -46,12 +47,12 @@ class VectorizationService:
         self.opensearch_client = opensearch_client
         self.opensearch_index_name = opensearch_index_name
 
-    def validate_inputs(self, file_streams_dict: Dict[str, BytesIO], material_id: str) -> None:
+    def validate_inputs(self, file_streams_dict: Dict[str, FileBuffer], material_id: str) -> None:
         """
         Validate vectorization inputs.
         
         Args:
-            file_streams_dict: File streams to process
+            file_streams_dict: File buffers to process
             material_id: Material identifier
             
         Raises:
@@ -96,7 +97,7 @@ class VectorizationService:
 
     async def vectorize_files(
         self, 
-        file_streams_dict: Dict[str, BytesIO], 
+        file_streams_dict: Dict[str, FileBuffer], 
         material_id: str, 
         category: int
     ) -> VectorizationResponse:
@@ -104,7 +105,7 @@ class VectorizationService:
         Process file streams and create embeddings for text chunks.
         
         Args:
-            file_streams_dict: Dictionary of filename -> file_stream
+            file_streams_dict: Dictionary of filename -> file_buffer
             material_id: Unique identifier for the material
             category: Category number for the material
             
@@ -119,7 +120,13 @@ class VectorizationService:
         logger.info(f"Material ID: {material_id}, Category: {category}")
         
         # Validate inputs
-        self.validate_inputs(file_streams_dict, material_id)
+        try:
+            self.validate_inputs(file_streams_dict, material_id)
+        except ValidationError:
+            # None of the files will be processed: drop their buffers and temp files now
+            for file_buffer in file_streams_dict.values():
+                file_buffer.release()
+            raise
         
         # Process files and create embeddings
         file_contents, processing_errors = await self.file_processor.process_multiple_files(file_streams_dict)
@@ -133,6 +140,7 @@ class VectorizationService:
                 material_data.model_dump(), 
                 material_id
             )
+            report_progress("indexed", material_id=material_id, total_documents=len(documents))
         except Exception as e:
             log_exception(logger, "OpenSearch indexing failed", e)
             # Only add to warnings, don't fail the entire process unless in Lambda
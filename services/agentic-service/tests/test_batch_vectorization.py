@@ -0,0 +1,212 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add src to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.file_buffer import FileBuffer
+from services.batch_vectorization_service import BatchVectorizationService
+from services.file_processor import FileProcessor
+from schemas.vectorize_schemas import VectorizeRequest
+
+
+def make_pdf_bytes(lines):
+    import fitz
+    document = fitz.open()
+    page = document.new_page()
+    for i, line in enumerate(lines):
+        page.insert_text((72, 72 + i * 14), line)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+class FakeS3Client:
+    def __init__(self, files):
+        self.files = files
+
+    def get_file_safely(self, bucket_name, filename, max_size_bytes):
+        if filename not in self.files:
+            return None, None, f"File not found: {filename}"
+        return FileBuffer(filename, data=self.files[filename]), {'size_bytes': len(self.files[filename])}, None
+
+
+class FakeOpenAIClient:
+    def __init__(self):
+        self.requests = []
+
+    async def create_embeddings(self, texts):
+        self.requests.append(len(texts))
+        await asyncio.sleep(0)
+        return [[float(len(text))] for text in texts]
+
+
+class FakeOpenSearchClient:
+    environment = 'testing'
+
+    def __init__(self):
+        self.bulk_calls = []
+
+    async def bulk_index_material_data(self, index_name, materials):
+        self.bulk_calls.append(dict(materials))
+        return {material_id: None for material_id in materials}
+
+
+@pytest.mark.unit
+def test_batch_shares_workers_and_bulk_indexes_once():
+    """Chunks are embedded in packed requests and indexed in one bulk call"""
+    files = {
+        f"material-{m}-file-{f}.pdf": make_pdf_bytes([f"Material {m} file {f} line {i} " * 4 for i in range(6)])
+        for m in range(3) for f in range(2)
+    }
+    openai_client = FakeOpenAIClient()
+    opensearch_client = FakeOpenSearchClient()
+    service = BatchVectorizationService(
+        FakeS3Client(files), FileProcessor(['pdf']), openai_client, opensearch_client, 'materials',
+        max_tokens_per_chunk=32, embedding_batch_size=64,
+        # One embedder lingering until the stop marker packs every chunk into one request
+        embed_workers=1, embedding_batch_linger_seconds=60
+    )
+
+    materials = [
+        VectorizeRequest(id=f"m{m}", category=0, uploaded_file=[f"material-{m}-file-{f}.pdf" for f in range(2)])
+        for m in range(3)
+    ]
+    materials.append(VectorizeRequest(id="missing", category=1, uploaded_file=["nope.pdf"]))
+
+    response = asyncio.run(service.vectorize_materials(materials, 'bucket', 10 * 1024 * 1024))
+
+    assert response.total_materials == 4
+    assert response.succeeded == 3
+    assert [r.material_id for r in response.results] == ["m0", "m1", "m2", "missing"]
+    assert not response.results[3].success
+    assert response.results[3].warnings["processing_errors"][0]["filename"] == "nope.pdf"
+
+    # Packed across materials: all chunks fit in one embedding_batch_size request
+    assert response.total_chunks <= 64
+    assert openai_client.requests == [response.total_chunks]
+    assert response.embedding_requests == 1
+
+    # One bulk call, documents in request order, chunks in chunk order
+    assert len(opensearch_client.bulk_calls) == 1
+    indexed = opensearch_client.bulk_calls[0]
+    assert set(indexed) == {"m0", "m1", "m2"}
+    documents = indexed["m1"]["documents"]
+    assert [d["document_source"] for d in documents] == ["material-1-file-0.pdf", "material-1-file-1.pdf"]
+    chunk_ids = [c["chunk_id"] for c in documents[0]["chunks"]]
+    assert chunk_ids == sorted(chunk_ids)
+
+
+@pytest.mark.unit
+def test_bulk_index_failures_are_reported_per_material():
+    """An indexing error on one material does not fail the others"""
+    files = {"a.pdf": make_pdf_bytes(["Alpha notes"]), "b.pdf": make_pdf_bytes(["Beta notes"])}
+
+    class PartiallyFailingOpenSearch(FakeOpenSearchClient):
+        async def bulk_index_material_data(self, index_name, materials):
+            return {material_id: ("Indexing failed: mapper_parsing_exception" if material_id == "b" else None)
+                    for material_id in materials}
+
+    service = BatchVectorizationService(
+        FakeS3Client(files), FileProcessor(['pdf']), FakeOpenAIClient(), PartiallyFailingOpenSearch(), 'materials'
+    )
+    response = asyncio.run(service.vectorize_materials([
+        VectorizeRequest(id="a", category=0, uploaded_file=["a.pdf"]),
+        VectorizeRequest(id="b", category=0, uploaded_file=["b.pdf"]),
+    ], 'bucket', 1024 * 1024))
+
+    assert [r.success for r in response.results] == [True, False]
+    assert "mapper_parsing_exception" in response.results[1].error
+
+
+@pytest.mark.unit
+def test_extraction_errors_are_reported_per_file():
+    """An extractor that raises fails only its own file; the batch carries on"""
+    files = {"a.pdf": make_pdf_bytes(["Alpha notes"]), "b.pdf": make_pdf_bytes(["Beta notes"])}
+
+    class FailingProcessor(FileProcessor):
+        async def process_single_file(self, filename, file_buffer):
+            if filename == "b.pdf":
+                raise ValueError("corrupt xref table")
+            return await super().process_single_file(filename, file_buffer)
+
+    service = BatchVectorizationService(
+        FakeS3Client(files), FailingProcessor(['pdf']), FakeOpenAIClient(), FakeOpenSearchClient(), 'materials',
+        extract_workers=1
+    )
+    response = asyncio.run(asyncio.wait_for(service.vectorize_materials([
+        VectorizeRequest(id="a", category=0, uploaded_file=["a.pdf"]),
+        VectorizeRequest(id="b", category=0, uploaded_file=["b.pdf", "a.pdf"]),
+    ], 'bucket', 1024 * 1024), 10))
+
+    assert [r.success for r in response.results] == [True, True]
+    errors = response.results[1].warnings["processing_errors"]
+    assert errors[0]["filename"] == "b.pdf" and "corrupt xref table" in errors[0]["error"]
+
+
+class RecordingOpenSearch:
+    """Synchronous opensearch-py stand-in that records bulk bodies and refreshes."""
+
+    def __init__(self, fail_bodies_containing=None):
+        self.indices = self
+        self.bodies = []
+        self.refreshes = []
+        self.fail_bodies_containing = fail_bodies_containing
+
+    def bulk(self, body, refresh, **kwargs):
+        assert refresh is False
+        if self.fail_bodies_containing and self.fail_bodies_containing in body:
+            raise ConnectionError("connection reset")
+        self.bodies.append(body)
+        return {"items": []}
+
+    def refresh(self, index, **kwargs):
+        self.refreshes.append(index)
+
+
+def make_opensearch_client(raw_client):
+    from core.retry import get_circuit_breaker
+    from infrastructure.aws.opensearch_client import OpenSearchClient
+
+    get_circuit_breaker("opensearch").reset()
+    client = object.__new__(OpenSearchClient)
+    client.client = raw_client
+    return client
+
+
+@pytest.mark.unit
+def test_bulk_indexing_is_chunked_with_one_refresh():
+    """Bulk bodies are bounded by document count and size, and the index is refreshed once at the end"""
+    raw = RecordingOpenSearch()
+    client = make_opensearch_client(raw)
+    documents = {f"m{i}": {"text": "x" * (5000 if i == 7 else 100)} for i in range(12)}
+
+    results = asyncio.run(client.bulk_index_documents(
+        "materials", documents, max_documents_per_request=5, max_bytes_per_request=4096
+    ))
+
+    assert results == {doc_id: None for doc_id in documents}
+    sent = [[line for line in body.splitlines()[::2]] for body in raw.bodies]
+    assert [len(lines) for lines in sent] == [5, 2, 1, 4]  # m7 alone exceeds the byte limit
+    assert all(len(body.encode()) <= 4096 for i, body in enumerate(raw.bodies) if i != 2)
+    assert raw.refreshes == ["materials"]
+
+
+@pytest.mark.unit
+def test_failed_bulk_chunk_only_fails_its_own_documents(monkeypatch):
+    """A chunk that keeps failing after its retries marks its documents; the rest are indexed and refreshed"""
+    import core.retry
+    monkeypatch.setattr(core.retry, "compute_backoff", lambda *args, **kwargs: 0)
+    raw = RecordingOpenSearch(fail_bodies_containing='"m3"')
+    client = make_opensearch_client(raw)
+    documents = {f"m{i}": {"text": "notes"} for i in range(6)}
+
+    results = asyncio.run(client.bulk_index_documents("materials", documents, max_documents_per_request=2))
+
+    assert [doc_id for doc_id, error in results.items() if error] == ["m2", "m3"]
+    assert "connection reset" in results["m2"]
+    assert len(raw.bodies) == 2
+    assert raw.refreshes == ["materials"]
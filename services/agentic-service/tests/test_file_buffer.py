@@ -0,0 +1,214 @@
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+from io import BytesIO
+
+import pytest
+
+# Add src to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.file_buffer import FileBuffer
+from infrastructure.aws.s3_client import S3Client
+from services.file_service import extract_content_with_tags
+
+
+FILE_SIZE = 8 * 1024 * 1024
+
+
+class FakeBody:
+    """Streaming body that allocates the payload on read, like a socket read."""
+
+    def __init__(self, size, payload=None):
+        self.size = size
+        self.payload = payload
+
+    def read(self):
+        if self.payload is not None:
+            return memoryview(self.payload).tobytes()
+        return bytes(self.size)
+
+
+class FakeBotoClient:
+    """Minimal boto3 S3 client double for download tests."""
+
+    def __init__(self, payload_size=FILE_SIZE, payload=None):
+        self.payload_size = payload_size
+        self.payload = payload
+
+    def head_object(self, Bucket, Key):
+        size = len(self.payload) if self.payload is not None else self.payload_size
+        return {'ContentLength': size, 'LastModified': datetime(2025, 1, 1)}
+
+    def get_object(self, Bucket, Key):
+        return {'Body': FakeBody(self.payload_size, self.payload)}
+
+    def download_file(self, Bucket, Key, Filename):
+        with open(Filename, 'wb') as f:
+            f.write(self.payload)
+
+
+def make_s3_client(fake_client, spool_threshold_bytes=None):
+    s3 = S3Client.__new__(S3Client)
+    s3.environment = 'testing'
+    s3.region = 'ap-northeast-1'
+    s3.client = fake_client
+    s3.spool_threshold_bytes = spool_threshold_bytes
+    return s3
+
+
+def make_pdf_bytes(text):
+    import fitz
+    document = fitz.open()
+    page = document.new_page()
+    page.insert_text((72, 72), text)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def measure_peak(func):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def make_padded_pdf(text, size):
+    """A valid PDF of roughly ``size`` bytes (PyMuPDF ignores data after %%EOF)."""
+    data = make_pdf_bytes(text)
+    return data + b"\n" + b"%" * (size - len(data) - 1)
+
+
+def legacy_pipeline(fake_client, filenames):
+    """
+    The pre-FileBuffer hand-off: BytesIO per download, size read through
+    getvalue(), parsed through an UploadFile stand-in, and every stream kept
+    in the request's file dict until the response is built.
+    """
+    class MockUploadFile:
+        def __init__(self, file_stream, filename):
+            self.file = file_stream
+            self.filename = filename
+
+    file_streams = {}
+    for filename in filenames:
+        stream = BytesIO(fake_client.get_object(Bucket='bucket', Key=filename)['Body'].read())
+        assert len(stream.getvalue()) == FILE_SIZE
+        file_streams[filename] = stream
+    contents = {}
+    for filename, stream in file_streams.items():
+        stream.seek(0)
+        contents[filename] = extract_content_with_tags(MockUploadFile(stream, filename), "pdf")
+    return contents, file_streams
+
+
+def current_pipeline(s3, filenames):
+    """The FileBuffer hand-off: buffers are released by FileProcessor once parsed."""
+    import asyncio
+    from services.file_processor import FileProcessor
+
+    file_buffers = {}
+    for filename in filenames:
+        file_buffer, metadata, error = s3.get_file_safely('bucket', filename, FILE_SIZE * 2)
+        assert error is None and metadata['actual_size'] == FILE_SIZE
+        file_buffers[filename] = file_buffer
+    processor = FileProcessor(['pdf'])
+    results = {filename: asyncio.run(processor.process_single_file(filename, file_buffer))
+               for filename, file_buffer in file_buffers.items()}
+    assert all(result.success for result in results.values())
+    return {filename: result.content for filename, result in results.items()}, file_buffers
+
+
+def measure_after(func):
+    """(peak, still allocated while the pipeline's results are held) in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        held = func()
+        current, peak = tracemalloc.get_traced_memory()
+        del held
+    finally:
+        tracemalloc.stop()
+    return peak, current
+
+
+@pytest.mark.unit
+def test_download_handoff_memory_against_legacy_path():
+    """Downloaded bytes no longer outlive parsing, and spooled files never enter memory"""
+    filenames = [f"lecture-{i}.pdf" for i in range(3)]
+    payload = make_padded_pdf("Lecture notes", FILE_SIZE)
+
+    legacy_peak, legacy_held = measure_after(lambda: legacy_pipeline(FakeBotoClient(payload=payload), filenames))
+    current_peak, current_held = measure_after(
+        lambda: current_pipeline(make_s3_client(FakeBotoClient(payload=payload)), filenames)
+    )
+    spooled_peak, spooled_held = measure_after(
+        lambda: current_pipeline(make_s3_client(FakeBotoClient(payload=payload), spool_threshold_bytes=1024 * 1024), filenames)
+    )
+
+    print(f"\n✅ {len(filenames)} x {FILE_SIZE // 2**20}MiB files, peak / held after parsing: "
+          f"legacy={legacy_peak / FILE_SIZE:.2f}x / {legacy_held / FILE_SIZE:.2f}x, "
+          f"in-memory={current_peak / FILE_SIZE:.2f}x / {current_held / FILE_SIZE:.2f}x, "
+          f"spooled={spooled_peak / FILE_SIZE:.2f}x / {spooled_held / FILE_SIZE:.2f}x")
+    assert current_peak <= legacy_peak * 1.05
+    assert current_held < legacy_held / 10
+    assert spooled_peak < legacy_peak / 10
+
+
+@pytest.mark.unit
+def test_pdf_extraction_from_buffer():
+    """PyMuPDF parses the shared buffer directly"""
+    pdf_bytes = make_pdf_bytes("Zero copy lecture notes")
+    file_buffer = FileBuffer(filename="notes.pdf", data=pdf_bytes)
+
+    content = extract_content_with_tags(file_buffer, "pdf")
+    assert "Zero copy lecture notes" in content
+    assert '<page number="1">' in content
+
+
+@pytest.mark.unit
+def test_large_files_spool_to_disk():
+    """Files above the spool threshold are parsed from a temp file path"""
+    pdf_bytes = make_pdf_bytes("Spooled lecture notes")
+    s3 = make_s3_client(FakeBotoClient(payload=pdf_bytes), spool_threshold_bytes=16)
+
+    file_buffer, metadata, error = s3.get_file_safely('bucket', 'big.pdf', 10 * 1024 * 1024)
+    assert error is None
+    assert not file_buffer.in_memory
+    assert metadata['actual_size'] == len(pdf_bytes)
+
+    content = extract_content_with_tags(file_buffer, "pdf")
+    assert "Spooled lecture notes" in content
+
+    file_buffer.release()
+    assert not os.path.exists(file_buffer.path)
+
+
+@pytest.mark.unit
+def test_rejected_files_release_their_buffers(tmp_path):
+    """Files that fail validation do not leave their temp files behind"""
+    import asyncio
+    from core.exceptions import ValidationError
+    from services.file_processor import FileProcessor
+    from services.vectorization_service import VectorizationService
+
+    def spooled(name):
+        path = tmp_path / name
+        path.write_bytes(b"payload")
+        return FileBuffer(filename=name, path=str(path))
+
+    result = asyncio.run(FileProcessor(['pdf']).process_single_file("notes.exe", spooled("notes.exe")))
+    assert not result.success
+    assert not (tmp_path / "notes.exe").exists()
+
+    service = VectorizationService(FileProcessor(['pdf']), None, None, 'materials')
+    with pytest.raises(ValidationError):
+        asyncio.run(service.vectorize_files({"a.pdf": spooled("a.pdf"), "b.pdf": spooled("b.pdf")}, " ", 0))
+    assert list(tmp_path.iterdir()) == []
@@ -83,3 +83,19 @@ def test_config_instance():
         print("✅ Config instance test passed")
     except Exception as e:
         pytest.skip(f"Config instance test failed: {e}")
+
+
+@pytest.mark.unit
+def test_response_streaming_defaults(monkeypatch):
+    """Test streaming is off on Lambda, where the handler buffers responses"""
+    from src.config.main_config import Config
+    monkeypatch.delenv("RESPONSE_STREAMING_ENABLED", raising=False)
+    monkeypatch.setenv("ENVIRONMENT", "lambda")
+    assert Config().RESPONSE_STREAMING_ENABLED is False
+
+    monkeypatch.setenv("ENVIRONMENT", "local")
+    assert Config().RESPONSE_STREAMING_ENABLED is True
+
+    monkeypatch.setenv("RESPONSE_STREAMING_ENABLED", "false")
+    assert Config().RESPONSE_STREAMING_ENABLED is False
+
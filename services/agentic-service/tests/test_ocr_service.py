@@ -0,0 +1,122 @@
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add src to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.file_buffer import FileBuffer
+from services import ocr_service as ocr_module
+from services import file_processor as file_processor_module
+from services.file_processor import FileProcessor
+from services.file_service import extract_pdf_pages, render_pdf_pages
+from services.ocr_service import OCRService
+
+
+def make_mixed_pdf_bytes():
+    """A PDF with one text page and one scanned (image-only) page."""
+    import fitz
+    document = fitz.open()
+    text_page = document.new_page()
+    text_page.insert_text((72, 72), "Typed lecture notes")
+
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 32, 32), False)
+    pixmap.set_rect(pixmap.irect, (200, 200, 200))
+    scanned_page = document.new_page()
+    scanned_page.insert_image(fitz.Rect(72, 72, 272, 272), pixmap=pixmap)
+
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def make_ocr_service(**kwargs):
+    service = OCRService(**kwargs)
+    service.enabled = True  # the tesseract binary is not needed with a fake engine
+    service._executor = ThreadPoolExecutor(max_workers=2)
+    return service
+
+
+@pytest.mark.unit
+def test_only_image_pages_need_ocr():
+    """Pages with a text layer are never flagged (or rendered) for OCR"""
+    pages = extract_pdf_pages(FileBuffer("mixed.pdf", data=make_mixed_pdf_bytes()), find_image_pages=True)
+
+    assert len(pages) == 2
+    assert not pages[0].needs_ocr
+    assert pages[1].needs_ocr
+    assert all(page.image_png is None for page in pages)
+
+
+@pytest.mark.unit
+def test_ocr_fallback_fills_image_pages_and_caches(monkeypatch):
+    """Image-only pages are OCR'd once; identical pages hit the cache"""
+    calls = []
+
+    def fake_tesseract(image_png, language, timeout_seconds):
+        calls.append(language)
+        return "Scanned lecture notes"
+
+    rendered = []
+
+    def counting_render(file, page_numbers, dpi):
+        rendered.append(page_numbers)
+        return render_pdf_pages(file, page_numbers, dpi)
+
+    monkeypatch.setattr(ocr_module, "_run_tesseract", fake_tesseract)
+    monkeypatch.setattr(file_processor_module, "render_pdf_pages", counting_render)
+    ocr_service = make_ocr_service(dpi=72)
+    processor = FileProcessor(['pdf'], ocr_service)
+    pdf_bytes = make_mixed_pdf_bytes()
+
+    result = asyncio.run(processor.process_single_file("scan.pdf", FileBuffer("scan.pdf", data=pdf_bytes)))
+    assert result.success
+    assert "Typed lecture notes" in result.content
+    assert '<page number="2" source="ocr">Scanned lecture notes</page>' in result.content
+    assert calls == ["eng"]
+    assert rendered == [[2]]
+
+    # The same document is served from the cache without rendering the page again
+    result = asyncio.run(processor.process_single_file("scan-copy.pdf", FileBuffer("scan-copy.pdf", data=pdf_bytes)))
+    assert '<page number="2" source="ocr">Scanned lecture notes</page>' in result.content
+    assert calls == ["eng"]
+    assert rendered == [[2]]
+    assert ocr_service.stats() == {"cached_pages": 1}
+
+
+@pytest.mark.unit
+def test_slow_pages_time_out(monkeypatch):
+    """A page exceeding its timeout is skipped instead of blocking the file"""
+    def stuck_tesseract(image_png, language, timeout_seconds):
+        time.sleep(0.5)
+        return "too late"
+
+    monkeypatch.setattr(ocr_module, "_run_tesseract", stuck_tesseract)
+    service = make_ocr_service(dpi=72, page_timeout_seconds=0.05)
+    monkeypatch.setattr(ocr_module, "OCR_TIMEOUT_GRACE_SECONDS", 0)
+    file_buffer = FileBuffer("slow.pdf", data=make_mixed_pdf_bytes())
+    pages = extract_pdf_pages(file_buffer, find_image_pages=True)
+    pages[1].image_png = render_pdf_pages(file_buffer, [2], dpi=72)[2]
+
+    pages = asyncio.run(service.fill_missing_text("slow.pdf", pages, file_buffer.sha256()))
+    assert not pages[1].ocr_applied
+    assert pages[1].text.strip() == ""
+
+
+@pytest.mark.unit
+def test_app_shutdown_stops_the_ocr_pool():
+    """The controller's OCR executor is shut down with the app"""
+    from controllers.file_controller import FileController
+
+    controller = object.__new__(FileController)
+    controller.ocr_service = make_ocr_service()
+    executor = controller.ocr_service._executor
+
+    controller.shutdown()
+    assert controller.ocr_service._executor is None
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pytest
+
+# Add src to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.progress import format_ndjson, format_sse, report_progress, stream_progress
+
+
+async def collect(operation, **kwargs):
+    events = []
+    async for event in stream_progress(operation, **kwargs):
+        events.append((time.monotonic(), event))
+    return events
+
+
+@pytest.mark.unit
+def test_events_stream_in_order_with_immediate_first_byte():
+    """'accepted' arrives before any work finishes, then stage events, then the result"""
+    def fetch_in_thread():
+        time.sleep(0.05)
+        report_progress("file_fetched", filename="a.pdf")
+
+    async def pipeline():
+        await asyncio.to_thread(fetch_in_thread)
+        report_progress("file_extracted", filename="a.pdf", pages=3)
+        await asyncio.sleep(0.05)
+        report_progress("indexed", material_id="m1")
+        return {"material_id": "m1"}
+
+    start = time.monotonic()
+    events = asyncio.run(collect(pipeline))
+    names = [event["event"] for _, event in events]
+
+    assert names == ["accepted", "file_fetched", "file_extracted", "indexed", "completed"]
+    assert events[0][0] - start < 0.02
+    assert events[-1][1]["result"] == {"material_id": "m1"}
+
+
+@pytest.mark.unit
+def test_failures_and_heartbeats():
+    """A failing pipeline ends with 'failed'; idle periods produce heartbeats"""
+    async def pipeline():
+        await asyncio.sleep(0.08)
+        raise RuntimeError("OpenSearch unavailable")
+
+    events = [event for _, event in asyncio.run(collect(pipeline, heartbeat_seconds=0.03))]
+
+    assert events[0]["event"] == "accepted"
+    assert any(event["event"] == "heartbeat" for event in events)
+    assert events[-1]["event"] == "failed"
+    assert events[-1]["error"] == "OpenSearch unavailable"
+
+
+@pytest.mark.unit
+def test_report_progress_without_listener_is_noop():
+    """Stages can always report; nothing happens outside a stream"""
+    report_progress("file_fetched", filename="a.pdf")
+
+
+@pytest.mark.unit
+def test_wire_formats():
+    """NDJSON is one object per line; SSE names the event"""
+    event = {"event": "indexed", "material_id": "m1"}
+    assert json.loads(format_ndjson(event)) == event
+    assert format_ndjson(event).endswith("\n")
+    assert format_sse(event).startswith("event: indexed\ndata: ")
+    assert format_sse(event).endswith("\n\n")
@@ -0,0 +1,219 @@
+import asyncio
+import pytest
+import sys
+import os
+import time
+
+# Add src to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.retry import (
+    async_retry,
+    circuit_protected,
+    compute_backoff,
+    get_circuit_breaker,
+    is_retryable_error,
+    request_deadline,
+    CircuitBreaker,
+)
+from core.exceptions import CircuitOpenError, DeadlineExceededError, S3OperationError
+
+
+class FakeAPIError(Exception):
+    """Stand-in for provider errors that expose an HTTP status code."""
+
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+@pytest.mark.unit
+def test_error_classification():
+    """Transient errors are retryable, auth and request errors are not"""
+    assert is_retryable_error(FakeAPIError(429))
+    assert is_retryable_error(FakeAPIError(503))
+    assert is_retryable_error(asyncio.TimeoutError())
+    assert not is_retryable_error(FakeAPIError(401))
+    assert not is_retryable_error(FakeAPIError(400))
+    assert not is_retryable_error(ValueError("bad input"))
+
+    # Wrapped service errors are classified by their cause
+    try:
+        raise S3OperationError("throttled") from FakeAPIError(503)
+    except S3OperationError as e:
+        assert is_retryable_error(e)
+
+
+@pytest.mark.unit
+def test_full_jitter_bounds():
+    """Jittered delays stay within the capped exponential delay"""
+    for attempt in range(6):
+        delay = compute_backoff(attempt, base_delay=1.0, backoff_factor=2.0, max_delay=5.0)
+        assert 0 <= delay <= min(5.0, 2.0 ** attempt)
+    assert compute_backoff(10, 1.0, 2.0, 5.0, jitter=False) == 5.0
+
+
+@pytest.mark.unit
+def test_fatal_errors_are_not_retried():
+    """Authentication-style errors surface after a single attempt"""
+    calls = []
+
+    @async_retry(max_retries=3, base_delay=0.001)
+    async def flaky():
+        calls.append(1)
+        raise FakeAPIError(401)
+
+    with pytest.raises(FakeAPIError):
+        asyncio.run(flaky())
+    assert len(calls) == 1
+
+
+@pytest.mark.unit
+def test_transient_errors_are_retried():
+    """Transient failures are retried until the call succeeds"""
+    calls = []
+
+    @async_retry(max_retries=3, base_delay=0.001)
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise FakeAPIError(503)
+        return "ok"
+
+    assert asyncio.run(flaky()) == "ok"
+    assert len(calls) == 3
+
+
+@pytest.mark.unit
+def test_deadline_budget_stops_retries():
+    """An exhausted request budget fails fast instead of sleeping"""
+    @async_retry(max_retries=5, base_delay=0.001)
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def run():
+        with request_deadline(0.05):
+            await slow()
+
+    with pytest.raises((DeadlineExceededError, asyncio.TimeoutError)):
+        asyncio.run(run())
+
+
+@pytest.mark.unit
+def test_circuit_breaker_opens_and_fails_fast():
+    """Once open, the breaker rejects calls without touching the dependency"""
+    breaker = get_circuit_breaker("test-dependency")
+    breaker.reset()
+    breaker.failure_threshold = 2
+    breaker.recovery_timeout = 60
+    calls = []
+
+    @async_retry(max_retries=5, base_delay=0.001, dependency="test-dependency")
+    async def down():
+        calls.append(1)
+        raise FakeAPIError(503)
+
+    with pytest.raises(FakeAPIError):
+        asyncio.run(down())
+    assert len(calls) == 2
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(down())
+    assert len(calls) == 2
+
+
+@pytest.mark.unit
+def test_circuit_breaker_half_open_recovery():
+    """A successful probe after the recovery timeout closes the circuit"""
+    breaker = CircuitBreaker("probe", failure_threshold=1, recovery_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # only one probe allowed
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.unit
+def test_circuit_protected_sync_calls():
+    """Synchronous clients only count transient failures against the breaker"""
+    breaker = get_circuit_breaker("test-sync")
+    breaker.reset()
+    breaker.failure_threshold = 1
+
+    @circuit_protected("test-sync")
+    def not_found():
+        raise S3OperationError("missing") from FakeAPIError(404)
+
+    with pytest.raises(S3OperationError):
+        not_found()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+class HangingEmbeddings:
+    """Async embeddings endpoint that never answers."""
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(60)
+
+
+class BlockingOpenSearch:
+    """Blocking client call, like opensearch-py."""
+
+    def __init__(self):
+        self.indices = self
+
+    def bulk(self, **kwargs):
+        time.sleep(0.2)
+        return {"items": []}
+
+    def refresh(self, **kwargs):
+        return {}
+
+
+@pytest.mark.unit
+def test_hung_embedding_call_is_cancelled_by_the_deadline():
+    """The async OpenAI client lets the request deadline cancel a hung call"""
+    from infrastructure.openai.client import OpenAIClient
+
+    get_circuit_breaker("openai").reset()
+    client = object.__new__(OpenAIClient)
+    client.model = "text-embedding-3-small"
+    client.client = type("FakeAsyncOpenAI", (), {"embeddings": HangingEmbeddings()})()
+
+    async def run():
+        with request_deadline(0.05):
+            await client.create_embedding("hello")
+
+    with pytest.raises((DeadlineExceededError, asyncio.TimeoutError)):
+        asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+
+@pytest.mark.unit
+def test_opensearch_calls_do_not_block_the_event_loop():
+    """Blocking bulk requests run in a worker thread while the loop keeps ticking"""
+    from infrastructure.aws.opensearch_client import OpenSearchClient
+
+    get_circuit_breaker("opensearch").reset()
+    client = object.__new__(OpenSearchClient)
+    client.client = BlockingOpenSearch()
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        await client.bulk_index_documents("materials", {"m1": {"text": "x"}})
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(run()) >= 5
@@ -12,6 +12,7 @@ from models import User, TokenBlacklist
 from schemas.auth_schemas import *
 from services.auth_service import *
 from services.email_service import send_verification_email, send_password_reset_email
+from services.principal_cache import principal_cache
 
 logger = logging.getLogger(__name__)
 security = HTTPBearer()
@@ -24,9 +25,6 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         token = credentials.credentials
         payload = jwt.decode(token, config.JWT_SECRET_KEY, algorithms=["HS256"])
         jti = payload.get("jti")
-        if jti and is_token_blacklisted(db, jti):
-            logger.error(f"Token is blacklisted: {jti}")
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been blacklisted")
         if payload.get("type") != "access":
             logger.error(f"Invalid token type: {payload.get('type')}")
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid token type: {payload.get('type')}")
@@ -34,6 +32,13 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         if user_id is None:
             logger.error("No user ID in token")
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token: no user id")
+        # A cached principal was already checked against the blacklist and the user row
+        cached_user = principal_cache.load(db, user_id, jti)
+        if cached_user is not None:
+            return cached_user
+        if jti and is_token_blacklisted(db, jti):
+            logger.error(f"Token is blacklisted: {jti}")
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been blacklisted")
         user = db.query(User).filter(User.id == user_id).first()
         if not user:
             logger.error(f"User not found in database: {user_id}")
@@ -47,6 +52,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             logger.error(f"User account inactive: {user.email}")
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User account is inactive")
         logger.info(f"Authentication successful for user: {user.email}")
+        principal_cache.put(user, jti)
         return user
     except InvalidTokenError as e:
         logger.error(f"JWT Error: {str(e)}")
@@ -59,6 +65,11 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         logger.error(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid token: {str(e)}")
 
+def get_current_user_for_update(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Get current authenticated user re-read from the database (a cached principal may be out of date)"""
+    db.refresh(current_user)
+    return current_user
+
 async def signup_user(user_data: SignupRequest, db: Session) -> MessageResponse:
     """Handle user registration"""
     try:
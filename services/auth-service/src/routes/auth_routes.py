@@ -59,7 +59,7 @@ async def oauth_signin(request: OAuthSigninRequest, db: Session = Depends(get_db
 @router.post("/change-password", response_model=MessageResponse)
 async def change_password(
     request: ChangePasswordRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_for_update),
     db: Session = Depends(get_db)
 ):
     """Change password endpoint"""
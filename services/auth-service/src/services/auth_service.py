@@ -23,7 +23,8 @@ def create_access_token(data: dict) -> str:
     to_encode.update({
         "exp": int(expire.timestamp()),
         "type": "access",
-        "iat": int(now.timestamp())
+        "iat": int(now.timestamp()),
+        "jti": uuid.uuid4().hex
     })
     return jwt.encode(to_encode, config.JWT_SECRET_KEY, algorithm="HS256")
 
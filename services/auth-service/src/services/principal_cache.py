@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from config import config
+from models import User, TokenBlacklist
+
+logger = logging.getLogger(__name__)
+
+PrincipalKey = Tuple[str, Optional[str]]
+
+
+def _detached_copy(user: User) -> User:
+    """Column-for-column copy of ``user`` that can be merged into any session without a SELECT."""
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+class PrincipalCache:
+    """
+    Short-lived cache of authenticated users keyed by (user id, token jti).
+
+    An entry means the user passed the verified/active checks and the token
+    was not blacklisted, so a hit skips both the blacklist and the user query.
+    ``load`` merges the cached copy into the request's session with
+    ``load=False`` so handlers can still modify and commit the user.
+    Committed user changes and newly blacklisted tokens drop the affected
+    entries (see ``register_invalidation``); other instances pick them up
+    once the TTL runs out, so handlers that check or derive values from the
+    user refresh it first (``get_current_user_for_update``).
+
+    user-service keeps its own copy of this module: each service is built
+    from its own ``src/`` against its own ``models.User``. This copy adds
+    the token index for blacklisting; keep the shared parts in step.
+    """
+
+    def __init__(self, ttl_seconds: float = 30, max_entries: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[PrincipalKey, Tuple[User, float]]" = OrderedDict()
+        self._keys_by_user: Dict[str, Set[PrincipalKey]] = {}
+        self._keys_by_token: Dict[str, Set[PrincipalKey]] = {}
+        self._lock = threading.Lock()
+
+    def _drop(self, key: PrincipalKey) -> None:
+        self._entries.pop(key, None)
+        for index, value in ((self._keys_by_user, key[0]), (self._keys_by_token, key[1])):
+            keys = index.get(value)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[value]
+
+    def get(self, user_id: str, jti: Optional[str] = None) -> Optional[User]:
+        key = (str(user_id), jti)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if self._clock() >= expires_at:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return user
+
+    def put(self, user: User, jti: Optional[str] = None) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        key = (str(user.id), jti)
+        snapshot = _detached_copy(user)
+        with self._lock:
+            self._entries[key] = (snapshot, self._clock() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(key[0], set()).add(key)
+            if jti is not None:
+                self._keys_by_token.setdefault(jti, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def load(self, db: Session, user_id: str, jti: Optional[str] = None) -> Optional[User]:
+        """Cached user attached to ``db``, or None on a miss."""
+        snapshot = self.get(user_id, jti)
+        if snapshot is None:
+            return None
+        return db.merge(snapshot, load=False)
+
+    def invalidate_user(self, user_id) -> None:
+        with self._lock:
+            for key in list(self._keys_by_user.get(str(user_id), ())):
+                self._drop(key)
+
+    def invalidate_token(self, jti: str) -> None:
+        with self._lock:
+            for key in list(self._keys_by_token.get(jti, ())):
+                self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self._keys_by_token.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_PENDING_KEY = "principal_cache_invalidations"
+
+
+def register_invalidation(cache: PrincipalCache, session_class=Session) -> None:
+    """Drop cached principals for users changed and tokens blacklisted in a committed transaction."""
+
+    @event.listens_for(session_class, "after_flush")
+    def _collect(session, flush_context):
+        users, tokens = session.info.setdefault(_PENDING_KEY, (set(), set()))
+        for obj in list(session.dirty) + list(session.deleted):
+            if isinstance(obj, User):
+                users.add(str(obj.id))
+        for obj in session.new:
+            if isinstance(obj, TokenBlacklist):
+                tokens.add(obj.token)
+
+    @event.listens_for(session_class, "after_commit")
+    def _invalidate(session):
+        users, tokens = session.info.pop(_PENDING_KEY, ((), ()))
+        for user_id in users:
+            cache.invalidate_user(user_id)
+        for jti in tokens:
+            cache.invalidate_token(jti)
+
+    @event.listens_for(session_class, "after_soft_rollback")
+    def _discard(session, previous_transaction):
+        session.info.pop(_PENDING_KEY, None)
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=config.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=config.PRINCIPAL_CACHE_MAX_ENTRIES
+)
+register_invalidation(principal_cache)
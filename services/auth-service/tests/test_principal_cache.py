@@ -0,0 +1,93 @@
+"""
+Principal Cache Tests
+
+Tests for the authenticated-user cache used by get_current_user:
+hits skip the user and blacklist queries, and commits invalidate entries.
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest.fixture
+def session_factory():
+    from models import Base, User
+    from services.principal_cache import principal_cache
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    db.add(User(id="user-1", email="user1@example.com", password="hashed", is_email_verified=True, is_active=True))
+    db.commit()
+    db.close()
+
+    principal_cache.clear()
+    yield Session
+    principal_cache.clear()
+
+
+class TestPrincipalCache:
+    """Test suite for the principal cache"""
+
+    def test_cached_user_is_attached_to_request_session(self, session_factory):
+        """A hit returns a session-bound copy whose changes commit normally"""
+        from models import User
+        from services.principal_cache import principal_cache
+
+        db = session_factory()
+        principal_cache.put(db.query(User).filter(User.id == "user-1").one(), "jti-1")
+
+        request_db = session_factory()
+        user = principal_cache.load(request_db, "user-1", "jti-1")
+        assert user in request_db
+        user.password = "new-hash"
+        request_db.commit()
+
+        # Credential change drops the entry
+        assert principal_cache.get("user-1", "jti-1") is None
+        assert session_factory().query(User).filter(User.id == "user-1").one().password == "new-hash"
+
+    def test_blacklisting_token_invalidates_only_that_token(self, session_factory):
+        """Committing a blacklist entry drops the cached principal for that jti"""
+        from models import User, TokenBlacklist
+        from services.principal_cache import principal_cache
+
+        db = session_factory()
+        user = db.query(User).filter(User.id == "user-1").one()
+        principal_cache.put(user, "jti-1")
+        principal_cache.put(user, "jti-2")
+
+        db.add(TokenBlacklist(token="jti-1", expires_at=datetime.now(timezone.utc) + timedelta(hours=1)))
+        db.commit()
+
+        assert principal_cache.get("user-1", "jti-1") is None
+        assert principal_cache.get("user-1", "jti-2") is not None
+
+    def test_deactivation_invalidates_all_tokens(self, session_factory):
+        """Deactivating a user drops every cached token for the user"""
+        from models import User
+        from services.principal_cache import principal_cache
+
+        db = session_factory()
+        user = db.query(User).filter(User.id == "user-1").one()
+        principal_cache.put(user, "jti-1")
+        principal_cache.put(user, "jti-2")
+
+        user.is_active = False
+        db.commit()
+
+        assert len(principal_cache) == 0
+
+    def test_ttl_expiry(self):
+        """Entries expire after the TTL"""
+        from models import User
+        from services.principal_cache import PrincipalCache
+
+        now = [0.0]
+        cache = PrincipalCache(ttl_seconds=30, clock=lambda: now[0])
+        cache.put(User(id="user-1", email="user1@example.com"), "jti-1")
+        assert cache.get("user-1", "jti-1") is not None
+        now[0] = 31
+        assert cache.get("user-1", "jti-1") is None
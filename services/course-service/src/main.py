@@ -181,6 +181,18 @@ async def create_lesson(course_id: int, lesson: Lesson, request: Request):
     print(f"Lesson created: {lesson_data['title']}")
     return {"status": 200, "lesson": lesson_data}
 
+class LessonCountsRequest(BaseModel):
+    course_ids: Optional[List[int]] = None
+
+@app.post("/api/v1/lessons/counts")
+async def get_lesson_counts(request: LessonCountsRequest):
+    # One pass over lessons instead of one /courses/{id}/lessons call per course
+    counts = {course_id: 0 for course_id in (request.course_ids if request.course_ids is not None else courses_db)}
+    for lesson in lessons_db.values():
+        if lesson["course_id"] in counts:
+            counts[lesson["course_id"]] += 1
+    return {"status": 200, "counts": {str(course_id): count for course_id, count in counts.items()}}
+
 @app.get("/api/v1/lessons/{lesson_id}")
 async def get_lesson(lesson_id: int):
     if lesson_id not in lessons_db:
@@ -0,0 +1,27 @@
+"""Add (is_active, current_exp) index for rank lookups
+
+Revision ID: a3f1c9d2e7b4
+Revises: 58052b22a77f
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f1c9d2e7b4'
+down_revision: Union[str, Sequence[str], None] = '58052b22a77f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_is_active_current_exp', 'users', ['is_active', 'current_exp'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_is_active_current_exp', table_name='users')
@@ -0,0 +1,40 @@
+"""Add profile_cards table for denormalized public profile cards
+
+Revision ID: b5e7d3a9c1f4
+Revises: f2c6a8d4b9e1
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e7d3a9c1f4'
+down_revision: Union[str, Sequence[str], None] = 'f2c6a8d4b9e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rows are filled by the profile-card backfill job; until then cards are rendered from users on read
+    op.create_table('profile_cards',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('initials', sa.String(), nullable=False),
+        sa.Column('avatar_url', sa.String(), nullable=True),
+        sa.Column('fragment', sa.Text(), nullable=False),
+        sa.Column('format_key', sa.String(), nullable=False),
+        sa.Column('source_hash', sa.String(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('profile_cards')
@@ -0,0 +1,27 @@
+"""Add (week_start, exp) index on activity_weekly for the weekly leaderboard
+
+Revision ID: c8e4f1a7d3b2
+Revises: b5e7d3a9c1f4
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e4f1a7d3b2'
+down_revision: Union[str, Sequence[str], None] = 'b5e7d3a9c1f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_activity_weekly_week_start_exp', 'activity_weekly', ['week_start', 'exp'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_activity_weekly_week_start_exp', table_name='activity_weekly')
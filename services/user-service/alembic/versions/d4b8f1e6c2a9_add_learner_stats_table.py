@@ -0,0 +1,128 @@
+"""Add learner_stats table and move [TEST_DATA] counters out of users.bio
+
+Revision ID: d4b8f1e6c2a9
+Revises: c7d2e8f4a1b6
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4b8f1e6c2a9'
+down_revision: Union[str, Sequence[str], None] = 'c7d2e8f4a1b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+TEST_DATA_PREFIX = '[TEST_DATA]'
+TEST_DATA_FIELDS = {
+    'test_total_courses': 'total_courses',
+    'test_completed_courses': 'completed_courses',
+    'test_total_lessons': 'total_lessons',
+    'test_total_quizzes': 'total_quizzes',
+    'test_completed_quizzes': 'completed_quizzes',
+    'test_average_score': 'average_score',
+}
+
+users = sa.table('users', sa.column('id', sa.String), sa.column('bio', sa.Text))
+
+
+def parse_bio(bio):
+    """Split a bio into (bio without [TEST_DATA] lines, counters); later lines win."""
+    stats = {}
+    kept = []
+    for line in bio.split('\n'):
+        if not line.startswith(TEST_DATA_PREFIX):
+            kept.append(line)
+            continue
+        try:
+            data = json.loads(line[len(TEST_DATA_PREFIX):])
+        except ValueError:
+            continue
+        for key, field in TEST_DATA_FIELDS.items():
+            if data.get(key) is not None:
+                stats[field] = data[key]
+    return '\n'.join(kept).strip(), stats
+
+
+def format_bio(bio, stats):
+    """Append counters to a bio as a [TEST_DATA] line, as /test/update-stats used to."""
+    line = f"{TEST_DATA_PREFIX} {json.dumps({key: stats[field] for key, field in TEST_DATA_FIELDS.items()})}"
+    return f"{bio}\n{line}" if bio else line
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    learner_stats = op.create_table('learner_stats',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('total_courses', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('completed_courses', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('total_lessons', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('total_quizzes', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('completed_quizzes', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('average_score', sa.Float(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Backfill in keyset-ordered batches so no single statement touches every user
+    bind = op.get_bind()
+    last_id = ''
+    while True:
+        rows = bind.execute(
+            sa.select(users.c.id, users.c.bio)
+            .where(users.c.id > last_id, users.c.bio.like(f'%{TEST_DATA_PREFIX}%'))
+            .order_by(users.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        stats_rows = []
+        bio_rows = []
+        for row in rows:
+            bio, stats = parse_bio(row.bio)
+            bio_rows.append({'b_id': row.id, 'b_bio': bio or None})
+            if stats:
+                stats_rows.append({'user_id': row.id, **dict.fromkeys(TEST_DATA_FIELDS.values(), 0), **stats})
+
+        if stats_rows:
+            bind.execute(sa.insert(learner_stats), stats_rows)
+        bind.execute(
+            users.update().where(users.c.id == sa.bindparam('b_id')).values(bio=sa.bindparam('b_bio')),
+            bio_rows
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    learner_stats = sa.table('learner_stats', sa.column('user_id', sa.String),
+                             *(sa.column(field) for field in TEST_DATA_FIELDS.values()))
+
+    # The table is the only copy of the counters: write them back into users.bio before dropping it
+    bind = op.get_bind()
+    last_id = ''
+    while True:
+        rows = bind.execute(
+            sa.select(learner_stats, users.c.bio)
+            .select_from(learner_stats.join(users, users.c.id == learner_stats.c.user_id))
+            .where(learner_stats.c.user_id > last_id)
+            .order_by(learner_stats.c.user_id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].user_id
+        bind.execute(
+            users.update().where(users.c.id == sa.bindparam('b_id')).values(bio=sa.bindparam('b_bio')),
+            [{'b_id': row.user_id, 'b_bio': format_bio(row.bio, row._mapping)} for row in rows]
+        )
+
+    op.drop_table('learner_stats')
@@ -0,0 +1,55 @@
+"""Add activity event log with daily and weekly rollups
+
+Revision ID: e9a3c5b7d1f2
+Revises: d4b8f1e6c2a9
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9a3c5b7d1f2'
+down_revision: Union[str, Sequence[str], None] = 'd4b8f1e6c2a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('activity_events',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('exp', sa.Integer(), nullable=False),
+        sa.Column('duration_seconds', sa.Integer(), nullable=False),
+        sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_activity_events_user_id_occurred_at', 'activity_events', ['user_id', 'occurred_at'])
+    op.create_index('ix_activity_events_occurred_at', 'activity_events', ['occurred_at'])
+
+    for table_name, key_column in (('activity_daily', 'day'), ('activity_weekly', 'week_start')):
+        op.create_table(table_name,
+            sa.Column('user_id', sa.String(), nullable=False),
+            sa.Column(key_column, sa.Date(), nullable=False),
+            sa.Column('event_count', sa.Integer(), nullable=False),
+            sa.Column('exp', sa.BigInteger(), nullable=False),
+            sa.Column('duration_seconds', sa.BigInteger(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('user_id', key_column)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('activity_weekly')
+    op.drop_table('activity_daily')
+    op.drop_index('ix_activity_events_occurred_at', table_name='activity_events')
+    op.drop_index('ix_activity_events_user_id_occurred_at', table_name='activity_events')
+    op.drop_table('activity_events')
@@ -0,0 +1,40 @@
+"""Add user_streaks table for study streaks and daily goals
+
+Revision ID: f2c6a8d4b9e1
+Revises: e9a3c5b7d1f2
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c6a8d4b9e1'
+down_revision: Union[str, Sequence[str], None] = 'e9a3c5b7d1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_streaks',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('current_streak', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('longest_streak', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_active_day', sa.Date(), nullable=True),
+        sa.Column('daily_goal_minutes', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('progress_day', sa.Date(), nullable=True),
+        sa.Column('progress_seconds', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index('ix_user_streaks_last_active_day', 'user_streaks', ['last_active_day'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_streaks_last_active_day', table_name='user_streaks')
+    op.drop_table('user_streaks')
@@ -20,6 +20,23 @@ class Config:
     
     # Database configuration
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    # The sync and async pools together keep the single 20-connection pool each process always had
+    # (per database: every read replica gets the same pair). Raise them only if RDS has the connections to spare.
+    # Sync engine: background jobs, write buffers and the sync services' worker threads
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 0))
+    # Async engine (asyncpg / aiosqlite) used by the non-blocking handlers; its connections never block the event loop
+    DB_ASYNC_POOL_SIZE: int = int(os.getenv("DB_ASYNC_POOL_SIZE", 10))
+    DB_ASYNC_MAX_OVERFLOW: int = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", 0))
+    # Read replicas (comma-separated URLs) for read-only endpoints; reads fall back to the primary when none is usable
+    # Reads after a write stay on the primary for MAX_LAG + CHECK_INTERVAL seconds, but only in the worker that
+    # wrote: the pin is per process, so with several workers or instances a read routed elsewhere can still see
+    # a replica up to MAX_LAG behind. Keep MAX_LAG within what those reads tolerate, or route a user to one worker.
+    DATABASE_REPLICA_URLS: List[str] = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    DB_REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", 5))
+    DB_REPLICA_CHECK_INTERVAL_SECONDS: float = float(os.getenv("DB_REPLICA_CHECK_INTERVAL_SECONDS", 5))
+    DB_REPLICA_RETRY_AFTER_SECONDS: float = float(os.getenv("DB_REPLICA_RETRY_AFTER_SECONDS", 30))
+    DB_REPLICA_CONNECT_TIMEOUT_SECONDS: int = int(os.getenv("DB_REPLICA_CONNECT_TIMEOUT_SECONDS", 3))
 
     # JWT configuration (must match auth service)
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "")
@@ -31,21 +48,105 @@ class Config:
     AWS_SECRET_ACCESS_KEY: str = os.getenv("SECRET_ACCESS_KEY", "")
     AWS_REGION: str = "ap-northeast-1"
     S3_USER_BUCKET_NAME: str = os.getenv("S3_USER_BUCKET_NAME", "")
+    # Shared AWS clients: pool size covers concurrent avatar uploads from executor threads
+    AWS_MAX_POOL_CONNECTIONS: int = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", 20))
+    AWS_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("AWS_CONNECT_TIMEOUT_SECONDS", 5))
+    AWS_READ_TIMEOUT_SECONDS: float = float(os.getenv("AWS_READ_TIMEOUT_SECONDS", 30))
+
+    # Authenticated principal cache (0 disables)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 30))
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", 10000))
 
     # File upload configuration
     UPLOAD_DIR: str = "./uploads"
     MAX_FILE_SIZE: int = 5242880  # 5MB
     ALLOWED_FILE_TYPES: List[str] = ["jpg", "jpeg", "png", "gif"]
+    AVATAR_WORKERS: int = int(os.getenv("AVATAR_WORKERS", 2))
+
+    # Presigned avatar URLs (SigV4 allows at most 7 days)
+    AVATAR_URL_EXPIRES_SECONDS: int = int(os.getenv("AVATAR_URL_EXPIRES_SECONDS", 86400))
+    AVATAR_URL_REFRESH_MARGIN_SECONDS: int = int(os.getenv("AVATAR_URL_REFRESH_MARGIN_SECONDS", 600))
+    AVATAR_URL_CACHE_MAX_ENTRIES: int = int(os.getenv("AVATAR_URL_CACHE_MAX_ENTRIES", 10000))
+    AVATAR_REDIRECT_MAX_AGE_SECONDS: int = int(os.getenv("AVATAR_REDIRECT_MAX_AGE_SECONDS", 300))
+
+    # /users-by-ids profile cards
+    PROFILE_CACHE_TTL_SECONDS: float = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", 60))
+    PROFILE_CACHE_NEGATIVE_TTL_SECONDS: float = float(os.getenv("PROFILE_CACHE_NEGATIVE_TTL_SECONDS", 5))
+    PROFILE_CACHE_MAX_ENTRIES: int = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", 50000))
+    PROFILE_LOOKUP_CHUNK_SIZE: int = int(os.getenv("PROFILE_LOOKUP_CHUNK_SIZE", 500))
+    # How often missing or outdated profile_cards rows (users created or changed by the auth service) are rewritten
+    PROFILE_CARD_BACKFILL_INTERVAL_SECONDS: float = float(os.getenv("PROFILE_CARD_BACKFILL_INTERVAL_SECONDS", 600))
+
+    # Learning activity log: local day boundaries, batching and raw-event retention
+    ACTIVITY_TIMEZONE_OFFSET_HOURS: int = int(os.getenv("ACTIVITY_TIMEZONE_OFFSET_HOURS", 7))
+    ACTIVITY_MAX_BACKDATE_DAYS: int = int(os.getenv("ACTIVITY_MAX_BACKDATE_DAYS", 7))
+    ACTIVITY_BATCH_WINDOW_MS: float = float(os.getenv("ACTIVITY_BATCH_WINDOW_MS", 0))
+    ACTIVITY_EVENT_RETENTION_DAYS: int = int(os.getenv("ACTIVITY_EVENT_RETENTION_DAYS", 90))
+    ACTIVITY_COMPACTION_INTERVAL_SECONDS: float = float(os.getenv("ACTIVITY_COMPACTION_INTERVAL_SECONDS", 3600))
+
+    # Study streaks: how often broken streaks are closed out (idempotent, so hourly covers local midnight)
+    STREAK_CLOSEOUT_INTERVAL_SECONDS: float = float(os.getenv("STREAK_CLOSEOUT_INTERVAL_SECONDS", 3600))
+
+    # EXP writes: coalesce increments arriving within this window (0 = write each one immediately)
+    EXP_COALESCE_WINDOW_MS: float = float(os.getenv("EXP_COALESCE_WINDOW_MS", 0))
+
+    # Leaderboard snapshots
+    LEADERBOARD_SIZE: int = int(os.getenv("LEADERBOARD_SIZE", 10))
+    LEADERBOARD_REFRESH_SECONDS: int = int(os.getenv("LEADERBOARD_REFRESH_SECONDS", 300))
+
+    # Per-user dashboard snapshots (stale-while-revalidate)
+    DASHBOARD_CACHE_TTL_SECONDS: float = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", 30))
+    DASHBOARD_CACHE_MAX_STALE_SECONDS: float = float(os.getenv("DASHBOARD_CACHE_MAX_STALE_SECONDS", 300))
+    DASHBOARD_CACHE_MAX_ENTRIES: int = int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES", 10000))
+
+    # Serialize large success payloads (/all, /dashboard) with orjson, skipping response-model validation
+    FAST_JSON_RESPONSES: bool = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
+
+    # Rank lookup: optional in-memory EXP index (per process, reloaded periodically)
+    RANK_INDEX_ENABLED: bool = os.getenv("RANK_INDEX_ENABLED", "false").lower() == "true"
+    RANK_INDEX_BUCKET_SIZE: int = int(os.getenv("RANK_INDEX_BUCKET_SIZE", 100))
+    RANK_INDEX_REFRESH_SECONDS: int = int(os.getenv("RANK_INDEX_REFRESH_SECONDS", 300))
 
     # Frontend configuration
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
+    # Public URL of this service (used to build avatar links)
+    USER_SERVICE_URL: str = os.getenv("USER_SERVICE_URL", "")
+
+    # Downstream services used for dashboard stats
+    COURSE_SERVICE_URL: str = os.getenv("COURSE_SERVICE_URL", "http://localhost:8002")
+    QUIZ_SERVICE_URL: str = os.getenv("QUIZ_SERVICE_URL", "http://localhost:8003")
+    DOWNSTREAM_TIMEOUT_SECONDS: float = float(os.getenv("DOWNSTREAM_TIMEOUT_SECONDS", 2.0))
+    DASHBOARD_STATS_TIMEOUT_SECONDS: float = float(os.getenv("DASHBOARD_STATS_TIMEOUT_SECONDS", 3.0))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", 50))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+
 config = Config()
 
 # Helper functions for compatibility
 def get_database_url():
     return config.DATABASE_URL
 
+# Async driver for each sync URL scheme the service is deployed with
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_database_url(url: str) -> str:
+    """Same database through its async driver; asyncpg takes ``ssl`` instead of libpq's ``sslmode``."""
+    scheme, sep, rest = url.partition("://")
+    if not sep or scheme not in _ASYNC_DRIVERS:
+        return url
+    if _ASYNC_DRIVERS[scheme] == "postgresql+asyncpg":
+        rest = rest.replace("sslmode=", "ssl=")
+    return f"{_ASYNC_DRIVERS[scheme]}://{rest}"
+
+def get_async_database_url():
+    return to_async_database_url(config.DATABASE_URL)
+
 def get_debug_mode():
     return config.DEBUG
 
@@ -1,91 +1,50 @@
+import asyncio
 import logging
 import os
 import uuid
 import aiofiles
 from pathlib import Path
-from fastapi import HTTPException, status, UploadFile, File
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi import HTTPException, Response, status, UploadFile, File
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from PIL import Image
-import io
-import boto3
 from botocore.exceptions import ClientError, NoCredentialsError
-import requests
 from jose import jwt
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from models import User
+from database import SessionLocal, async_read_session, read_session, replica_router
 from schemas.user_schemas import *
 from config import config
+from services.learner_stats_service import get_learner_stats, reset_learner_stats, set_learner_stats
+from services.level_service import (
+    LEVEL_EXP_THRESHOLDS, get_exp_for_level, auto_level_up
+)
+from services.activity_service import (
+    ActivityEventBuffer, ActivityRecord, compact_events, get_daily_activity, get_weekly_activity, get_year_heatmap,
+    normalize_record, record_events, record_weekly_exp, today_local
+)
+from services.streak_service import close_out_streaks, get_streak, set_daily_goal
+from services.avatar_service import AvatarProcessingError, avatar_processor
+from services.aws_clients import get_s3_client
+from services.avatar_url_service import (
+    AvatarNotFound, avatar_link, avatar_object_key, avatar_url_service, etag_matches, format_avatar_value, parse_avatar_value,
+    public_avatar_id
+)
+from services.fast_json import fast_json_response
+from services.exp_service import ExpWriteBuffer, award_exp_bulk, increment_exp
+from services.principal_cache import principal_cache
+from services.profile_cards import backfill_profile_cards, refresh_profile_cards
+from services.profile_lookup import profile_lookup
+from services.rank_service import get_user_rank, record_exp_change
+from services.leaderboard_service import leaderboard_service
+from services.dashboard_cache import dashboard_cache
+from services.user_listing import UserListQuery, build_statement, iter_users_ndjson, list_users
+from services.dashboard_stats import fetch_dashboard_stats, EMPTY_COURSE_STATS, EMPTY_QUIZ_STATS
 
 logger = logging.getLogger(__name__)
 
-# ===== LEVEL SYSTEM CONFIGURATION =====
-LEVEL_EXP_THRESHOLDS = [
-    0,      # Level 1: 0 exp
-    100,    # Level 2: 100 exp
-    300,    # Level 3: 300 exp
-    600,    # Level 4: 600 exp
-    1000,   # Level 5: 1000 exp
-    1500,   # Level 6: 1500 exp
-    2100,   # Level 7: 2100 exp
-    2800,   # Level 8: 2800 exp
-    3600,   # Level 9: 3600 exp
-    4500,   # Level 10: 4500 exp
-    5500,   # Level 11: 5500 exp
-    6600,   # Level 12: 6600 exp
-    7800,   # Level 13: 7800 exp
-    9100,   # Level 14: 9100 exp
-    10500,  # Level 15: 10500 exp
-]
-
-def get_exp_for_level(level: int) -> int:
-    if level <= 1:
-        return 0
-    
-    level_index = level - 1
-    
-    if level_index < len(LEVEL_EXP_THRESHOLDS):
-        return LEVEL_EXP_THRESHOLDS[level_index]
-    
-    base_level = len(LEVEL_EXP_THRESHOLDS)
-    base_exp = LEVEL_EXP_THRESHOLDS[-1]
-    growth_factor = 1.3 
-    
-    additional_levels = level - base_level
-    additional_exp = base_exp * (growth_factor ** additional_levels) - base_exp
-    
-    return int(base_exp + additional_exp)
-
-def calculate_level_from_exp(current_exp: int) -> tuple[int, int, int]:
-    if current_exp <= 0:
-        return 1, 0, get_exp_for_level(2)
-    
-    level = 1
-    while True:
-        next_level_exp = get_exp_for_level(level + 1)
-        if current_exp < next_level_exp:
-            break
-        level += 1
-        
-        if level > 1000:
-            break
-    
-    current_level_exp = get_exp_for_level(level)
-    next_level_exp = get_exp_for_level(level + 1)
-    
-    return level, current_level_exp, next_level_exp
-
-from typing import Optional
-
-def auto_level_up(current_exp: int, current_level: Optional[int] = None) -> tuple[int, int, bool]:
-    new_level, current_level_exp, next_level_exp = calculate_level_from_exp(current_exp)
-    
-    level_increased = current_level is not None and new_level > current_level
-    
-    return new_level, next_level_exp, level_increased
-
 def create_access_token(email: str) -> str:
     try:
         expire = datetime.utcnow() + timedelta(minutes=15)
@@ -100,21 +59,25 @@ def create_access_token(email: str) -> str:
         logger.error(f"Error creating access token: {str(e)}")
         return ""
 
-def get_s3_client():
-    try:
-        if config.AWS_ACCESS_KEY_ID and config.AWS_SECRET_ACCESS_KEY:
-            return boto3.client(
-                's3',
-                aws_access_key_id=config.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=config.AWS_SECRET_ACCESS_KEY,
-                region_name=config.AWS_REGION
-            )
-        return boto3.client('s3', region_name=config.AWS_REGION)
-    except Exception as e:
-        logger.error(f"S3 client error: {e}")
-        return None
+def _success_response(model_class, **fields):
+    # Payloads built here from our own rows; the fast path skips re-validating them against the response model
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(model_class, **fields)
+    return model_class(**fields)
+
+def _on_user_written(user_id, profile: bool = False) -> None:
+    # Reads of this user stay on the primary until the replicas have caught up, so caches refill with the new row
+    replica_router.note_write(user_id)
+    dashboard_cache.invalidate(user_id)
+    if profile:
+        profile_lookup.invalidate(user_id)
 
-async def change_user_info(request: ChangeInfoRequest, current_user: User, db: Session) -> MessageResponse:
+def _on_profile_written(user: User) -> None:
+    # The profile_cards row was rewritten in the same transaction; in-memory copies are refreshed here
+    _on_user_written(user.id, profile=True)
+    leaderboard_service.record_profile_change(user)
+
+async def change_user_info(request: ChangeInfoRequest, current_user: User, db: AsyncSession) -> MessageResponse:
     try:
         if request.family_name is not None:
             setattr(current_user, 'family_name', request.family_name)
@@ -126,39 +89,59 @@ async def change_user_info(request: ChangeInfoRequest, current_user: User, db: S
             setattr(current_user, 'sex', request.sex)
         if request.bio is not None:
             setattr(current_user, 'bio', request.bio)
-        db.commit()
+        if request.family_name is not None or request.given_name is not None:
+            await db.run_sync(refresh_profile_cards, [current_user])
+        await db.commit()
+        _on_profile_written(current_user)
         logger.info(f"User info updated: {current_user.email}")
         return MessageResponse(status=200, message="Bạn đã đổi thông tin cá nhân thành công")
     except Exception as e:
         logger.error(f"Update info failed: {getattr(current_user, 'email', 'unknown')}: {str(e)}")
-        db.rollback()
+        await db.rollback()
         return MessageResponse(status=401, message="Có lỗi xảy ra, xin vui lòng thử lại")
 
-async def get_user_avatar(avatar_id: str):
+async def get_user_avatar(avatar_id: str, db: AsyncSession, version: Optional[str] = None, size: Optional[int] = None,
+                          extension: str = "jpg", if_none_match: Optional[str] = None):
+    s3_client = get_s3_client()
+    if not s3_client:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="S3 client not available")
+    bucket_name = config.S3_USER_BUCKET_NAME
+    if not bucket_name:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="S3 bucket not configured")
+
+    avatar_id, requested_version = parse_avatar_value(avatar_id)
+    requested_version = version or requested_version
+    recorded = (await db.execute(select(User.avatar_url).where(User.id == avatar_id))).first()
+    if recorded is not None:
+        # The users table is authoritative: no avatar means no object, and a recorded one needs no HEAD
+        if not recorded.avatar_url:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar không tồn tại")
+        if recorded.avatar_url.startswith('http'):
+            return RedirectResponse(url=recorded.avatar_url, status_code=status.HTTP_302_FOUND,
+                                    headers={"Cache-Control": f"public, max-age={config.AVATAR_REDIRECT_MAX_AGE_SECONDS}"})
+        _, current_version = parse_avatar_value(recorded.avatar_url)
+    else:
+        current_version = requested_version
+
+    avatar_key = avatar_object_key(avatar_id, current_version, size, extension)
     try:
-        s3_client = get_s3_client()
-        if not s3_client:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="S3 client not available")
-        bucket_name = config.S3_USER_BUCKET_NAME
-        if not bucket_name:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="S3 bucket not configured")
-        avatar_key = f"avatars/{avatar_id}"
-        try:
-            s3_client.head_object(Bucket=bucket_name, Key=avatar_key)
-            presigned_url = s3_client.generate_presigned_url('get_object', Params={'Bucket': bucket_name, 'Key': avatar_key}, ExpiresIn=3600)
-            from fastapi.responses import RedirectResponse
-            return RedirectResponse(url=presigned_url)
-        except ClientError as e:
-            if e.response['Error']['Code'] == '404':
-                logger.error(f"Avatar not found: {avatar_key}")
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar không tồn tại")
-            logger.error(f"S3 error: {e.response['Error']['Message']}")
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Lỗi khi truy cập avatar")
-    except Exception as e:
-        logger.error(f"Avatar error {avatar_id}: {str(e)}")
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Không tìm thấy ảnh")
+        if recorded is None:
+            signed = await asyncio.to_thread(avatar_url_service.get_url, s3_client, bucket_name, avatar_key, current_version, True)
+        else:
+            signed = avatar_url_service.get_url(s3_client, bucket_name, avatar_key, current_version)
+    except AvatarNotFound:
+        logger.error(f"Avatar not found: {avatar_key}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar không tồn tại")
+    except ClientError as e:
+        logger.error(f"S3 error: {e.response['Error']['Message']}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Lỗi khi truy cập avatar")
+
+    headers = avatar_url_service.cache_headers(signed, versioned=current_version is not None and requested_version == current_version)
+    if etag_matches(if_none_match, signed.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return RedirectResponse(url=signed.url, status_code=status.HTTP_302_FOUND, headers=headers)
 
-async def update_user_avatar(avatar_file: UploadFile, current_user: User, db: Session) -> MessageResponse:
+async def update_user_avatar(avatar_file: UploadFile, current_user: User, db: AsyncSession) -> MessageResponse:
     try:
         if not avatar_file.content_type or not avatar_file.content_type.startswith('image/'):
             return MessageResponse(status=400, message="File phải là ảnh (JPG, PNG, WebP)")
@@ -173,51 +156,34 @@ async def update_user_avatar(avatar_file: UploadFile, current_user: User, db: Se
             return MessageResponse(status=500, message="Cấu hình lưu trữ không đầy đủ")
         avatar_id = str(current_user.id)
         try:
-            image = Image.open(io.BytesIO(contents))
-            if image.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'P':
-                    image = image.convert('RGBA')
-                background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-                image = background
-            image = image.resize((400, 400), Image.Resampling.LANCZOS)
-            img_buffer = io.BytesIO()
-            image.save(img_buffer, format='JPEG', optimize=True, quality=85)
-            img_buffer.seek(0)
-        except Exception:
+            variants = await avatar_processor.render(contents)
+        except AvatarProcessingError:
             return MessageResponse(status=400, message="Không thể xử lý ảnh. Vui lòng thử ảnh khác")
         try:
-            s3_key = f"avatars/{avatar_id}"
-            s3_client.upload_fileobj(
-                img_buffer,
-                bucket_name,
-                s3_key,
-                ExtraArgs={
-                    'ContentType': 'image/jpeg',
-                    'CacheControl': 'public, max-age=31536000',
-                    'Metadata': {
-                        'user_id': str(current_user.id),
-                        'user_email': current_user.email,
-                        'upload_timestamp': str(uuid.uuid1().time),
-                        'original_filename': avatar_file.filename or 'unknown'
-                    }
-                }
-            )
+            await avatar_processor.upload(s3_client, bucket_name, avatar_id, variants, {
+                'user_id': str(current_user.id),
+                'user_email': current_user.email,
+                'upload_timestamp': str(uuid.uuid1().time),
+                'original_filename': avatar_file.filename or 'unknown'
+            })
         except Exception:
             return MessageResponse(status=500, message="Lỗi khi tải ảnh lên. Vui lòng thử lại")
-        current_user.avatar_url = avatar_id
-        db.commit()
+        current_user.avatar_url = format_avatar_value(avatar_id, uuid.uuid4().hex[:12])
+        await db.run_sync(refresh_profile_cards, [current_user])
+        await db.commit()
+        avatar_url_service.invalidate(avatar_id)
+        _on_profile_written(current_user)
         logger.info(f"Avatar updated: {current_user.email}")
         return MessageResponse(status=200, message="Bạn đã cập nhật Avatar thành công")
     except Exception:
-        db.rollback()
+        await db.rollback()
         return MessageResponse(status=500, message="Có lỗi xảy ra khi tải ảnh lên, xin vui lòng thử lại")
 
-async def get_user_info(user_id: Optional[str], current_user: User, db: Session) -> UserInfoResponse:
+async def get_user_info(user_id: Optional[str], current_user: User, db: AsyncSession) -> UserInfoResponse:
     try:
         target_user = current_user
         if user_id:
-            target_user = db.query(User).filter(User.id == user_id).first()
+            target_user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
             if not target_user:
                 return UserInfoResponse(
                     status=401,
@@ -228,13 +194,7 @@ async def get_user_info(user_id: Optional[str], current_user: User, db: Session)
         if getattr(target_user, 'dob', None):
             dob_formatted = getattr(target_user, 'dob').strftime("%d/%m/%Y")
         
-        avatar_url = None
-        avatar_id = getattr(target_user, 'avatar_url', None)
-        if avatar_id:
-            if avatar_id.startswith('http'):
-                avatar_url = avatar_id
-            else:
-                avatar_url = f"{config.USER_SERVICE_URL}/avatar/?user_id={target_user.id}"
+        avatar_url = avatar_link(target_user.id, getattr(target_user, 'avatar_url', None))
         
         user_info = {
             "id": getattr(target_user, 'id', None),
@@ -242,7 +202,7 @@ async def get_user_info(user_id: Optional[str], current_user: User, db: Session)
             "family_name": getattr(target_user, 'family_name', None),
             "given_name": getattr(target_user, 'given_name', None),
             "birth_date": dob_formatted,
-            "avatar_id": avatar_id,
+            "avatar_id": public_avatar_id(getattr(target_user, 'avatar_url', None)),
             "avatar_url": avatar_url,
             "level": getattr(target_user, 'level', 1),
             "current_exp": getattr(target_user, 'current_exp', 0),
@@ -265,45 +225,21 @@ async def get_user_info(user_id: Optional[str], current_user: User, db: Session)
             message="Có lỗi xảy ra, xin vui lòng thử lại"
         )
 
-async def get_all_users(db: Session) -> UsersListResponse:
+async def get_all_users(db: AsyncSession, query: Optional[UserListQuery] = None) -> UsersListResponse:
     try:
-        users = db.query(User).filter(User.is_active == True).all()
-        
-        users_info = []
-        for user in users:
-            dob_formatted = None
-            if getattr(user, 'dob', None):
-                dob_formatted = getattr(user, 'dob').strftime("%d/%m/%Y")
-            
-            avatar_url = None
-            avatar_id = getattr(user, 'avatar_url', None)
-            if avatar_id:
-                if avatar_id.startswith('http'):
-                    avatar_url = avatar_id
-                else:
-                    avatar_url = f"{config.USER_SERVICE_URL}/avatar/?user_id={user.id}"
-                
-            user_data = {
-                "user_id": getattr(user, 'id', None),
-                "family_name": getattr(user, 'family_name', None),
-                "given_name": getattr(user, 'given_name', None),
-                "dob": dob_formatted,
-                "avatar_id": avatar_id,
-                "avatar_url": avatar_url,
-                "level": getattr(user, 'level', 1),
-                "current_exp": getattr(user, 'current_exp', 0),
-                "require_exp": getattr(user, 'require_exp', 1000),
-                "sex": getattr(user, 'sex', None),
-                "bio": getattr(user, 'bio', None),
-                "remind_time": getattr(user, 'remind_time', None)
-            }
-            users_info.append(user_data)
-        
-        return UsersListResponse(
+        users_info, next_cursor = await db.run_sync(list_users, query or UserListQuery())
+        return _success_response(
+            UsersListResponse,
             status=200,
-            infos=users_info
+            infos=users_info,
+            next_cursor=next_cursor
         )
         
+    except ValueError as e:
+        return UsersListResponse(
+            status=400,
+            message=str(e)
+        )
     except Exception as e:
         logger.error(f"Error getting all users: {str(e)}")
         return UsersListResponse(
@@ -311,10 +247,23 @@ async def get_all_users(db: Session) -> UsersListResponse:
             message="Có lỗi xảy ra, xin vui lòng thử lại"
         )
 
-async def set_notify_time(request: NotifyTimeRequest, current_user: User, db: Session) -> MessageResponse:
+async def export_all_users(query: UserListQuery):
+    try:
+        # Validate up front so bad parameters get a normal error response
+        build_statement(query)
+    except ValueError as e:
+        return UsersListResponse(status=400, message=str(e))
+    return StreamingResponse(
+        iter_users_ndjson(read_session, query),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=users.ndjson"}
+    )
+
+async def set_notify_time(request: NotifyTimeRequest, current_user: User, db: AsyncSession) -> MessageResponse:
     try:
         setattr(current_user, 'remind_time', request.remind_time)
-        db.commit()
+        await db.commit()
+        _on_user_written(current_user.id)
         logger.info(f"Successfully set remind time for user {current_user.email} to {request.remind_time}")
         return MessageResponse(
             status=200,
@@ -323,66 +272,20 @@ async def set_notify_time(request: NotifyTimeRequest, current_user: User, db: Se
         
     except Exception as e:
         logger.error(f"Failed to set remind time for user {getattr(current_user, 'email', 'unknown')}: {str(e)}")
-        db.rollback()
+        await db.rollback()
         return MessageResponse(
             status=401,
             message="Có lỗi xảy ra, xin vui lòng thử lại"
         )
 
-async def get_user_dashboard(current_user: User, db: Session) -> DashboardResponse:
+async def get_user_dashboard(current_user: User) -> DashboardResponse:
     try:
-        avatar_url = None
-        avatar_id = getattr(current_user, 'avatar_url', None)
-        if avatar_id:
-            if avatar_id.startswith('http'):
-                avatar_url = avatar_id
-            else:
-                avatar_url = f"{config.USER_SERVICE_URL}/avatar/?user_id={current_user.id}"
-        course_stats = await get_course_stats(current_user.email)
-        quiz_stats = await get_quiz_stats(current_user.email)
-        rank_data = await calculate_user_rank(current_user, db)
-        leaderboard = await get_leaderboard_data(db)
-        
-        # Calculate real dashboard data
-        dashboard_info = {
-            "id": current_user.id,
-            "email": current_user.email,
-            "level": getattr(current_user, 'level', 1),
-            "current_exp": getattr(current_user, 'current_exp', 0),
-            "require_exp": getattr(current_user, 'require_exp', 100),
-            "family_name": getattr(current_user, 'family_name', None),
-            "given_name": getattr(current_user, 'given_name', None),
-            "avatar_url": avatar_url,
-            "remind_time": getattr(current_user, 'remind_time', None),
-            
-            # Real course statistics
-            "course_num": course_stats["total_courses"],
-            "total_courses": course_stats["total_courses"],
-            "finish_course_num": course_stats["completed_courses"],
-            "completed_courses": course_stats["completed_courses"],
-            "lesson_num": course_stats["total_lessons"],
-            
-            # Real quiz statistics
-            "quiz_num": quiz_stats["total_quizzes"],
-            "total_quizzes": quiz_stats["total_quizzes"],
-            "completed_quizzes": quiz_stats["completed_quizzes"],
-            "average_quiz_score": quiz_stats["average_score"],
-            "average_score": quiz_stats["average_score"],
-            
-            # Real ranking data
-            "rank": rank_data["rank"],
-            "user_num": rank_data["total_users"],
-            
-            # Leaderboard data for display
-            "user_top_rank": leaderboard,
-            
-            # Activity data placeholder
-            "learning_history": [],
-        }
-        
-        return DashboardResponse(
+        user_id = current_user.id
+        dashboard_info = await dashboard_cache.get(user_id, build=lambda: _load_dashboard_info(user_id))
+        return _success_response(
+            DashboardResponse,
             status=200,
-            info=dashboard_info
+            info=dict(dashboard_info)
         )
         
     except Exception as e:
@@ -392,149 +295,276 @@ async def get_user_dashboard(current_user: User, db: Session) -> DashboardRespon
             message="Có lỗi xảy ra, xin vui lòng thử lại"
         )
 
-async def save_user_activity(current_user: User, db: Session) -> MessageResponse:
+async def _load_dashboard_info(user_id: str) -> dict:
+    # Shared with concurrent requests and background refreshes that can outlive this request, so it owns its session
+    async with await async_read_session(user_id) as db:
+        user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+        if user is None:
+            raise ValueError(f"User {user_id} no longer exists")
+        return await _build_dashboard_info(user, db)
+
+async def _build_dashboard_info(current_user: User, db: AsyncSession) -> dict:
+    avatar_id = getattr(current_user, 'avatar_url', None)
+    avatar_url = avatar_link(current_user.id, avatar_id)
+    course_stats, quiz_stats, partial_stats = await get_dashboard_stats(current_user.email)
+    if partial_stats:
+        # Fill what the downstream services couldn't provide from the locally recorded counters
+        learner_stats = await db.run_sync(get_learner_stats, current_user.id)
+        if "courses" in partial_stats:
+            course_stats = {field: value or learner_stats[field] for field, value in course_stats.items()}
+        if "quizzes" in partial_stats:
+            quiz_stats = {field: value or learner_stats[field] for field, value in quiz_stats.items()}
+    rank_data = await calculate_user_rank(current_user, db)
+    leaderboard = await get_leaderboard_data(db)
+    streak = await db.run_sync(get_streak, current_user.id)
+    learning_history = await db.run_sync(get_daily_activity, current_user.id, today_local() - timedelta(days=364), today_local())
+    
+    # Calculate real dashboard data
+    dashboard_info = {
+        "id": current_user.id,
+        "email": current_user.email,
+        "level": getattr(current_user, 'level', 1),
+        "current_exp": getattr(current_user, 'current_exp', 0),
+        "require_exp": getattr(current_user, 'require_exp', 100),
+        "family_name": getattr(current_user, 'family_name', None),
+        "given_name": getattr(current_user, 'given_name', None),
+        "avatar_url": avatar_url,
+        "remind_time": getattr(current_user, 'remind_time', None),
+        
+        # Real course statistics
+        "course_num": course_stats["total_courses"],
+        "total_courses": course_stats["total_courses"],
+        "finish_course_num": course_stats["completed_courses"],
+        "completed_courses": course_stats["completed_courses"],
+        "lesson_num": course_stats["total_lessons"],
+        
+        # Real quiz statistics
+        "quiz_num": quiz_stats["total_quizzes"],
+        "total_quizzes": quiz_stats["total_quizzes"],
+        "completed_quizzes": quiz_stats["completed_quizzes"],
+        "average_quiz_score": quiz_stats["average_score"],
+        "average_score": quiz_stats["average_score"],
+        
+        # Real ranking data
+        "rank": rank_data["rank"],
+        "user_num": rank_data["total_users"],
+        
+        # Leaderboard data for display
+        "user_top_rank": leaderboard,
+        
+        # Daily activity for the last year, read from the rollups
+        "learning_history": learning_history,
+        "study_streak": streak["current_streak"],
+        "longest_streak": streak["longest_streak"],
+        "daily_goal_minutes": streak["daily_goal_minutes"],
+        "today_minutes": streak["today_minutes"],
+
+        # Stats sections that timed out or failed downstream (served as zeros)
+        "stats_partial": partial_stats,
+    }
+    return dashboard_info
+
+_activity_buffer: Optional[ActivityEventBuffer] = None
+
+def _on_activity_committed(records) -> None:
+    for user_id in {record.user_id for record in records}:
+        _on_user_written(user_id)
+
+def _get_activity_buffer() -> ActivityEventBuffer:
+    global _activity_buffer
+    if _activity_buffer is None:
+        _activity_buffer = ActivityEventBuffer(
+            SessionLocal,
+            linger_seconds=config.ACTIVITY_BATCH_WINDOW_MS / 1000,
+            on_commit=_on_activity_committed
+        )
+    return _activity_buffer
+
+async def _record_activity(records: list, db: AsyncSession) -> None:
+    if config.ACTIVITY_BATCH_WINDOW_MS > 0:
+        await _get_activity_buffer().add(records)
+    else:
+        await db.run_sync(record_events, records)
+        await db.commit()
+        _on_activity_committed(records)
+
+def _to_activity_records(events: list, current_user: User) -> list:
+    return [
+        normalize_record(ActivityRecord(
+            user_id=str(current_user.id),
+            event_type=event.event_type,
+            occurred_at=event.occurred_at,
+            duration_seconds=event.duration_seconds,
+            quiz_score=event.quiz_score
+        ))
+        for event in events
+    ]
+
+async def save_user_activity(request: Optional[ActivityEventRequest], current_user: User, db: AsyncSession) -> MessageResponse:
+    try:
+        records = _to_activity_records([request or ActivityEventRequest()], current_user)
+    except ValueError as e:
+        return MessageResponse(status=400, message=str(e))
     try:
+        await _record_activity(records, db)
         return MessageResponse(status=200)
         
     except Exception as e:
         logger.error(f"Error saving activity for user {getattr(current_user, 'email', 'unknown')}: {str(e)}")
+        await db.rollback()
         return MessageResponse(
             status=401,
             message="Có lỗi xảy ra, xin vui lòng thử lại"
         )
 
-async def get_course_stats(user_email: str) -> dict:
+async def save_user_activity_batch(request: ActivityBatchRequest, current_user: User, db: AsyncSession) -> MessageResponse:
     try:
-        course_service_url = f"{config.COURSE_SERVICE_URL}/api/v1"
-        headers = {"Authorization": f"Bearer {create_access_token(user_email)}"}
-        
-        courses_response = requests.get(f"{course_service_url}/courses", headers=headers, timeout=5)
-        courses_data = courses_response.json() if courses_response.status_code == 200 else {"courses": []}
-        
-        total_courses = len(courses_data.get("courses", []))
-        
-        results_response = requests.get(f"{course_service_url}/user/test-results", headers=headers, timeout=5)
-        results_data = results_response.json() if results_response.status_code == 200 else {"results": []}
-        
-        completed_courses = len(set(result.get("test_id") for result in results_data.get("results", [])))
-        
-        total_lessons = 0
-        for course in courses_data.get("courses", []):
-            course_id = course.get("id")
-            if course_id:
-                lessons_response = requests.get(f"{course_service_url}/courses/{course_id}/lessons", headers=headers, timeout=5)
-                lessons_data = lessons_response.json() if lessons_response.status_code == 200 else {"lessons": []}
-                total_lessons += len(lessons_data.get("lessons", []))
-        
-        return {
-            "total_courses": total_courses,
-            "completed_courses": completed_courses,
-            "total_lessons": total_lessons
-        }
+        records = _to_activity_records(request.events, current_user)
+    except ValueError as e:
+        return MessageResponse(status=400, message=str(e))
+    try:
+        await _record_activity(records, db)
+        return MessageResponse(status=200, message=f"Đã lưu {len(records)} hoạt động")
+    except Exception as e:
+        logger.error(f"Error saving activity batch for user {getattr(current_user, 'email', 'unknown')}: {str(e)}")
+        await db.rollback()
+        return MessageResponse(status=500, message="Có lỗi xảy ra, xin vui lòng thử lại")
+
+async def get_user_activity(year: Optional[int], current_user: User, db: AsyncSession) -> ActivityResponse:
+    try:
+        year = year or today_local().year
+        return ActivityResponse(
+            status=200,
+            year=year,
+            activity=await db.run_sync(get_year_heatmap, current_user.id, year),
+            weekly=await db.run_sync(get_weekly_activity, current_user.id, date(year, 1, 1), date(year, 12, 31))
+        )
+    except Exception as e:
+        logger.error(f"Error getting activity for user {getattr(current_user, 'email', 'unknown')}: {str(e)}")
+        return ActivityResponse(status=500, message="Có lỗi xảy ra, xin vui lòng thử lại")
+
+def run_activity_compaction() -> int:
+    return compact_events(SessionLocal, config.ACTIVITY_EVENT_RETENTION_DAYS)
+
+async def compact_activity() -> MessageResponse:
+    try:
+        removed = await asyncio.to_thread(run_activity_compaction)
+        return MessageResponse(status=200, message=f"Đã dọn {removed} sự kiện hoạt động cũ")
+    except Exception as e:
+        logger.error(f"Activity compaction failed: {str(e)}")
+        return MessageResponse(status=500, message="Có lỗi xảy ra khi dọn dữ liệu hoạt động")
+
+async def get_user_streak(current_user: User, db: AsyncSession) -> StreakResponse:
+    try:
+        return StreakResponse(status=200, streak=await db.run_sync(get_streak, current_user.id))
+    except Exception as e:
+        logger.error(f"Error getting streak for user {getattr(current_user, 'email', 'unknown')}: {str(e)}")
+        return StreakResponse(status=500, message="Có lỗi xảy ra, xin vui lòng thử lại")
+
+async def set_user_daily_goal(request: StreakGoalRequest, current_user: User, db: AsyncSession) -> StreakResponse:
+    try:
+        await db.run_sync(set_daily_goal, current_user.id, request.daily_goal_minutes)
+        await db.commit()
+        _on_user_written(current_user.id)
+        return StreakResponse(status=200, streak=await db.run_sync(get_streak, current_user.id))
     except Exception as e:
-        logger.error(f"Error getting course stats: {str(e)}")
-        return {"total_courses": 0, "completed_courses": 0, "total_lessons": 0}
+        logger.error(f"Error setting daily goal for user {getattr(current_user, 'email', 'unknown')}: {str(e)}")
+        await db.rollback()
+        return StreakResponse(status=500, message="Có lỗi xảy ra, xin vui lòng thử lại")
 
-async def get_quiz_stats(user_email: str) -> dict:
+def run_streak_close_out() -> int:
+    return close_out_streaks(SessionLocal)
+
+async def close_out_broken_streaks() -> MessageResponse:
+    try:
+        closed = await asyncio.to_thread(run_streak_close_out)
+        return MessageResponse(status=200, message=f"Đã kết thúc {closed} chuỗi ngày học")
+    except Exception as e:
+        logger.error(f"Streak close-out failed: {str(e)}")
+        return MessageResponse(status=500, message="Có lỗi xảy ra khi cập nhật chuỗi ngày học")
+
+def run_profile_card_backfill() -> int:
+    return backfill_profile_cards(SessionLocal)
+
+async def backfill_missing_profile_cards() -> MessageResponse:
+    try:
+        written = await asyncio.to_thread(run_profile_card_backfill)
+        return MessageResponse(status=200, message=f"Đã cập nhật {written} thẻ hồ sơ")
+    except Exception as e:
+        logger.error(f"Profile card backfill failed: {str(e)}")
+        return MessageResponse(status=500, message="Có lỗi xảy ra khi cập nhật thẻ hồ sơ")
+
+async def get_dashboard_stats(user_email: str) -> tuple:
     try:
-        quiz_service_url = f"{config.QUIZ_SERVICE_URL}/api/v1"
         headers = {"Authorization": f"Bearer {create_access_token(user_email)}"}
-        
-        quizzes_response = requests.get(f"{quiz_service_url}/quizzes", headers=headers, timeout=5)
-        quizzes_data = quizzes_response.json() if quizzes_response.status_code == 200 else {"quizzes": []}
-        
-        total_quizzes = len(quizzes_data.get("quizzes", []))
-        
-        attempts_response = requests.get(f"{quiz_service_url}/user/quiz-attempts", headers=headers, timeout=5)
-        attempts_data = attempts_response.json() if attempts_response.status_code == 200 else {"attempts": []}
-        
-        attempts = attempts_data.get("attempts", [])
-        completed_quizzes = len(attempts)
-        
-        total_score = sum(attempt.get("score", 0) for attempt in attempts)
-        average_score = total_score / len(attempts) if attempts else 0
-        
-        return {
-            "total_quizzes": total_quizzes,
-            "completed_quizzes": completed_quizzes,
-            "average_score": average_score / 100 if average_score > 1 else average_score 
-        }
+        return await fetch_dashboard_stats(headers)
     except Exception as e:
-        logger.error(f"Error getting quiz stats: {str(e)}")
-        return {"total_quizzes": 0, "completed_quizzes": 0, "average_score": 0}
+        logger.error(f"Error getting dashboard stats: {str(e)}")
+        return dict(EMPTY_COURSE_STATS), dict(EMPTY_QUIZ_STATS), ["courses", "quizzes"]
 
-async def calculate_user_rank(current_user: User, db: Session) -> dict:
+async def calculate_user_rank(current_user: User, db: AsyncSession) -> dict:
     try:
-        users = db.query(User).filter(User.is_active == True).order_by(User.current_exp.desc()).all()
-        
-        user_rank = 1
-        total_users = len(users)
-        
-        for i, user in enumerate(users):
-            if user.id == current_user.id:
-                user_rank = i + 1
-                break
-        
-        return {"rank": user_rank, "total_users": total_users}
+        return await db.run_sync(get_user_rank, current_user)
     except Exception as e:
         logger.error(f"Error calculating user rank: {str(e)}")
         return {"rank": 1, "total_users": 1}
 
-async def get_leaderboard_data(db: Session) -> list:
+async def get_leaderboard_data(db: AsyncSession, period: str = "global") -> list:
     try:
-        top_users = db.query(User).filter(User.is_active == True).order_by(User.current_exp.desc()).limit(10).all()
-        
-        leaderboard = []
-        for i, user in enumerate(top_users):
-            avatar_url = None
-            if user.avatar_url:
-                if user.avatar_url.startswith('http'):
-                    avatar_url = user.avatar_url
-                else:
-                    avatar_url = f"{config.USER_SERVICE_URL}/avatar/?user_id={user.id}"
-            
-            leaderboard.append({
-                "rank": i + 1,
-                "id": str(user.id),
-                "name": f"{user.family_name or ''} {user.given_name or ''}".strip() or user.email.split('@')[0],
-                "level": user.level or 1,
-                "experience": user.current_exp or 0,
-                "avatar_url": avatar_url,
-                "initials": "".join([name[0].upper() for name in [user.family_name or '', user.given_name or ''] if name])[:2] or user.email[0].upper()
-            })
-        
-        return leaderboard
+        return await db.run_sync(leaderboard_service.get_leaderboard, period)
     except Exception as e:
         logger.error(f"Error getting leaderboard: {str(e)}")
         return []
 
-async def get_users_by_ids(user_ids: list[str], db: Session) -> dict:
+_exp_write_buffer: Optional[ExpWriteBuffer] = None
+
+def _on_exp_increments_committed(results: dict, deltas: dict) -> None:
+    # Core UPDATEs bypass the ORM, so caches holding these users are refreshed by hand
+    for user_id, result in results.items():
+        principal_cache.invalidate_user(user_id)
+        _on_exp_committed(result["user"], deltas[user_id])
+
+def _get_exp_write_buffer() -> ExpWriteBuffer:
+    global _exp_write_buffer
+    if _exp_write_buffer is None:
+        _exp_write_buffer = ExpWriteBuffer(
+            SessionLocal,
+            linger_seconds=config.EXP_COALESCE_WINDOW_MS / 1000,
+            on_commit=_on_exp_increments_committed
+        )
+    return _exp_write_buffer
+
+async def _increment_user_exp(current_user: User, exp_amount: int, db: AsyncSession) -> Optional[dict]:
+    user_id = str(current_user.id)
+    if config.EXP_COALESCE_WINDOW_MS > 0:
+        result = await _get_exp_write_buffer().add(user_id, exp_amount)
+    else:
+        result = await db.run_sync(increment_exp, user_id, exp_amount)
+        await db.commit()
+        if result is not None:
+            _on_exp_increments_committed({user_id: result}, {user_id: exp_amount})
+    if result is not None:
+        # The ORM copy of the user predates the increment (and an AsyncSession cannot lazy-load it later)
+        await db.refresh(current_user)
+    return result
+
+def _on_exp_committed(user: User, exp_delta: int) -> None:
+    _on_user_written(user.id, profile=True)
     try:
-        users = db.query(User).filter(User.id.in_(user_ids), User.is_active == True).all()
-        user_data = {}
-        for user in users:
-            avatar_url = None
-            avatar_id = getattr(user, 'avatar_url', None)
-            if avatar_id:
-                if avatar_id.startswith('http'):
-                    avatar_url = avatar_id
-                else:
-                    avatar_url = f"{config.USER_SERVICE_URL}/avatar/?user_id={user.id}"
-            
-            user_data[str(user.id)] = {
-                "id": str(user.id),
-                "name": f"{user.family_name or ''} {user.given_name or ''}".strip() or user.email.split('@')[0],
-                "avatar_url": avatar_url,
-                "level": user.level or 1,
-                "initials": "".join([name[0].upper() for name in [user.family_name or '', user.given_name or ''] if name])[:2] or user.email[0].upper()
-            }
-        
-        return user_data
+        record_exp_change(user)
+        leaderboard_service.record_exp_change(user, exp_delta)
+    except Exception as e:
+        logger.error(f"Error updating rank caches for user {getattr(user, 'email', 'unknown')}: {str(e)}")
+
+async def get_users_by_ids(user_ids: list[str]) -> Response:
+    try:
+        content = await profile_lookup.get_cards_json(lambda: read_session(*user_ids), user_ids)
     except Exception as e:
         logger.error(f"Error getting users by IDs: {str(e)}")
-        return {}
+        content = b"{}"
+    return Response(content=content, media_type="application/json")
 
-async def update_test_stats(request: TestStatsRequest, current_user: User, db: Session) -> TestStatsResponse:
+async def update_test_stats(request: TestStatsRequest, current_user: User, db: AsyncSession) -> TestStatsResponse:
     try:
         original_stats = {
             "level": getattr(current_user, 'level', 1),
@@ -583,29 +613,19 @@ async def update_test_stats(request: TestStatsRequest, current_user: User, db: S
         if request.require_exp is not None:
             setattr(current_user, 'require_exp', request.require_exp)
         
-        test_data = {}
-        if request.total_courses is not None:
-            test_data['test_total_courses'] = request.total_courses
-        if request.completed_courses is not None:
-            test_data['test_completed_courses'] = request.completed_courses
-        if request.total_lessons is not None:
-            test_data['test_total_lessons'] = request.total_lessons
-        if request.total_quizzes is not None:
-            test_data['test_total_quizzes'] = request.total_quizzes
-        if request.completed_quizzes is not None:
-            test_data['test_completed_quizzes'] = request.completed_quizzes
-        if request.average_score is not None:
-            test_data['test_average_score'] = request.average_score
-        
-        if test_data:
-            import json
-            current_bio = getattr(current_user, 'bio', '') or ''
-            if current_bio and not current_bio.endswith('\n'):
-                current_bio += '\n'
-            current_bio += f"[TEST_DATA] {json.dumps(test_data)}"
-            setattr(current_user, 'bio', current_bio)
-        
-        db.commit()
+        await db.run_sync(set_learner_stats, current_user.id, {
+            "total_courses": request.total_courses,
+            "completed_courses": request.completed_courses,
+            "total_lessons": request.total_lessons,
+            "total_quizzes": request.total_quizzes,
+            "completed_quizzes": request.completed_quizzes,
+            "average_score": request.average_score,
+        })
+        
+        exp_delta = getattr(current_user, 'current_exp', 0) - original_stats['current_exp']
+        await db.run_sync(record_weekly_exp, {current_user.id: exp_delta})
+        await db.commit()
+        _on_exp_committed(current_user, exp_delta)
         
         updated_stats = {
             "level": getattr(current_user, 'level'),
@@ -633,24 +653,22 @@ async def update_test_stats(request: TestStatsRequest, current_user: User, db: S
         
     except Exception as e:
         logger.error(f"Failed to update test stats for user {getattr(current_user, 'email', 'unknown')}: {str(e)}")
-        db.rollback()
+        await db.rollback()
         return TestStatsResponse(
             status=500,
             message="Có lỗi xảy ra khi cập nhật thống kê test"
         )
 
-async def reset_test_stats(current_user: User, db: Session) -> TestStatsResponse:
+async def reset_test_stats(current_user: User, db: AsyncSession) -> TestStatsResponse:
     try:
         setattr(current_user, 'level', 1)
         setattr(current_user, 'current_exp', 0)
         setattr(current_user, 'require_exp', get_exp_for_level(2))
         
-        current_bio = getattr(current_user, 'bio', '') or ''
-        bio_lines = current_bio.split('\n')
-        filtered_lines = [line for line in bio_lines if not line.startswith('[TEST_DATA]')]
-        setattr(current_user, 'bio', '\n'.join(filtered_lines).strip())
+        await db.run_sync(reset_learner_stats, current_user.id)
         
-        db.commit();
+        await db.commit();
+        _on_exp_committed(current_user, 0)
         
         rank_data = await calculate_user_rank(current_user, db);
         
@@ -671,7 +689,7 @@ async def reset_test_stats(current_user: User, db: Session) -> TestStatsResponse
         
     except Exception as e:
         logger.error(f"Failed to reset test stats for user {getattr(current_user, 'email', 'unknown')}: {str(e)}")
-        db.rollback()
+        await db.rollback()
         return TestStatsResponse(
             status=500,
             message="Có lỗi xảy ra khi reset thống kê"
@@ -718,23 +736,21 @@ async def get_level_system_info() -> dict:
             "message": "Có lỗi xảy ra khi lấy thông tin level system"
         }
 
-async def simulate_learning_activity(current_user: User, db: Session) -> TestStatsResponse:
+async def simulate_learning_activity(current_user: User, db: AsyncSession) -> TestStatsResponse:
     try:
-        original_level = getattr(current_user, 'level', 1)
-        original_exp = getattr(current_user, 'current_exp', 0)
-        original_require_exp = getattr(current_user, 'require_exp', 100)
-        
         activity_exp = 100 + 100 + 50  # Course + quizzes + bonus
-        new_total_exp = original_exp + activity_exp
-        
-        setattr(current_user, 'current_exp', new_total_exp)
         
-        new_level, next_level_exp, level_increased = auto_level_up(new_total_exp, original_level)
+        result = await _increment_user_exp(current_user, activity_exp, db)
+        if result is None:
+            return TestStatsResponse(status=404, message="Không tìm thấy người dùng")
         
-        setattr(current_user, 'level', new_level)
-        setattr(current_user, 'require_exp', next_level_exp)
-        
-        db.commit()
+        original_level = result["original_level"]
+        original_exp = result["original_exp"]
+        original_require_exp = get_exp_for_level(original_level + 1)
+        new_level = result["new_level"]
+        new_total_exp = result["new_exp"]
+        next_level_exp = result["new_require_exp"]
+        level_increased = new_level > original_level
         
         rank_data = await calculate_user_rank(current_user, db)
         
@@ -766,27 +782,25 @@ async def simulate_learning_activity(current_user: User, db: Session) -> TestSta
         
     except Exception as e:
         logger.error(f"Failed to simulate activity for user {getattr(current_user, 'email', 'unknown')}: {str(e)}")
-        db.rollback()
+        await db.rollback()
         return TestStatsResponse(
             status=500,
             message="Có lỗi xảy ra khi mô phỏng hoạt động học tập"
         )
 
-async def add_experience(exp_amount: int, current_user: User, db: Session) -> TestStatsResponse:
+async def add_experience(exp_amount: int, current_user: User, db: AsyncSession) -> TestStatsResponse:
     try:
-        original_level = getattr(current_user, 'level', 1)
-        original_exp = getattr(current_user, 'current_exp', 0)
-        original_require_exp = getattr(current_user, 'require_exp', 100)
-        
-        new_total_exp = original_exp + exp_amount
-        setattr(current_user, 'current_exp', new_total_exp)
-        
-        new_level, next_level_exp, level_increased = auto_level_up(new_total_exp, original_level)
-        
-        setattr(current_user, 'level', new_level)
-        setattr(current_user, 'require_exp', next_level_exp)
-        
-        db.commit()
+        result = await _increment_user_exp(current_user, exp_amount, db)
+        if result is None:
+            return TestStatsResponse(status=404, message="Không tìm thấy người dùng")
+        
+        original_level = result["original_level"]
+        original_exp = result["original_exp"]
+        original_require_exp = get_exp_for_level(original_level + 1)
+        new_level = result["new_level"]
+        new_total_exp = result["new_exp"]
+        next_level_exp = result["new_require_exp"]
+        level_increased = new_level > original_level
         
         rank_data = await calculate_user_rank(current_user, db)
         
@@ -822,8 +836,34 @@ async def add_experience(exp_amount: int, current_user: User, db: Session) -> Te
         
     except Exception as e:
         logger.error(f"Failed to add experience for user {getattr(current_user, 'email', 'unknown')}: {str(e)}")
-        db.rollback()
+        await db.rollback()
         return TestStatsResponse(
             status=500,
             message="Có lỗi xảy ra khi thêm kinh nghiệm"
-        )
\ No newline at end of file
+        )
+
+async def award_experience_bulk(request: BulkExpAwardRequest, db: AsyncSession) -> BulkExpAwardResponse:
+    try:
+        outcome = await db.run_sync(award_exp_bulk, [(award.user_id, award.exp_amount) for award in request.awards])
+        await db.commit()
+        _on_exp_increments_committed(
+            {user.id: {"user": user} for user in outcome.users}, outcome.deltas
+        )
+        
+        level_ups = sum(1 for result in outcome.results if result["level_increased"])
+        logger.info(f"Bulk experience award: {len(outcome.results)} users, {level_ups} level-ups")
+        
+        return BulkExpAwardResponse(
+            status=200,
+            message=f"Đã cộng kinh nghiệm cho {len(outcome.results)} người dùng ({level_ups} lên cấp)",
+            results=outcome.results,
+            not_found=outcome.not_found
+        )
+        
+    except Exception as e:
+        logger.error(f"Failed to award experience in bulk: {str(e)}")
+        await db.rollback()
+        return BulkExpAwardResponse(
+            status=500,
+            message="Có lỗi xảy ra khi thêm kinh nghiệm"
+        )
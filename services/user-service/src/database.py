@@ -1,9 +1,13 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+import asyncio
 import logging
+from urllib.parse import urlparse
 
-from config import get_database_url, get_debug_mode
+from config import config, get_async_database_url, get_database_url, get_debug_mode, to_async_database_url
+from services.replica_router import DatabaseEndpoint, ReplicaRouter
 
 logger = logging.getLogger(__name__)
 
@@ -13,14 +17,57 @@ DEBUG = get_debug_mode()
 engine = create_engine(
     DATABASE_URL, 
     echo=DEBUG,
-    pool_size=20,
-    max_overflow=0,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
     pool_pre_ping=True,
     pool_recycle=300
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    get_async_database_url(),
+    echo=DEBUG,
+    pool_size=config.DB_ASYNC_POOL_SIZE,
+    max_overflow=config.DB_ASYNC_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=300
+)
+
+# expire_on_commit=False: attributes read after commit must not trigger an implicit (blocking) refresh
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+def _replica_endpoint(url: str) -> DatabaseEndpoint:
+    is_postgres = url.startswith("postgres")
+    timeout = config.DB_REPLICA_CONNECT_TIMEOUT_SECONDS
+    pool_options = dict(
+        echo=DEBUG,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=300
+    )
+    # An unreachable replica must fail fast so reads move on to the next one
+    return DatabaseEndpoint(
+        name=urlparse(url).hostname or url,
+        engine=create_engine(url, connect_args={"connect_timeout": timeout} if is_postgres else {}, **pool_options),
+        async_engine=create_async_engine(
+            to_async_database_url(url),
+            connect_args={"timeout": timeout} if is_postgres else {},
+            **dict(pool_options, pool_size=config.DB_ASYNC_POOL_SIZE, max_overflow=config.DB_ASYNC_MAX_OVERFLOW)
+        )
+    )
+
+
+replica_router = ReplicaRouter(
+    DatabaseEndpoint("primary", engine, async_engine),
+    [_replica_endpoint(url) for url in config.DATABASE_REPLICA_URLS],
+    max_lag_seconds=config.DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval_seconds=config.DB_REPLICA_CHECK_INTERVAL_SECONDS,
+    retry_after_seconds=config.DB_REPLICA_RETRY_AFTER_SECONDS
+)
+
 Base = declarative_base()
 
 
@@ -32,6 +79,32 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def read_session(*keys) -> Session:
+    """
+    Session for read-only work, on a healthy replica unless ``keys`` (user ids)
+    were written too recently. Never commit through it. Blocking: call from
+    sync code or a worker thread.
+    """
+    replica_router.refresh_if_stale()
+    return SessionLocal(bind=replica_router.choose(keys).engine)
+
+
+async def async_read_session(*keys) -> AsyncSession:
+    if replica_router.is_stale():
+        await asyncio.to_thread(replica_router.refresh_if_stale)
+    return AsyncSessionLocal(bind=replica_router.choose(keys).async_engine)
+
+
+async def get_async_read_db():
+    async with await async_read_session() as db:
+        yield db
+
+
 def create_tables():
     try:
         from models import Base
@@ -8,8 +8,13 @@ from mangum import Mangum
 import json
 
 from config import config
-from database import create_tables, engine, SessionLocal
+from database import async_engine, create_tables, engine, replica_router, SessionLocal
 from routes.user_routes import router as user_router
+from services.http_client import close_http_client
+from services.avatar_service import avatar_processor
+from services.aws_clients import aws_clients
+from services.background_jobs import PeriodicJob, background_jobs
+from controllers.user_controller import run_activity_compaction, run_profile_card_backfill, run_streak_close_out
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,10 +33,30 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Error during startup: {e}")
             raise
+        # On Lambda the client is created lazily by the first request that needs it
+        try:
+            aws_clients.warm("s3")
+        except Exception as e:
+            logger.warning(f"Could not create AWS clients at startup: {e}")
+        # On Lambda these run from scheduled calls to the admin endpoints instead
+        background_jobs.append(PeriodicJob("activity-compaction", config.ACTIVITY_COMPACTION_INTERVAL_SECONDS, run_activity_compaction))
+        background_jobs.append(PeriodicJob("streak-close-out", config.STREAK_CLOSEOUT_INTERVAL_SECONDS, run_streak_close_out))
+        background_jobs.append(PeriodicJob("profile-card-backfill", config.PROFILE_CARD_BACKFILL_INTERVAL_SECONDS, run_profile_card_backfill))
+        for job in background_jobs:
+            job.start()
     
     yield
     
     # Shutdown
+    for job in background_jobs:
+        await job.stop()
+    await close_http_client()
+    avatar_processor.shutdown()
+    aws_clients.close()
+    await async_engine.dispose()
+    for replica in replica_router.replicas:
+        replica.engine.dispose()
+        await replica.async_engine.dispose()
     logger.info("User Service shutting down")
 
 app = FastAPI(
@@ -73,6 +98,7 @@ async def health_check():
         "status": "healthy",
         "service": "user-service",
         "database": db_status,
+        "replicas": replica_router.status(),
         "version": "1.0.0"
     }
 
@@ -3,7 +3,7 @@ Database models for User Service
 Self-contained models that don't depend on external libs
 """
 
-from sqlalchemy import Column, String, DateTime, Integer, Boolean, BigInteger, Text
+from sqlalchemy import Column, String, Date, DateTime, Integer, Boolean, BigInteger, Text, Index, Float, ForeignKey
 from sqlalchemy.sql import func
 from sqlalchemy.ext.declarative import declarative_base
 import uuid
@@ -55,7 +55,130 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     last_login = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        # Rank lookups: COUNT(*) WHERE is_active AND current_exp > :exp
+        Index('ix_users_is_active_current_exp', 'is_active', 'current_exp'),
+        # Admin listing: keyset pagination on (created_at, id)
+        Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
+
+
+class LearnerStats(Base):
+    """
+    Per-user learning counters, one row per user keyed by user_id
+    """
+    __tablename__ = "learner_stats"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    # Course statistics
+    total_courses = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_courses = Column(Integer, nullable=False, default=0, server_default="0")
+    total_lessons = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Quiz statistics (average_score is 0..1)
+    total_quizzes = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_quizzes = Column(Integer, nullable=False, default=0, server_default="0")
+    average_score = Column(Float, nullable=False, default=0, server_default="0")
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ActivityEvent(Base):
+    """
+    Append-only log of learning activity; rows are never updated, only pruned by compaction
+    """
+    __tablename__ = "activity_events"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    event_type = Column(String, nullable=False)
+    exp = Column(Integer, nullable=False, default=0)
+    duration_seconds = Column(Integer, nullable=False, default=0)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_activity_events_user_id_occurred_at', 'user_id', 'occurred_at'),
+        # Compaction: range delete of events past retention
+        Index('ix_activity_events_occurred_at', 'occurred_at'),
+    )
+
+
+class ActivityDaily(Base):
+    """
+    Per-user daily rollup of activity_events (local calendar day), maintained on write
+    """
+    __tablename__ = "activity_daily"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    event_count = Column(Integer, nullable=False, default=0)
+    exp = Column(BigInteger, nullable=False, default=0)
+    duration_seconds = Column(BigInteger, nullable=False, default=0)
+
+
+class ActivityWeekly(Base):
+    """
+    Per-user weekly rollup of activity_events, keyed by the local Monday starting the week
+    """
+    __tablename__ = "activity_weekly"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    week_start = Column(Date, primary_key=True)
+    event_count = Column(Integer, nullable=False, default=0)
+    exp = Column(BigInteger, nullable=False, default=0)
+    duration_seconds = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        # Weekly leaderboard: top EXP gained in one week
+        Index('ix_activity_weekly_week_start_exp', 'week_start', 'exp'),
+    )
+
+
+class UserStreak(Base):
+    """
+    Study streak state per user, advanced by each activity event and closed out nightly
+    """
+    __tablename__ = "user_streaks"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    current_streak = Column(Integer, nullable=False, default=0, server_default="0")
+    longest_streak = Column(Integer, nullable=False, default=0, server_default="0")
+    last_active_day = Column(Date, nullable=True)  # last local day the daily goal was met
+
+    # Daily goal (0 = any activity counts) and progress towards it on progress_day
+    daily_goal_minutes = Column(Integer, nullable=False, default=0, server_default="0")
+    progress_day = Column(Date, nullable=True)
+    progress_seconds = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # Nightly close-out: WHERE current_streak > 0 AND last_active_day < :yesterday
+        Index('ix_user_streaks_last_active_day', 'last_active_day'),
+    )
+
+
+class ProfileCard(Base):
+    """
+    Denormalized public card per user, rewritten whenever the name or avatar changes
+    """
+    __tablename__ = "profile_cards"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    name = Column(String, nullable=False)
+    initials = Column(String, nullable=False)
+    avatar_url = Column(String, nullable=True)  # public link, not the stored avatar value
+
+    # The card's JSON members without level or braces, spliced as is into list responses
+    fragment = Column(Text, nullable=False)
+    # Layout version and link base the fragment was rendered with; other keys are re-rendered on read
+    format_key = Column(String, nullable=False)
+    # Digest of the users columns it was rendered from; a mismatch (e.g. a write by auth-service) is re-rendered
+    source_hash = Column(String, nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 # Make all models available for import
-__all__ = ['User', 'Base']
+__all__ = ['User', 'LearnerStats', 'ActivityEvent', 'ActivityDaily', 'ActivityWeekly', 'UserStreak', 'ProfileCard', 'Base']
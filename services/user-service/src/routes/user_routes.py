@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Query, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, UploadFile, File, Query, Header, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import logging
 
-from database import get_db
+from database import get_async_db, get_async_read_db
 from schemas.user_schemas import *
 from controllers.user_controller import *
-from services.user_service_auth import get_current_user, get_current_admin_user
+from services.user_service_auth import (
+    get_current_admin_user, get_current_user_async, get_current_user_async_read_db, get_current_user_for_update
+)
+from services.leaderboard_service import leaderboard_service
+from services.user_listing import UserListQuery, parse_fields
 
 logger = logging.getLogger(__name__)
 
@@ -16,8 +20,8 @@ router = APIRouter(prefix="", tags=["User Management"])
 @router.put("/change-info", response_model=MessageResponse)
 async def change_personal_info(
     request: ChangeInfoRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db)
 ):
     return await change_user_info(request, current_user, db)
 
@@ -25,7 +29,12 @@ async def change_personal_info(
 @router.get("/avatar/")
 async def get_user_avatar_endpoint(
     avatar_id: Optional[str] = Query(None, description="Avatar ID to retrieve"),
-    user_id: Optional[str] = Query(None, description="User ID to retrieve avatar for")
+    user_id: Optional[str] = Query(None, description="User ID to retrieve avatar for"),
+    v: Optional[str] = Query(None, description="Avatar version from the avatar link"),
+    size: Optional[int] = Query(None, description="Variant size in pixels (400, 96 or 40)"),
+    format: str = Query("jpg", pattern="^(jpg|webp)$"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     if not avatar_id and not user_id:
         raise HTTPException(status_code=400, detail="Either avatar_id or user_id must be provided")
@@ -33,14 +42,14 @@ async def get_user_avatar_endpoint(
     target_id = user_id if user_id else avatar_id
     if target_id is None:
         raise HTTPException(status_code=400, detail="No valid avatar_id or user_id provided")
-    return await get_user_avatar(target_id)
+    return await get_user_avatar(target_id, db, version=v, size=size, extension=format, if_none_match=if_none_match)
 
 # 2.3. Cập nhật avatar
 @router.put("/avatar", response_model=MessageResponse)
 async def update_avatar(
     avatar_file: UploadFile = File(..., description="Avatar image file"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db)
 ):
     return await update_user_avatar(avatar_file, current_user, db)
 
@@ -48,64 +57,154 @@ async def update_avatar(
 @router.get("/info", response_model=UserInfoResponse)
 async def get_user(
     id: Optional[str] = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_current_user_async_read_db)
 ):
     return await get_user_info(id, current_user, db)
 
 # 2.5. Lấy thông tin USERS (Admin only)
 @router.get("/all", response_model=UsersListResponse)
 async def get_users(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    q: Optional[str] = Query(None, description="Search in name and email"),
+    min_level: Optional[int] = Query(None, ge=1),
+    max_level: Optional[int] = Query(None, ge=1),
+    sex: Optional[str] = Query(None),
+    sort: str = Query("created_at", pattern="^(created_at|current_exp|level)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; omit to return every user"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    return await get_all_users(db)
+    try:
+        query = UserListQuery(
+            fields=parse_fields(fields), q=q, min_level=min_level, max_level=max_level, sex=sex,
+            sort=sort, order=order, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        return UsersListResponse(status=400, message=str(e))
+    if format == "ndjson":
+        return await export_all_users(query)
+    return await get_all_users(db, query)
 
 # 2.6. Set thời gian học mỗi ngày
 @router.put("/notify-time", response_model=MessageResponse)
 async def set_notify_time_endpoint(
     request: NotifyTimeRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db)
 ):
     return await set_notify_time(request, current_user, db)
 
 # 2.7. Lấy thông tin cho dashboard
 @router.get("/dashboard", response_model=DashboardResponse)
-async def get_dashboard(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_dashboard(current_user: User = Depends(get_current_user_async)):
+    return await get_user_dashboard(current_user)
+
+# 2.7.1. Bảng xếp hạng (global hoặc weekly), trả về payload đã serialize sẵn
+@router.get("/leaderboard")
+async def get_leaderboard(
+    period: str = Query("global", pattern="^(global|weekly)$"),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    return await get_user_dashboard(current_user, db)
+    return Response(content=await db.run_sync(leaderboard_service.get_leaderboard_bytes, period), media_type="application/json")
+
+# 2.7.2. Cộng kinh nghiệm hàng loạt (Admin only), ví dụ khi kết thúc một sự kiện quiz
+@router.post("/exp/bulk-award", response_model=BulkExpAwardResponse)
+async def bulk_award_experience(
+    request: BulkExpAwardRequest,
+    current_admin: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await award_experience_bulk(request, db)
 
 # 2.8. Lưu cột mốc hoạt động của USER
 @router.post("/activity", response_model=MessageResponse)
 async def save_activity(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Optional[ActivityEventRequest] = None,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await save_user_activity(request, current_user, db)
+
+# 2.8.1. Lưu nhiều hoạt động một lần (ví dụ đồng bộ khi client offline)
+@router.post("/activity/batch", response_model=MessageResponse)
+async def save_activity_batch(
+    request: ActivityBatchRequest,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await save_user_activity_batch(request, current_user, db)
+
+# 2.8.2. Heatmap hoạt động theo năm (đọc từ bảng tổng hợp theo ngày)
+@router.get("/activity", response_model=ActivityResponse)
+async def get_activity(
+    year: Optional[int] = Query(None, ge=2000, le=2100),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await get_user_activity(year, current_user, db)
+
+# 2.8.3. Dọn sự kiện hoạt động cũ (Admin only, gọi theo lịch khi chạy trên Lambda)
+@router.post("/activity/compact", response_model=MessageResponse)
+async def compact_activity_endpoint(
+    current_admin: User = Depends(get_current_admin_user)
 ):
-    return await save_user_activity(current_user, db)
+    return await compact_activity()
+
+# 2.9. Chuỗi ngày học liên tiếp và mục tiêu mỗi ngày
+@router.get("/streak", response_model=StreakResponse)
+async def get_streak_endpoint(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await get_user_streak(current_user, db)
+
+# 2.9.1. Đặt mục tiêu số phút học mỗi ngày (0 = chỉ cần có hoạt động)
+@router.put("/streak/goal", response_model=StreakResponse)
+async def set_streak_goal(
+    request: StreakGoalRequest,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await set_user_daily_goal(request, current_user, db)
+
+# 2.9.2. Kết thúc các chuỗi bị gián đoạn (Admin only, gọi hằng đêm khi chạy trên Lambda)
+@router.post("/streak/close-out", response_model=MessageResponse)
+async def close_out_streaks_endpoint(
+    current_admin: User = Depends(get_current_admin_user)
+):
+    return await close_out_broken_streaks()
 
 # 2.6. Lấy thông tin nhiều users theo IDs
 @router.post("/users-by-ids", response_model=dict)
 async def get_users_by_ids_endpoint(
     user_ids: list[str],
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async)
+):
+    return await get_users_by_ids(user_ids)
+
+# 2.6.1. Ghi thẻ hồ sơ còn thiếu (Admin only, gọi theo lịch khi chạy trên Lambda)
+@router.post("/profile-cards/backfill", response_model=MessageResponse)
+async def backfill_profile_cards_endpoint(
+    current_admin: User = Depends(get_current_admin_user)
 ):
-    return await get_users_by_ids(user_ids, db)
+    return await backfill_missing_profile_cards()
 
 # Additional utility endpoints
 @router.get("/profile", response_model=UserInfoResponse)
 async def get_current_user_profile(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_current_user_async_read_db)
 ):
     return await get_user_info(None, current_user, db)
 
 @router.get("/me", response_model=dict)
 async def get_current_user_basic_info(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_async)
 ):
     return {
         "id": current_user.id,
@@ -121,37 +220,34 @@ async def get_current_user_basic_info(
 @router.put("/test/update-stats", response_model=TestStatsResponse)
 async def update_test_stats_endpoint(
     request: TestStatsRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db)
 ):
    
     return await update_test_stats(request, current_user, db)
 
 @router.post("/test/reset-stats", response_model=TestStatsResponse)
 async def reset_test_stats_endpoint(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db)
 ):
     return await reset_test_stats(current_user, db)
 
 @router.get("/test/simulate-activity", response_model=TestStatsResponse)
 async def simulate_learning_activity_endpoint(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    from ..controllers.user_controller import simulate_learning_activity
     return await simulate_learning_activity(current_user, db)
 
 @router.get("/test/level-system-info")
 async def get_level_system_info_endpoint():
-    from ..controllers.user_controller import get_level_system_info
     return await get_level_system_info()
 
 @router.post("/test/add-experience", response_model=TestStatsResponse)
 async def add_experience_endpoint(
     exp_amount: int = Query(..., description="Amount of experience to add", ge=1, le=10000),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    from ..controllers.user_controller import add_experience
     return await add_experience(exp_amount, current_user, db)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 import re
 
@@ -42,6 +42,7 @@ class DashboardResponse(BaseModel):
 class UsersListResponse(BaseModel):
     status: int
     infos: Optional[list] = None
+    next_cursor: Optional[str] = None
     message: Optional[str] = None
 
 class TestStatsRequest(BaseModel):
@@ -80,3 +81,76 @@ class TestStatsResponse(BaseModel):
     status: int
     message: Optional[str] = None
     updated_stats: Optional[dict] = None
+
+class ExpAward(BaseModel):
+    user_id: str
+    exp_amount: int
+
+    @validator('exp_amount')
+    def validate_exp_amount(cls, v):
+        if v < 1 or v > 100000:
+            raise ValueError('exp_amount must be between 1 and 100000')
+        return v
+
+class BulkExpAwardRequest(BaseModel):
+    awards: List[ExpAward]
+
+    @validator('awards')
+    def validate_awards(cls, v):
+        if not v or len(v) > 5000:
+            raise ValueError('awards must contain between 1 and 5000 entries')
+        return v
+
+class BulkExpAwardResponse(BaseModel):
+    status: int
+    message: Optional[str] = None
+    results: Optional[list] = None
+    not_found: Optional[List[str]] = None
+
+class ActivityEventRequest(BaseModel):
+    event_type: str = "study"
+    duration_seconds: int = 0
+    occurred_at: Optional[datetime] = None
+    quiz_score: Optional[float] = None
+
+    @validator('duration_seconds')
+    def validate_duration(cls, v):
+        if v < 0 or v > 86400:
+            raise ValueError('duration_seconds must be between 0 and 86400')
+        return v
+
+    @validator('quiz_score')
+    def validate_quiz_score(cls, v):
+        if v is not None and (v < 0 or v > 1):
+            raise ValueError('quiz_score must be between 0 and 1')
+        return v
+
+class ActivityBatchRequest(BaseModel):
+    events: List[ActivityEventRequest]
+
+    @validator('events')
+    def validate_events(cls, v):
+        if not v or len(v) > 500:
+            raise ValueError('events must contain between 1 and 500 entries')
+        return v
+
+class ActivityResponse(BaseModel):
+    status: int
+    message: Optional[str] = None
+    year: Optional[int] = None
+    activity: Optional[dict] = None
+    weekly: Optional[list] = None
+
+class StreakGoalRequest(BaseModel):
+    daily_goal_minutes: int
+
+    @validator('daily_goal_minutes')
+    def validate_daily_goal(cls, v):
+        if v < 0 or v > 480:
+            raise ValueError('daily_goal_minutes must be between 0 and 480')
+        return v
+
+class StreakResponse(BaseModel):
+    status: int
+    message: Optional[str] = None
+    streak: Optional[dict] = None
@@ -0,0 +1,267 @@
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from models import ActivityDaily, ActivityEvent, ActivityWeekly
+from config import config
+from services.learner_stats_service import increment_learner_stats
+from services.local_time import local_day, today_local, week_start
+from services.sql_utils import upsert_insert
+from services.streak_service import apply_activity as apply_streak_activity
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ("study", "lesson_completed", "quiz_completed", "course_completed")
+
+ROLLUP_FIELDS = ("event_count", "exp", "duration_seconds")
+
+
+@dataclass
+class ActivityRecord:
+    user_id: str
+    event_type: str
+    occurred_at: Optional[datetime] = None
+    exp: int = 0
+    duration_seconds: int = 0
+    quiz_score: Optional[float] = None
+
+
+def normalize_record(record: ActivityRecord, now: Optional[datetime] = None) -> ActivityRecord:
+    """Validate an event from a client; raises ValueError for unknown types or out-of-range times."""
+    now = now or datetime.now(timezone.utc)
+    if record.event_type not in EVENT_TYPES:
+        raise ValueError(f"Unknown event type: {record.event_type}")
+    occurred_at = record.occurred_at or now
+    if occurred_at.tzinfo is None:
+        occurred_at = occurred_at.replace(tzinfo=timezone.utc)
+    if occurred_at > now + timedelta(minutes=5):
+        raise ValueError("occurred_at is in the future")
+    if occurred_at < now - timedelta(days=config.ACTIVITY_MAX_BACKDATE_DAYS):
+        raise ValueError(f"occurred_at is more than {config.ACTIVITY_MAX_BACKDATE_DAYS} days old")
+    record.occurred_at = occurred_at
+    return record
+
+
+def aggregate(records: Sequence[ActivityRecord]) -> Tuple[Dict[Tuple[str, date], Dict[str, int]], Dict[Tuple[str, date], Dict[str, int]]]:
+    """Sum a batch into (user, day) and (user, week) deltas."""
+    daily: Dict[Tuple[str, date], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+    weekly: Dict[Tuple[str, date], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+    for record in records:
+        day = local_day(record.occurred_at)
+        for bucket in (daily[(record.user_id, day)], weekly[(record.user_id, week_start(day))]):
+            bucket["event_count"] += 1
+            bucket["exp"] += record.exp
+            bucket["duration_seconds"] += record.duration_seconds
+    return daily, weekly
+
+
+def _upsert_rollup(db: Session, model, key_column: str, deltas: Dict[Tuple[str, date], Dict[str, int]]) -> None:
+    if not deltas:
+        return
+    stmt = upsert_insert(db, model)
+    table = model.__table__.c
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.user_id, table[key_column]],
+        set_={field: table[field] + stmt.excluded[field] for field in ROLLUP_FIELDS}
+    )
+    # Sorted so concurrent batches take row locks in the same order
+    db.execute(stmt, [
+        {"user_id": user_id, key_column: key, **values}
+        for (user_id, key), values in sorted(deltas.items())
+    ])
+
+
+def record_weekly_exp(db: Session, deltas: Dict[str, int], now: Optional[datetime] = None) -> None:
+    """
+    Add EXP gains outside activity events (test stats, awards) to this week's rollup.
+
+    activity_weekly.exp is the persisted source of the weekly leaderboard, so
+    every positive EXP change is counted here in the caller's transaction.
+    """
+    week = week_start(today_local(now))
+    _upsert_rollup(db, ActivityWeekly, "week_start", {
+        (str(user_id), week): {"event_count": 0, "exp": delta, "duration_seconds": 0}
+        for user_id, delta in deltas.items() if delta > 0
+    })
+
+
+def record_events(db: Session, records: Sequence[ActivityRecord]) -> None:
+    """
+    Append a batch of events and fold it into the daily and weekly rollups and streaks.
+
+    One multi-row INSERT for the events plus one upsert per rollup table, all in
+    the caller's transaction, so the rollups always match the event log.
+    """
+    if not records:
+        return
+    db.execute(ActivityEvent.__table__.insert(), [
+        {
+            "user_id": record.user_id,
+            "event_type": record.event_type,
+            "exp": record.exp,
+            "duration_seconds": record.duration_seconds,
+            "occurred_at": record.occurred_at,
+        }
+        for record in records
+    ])
+    daily, weekly = aggregate(records)
+    _upsert_rollup(db, ActivityDaily, "day", daily)
+    _upsert_rollup(db, ActivityWeekly, "week_start", weekly)
+    apply_streak_activity(db, records)
+
+    for record in records:
+        if record.event_type == "course_completed":
+            increment_learner_stats(db, record.user_id, {"completed_courses": 1})
+        elif record.event_type == "quiz_completed" and record.quiz_score is not None:
+            increment_learner_stats(db, record.user_id, {}, quiz_score=record.quiz_score)
+
+
+def get_daily_activity(db: Session, user_id: str, start: date, end: date) -> List[dict]:
+    """Daily rollups in [start, end] - one primary-key range scan."""
+    rows = db.execute(
+        select(ActivityDaily.day, ActivityDaily.event_count, ActivityDaily.exp, ActivityDaily.duration_seconds)
+        .where(ActivityDaily.user_id == user_id, ActivityDaily.day >= start, ActivityDaily.day <= end)
+        .order_by(ActivityDaily.day)
+    ).all()
+    return [
+        {"date": row.day.isoformat(), "count": row.event_count, "exp": row.exp, "duration_seconds": row.duration_seconds}
+        for row in rows
+    ]
+
+
+def get_weekly_activity(db: Session, user_id: str, start: date, end: date) -> List[dict]:
+    rows = db.execute(
+        select(ActivityWeekly.week_start, ActivityWeekly.event_count, ActivityWeekly.exp, ActivityWeekly.duration_seconds)
+        .where(ActivityWeekly.user_id == user_id, ActivityWeekly.week_start >= week_start(start), ActivityWeekly.week_start <= end)
+        .order_by(ActivityWeekly.week_start)
+    ).all()
+    return [
+        {"week_start": row.week_start.isoformat(), "count": row.event_count, "exp": row.exp, "duration_seconds": row.duration_seconds}
+        for row in rows
+    ]
+
+
+def get_year_heatmap(db: Session, user_id: str, year: int) -> Dict[str, int]:
+    """``{"YYYY-MM-DD": event_count}`` for the days of ``year`` with any activity."""
+    return {
+        entry["date"]: entry["count"]
+        for entry in get_daily_activity(db, user_id, date(year, 1, 1), date(year, 12, 31))
+    }
+
+
+def compact_events(session_factory: Callable[[], Session], retention_days: int, batch_size: int = 5000,
+                   now: Optional[datetime] = None) -> int:
+    """
+    Delete raw events older than ``retention_days``; the rollups already hold their totals.
+
+    Runs in short transactions of ``batch_size`` rows so it never holds long locks.
+    Returns the number of events removed.
+    """
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+    removed = 0
+    while True:
+        db = session_factory()
+        try:
+            ids = select(ActivityEvent.id).where(ActivityEvent.occurred_at < cutoff).order_by(ActivityEvent.id).limit(batch_size)
+            deleted = db.execute(delete(ActivityEvent).where(ActivityEvent.id.in_(ids))).rowcount
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        removed += deleted
+        if deleted < batch_size:
+            break
+    if removed:
+        logger.info(f"Compacted {removed} activity events older than {cutoff.isoformat()}")
+    return removed
+
+
+class ActivityEventBuffer:
+    """
+    Collects activity events from concurrent requests for ``linger_seconds`` and
+    writes them in one transaction (one multi-row INSERT plus the rollup upserts).
+
+    Callers await ``add`` until their events are committed.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        linger_seconds: float = 0.01,
+        max_batch: int = 1000,
+        on_commit: Optional[Callable[[Sequence[ActivityRecord]], None]] = None
+    ):
+        self.session_factory = session_factory
+        self.linger_seconds = linger_seconds
+        self.max_batch = max_batch
+        self.on_commit = on_commit
+        self._pending: List[Tuple[List[ActivityRecord], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def add(self, records: List[ActivityRecord]) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Work queued on a previous event loop (e.g. another Lambda invocation) can never complete here
+            self._pending, self._flush_task, self._loop = [], None, loop
+
+        future = loop.create_future()
+        self._pending.append((records, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_after_linger())
+        await future
+
+    async def _flush_after_linger(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self.linger_seconds)
+            pending, self._pending = self._pending, []
+            batch: List[Tuple[List[ActivityRecord], asyncio.Future]] = []
+            size = 0
+            for entry in pending:
+                if batch and size + len(entry[0]) > self.max_batch:
+                    await self._flush(batch)
+                    batch, size = [], 0
+                batch.append(entry)
+                size += len(entry[0])
+            if batch:
+                await self._flush(batch)
+
+    def _commit(self, records: List[ActivityRecord]) -> None:
+        db = self.session_factory()
+        try:
+            record_events(db, records)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _flush(self, batch: List[Tuple[List[ActivityRecord], asyncio.Future]]) -> None:
+        records = [record for entry_records, _ in batch for record in entry_records]
+        try:
+            await asyncio.to_thread(self._commit, records)
+        except Exception as e:
+            logger.error(f"Activity buffer flush failed for {len(records)} events: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if self.on_commit is not None:
+            try:
+                self.on_commit(records)
+            except Exception as e:
+                logger.error(f"Activity buffer commit hook failed: {str(e)}")
+
+        for _, future in batch:
+            if not future.done():
+                future.set_result(None)
@@ -0,0 +1,128 @@
+import asyncio
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from PIL import Image
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+AVATAR_SIZES = (400, 96, 40)
+
+_FORMATS = {
+    "jpg": ("JPEG", "image/jpeg", {"quality": 85, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+}
+
+
+class AvatarProcessingError(Exception):
+    """The upload could not be decoded or converted."""
+
+
+@dataclass
+class AvatarVariant:
+    size: int
+    extension: str
+    content_type: str
+    data: bytes
+
+
+def avatar_variant_key(avatar_id: str, size: int, extension: str) -> str:
+    return f"avatars/{avatar_id}/{size}.{extension}"
+
+
+def legacy_avatar_key(avatar_id: str) -> str:
+    """Key older clients and links point at: the 400px JPEG."""
+    return f"avatars/{avatar_id}"
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    if image.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        background.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
+        return background
+    return image.convert('RGB') if image.mode != 'RGB' else image
+
+
+def _downscale(image: Image.Image, size: int) -> Image.Image:
+    # reduce() is a cheap integer box filter; LANCZOS then only works on a ~2x larger image
+    factor = min(image.width // (size * 2), image.height // (size * 2))
+    if factor >= 2:
+        image = image.reduce(factor)
+    return image.resize((size, size), Image.Resampling.LANCZOS)
+
+
+def render_avatar_variants(contents: bytes, sizes: Sequence[int] = AVATAR_SIZES) -> List[AvatarVariant]:
+    """
+    Decode an upload once and encode every size in JPEG and WebP.
+
+    JPEG sources are decoded straight at a reduced scale via ``draft()``;
+    smaller sizes are derived from the next larger one rather than the original.
+    """
+    sizes = sorted(sizes, reverse=True)
+    try:
+        image = Image.open(io.BytesIO(contents))
+        image.draft('RGB', (sizes[0], sizes[0]))
+        image = _flatten(image)
+    except Exception as e:
+        raise AvatarProcessingError(str(e))
+
+    variants = []
+    source = image
+    for size in sizes:
+        source = _downscale(source, size)
+        for extension, (pil_format, content_type, options) in _FORMATS.items():
+            buffer = io.BytesIO()
+            source.save(buffer, format=pil_format, **options)
+            variants.append(AvatarVariant(size, extension, content_type, buffer.getvalue()))
+    return variants
+
+
+class AvatarProcessor:
+    """Runs avatar conversion and uploads off the event loop on a bounded thread pool."""
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="avatar")
+        return self._executor
+
+    async def render(self, contents: bytes) -> List[AvatarVariant]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), render_avatar_variants, contents)
+
+    async def upload(self, s3_client, bucket_name: str, avatar_id: str, variants: List[AvatarVariant], metadata: Dict[str, str]) -> None:
+        """Upload every variant concurrently through one shared client (boto3 clients are thread-safe)."""
+        def put(key: str, variant: AvatarVariant) -> None:
+            s3_client.put_object(
+                Bucket=bucket_name,
+                Key=key,
+                Body=variant.data,
+                ContentType=variant.content_type,
+                CacheControl='public, max-age=31536000',
+                Metadata=metadata
+            )
+
+        uploads = [(avatar_variant_key(avatar_id, v.size, v.extension), v) for v in variants]
+        largest_jpeg = next(v for v in variants if v.extension == "jpg" and v.size == max(x.size for x in variants))
+        uploads.append((legacy_avatar_key(avatar_id), largest_jpeg))
+
+        await asyncio.gather(*(asyncio.to_thread(put, key, variant) for key, variant in uploads))
+        logger.info(f"Uploaded {len(uploads)} avatar objects for {avatar_id}")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+avatar_processor = AvatarProcessor(max_workers=config.AVATAR_WORKERS)
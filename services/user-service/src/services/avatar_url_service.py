@@ -0,0 +1,170 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from config import config
+from services.avatar_service import AVATAR_SIZES, avatar_variant_key, legacy_avatar_key
+
+logger = logging.getLogger(__name__)
+
+VERSION_SEPARATOR = ":"
+
+
+class AvatarNotFound(Exception):
+    """No avatar object exists for the requested id."""
+
+
+def format_avatar_value(avatar_id: str, version: str) -> str:
+    """Value stored in ``users.avatar_url`` for an uploaded avatar: ``<id>:<version>``."""
+    return f"{avatar_id}{VERSION_SEPARATOR}{version}"
+
+
+def parse_avatar_value(value: str) -> Tuple[str, Optional[str]]:
+    """Split a stored avatar value into (avatar_id, version); values written before versioning have no version."""
+    avatar_id, _, version = value.partition(VERSION_SEPARATOR)
+    return avatar_id, version or None
+
+
+def public_avatar_id(value: Optional[str]) -> Optional[str]:
+    """``avatar_id`` as the API has always returned it: an uploaded avatar's id without the version, external URLs as is."""
+    if not value or value.startswith('http'):
+        return value
+    return parse_avatar_value(value)[0]
+
+
+def avatar_link(user_id, value: Optional[str]) -> Optional[str]:
+    """
+    Public avatar URL for a user row.
+
+    External (e.g. Google) avatars are returned as is; uploaded avatars point at
+    ``/avatar/`` with the version appended, so the link changes on every upload
+    and its redirect can be cached for as long as the presigned URL stays valid.
+    """
+    if not value:
+        return None
+    if value.startswith('http'):
+        return value
+    _, version = parse_avatar_value(value)
+    link = f"{config.USER_SERVICE_URL}/avatar/?user_id={user_id}"
+    return f"{link}&v={version}" if version else link
+
+
+def avatar_object_key(avatar_id: str, version: Optional[str], size: Optional[int] = None, extension: str = "jpg") -> str:
+    """Variants only exist for versioned uploads; older avatars have the single legacy object."""
+    if version and size in AVATAR_SIZES:
+        return avatar_variant_key(avatar_id, size, extension)
+    return legacy_avatar_key(avatar_id)
+
+
+@dataclass
+class SignedAvatarUrl:
+    url: str
+    expires_at: float
+    etag: str
+
+
+class AvatarUrlService:
+    """
+    Presigned avatar URLs cached per (object key, version).
+
+    A URL is reused until ``refresh_margin`` seconds before it expires, so repeated
+    ``/avatar/`` requests neither re-sign nor hit S3. The ETag is derived from the
+    URL, so a client holding the same redirect revalidates with a 304.
+    """
+
+    def __init__(self, expires_in: int = 86400, refresh_margin: int = 600, max_entries: int = 10000,
+                 unversioned_max_age: int = 300, clock: Callable[[], float] = time.time):
+        self.expires_in = expires_in
+        self.refresh_margin = refresh_margin
+        self.max_entries = max_entries
+        self.unversioned_max_age = unversioned_max_age
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], SignedAvatarUrl]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, cache_key: Tuple[str, Optional[str]]) -> Optional[SignedAvatarUrl]:
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            if entry.expires_at - self.refresh_margin <= self._clock():
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+            return entry
+
+    def get_url(self, s3_client, bucket_name: str, key: str, version: Optional[str] = None, verify: bool = False) -> SignedAvatarUrl:
+        """
+        Presigned GET URL for ``key``.
+
+        ``verify`` issues a HEAD first; callers only need it when the users table
+        does not already record the avatar. Raises AvatarNotFound on a 404.
+        """
+        cache_key = (key, version)
+        entry = self._cached(cache_key)
+        if entry is not None:
+            return entry
+
+        if verify:
+            try:
+                s3_client.head_object(Bucket=bucket_name, Key=key)
+            except ClientError as e:
+                if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                    raise AvatarNotFound(key)
+                raise
+
+        expires_at = self._clock() + self.expires_in
+        url = s3_client.generate_presigned_url('get_object', Params={'Bucket': bucket_name, 'Key': key}, ExpiresIn=self.expires_in)
+        entry = SignedAvatarUrl(url=url, expires_at=expires_at, etag=f'"{hashlib.sha1(url.encode()).hexdigest()[:20]}"')
+
+        with self._lock:
+            self._entries[cache_key] = entry
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def cache_headers(self, entry: SignedAvatarUrl, versioned: bool) -> dict:
+        """
+        Versioned links change on every upload, so their redirect may be cached until
+        just before the presigned URL expires; unversioned links are kept short so a
+        new upload shows up within ``unversioned_max_age``.
+        """
+        max_age = max(int(entry.expires_at - self.refresh_margin - self._clock()), 0)
+        if versioned:
+            cache_control = f"public, max-age={max_age}, immutable"
+        else:
+            cache_control = f"public, max-age={min(max_age, self.unversioned_max_age)}"
+        return {"Cache-Control": cache_control, "ETag": entry.etag}
+
+    def invalidate(self, avatar_id: str) -> None:
+        """Drop every cached URL for an avatar (legacy key and variants)."""
+        prefix = legacy_avatar_key(avatar_id)
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == prefix or k[0].startswith(prefix + "/")]:
+                del self._entries[cache_key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+avatar_url_service = AvatarUrlService(
+    expires_in=config.AVATAR_URL_EXPIRES_SECONDS,
+    refresh_margin=config.AVATAR_URL_REFRESH_MARGIN_SECONDS,
+    max_entries=config.AVATAR_URL_CACHE_MAX_ENTRIES,
+    unversioned_max_age=config.AVATAR_REDIRECT_MAX_AGE_SECONDS
+)
@@ -0,0 +1,94 @@
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+import boto3
+from botocore.config import Config as BotoConfig
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class AwsClientRegistry:
+    """
+    One boto3 session and one client per AWS service for the whole process.
+
+    Credential resolution, endpoint loading and the urllib3 connection pool are
+    paid once per client instead of once per request. boto3 clients (unlike
+    sessions and resources) are thread-safe, so the same client is shared by the
+    event loop and the executor threads that run blocking S3 calls.
+    """
+
+    def __init__(self, region_name: str, aws_access_key_id: str = "", aws_secret_access_key: str = "",
+                 max_pool_connections: int = 20, connect_timeout: float = 5, read_timeout: float = 30,
+                 session_factory: Callable[..., boto3.session.Session] = boto3.session.Session):
+        self.region_name = region_name
+        self._credentials = {}
+        if aws_access_key_id and aws_secret_access_key:
+            self._credentials = {
+                "aws_access_key_id": aws_access_key_id,
+                "aws_secret_access_key": aws_secret_access_key
+            }
+        self._client_config = BotoConfig(
+            max_pool_connections=max_pool_connections,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            tcp_keepalive=True,
+            retries={"max_attempts": 3, "mode": "standard"}
+        )
+        self._session_factory = session_factory
+        self._session: Optional[boto3.session.Session] = None
+        self._clients: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def get(self, service_name: str):
+        client = self._clients.get(service_name)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(service_name)
+            if client is None:
+                if self._session is None:
+                    # Sessions are not thread-safe; only ever touched under the lock
+                    self._session = self._session_factory(region_name=self.region_name, **self._credentials)
+                client = self._session.client(service_name, config=self._client_config)
+                self._clients[service_name] = client
+                logger.info(f"AWS {service_name} client created")
+        return client
+
+    def warm(self, *service_names: str) -> None:
+        """Create clients up front so the first request doesn't pay for it."""
+        for service_name in service_names:
+            self.get(service_name)
+
+    def close(self) -> None:
+        with self._lock:
+            clients, self._clients = self._clients, {}
+            self._session = None
+        for service_name, client in clients.items():
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning(f"Error closing AWS {service_name} client: {e}")
+        if clients:
+            logger.info("AWS clients closed")
+
+
+aws_clients = AwsClientRegistry(
+    region_name=config.AWS_REGION,
+    aws_access_key_id=config.AWS_ACCESS_KEY_ID,
+    aws_secret_access_key=config.AWS_SECRET_ACCESS_KEY,
+    max_pool_connections=config.AWS_MAX_POOL_CONNECTIONS,
+    connect_timeout=config.AWS_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=config.AWS_READ_TIMEOUT_SECONDS
+)
+
+
+def get_s3_client():
+    """Shared S3 client, or None when it cannot be created."""
+    try:
+        return aws_clients.get("s3")
+    except Exception as e:
+        logger.error(f"S3 client error: {e}")
+        return None
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """
+    Runs a blocking maintenance function every ``interval_seconds`` in a worker thread.
+
+    Used by long-running deployments; on Lambda the same functions are triggered
+    by a scheduled call to the matching admin endpoint instead.
+    """
+
+    def __init__(self, name: str, interval_seconds: float, func: Callable[[], object]):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.func = func
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await asyncio.to_thread(self.func)
+            except Exception as e:
+                logger.error(f"Background job '{self.name}' failed: {str(e)}")
+
+    def start(self) -> None:
+        if self.interval_seconds <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Background job '{self.name}' scheduled every {self.interval_seconds}s")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+background_jobs: List[PeriodicJob] = []
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Set
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+DashboardBuilder = Callable[[], Awaitable[dict]]
+
+
+@dataclass
+class _Snapshot:
+    info: dict
+    fresh_until: float
+    expires_at: float
+
+
+class DashboardCache:
+    """
+    Per-user dashboard snapshots with stale-while-revalidate.
+
+    A fresh snapshot is returned as is. A stale one (past ``ttl_seconds`` but
+    within ``max_stale_seconds``) is still returned immediately while a single
+    background task rebuilds it. Only a missing or expired snapshot makes the
+    caller wait, and concurrent callers for the same user share that build.
+    Since a build can outlive the request that started it, builders open
+    their own sessions rather than using a request-scoped one.
+    ``invalidate`` drops a user's snapshot after a write that changes it;
+    builds started before the invalidation are not stored.
+    """
+
+    def __init__(self, ttl_seconds: float = 30, max_stale_seconds: float = 300,
+                 partial_ttl_seconds: float = 5, max_entries: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.partial_ttl_seconds = partial_ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._snapshots: "OrderedDict[str, _Snapshot]" = OrderedDict()
+        # Builds in progress per user; invalidate() drops them so their results are not stored
+        self._building: Dict[str, Set[object]] = {}
+        self._builds: Dict[str, asyncio.Future] = {}
+        self._refreshing: Dict[str, float] = {}
+
+    def _store(self, user_id: str, info: dict) -> None:
+        now = self._clock()
+        # Snapshots missing downstream stats are revalidated sooner
+        ttl = self.partial_ttl_seconds if info.get("stats_partial") else self.ttl_seconds
+        self._snapshots[user_id] = _Snapshot(info, now + ttl, now + max(ttl, self.max_stale_seconds))
+        self._snapshots.move_to_end(user_id)
+        while len(self._snapshots) > self.max_entries:
+            self._snapshots.popitem(last=False)
+
+    async def _build(self, user_id: str, build: DashboardBuilder) -> dict:
+        token = object()
+        self._building.setdefault(user_id, set()).add(token)
+        try:
+            info = await build()
+            if token in self._building.get(user_id, ()):  # not invalidated while building
+                self._store(user_id, info)
+            return info
+        finally:
+            tokens = self._building.get(user_id)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._building[user_id]
+
+    async def _refresh(self, user_id: str, refresh: DashboardBuilder) -> None:
+        try:
+            await self._build(user_id, refresh)
+        except Exception as e:
+            logger.error(f"Background dashboard refresh failed for user {user_id}: {str(e)}")
+        finally:
+            self._refreshing.pop(user_id, None)
+
+    def _schedule_refresh(self, user_id: str, refresh: DashboardBuilder) -> None:
+        started = self._refreshing.get(user_id)
+        # A refresh frozen mid-flight (e.g. Lambda) must not block later ones forever
+        if started is not None and self._clock() - started < self.ttl_seconds:
+            return
+        self._refreshing[user_id] = self._clock()
+        asyncio.get_running_loop().create_task(self._refresh(user_id, refresh))
+
+    async def get(self, user_id: str, build: DashboardBuilder) -> dict:
+        """
+        Dashboard info for ``user_id``.
+
+        Args:
+            user_id: Cache key
+            build: Builds the snapshot; shared by concurrent callers and run
+                from background refreshes, so it must not rely on
+                request-scoped resources
+        """
+        user_id = str(user_id)
+        now = self._clock()
+        snapshot = self._snapshots.get(user_id)
+
+        if snapshot is not None and now < snapshot.expires_at:
+            self._snapshots.move_to_end(user_id)
+            if now >= snapshot.fresh_until:
+                self._schedule_refresh(user_id, build)
+            return snapshot.info
+
+        pending = self._builds.get(user_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._build(user_id, build))
+            self._builds[user_id] = pending
+            pending.add_done_callback(lambda done: self._forget_build(user_id, done))
+        return await asyncio.shield(pending)
+
+    def _forget_build(self, user_id: str, build: asyncio.Future) -> None:
+        if self._builds.get(user_id) is build:
+            del self._builds[user_id]
+
+    def invalidate(self, user_id) -> None:
+        user_id = str(user_id)
+        self._building.pop(user_id, None)
+        self._snapshots.pop(user_id, None)
+        self._builds.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._snapshots.clear()
+        self._builds.clear()
+        self._building.clear()
+
+
+dashboard_cache = DashboardCache(
+    ttl_seconds=config.DASHBOARD_CACHE_TTL_SECONDS,
+    max_stale_seconds=config.DASHBOARD_CACHE_MAX_STALE_SECONDS,
+    max_entries=config.DASHBOARD_CACHE_MAX_ENTRIES
+)
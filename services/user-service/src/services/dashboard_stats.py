@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from typing import Awaitable, Dict, List, Optional, Tuple
+
+import httpx
+
+from config import config
+from services.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+EMPTY_COURSE_STATS = {"total_courses": 0, "completed_courses": 0, "total_lessons": 0}
+EMPTY_QUIZ_STATS = {"total_quizzes": 0, "completed_quizzes": 0, "average_score": 0}
+
+
+def _remaining(deadline: float) -> float:
+    return max(deadline - asyncio.get_running_loop().time(), 0)
+
+
+async def _get_json(method: str, url: str, headers: dict, **kwargs) -> Optional[dict]:
+    try:
+        response = await get_http_client().request(method, url, headers=headers, **kwargs)
+    except httpx.HTTPError as e:
+        logger.warning(f"Downstream call failed: {method} {url}: {e}")
+        return None
+    if response.status_code != 200:
+        logger.warning(f"Downstream call returned {response.status_code}: {method} {url}")
+        return None
+    return response.json()
+
+
+async def gather_within(calls: Dict[str, Awaitable], deadline: float) -> Dict[str, Optional[dict]]:
+    """Run calls concurrently; anything unfinished at the deadline is cancelled and reported as None."""
+    tasks = {name: asyncio.ensure_future(call) for name, call in calls.items()}
+    done, pending = await asyncio.wait(tasks.values(), timeout=_remaining(deadline))
+    for task in pending:
+        task.cancel()
+
+    results = {}
+    for name, task in tasks.items():
+        if task in done and not task.cancelled() and task.exception() is None:
+            results[name] = task.result()
+        else:
+            if task in pending:
+                logger.warning(f"Downstream call '{name}' missed the dashboard deadline")
+            results[name] = None
+    return results
+
+
+async def _get_lesson_total(base_url: str, headers: dict, course_ids: List, deadline: float) -> Optional[int]:
+    results = await gather_within({
+        "counts": _get_json("POST", f"{base_url}/lessons/counts", headers, json={"course_ids": course_ids})
+    }, deadline)
+    if results["counts"] is not None:
+        return sum(results["counts"].get("counts", {}).values())
+
+    # Older course-service without the batch endpoint: per-course calls, concurrently
+    per_course = await gather_within({
+        str(course_id): _get_json("GET", f"{base_url}/courses/{course_id}/lessons", headers)
+        for course_id in course_ids
+    }, deadline)
+    if any(data is None for data in per_course.values()):
+        return None
+    return sum(len(data.get("lessons", [])) for data in per_course.values())
+
+
+async def fetch_course_stats(headers: dict, deadline: float) -> Tuple[dict, bool]:
+    """Returns (stats, complete)."""
+    base_url = f"{config.COURSE_SERVICE_URL}/api/v1"
+    results = await gather_within({
+        "courses": _get_json("GET", f"{base_url}/courses", headers),
+        "results": _get_json("GET", f"{base_url}/user/test-results", headers),
+    }, deadline)
+
+    stats = dict(EMPTY_COURSE_STATS)
+    courses = (results["courses"] or {}).get("courses", [])
+    stats["total_courses"] = len(courses)
+    stats["completed_courses"] = len(set(result.get("test_id") for result in (results["results"] or {}).get("results", [])))
+    complete = results["courses"] is not None and results["results"] is not None
+
+    course_ids = [course.get("id") for course in courses if course.get("id")]
+    if course_ids:
+        total_lessons = await _get_lesson_total(base_url, headers, course_ids, deadline)
+        if total_lessons is None:
+            complete = False
+        else:
+            stats["total_lessons"] = total_lessons
+
+    return stats, complete
+
+
+async def fetch_quiz_stats(headers: dict, deadline: float) -> Tuple[dict, bool]:
+    """Returns (stats, complete)."""
+    base_url = f"{config.QUIZ_SERVICE_URL}/api/v1"
+    results = await gather_within({
+        "quizzes": _get_json("GET", f"{base_url}/quizzes", headers),
+        "attempts": _get_json("GET", f"{base_url}/user/quiz-attempts", headers),
+    }, deadline)
+
+    attempts = (results["attempts"] or {}).get("attempts", [])
+    total_score = sum(attempt.get("score", 0) for attempt in attempts)
+    average_score = total_score / len(attempts) if attempts else 0
+
+    stats = {
+        "total_quizzes": len((results["quizzes"] or {}).get("quizzes", [])),
+        "completed_quizzes": len(attempts),
+        "average_score": average_score / 100 if average_score > 1 else average_score
+    }
+    return stats, results["quizzes"] is not None and results["attempts"] is not None
+
+
+async def fetch_dashboard_stats(headers: dict, timeout: Optional[float] = None) -> Tuple[dict, dict, List[str]]:
+    """
+    Course and quiz stats fetched concurrently under one total deadline.
+
+    Returns:
+        (course_stats, quiz_stats, partial_sections) - a section is listed as
+        partial when any of its downstream calls failed or ran out of time.
+    """
+    deadline = asyncio.get_running_loop().time() + (timeout or config.DASHBOARD_STATS_TIMEOUT_SECONDS)
+    (course_stats, course_complete), (quiz_stats, quiz_complete) = await asyncio.gather(
+        fetch_course_stats(headers, deadline),
+        fetch_quiz_stats(headers, deadline)
+    )
+
+    partial = [name for name, complete in (("courses", course_complete), ("quizzes", quiz_complete)) if not complete]
+    return course_stats, quiz_stats, partial
@@ -0,0 +1,290 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import BigInteger, Integer, String, column, select, update, values
+from sqlalchemy.orm import Session
+
+from models import User
+from services.activity_service import record_weekly_exp
+from services.level_service import calculate_level_from_exp, calculate_levels
+
+logger = logging.getLogger(__name__)
+
+# Users incremented, recomputed and written per statement
+EXP_BULK_CHUNK_SIZE = 1000
+
+# Columns read back from the increment (enough for the level, rank and leaderboard hooks)
+_RETURNED_COLUMNS = (
+    User.id, User.email, User.given_name, User.family_name, User.avatar_url,
+    User.current_exp, User.level, User.require_exp
+)
+
+
+@dataclass
+class BulkAwardOutcome:
+    results: List[dict] = field(default_factory=list)
+    not_found: List[str] = field(default_factory=list)
+    # Post-update user snapshots (id, names, avatar, exp, level) for cache hooks
+    users: List[SimpleNamespace] = field(default_factory=list)
+    deltas: Dict[str, int] = field(default_factory=dict)
+
+
+def merge_awards(awards: Iterable[Tuple[str, int]]) -> Dict[str, int]:
+    """Sum deltas per user, keeping first-seen order."""
+    merged: Dict[str, int] = {}
+    for user_id, delta in awards:
+        merged[str(user_id)] = merged.get(str(user_id), 0) + int(delta)
+    return merged
+
+
+def values_update_statement(rows: List[dict]):
+    """UPDATE users ... FROM (VALUES ...) setting exp, level and require_exp per id."""
+    data = values(
+        column("id", String), column("current_exp", BigInteger),
+        column("level", Integer), column("require_exp", BigInteger),
+        name="awards"
+    ).data([(row["id"], row["current_exp"], row["level"], row["require_exp"]) for row in rows])
+    users = User.__table__
+    return (
+        update(users)
+        .where(users.c.id == data.c.id)
+        .values(current_exp=data.c.current_exp, level=data.c.level, require_exp=data.c.require_exp)
+    )
+
+
+def values_increment_statement(deltas: Dict[str, int]):
+    """UPDATE users SET current_exp = current_exp + delta FROM (VALUES ...) ... RETURNING."""
+    data = values(column("id", String), column("delta", BigInteger), name="deltas").data(list(deltas.items()))
+    users = User.__table__
+    return (
+        update(users)
+        .where(users.c.id == data.c.id, users.c.is_active == True)
+        .values(current_exp=users.c.current_exp + data.c.delta)
+        .returning(*(users.c[col.key] for col in _RETURNED_COLUMNS))
+    )
+
+
+def _write_levels(db: Session, rows: List[dict]) -> None:
+    """One UPDATE for the whole chunk: a VALUES join on PostgreSQL, an executemany elsewhere."""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(values_update_statement(rows))
+    else:
+        # ORM bulk UPDATE by primary key
+        db.execute(update(User), rows)
+
+
+def _increment_chunk(db: Session, deltas: Dict[str, int]) -> list:
+    if db.get_bind().dialect.name == "postgresql":
+        # Take the row locks in id order so concurrent batches cannot deadlock
+        db.execute(select(User.id).where(User.id.in_(list(deltas))).order_by(User.id).with_for_update())
+        return db.execute(values_increment_statement(deltas)).all()
+
+    rows = []
+    for user_id in sorted(deltas):
+        row = db.execute(
+            update(User)
+            .where(User.id == user_id, User.is_active == True)
+            .values(current_exp=User.current_exp + deltas[user_id])
+            .returning(*_RETURNED_COLUMNS)
+        ).first()
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def increment_exp_many(db: Session, deltas: Dict[str, int]) -> Dict[str, dict]:
+    """
+    Atomically add EXP to active users and bring their levels up to date, without committing.
+
+    The gains are also added to this week's activity_weekly rollup, which the
+    weekly leaderboard is loaded from.
+
+    The increment happens in the database (``current_exp = current_exp + :delta``
+    ... RETURNING), so concurrent writers never overwrite each other; the level
+    is recomputed from the returned value while the row is still locked by
+    this transaction.
+
+    Returns:
+        {user_id: {original_exp, new_exp, original_level, new_level,
+        new_require_exp, user}} for every active user that was updated
+    """
+    for delta in deltas.values():
+        if delta < 0:
+            raise ValueError("EXP deltas must not be negative")
+
+    results: Dict[str, dict] = {}
+    user_ids = list(deltas)
+    for start in range(0, len(user_ids), EXP_BULK_CHUNK_SIZE):
+        chunk = {user_id: deltas[user_id] for user_id in user_ids[start:start + EXP_BULK_CHUNK_SIZE]}
+        rows = _increment_chunk(db, chunk)
+        if not rows:
+            continue
+
+        levels, next_level_exps = calculate_levels([row.current_exp for row in rows])
+        level_updates = []
+        for row, level, require_exp in zip(rows, levels, next_level_exps):
+            level, require_exp = int(level), int(require_exp)
+            if (level, require_exp) != (row.level, row.require_exp):
+                level_updates.append({"id": row.id, "current_exp": row.current_exp, "level": level, "require_exp": require_exp})
+            results[row.id] = {
+                "original_exp": row.current_exp - chunk[row.id],
+                "new_exp": row.current_exp,
+                "original_level": row.level or 1,
+                "new_level": level,
+                "new_require_exp": require_exp,
+                "user": SimpleNamespace(
+                    id=row.id, email=row.email, given_name=row.given_name, family_name=row.family_name,
+                    avatar_url=row.avatar_url, current_exp=row.current_exp, level=level,
+                    require_exp=require_exp, is_active=True
+                ),
+            }
+        if level_updates:
+            _write_levels(db, level_updates)
+    record_weekly_exp(db, {user_id: result["new_exp"] - result["original_exp"] for user_id, result in results.items()})
+    return results
+
+
+def increment_exp(db: Session, user_id: str, delta: int) -> Optional[dict]:
+    """Atomic single-user increment; None if the user is missing or inactive."""
+    return increment_exp_many(db, {str(user_id): delta}).get(str(user_id))
+
+
+def award_exp_bulk(db: Session, awards: Iterable[Tuple[str, int]]) -> BulkAwardOutcome:
+    """
+    Apply EXP awards to many active users without committing.
+
+    Per chunk: one atomic increment statement, one vectorized level
+    computation and one batched level write. Unknown or inactive users are
+    reported in ``not_found``.
+    """
+    deltas = merge_awards(awards)
+    outcome = BulkAwardOutcome(deltas=deltas)
+    updated = increment_exp_many(db, deltas)
+
+    for user_id in deltas:
+        result = updated.get(user_id)
+        if result is None:
+            outcome.not_found.append(user_id)
+            continue
+        outcome.results.append({
+            "user_id": user_id,
+            "exp_gained": deltas[user_id],
+            "original_exp": result["original_exp"],
+            "new_exp": result["new_exp"],
+            "original_level": result["original_level"],
+            "new_level": result["new_level"],
+            "new_require_exp": result["new_require_exp"],
+            "level_increased": result["new_level"] > result["original_level"],
+            "levels_gained": max(result["new_level"] - result["original_level"], 0),
+        })
+        outcome.users.append(result["user"])
+
+    logger.info(f"Bulk EXP award: {len(outcome.results)} users updated, {len(outcome.not_found)} not found")
+    return outcome
+
+
+class ExpWriteBuffer:
+    """
+    Coalesces EXP increments that arrive within a short window.
+
+    Callers await ``add``; increments for the same user inside the window
+    become one atomic UPDATE, and all users pending at flush time share one
+    transaction. Each caller still gets its own view of the change (EXP and
+    level before/after its own delta), as if the increments had been applied
+    one by one in arrival order.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        linger_seconds: float = 0.005,
+        max_batch: int = 500,
+        on_commit: Optional[Callable[[Dict[str, dict], Dict[str, int]], None]] = None
+    ):
+        self.session_factory = session_factory
+        self.linger_seconds = linger_seconds
+        self.max_batch = max_batch
+        self.on_commit = on_commit
+        self._pending: Dict[str, List[Tuple[int, asyncio.Future]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def add(self, user_id: str, delta: int) -> Optional[dict]:
+        """Queue an increment and wait for it to be committed; None if the user is missing or inactive."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Work queued on a previous event loop (e.g. another Lambda invocation) can never complete here
+            self._pending, self._flush_task, self._loop = {}, None, loop
+
+        future = loop.create_future()
+        self._pending.setdefault(str(user_id), []).append((int(delta), future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_after_linger())
+        return await future
+
+    async def _flush_after_linger(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self.linger_seconds)
+            batch, self._pending = self._pending, {}
+            user_ids = list(batch)
+            for start in range(0, len(user_ids), self.max_batch):
+                await self._flush({user_id: batch[user_id] for user_id in user_ids[start:start + self.max_batch]})
+
+    def _commit(self, deltas: Dict[str, int]) -> Dict[str, dict]:
+        db = self.session_factory()
+        try:
+            results = increment_exp_many(db, deltas)
+            db.commit()
+            return results
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _flush(self, batch: Dict[str, List[Tuple[int, asyncio.Future]]]) -> None:
+        deltas = {user_id: sum(delta for delta, _ in waiters) for user_id, waiters in batch.items()}
+        try:
+            results = await asyncio.to_thread(self._commit, deltas)
+        except Exception as e:
+            logger.error(f"EXP buffer flush failed for {len(deltas)} users: {str(e)}")
+            for waiters in batch.values():
+                for _, future in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        if self.on_commit is not None:
+            try:
+                self.on_commit(results, deltas)
+            except Exception as e:
+                logger.error(f"EXP buffer commit hook failed: {str(e)}")
+
+        for user_id, waiters in batch.items():
+            result = results.get(user_id)
+            exp = result["original_exp"] if result else 0
+            level = result["original_level"] if result else 1
+            for delta, future in waiters:
+                if future.done():
+                    continue
+                if result is None:
+                    future.set_result(None)
+                    continue
+                new_level, _, require_exp = calculate_level_from_exp(exp + delta)
+                future.set_result({
+                    "original_exp": exp,
+                    "new_exp": exp + delta,
+                    "original_level": level,
+                    "new_level": new_level,
+                    "new_require_exp": require_exp,
+                    "user": result["user"],
+                })
+                exp, level = exp + delta, new_level
+
+    async def drain(self) -> None:
+        """Wait for everything queued so far to be committed."""
+        while self._flush_task is not None and not self._flush_task.done():
+            await asyncio.shield(self._flush_task)
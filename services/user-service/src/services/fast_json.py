@@ -0,0 +1,38 @@
+import json
+from typing import Any, Type
+
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson is optional - the stdlib encoder produces the same JSON, only slower
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, as FastAPI's JSONResponse would render it."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered straight from plain data.
+
+    Returning a Response from a handler bypasses the route's response model,
+    so the content is neither validated nor walked by ``jsonable_encoder``:
+    only use it for payloads built from our own rows, made of JSON-native
+    values (str, int, float, bool, None, list, dict).
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_json_response(model_class: Type[BaseModel], **fields) -> FastJSONResponse:
+    """The body ``model_class(**fields)`` would serialize to, without building the model."""
+    return FastJSONResponse({name: fields.get(name, field.default) for name, field in model_class.model_fields.items()})
@@ -0,0 +1,44 @@
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Shared keep-alive client for calls to other Pathlight services.
+
+    Created lazily (so Lambda cold starts don't pay for it until needed) and
+    re-created if the running event loop changed, since pooled connections
+    are bound to the loop that opened them.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(config.DOWNSTREAM_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=30.0
+            )
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("Shared HTTP client closed")
+    _client = None
+    _client_loop = None
@@ -0,0 +1,305 @@
+import bisect
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import ActivityWeekly, User
+from config import config
+from services.local_time import today_local, week_start
+from services.profile_cards import card_members, row_fragment, select_cards, serialize_members
+
+logger = logging.getLogger(__name__)
+
+GLOBAL = "global"
+WEEKLY = "weekly"
+
+
+class SortedSetStore:
+    """
+    Local stand-in for Redis sorted sets (ZADD / ZINCRBY / ZREM / ZREVRANGE).
+
+    Members are kept in a list ordered by (-score, member), so reads of the
+    top of a set are a slice and writes are O(log n) searches plus a list shift.
+    """
+
+    def __init__(self):
+        self._scores: Dict[str, Dict[str, float]] = {}
+        self._ordered: Dict[str, List[Tuple[float, str]]] = {}
+        self._lock = threading.Lock()
+
+    def _remove(self, key: str, member: str) -> None:
+        score = self._scores.get(key, {}).pop(member, None)
+        if score is not None:
+            ordered = self._ordered[key]
+            del ordered[bisect.bisect_left(ordered, (-score, member))]
+
+    def zadd(self, key: str, member: str, score: float) -> None:
+        with self._lock:
+            self._remove(key, member)
+            self._scores.setdefault(key, {})[member] = score
+            bisect.insort(self._ordered.setdefault(key, []), (-score, member))
+
+    def zincrby(self, key: str, member: str, amount: float) -> float:
+        with self._lock:
+            score = self._scores.get(key, {}).get(member, 0) + amount
+            self._remove(key, member)
+            self._scores.setdefault(key, {})[member] = score
+            bisect.insort(self._ordered.setdefault(key, []), (-score, member))
+            return score
+
+    def zrem(self, key: str, member: str) -> None:
+        with self._lock:
+            self._remove(key, member)
+
+    def zscore(self, key: str, member: str) -> Optional[float]:
+        return self._scores.get(key, {}).get(member)
+
+    def zcard(self, key: str) -> int:
+        return len(self._scores.get(key, {}))
+
+    def zrevrange(self, key: str, start: int, stop: int) -> List[Tuple[str, float]]:
+        """Members from highest to lowest score, ``stop`` inclusive like Redis."""
+        with self._lock:
+            ordered = self._ordered.get(key, [])
+            if start < 0:
+                start += len(ordered)
+            if stop < 0:
+                stop += len(ordered)
+            return [(member, -neg_score) for neg_score, member in ordered[max(start, 0):stop + 1]]
+
+    def ztrim(self, key: str, keep: int) -> None:
+        """Drop everything below the top ``keep`` members."""
+        with self._lock:
+            ordered = self._ordered.get(key, [])
+            for _, member in ordered[keep:]:
+                self._scores[key].pop(member, None)
+            del ordered[keep:]
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._scores.pop(key, None)
+            self._ordered.pop(key, None)
+
+    def keys(self) -> List[str]:
+        return list(self._scores)
+
+
+@dataclass
+class _Card:
+    members: dict
+    fragment: str  # the members as pre-serialized JSON, see profile_cards
+    level: int
+
+
+def _card_for(user) -> _Card:
+    members = card_members(user)
+    return _Card(members, serialize_members(members), user.level or 1)
+
+
+def current_week_key(now: Optional[datetime] = None) -> str:
+    """Sorted-set key of the current week, starting on the local Monday like activity_weekly."""
+    return f"{WEEKLY}:{week_start(today_local(now)).isoformat()}"
+
+
+class LeaderboardService:
+    """
+    Precomputed top-N leaderboards (global by total EXP, weekly by EXP gained).
+
+    Writes update the sorted sets incrementally; reads return a cached list and
+    a pre-serialized JSON payload that are rebuilt only after a write changed the top N.
+    Both boards keep a margin of extra members so users falling out of the
+    top N can be backfilled without a query, and are reloaded periodically to
+    pick up writes made by other instances: the global board from the users
+    table, the weekly board from this week's activity_weekly rollup.
+    """
+
+    def __init__(self, store: Optional[SortedSetStore] = None, top_n: int = 10, margin: int = 40, refresh_seconds: int = 300):
+        self.store = store or SortedSetStore()
+        self.top_n = top_n
+        self.capacity = top_n + margin
+        self.refresh_seconds = refresh_seconds
+        self._cards: Dict[str, _Card] = {}
+        self._snapshots: Dict[str, Tuple[List[dict], bytes]] = {}
+        self._global_loaded_at: Optional[float] = None
+        self._global_complete = False
+        self._weekly_key: Optional[str] = None
+        self._weekly_loaded_at: Optional[float] = None
+        self._weekly_complete = False
+        self._lock = threading.Lock()
+
+    def _ensure_global(self, db: Session) -> None:
+        loaded_at = self._global_loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.refresh_seconds:
+            return
+        self.reload_global(db)
+
+    def reload_global(self, db: Session) -> None:
+        top_users = db.execute(
+            select_cards().add_columns(User.current_exp)
+            .where(User.is_active == True).order_by(User.current_exp.desc()).limit(self.capacity)
+        ).all()
+        with self._lock:
+            self.store.delete(GLOBAL)
+            for user in top_users:
+                fragment = row_fragment(user)
+                self._cards[str(user.id)] = _Card(json.loads(f"{{{fragment}}}"), fragment, user.level or 1)
+                self.store.zadd(GLOBAL, str(user.id), user.current_exp or 0)
+            self._snapshots.pop(GLOBAL, None)
+            self._global_complete = len(top_users) < self.capacity
+            self._global_loaded_at = time.monotonic()
+        logger.info(f"Global leaderboard loaded with {len(top_users)} users")
+
+    def _ensure_weekly(self, db: Session, week_key: str) -> None:
+        loaded_at = self._weekly_loaded_at
+        if self._weekly_key == week_key and loaded_at is not None and time.monotonic() - loaded_at < self.refresh_seconds:
+            return
+        self.reload_weekly(db, week_key)
+
+    def reload_weekly(self, db: Session, week_key: Optional[str] = None) -> None:
+        week_key = week_key or current_week_key()
+        top_users = db.execute(
+            select_cards().add_columns(ActivityWeekly.exp)
+            .join(ActivityWeekly, ActivityWeekly.user_id == User.id)
+            .where(
+                ActivityWeekly.week_start == date.fromisoformat(week_key.split(":", 1)[1]),
+                ActivityWeekly.exp > 0,
+                User.is_active == True
+            )
+            .order_by(ActivityWeekly.exp.desc()).limit(self.capacity)
+        ).all()
+        with self._lock:
+            for key in self.store.keys():
+                if key.startswith(f"{WEEKLY}:"):
+                    self.store.delete(key)
+                    self._snapshots.pop(key, None)
+            for user in top_users:
+                fragment = row_fragment(user)
+                self._cards[str(user.id)] = _Card(json.loads(f"{{{fragment}}}"), fragment, user.level or 1)
+                self.store.zadd(week_key, str(user.id), user.exp)
+            self._snapshots.pop(week_key, None)
+            self._weekly_key = week_key
+            self._weekly_complete = len(top_users) < self.capacity
+            self._weekly_loaded_at = time.monotonic()
+        logger.info(f"Weekly leaderboard {week_key} loaded with {len(top_users)} users")
+
+    def _top_ids(self, key: str) -> List[str]:
+        return [member for member, _ in self.store.zrevrange(key, 0, self.top_n - 1)]
+
+    def _apply_global(self, user_id: str, exp: int) -> None:
+        if self._global_complete:
+            # Every active user is tracked, so any score can be placed exactly
+            self.store.zadd(GLOBAL, user_id, exp)
+            return
+
+        tracked = self.store.zscore(GLOBAL, user_id) is not None
+        lowest = self.store.zrevrange(GLOBAL, -1, -1)
+        lowest_score = lowest[0][1] if lowest and lowest[0][0] != user_id else None
+        if tracked and lowest_score is not None and exp < lowest_score:
+            # Untracked users may now outrank this one; drop it rather than misplace it
+            self.store.zrem(GLOBAL, user_id)
+        elif tracked or lowest_score is None or exp > lowest_score:
+            self.store.zadd(GLOBAL, user_id, exp)
+            self.store.ztrim(GLOBAL, self.capacity)
+
+    def _apply_weekly(self, week_key: str, user_id: str, exp_delta: int) -> None:
+        if self._weekly_key != week_key:
+            # Not loaded for this week yet: the first read loads the committed gain from activity_weekly
+            return
+        if self._weekly_complete or self.store.zscore(week_key, user_id) is not None:
+            # Tracked totals are exact, and with a complete board untracked users had no EXP this week
+            self.store.zincrby(week_key, user_id, exp_delta)
+            return
+
+        # An untracked user's total is unknown, but it was at most the lowest tracked score
+        lowest = self.store.zrevrange(week_key, -1, -1)
+        last_shown = self.store.zrevrange(week_key, self.top_n - 1, self.top_n - 1)
+        if not lowest or not last_shown or lowest[0][1] + exp_delta >= last_shown[0][1]:
+            # It may now be on the board: reload on next read rather than guess its place
+            self._weekly_loaded_at = None
+
+    def record_exp_change(self, user: User, exp_delta: int = 0) -> None:
+        """Apply a committed EXP change for ``user`` to every board."""
+        user_id = str(user.id)
+        week_key = current_week_key()
+
+        with self._lock:
+            global_before = self._top_ids(GLOBAL)
+            weekly_before = self._top_ids(week_key)
+            self._cards[user_id] = _card_for(user)
+
+            if not getattr(user, 'is_active', True):
+                self.store.zrem(GLOBAL, user_id)
+                self.store.zrem(week_key, user_id)
+            else:
+                self._apply_global(user_id, getattr(user, 'current_exp', 0) or 0)
+                if exp_delta > 0:
+                    self._apply_weekly(week_key, user_id, exp_delta)
+
+            if not self._global_complete and self.store.zcard(GLOBAL) < self.top_n and self._global_loaded_at is not None:
+                # Margin exhausted (e.g. several resets): force a reload on next read
+                self._global_loaded_at = None
+            if not self._weekly_complete and self.store.zcard(week_key) < self.top_n and self._weekly_key == week_key:
+                self._weekly_loaded_at = None
+
+            # Only invalidate snapshots whose visible content may have changed
+            if user_id in global_before or self._top_ids(GLOBAL) != global_before:
+                self._snapshots.pop(GLOBAL, None)
+            if user_id in weekly_before or self._top_ids(week_key) != weekly_before:
+                self._snapshots.pop(week_key, None)
+
+    def record_profile_change(self, user: User) -> None:
+        """Re-render a tracked user's card after a committed name or avatar change."""
+        user_id = str(user.id)
+        with self._lock:
+            if user_id not in self._cards:
+                return
+            self._cards[user_id] = _card_for(user)
+            for key in self.store.keys():
+                if user_id in self._top_ids(key):
+                    self._snapshots.pop(key, None)
+
+    def _snapshot(self, key: str) -> Tuple[List[dict], bytes]:
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            entries, serialized = [], []
+            for rank, (member, score) in enumerate(self.store.zrevrange(key, 0, self.top_n - 1), start=1):
+                card = self._cards.get(member)
+                if card is None:
+                    continue
+                entries.append({"rank": rank, **card.members, "level": card.level, "experience": int(score)})
+                # Splice the cached card JSON rather than serializing the entry again
+                serialized.append(f'{{"rank":{rank},{card.fragment},"level":{card.level},"experience":{int(score)}}}')
+            snapshot = (entries, f"[{','.join(serialized)}]".encode("utf-8"))
+            self._snapshots[key] = snapshot
+        return snapshot
+
+    def _key_for(self, db: Session, period: str) -> str:
+        if period == WEEKLY:
+            week_key = current_week_key()
+            self._ensure_weekly(db, week_key)
+            return week_key
+        self._ensure_global(db)
+        return GLOBAL
+
+    def get_leaderboard(self, db: Session, period: str = GLOBAL) -> List[dict]:
+        """Cached top-N entries (shared list - do not mutate)."""
+        return self._snapshot(self._key_for(db, period))[0]
+
+    def get_leaderboard_bytes(self, db: Session, period: str = GLOBAL) -> bytes:
+        """Pre-serialized JSON array of the top-N entries."""
+        return self._snapshot(self._key_for(db, period))[1]
+
+
+leaderboard_service = LeaderboardService(
+    top_n=config.LEADERBOARD_SIZE,
+    refresh_seconds=config.LEADERBOARD_REFRESH_SECONDS
+)
@@ -0,0 +1,68 @@
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from models import LearnerStats
+from services.sql_utils import upsert_insert
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ("total_courses", "completed_courses", "total_lessons", "total_quizzes", "completed_quizzes")
+STAT_FIELDS = COUNTER_FIELDS + ("average_score",)
+
+EMPTY_LEARNER_STATS = {field: 0 for field in STAT_FIELDS}
+
+_columns = LearnerStats.__table__.c
+
+
+def get_learner_stats(db: Session, user_id: str) -> dict:
+    """Counters for one user (zeros when nothing was recorded) - a primary key lookup."""
+    row = db.execute(select(*(_columns[field] for field in STAT_FIELDS)).where(_columns.user_id == user_id)).first()
+    return dict(row._mapping) if row is not None else dict(EMPTY_LEARNER_STATS)
+
+
+def set_learner_stats(db: Session, user_id: str, values: Dict[str, float]) -> None:
+    """Overwrite the given fields (upsert); fields not passed keep their value."""
+    values = {field: value for field, value in values.items() if field in STAT_FIELDS and value is not None}
+    if not values:
+        return
+    stmt = upsert_insert(db, LearnerStats).values(user_id=user_id, **values)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[_columns.user_id],
+        set_={**{field: stmt.excluded[field] for field in values}, "updated_at": func.now()}
+    ))
+
+
+def increment_learner_stats(db: Session, user_id: str, deltas: Dict[str, int], quiz_score: Optional[float] = None) -> None:
+    """
+    Add ``deltas`` to the counters in one upsert, so concurrent writers never lose updates.
+
+    ``quiz_score`` (0..1) records one more completed quiz and folds the score into
+    the running average in the same statement.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if field in COUNTER_FIELDS and delta}
+    if quiz_score is not None:
+        deltas["completed_quizzes"] = deltas.get("completed_quizzes", 0) + 1
+    if not deltas:
+        return
+
+    insert_values = dict(deltas)
+    if quiz_score is not None:
+        insert_values["average_score"] = quiz_score
+    stmt = upsert_insert(db, LearnerStats).values(user_id=user_id, **insert_values)
+
+    # SET expressions see the pre-update row, so the average uses the old quiz count
+    updates = {field: _columns[field] + stmt.excluded[field] for field in deltas}
+    updates["updated_at"] = func.now()
+    if quiz_score is not None:
+        updates["average_score"] = (
+            (_columns.average_score * _columns.completed_quizzes + quiz_score)
+            / (_columns.completed_quizzes + 1)
+        )
+    db.execute(stmt.on_conflict_do_update(index_elements=[_columns.user_id], set_=updates))
+
+
+def reset_learner_stats(db: Session, user_id: str) -> None:
+    db.execute(delete(LearnerStats).where(LearnerStats.user_id == user_id))
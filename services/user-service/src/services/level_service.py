@@ -0,0 +1,106 @@
+import bisect
+import math
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # the vectorized path is optional - falls back to per-value lookups
+    np = None
+
+# ===== LEVEL SYSTEM CONFIGURATION =====
+LEVEL_EXP_THRESHOLDS = [
+    0,      # Level 1: 0 exp
+    100,    # Level 2: 100 exp
+    300,    # Level 3: 300 exp
+    600,    # Level 4: 600 exp
+    1000,   # Level 5: 1000 exp
+    1500,   # Level 6: 1500 exp
+    2100,   # Level 7: 2100 exp
+    2800,   # Level 8: 2800 exp
+    3600,   # Level 9: 3600 exp
+    4500,   # Level 10: 4500 exp
+    5500,   # Level 11: 5500 exp
+    6600,   # Level 12: 6600 exp
+    7800,   # Level 13: 7800 exp
+    9100,   # Level 14: 9100 exp
+    10500,  # Level 15: 10500 exp
+]
+
+# Past the table, thresholds grow geometrically: BASE_EXP * GROWTH_FACTOR ** (level - BASE_LEVEL)
+BASE_LEVEL = len(LEVEL_EXP_THRESHOLDS)
+BASE_EXP = LEVEL_EXP_THRESHOLDS[-1]
+GROWTH_FACTOR = 1.3
+MAX_LEVEL = 1001
+
+
+def _threshold(level: int) -> int:
+    if level <= 1:
+        return 0
+    if level - 1 < len(LEVEL_EXP_THRESHOLDS):
+        return LEVEL_EXP_THRESHOLDS[level - 1]
+    additional_exp = BASE_EXP * (GROWTH_FACTOR ** (level - BASE_LEVEL)) - BASE_EXP
+    return int(BASE_EXP + additional_exp)
+
+
+# EXP needed for levels 1..MAX_LEVEL + 1 (index = level - 1), computed once
+_THRESHOLDS: List[int] = [_threshold(level) for level in range(1, MAX_LEVEL + 2)]
+_LOG_GROWTH = math.log(GROWTH_FACTOR)
+_THRESHOLDS_ARRAY = np.array(_THRESHOLDS, dtype=np.float64) if np is not None else None
+
+
+def get_exp_for_level(level: int) -> int:
+    if level <= 1:
+        return 0
+    if level <= len(_THRESHOLDS):
+        return _THRESHOLDS[level - 1]
+    return _threshold(level)
+
+
+def level_for_exp(current_exp: int) -> int:
+    """Highest level whose threshold ``current_exp`` has reached (capped at MAX_LEVEL)."""
+    if current_exp < BASE_EXP:
+        return max(bisect.bisect_right(_THRESHOLDS, current_exp, hi=BASE_LEVEL), 1)
+
+    # Geometric tail: invert the growth formula, then let the table settle float rounding
+    level = BASE_LEVEL + int(math.log(current_exp / BASE_EXP) / _LOG_GROWTH)
+    level = min(max(level, BASE_LEVEL), MAX_LEVEL)
+    while level < MAX_LEVEL and _THRESHOLDS[level] <= current_exp:
+        level += 1
+    while level > BASE_LEVEL and _THRESHOLDS[level - 1] > current_exp:
+        level -= 1
+    return level
+
+
+def calculate_level_from_exp(current_exp: int) -> tuple[int, int, int]:
+    if current_exp <= 0:
+        return 1, 0, get_exp_for_level(2)
+    level = level_for_exp(current_exp)
+    return level, _THRESHOLDS[level - 1], _THRESHOLDS[level]
+
+
+def auto_level_up(current_exp: int, current_level: Optional[int] = None) -> tuple[int, int, bool]:
+    new_level, current_level_exp, next_level_exp = calculate_level_from_exp(current_exp)
+    
+    level_increased = current_level is not None and new_level > current_level
+    
+    return new_level, next_level_exp, level_increased
+
+
+def calculate_levels(exps: Sequence[int]) -> Tuple[Sequence[int], Sequence[int]]:
+    """
+    Levels and next-level EXP for many users at once.
+
+    Uses one NumPy ``searchsorted`` over the precomputed table when NumPy is
+    installed (every threshold is an integer exactly representable as a
+    float64), otherwise the scalar lookup per value.
+
+    Returns:
+        (levels, next_level_exps) - NumPy int64 arrays, or lists without NumPy
+    """
+    if np is None:
+        results = [calculate_level_from_exp(int(exp)) for exp in exps]
+        return [level for level, _, _ in results], [next_exp for _, _, next_exp in results]
+
+    values = np.asarray(exps, dtype=np.float64)
+    levels = np.clip(np.searchsorted(_THRESHOLDS_ARRAY, values, side="right"), 1, MAX_LEVEL)
+    return levels.astype(np.int64), _THRESHOLDS_ARRAY[levels].astype(np.int64)
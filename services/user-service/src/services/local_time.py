@@ -0,0 +1,22 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from config import config
+
+# Day boundaries follow the users' local time (Vietnam, UTC+7), as reminders do
+LOCAL_TZ = timezone(timedelta(hours=config.ACTIVITY_TIMEZONE_OFFSET_HOURS))
+
+
+def local_day(moment: datetime) -> date:
+    """Local calendar day of a timestamp; naive timestamps are taken as UTC."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(LOCAL_TZ).date()
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def today_local(now: Optional[datetime] = None) -> date:
+    return local_day(now or datetime.now(timezone.utc))
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models import ProfileCard, User
+from config import config
+from services.avatar_url_service import avatar_link
+from services.sql_utils import upsert_insert
+
+logger = logging.getLogger(__name__)
+
+# Bump when the card layout changes; the link base is part of the key because it is baked into avatar_url
+CARD_LAYOUT_VERSION = 1
+
+
+def card_format_key() -> str:
+    return f"{CARD_LAYOUT_VERSION}:{config.USER_SERVICE_URL}"
+
+
+# Everything a card is rendered from, plus the stored projection (NULL until written)
+CARD_SOURCE_COLUMNS = (User.id, User.email, User.family_name, User.given_name, User.avatar_url)
+CARD_COLUMNS = CARD_SOURCE_COLUMNS + (User.level, ProfileCard.fragment, ProfileCard.format_key, ProfileCard.source_hash)
+
+
+def card_source_hash(user) -> str:
+    """
+    Digest of the users columns a card is rendered from.
+
+    The auth service also writes these (Google sign-in replaces the avatar and
+    fills in missing names) without touching profile_cards, so a stored card is
+    only used while its digest still matches the row it is read with.
+    """
+    source = "\x1f".join(str(getattr(user, column.key) or "") for column in CARD_SOURCE_COLUMNS)
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+
+def display_name(user) -> str:
+    return f"{user.family_name or ''} {user.given_name or ''}".strip() or user.email.split('@')[0]
+
+
+def display_initials(user) -> str:
+    return "".join([name[0].upper() for name in [user.family_name or '', user.given_name or ''] if name])[:2] or user.email[0].upper()
+
+
+def card_members(user) -> dict:
+    """The level-independent part of a card: everything that only changes with the name or avatar."""
+    return {
+        "id": str(user.id),
+        "name": display_name(user),
+        "avatar_url": avatar_link(user.id, user.avatar_url),
+        "initials": display_initials(user)
+    }
+
+
+def build_profile_card(user) -> dict:
+    """Public card for a user row (any object with the CARD_SOURCE_COLUMNS attributes and ``level``)."""
+    return {**card_members(user), "level": user.level or 1}
+
+
+def serialize_members(members: dict) -> str:
+    """``"id":...,"name":...`` - the members as JSON without the braces, ready to splice into an object."""
+    return json.dumps(members, ensure_ascii=False)[1:-1]
+
+
+def render_fragment(user) -> str:
+    return serialize_members(card_members(user))
+
+
+def is_card_current(row) -> bool:
+    return row.fragment is not None and row.format_key == card_format_key() and row.source_hash == card_source_hash(row)
+
+
+def row_fragment(row) -> str:
+    """Stored fragment of a CARD_COLUMNS row, or one rendered from its users columns when missing or outdated."""
+    if is_card_current(row):
+        return row.fragment
+    return render_fragment(row)
+
+
+def card_json(fragment: str, level: Optional[int]) -> str:
+    return f'{{{fragment},"level":{int(level or 1)}}}'
+
+
+def select_cards():
+    """SELECT of CARD_COLUMNS; users without a stored card come back with a NULL fragment."""
+    return select(*CARD_COLUMNS).outerjoin(ProfileCard, ProfileCard.user_id == User.id)
+
+
+def refresh_profile_cards(db: Session, users: Iterable) -> None:
+    """
+    Rewrite the stored cards of ``users`` in the caller's transaction.
+
+    Call it wherever a name or avatar changes, before the commit, so the
+    projection never disagrees with a committed users row.
+    """
+    values = []
+    for user in users:
+        members = card_members(user)
+        values.append({
+            "user_id": members["id"],
+            "name": members["name"],
+            "initials": members["initials"],
+            "avatar_url": members["avatar_url"],
+            "fragment": serialize_members(members),
+            "format_key": card_format_key(),
+            "source_hash": card_source_hash(user)
+        })
+    if not values:
+        return
+    stmt = upsert_insert(db, ProfileCard).values(values)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[ProfileCard.user_id],
+        set_={
+            **{field: stmt.excluded[field] for field in ("name", "initials", "avatar_url", "fragment", "format_key", "source_hash")},
+            "updated_at": func.now()
+        }
+    ))
+
+
+def backfill_profile_cards(session_factory, batch_size: int = 1000) -> int:
+    """
+    Rewrite cards that are missing (accounts created by the auth service),
+    were rendered with an older format or no longer match their users row
+    (names and avatars changed by the auth service). Reads render those on
+    the fly, so this only saves them the work.
+    """
+    written = 0
+    after = None
+    while True:
+        db = session_factory()
+        try:
+            statement = select_cards().order_by(User.id).limit(batch_size)
+            if after is not None:
+                statement = statement.where(User.id > after)
+            rows = db.execute(statement).all()
+            stale = [row for row in rows if not is_card_current(row)]
+            refresh_profile_cards(db, stale)
+            db.commit()
+        finally:
+            db.close()
+        written += len(stale)
+        if len(rows) < batch_size:
+            break
+        after = rows[-1].id
+    if written:
+        logger.info(f"Backfilled {written} profile cards")
+    return written
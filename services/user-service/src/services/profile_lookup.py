@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from models import User
+from config import config
+from services.profile_cards import card_json, row_fragment, select_cards
+
+logger = logging.getLogger(__name__)
+
+RowLoader = Callable[[Callable, List[str]], Sequence]
+
+
+def serialize_card_fragment(row) -> bytes:
+    """``"<id>":{card}`` for a CARD_COLUMNS row - a ready-to-join member of the id -> card JSON object."""
+    return f"{json.dumps(str(row.id))}:{card_json(row_fragment(row), row.level)}".encode("utf-8")
+
+
+def join_fragments(fragments: Iterable[bytes]) -> bytes:
+    return b"{" + b",".join(fragments) + b"}"
+
+
+def load_active_profile_rows(session_factory, user_ids: List[str]) -> Sequence:
+    """Runs in a worker thread, so it uses its own session."""
+    db = session_factory()
+    try:
+        return db.execute(select_cards().where(User.id.in_(user_ids), User.is_active == True)).all()
+    finally:
+        db.close()
+
+
+@dataclass
+class _Entry:
+    fragment: Optional[bytes]  # None: no active user with this id
+    expires_at: float
+
+
+class ProfileLookup:
+    """
+    Read-through cache of pre-serialized profile cards keyed by user id.
+
+    Rows come from the ``profile_cards`` projection, so a cold load splices the
+    stored fragment with the user's level instead of rendering the card.
+
+    Misses are loaded in chunks of ``chunk_size`` ids off the event loop. An id
+    that is already being loaded by another request is awaited rather than
+    queried again, so overlapping concurrent lookups share one query per id.
+    Unknown and inactive ids are cached for ``negative_ttl_seconds``.
+
+    A load only stores an id while its future is still the in-flight one for
+    that id; ``invalidate`` drops the future, so results read before the
+    invalidation are handed to their waiters but never cached.
+    """
+
+    def __init__(self, load_rows: RowLoader = load_active_profile_rows, ttl_seconds: float = 60,
+                 negative_ttl_seconds: float = 5, max_entries: int = 50000, chunk_size: int = 500,
+                 clock: Callable[[], float] = time.monotonic):
+        self.load_rows = load_rows
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        self.chunk_size = chunk_size
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _cached(self, user_id: str, now: float) -> Optional[_Entry]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry.expires_at <= now:
+            return None
+        self._entries.move_to_end(user_id)
+        return entry
+
+    def _store(self, user_id: str, fragment: Optional[bytes]) -> None:
+        ttl = self.ttl_seconds if fragment is not None else self.negative_ttl_seconds
+        self._entries[user_id] = _Entry(fragment, self._clock() + ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _load_chunk(self, session_factory, user_ids: List[str], futures: Dict[str, asyncio.Future]) -> None:
+        try:
+            rows = await asyncio.to_thread(self.load_rows, session_factory, user_ids)
+            fragments = {str(row.id): serialize_card_fragment(row) for row in rows}
+            for user_id in user_ids:
+                fragment = fragments.get(user_id)
+                if self._inflight.get(user_id) is futures[user_id]:  # not invalidated while loading
+                    self._store(user_id, fragment)
+                futures[user_id].set_result(fragment)
+        except Exception as e:
+            for user_id in user_ids:
+                if not futures[user_id].done():
+                    futures[user_id].set_exception(e)
+        finally:
+            for user_id in user_ids:
+                if self._inflight.get(user_id) is futures[user_id]:
+                    del self._inflight[user_id]
+
+    async def get_fragments(self, session_factory, user_ids: Iterable[str]) -> List[bytes]:
+        """Card fragments for the active users among ``user_ids`` (order of first appearance)."""
+        ordered = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Loads started on a previous event loop (e.g. another Lambda invocation) can never complete here
+            self._inflight, self._loop = {}, loop
+        now = self._clock()
+        found: Dict[str, Optional[bytes]] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        missing: List[str] = []
+
+        for user_id in ordered:
+            entry = self._cached(user_id, now)
+            if entry is not None:
+                found[user_id] = entry.fragment
+            elif user_id in self._inflight:
+                waiting[user_id] = self._inflight[user_id]
+            else:
+                missing.append(user_id)
+
+        if missing:
+            futures = {user_id: loop.create_future() for user_id in missing}
+            self._inflight.update(futures)
+            waiting.update(futures)
+            await asyncio.gather(*(
+                self._load_chunk(session_factory, missing[i:i + self.chunk_size], futures)
+                for i in range(0, len(missing), self.chunk_size)
+            ))
+
+        if waiting:
+            results = await asyncio.gather(*(asyncio.shield(future) for future in waiting.values()))
+            found.update(zip(waiting.keys(), results))
+
+        return [found[user_id] for user_id in ordered if found.get(user_id) is not None]
+
+    async def get_cards_json(self, session_factory, user_ids: Iterable[str]) -> bytes:
+        """``{"<id>": {card}, ...}`` assembled from cached fragments."""
+        return join_fragments(await self.get_fragments(session_factory, user_ids))
+
+    def invalidate(self, user_id) -> None:
+        user_id = str(user_id)
+        self._entries.pop(user_id, None)
+        self._inflight.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+
+
+profile_lookup = ProfileLookup(
+    ttl_seconds=config.PROFILE_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=config.PROFILE_CACHE_NEGATIVE_TTL_SECONDS,
+    max_entries=config.PROFILE_CACHE_MAX_ENTRIES,
+    chunk_size=config.PROFILE_LOOKUP_CHUNK_SIZE
+)
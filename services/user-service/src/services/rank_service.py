@@ -0,0 +1,177 @@
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models import User
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class ExpRankIndex:
+    """
+    In-memory order-statistics index over active users' EXP.
+
+    EXP values are grouped into fixed-width buckets counted by a Fenwick tree;
+    each bucket also keeps its values sorted, so a rank is exact:
+    users in higher buckets (Fenwick prefix sum) plus higher values in the same bucket.
+    """
+
+    def __init__(self, bucket_size: int = 100, capacity: int = 1024):
+        self.bucket_size = bucket_size
+        self._capacity = capacity
+        self._tree = [0] * (capacity + 1)
+        self._buckets: Dict[int, List[int]] = {}
+        self._user_exp: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def from_rows(cls, rows, bucket_size: int = 100) -> "ExpRankIndex":
+        rows = [(str(user_id), int(exp or 0)) for user_id, exp in rows]
+        max_exp = max((exp for _, exp in rows), default=0)
+        index = cls(bucket_size=bucket_size, capacity=cls._capacity_for(max_exp, bucket_size))
+        for user_id, exp in rows:
+            index._insert(user_id, exp)
+        return index
+
+    @staticmethod
+    def _capacity_for(max_exp: int, bucket_size: int) -> int:
+        # Headroom so ordinary EXP growth doesn't force a rebuild
+        return max(1024, (max_exp // bucket_size + 1) * 2)
+
+    @property
+    def total(self) -> int:
+        return len(self._user_exp)
+
+    def _bucket_of(self, exp: int) -> int:
+        return max(exp, 0) // self.bucket_size
+
+    def _add(self, bucket: int, delta: int) -> None:
+        i = bucket + 1
+        while i <= self._capacity:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, bucket: int) -> int:
+        """Users in buckets 0..bucket inclusive."""
+        total = 0
+        i = min(bucket + 1, self._capacity)
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _grow(self, bucket: int) -> None:
+        self._capacity = self._capacity_for(bucket * self.bucket_size, self.bucket_size)
+        self._tree = [0] * (self._capacity + 1)
+        for b, values in self._buckets.items():
+            self._add(b, len(values))
+
+    def _insert(self, user_id: str, exp: int) -> None:
+        bucket = self._bucket_of(exp)
+        if bucket >= self._capacity:
+            self._grow(bucket)
+        bisect.insort(self._buckets.setdefault(bucket, []), exp)
+        self._add(bucket, 1)
+        self._user_exp[user_id] = exp
+
+    def _delete(self, user_id: str) -> None:
+        exp = self._user_exp.pop(user_id, None)
+        if exp is None:
+            return
+        bucket = self._bucket_of(exp)
+        values = self._buckets[bucket]
+        del values[bisect.bisect_left(values, exp)]
+        if not values:
+            del self._buckets[bucket]
+        self._add(bucket, -1)
+
+    def update(self, user_id: str, exp: int) -> None:
+        with self._lock:
+            self._delete(str(user_id))
+            self._insert(str(user_id), int(exp or 0))
+
+    def remove(self, user_id: str) -> None:
+        with self._lock:
+            self._delete(str(user_id))
+
+    def count_greater(self, exp: int) -> int:
+        exp = int(exp or 0)
+        with self._lock:
+            bucket = self._bucket_of(exp)
+            above = self.total - self._prefix(bucket)
+            values = self._buckets.get(bucket, [])
+            return above + len(values) - bisect.bisect_right(values, exp)
+
+    def rank_of(self, exp: int) -> int:
+        return self.count_greater(exp) + 1
+
+
+_rank_index: Optional[ExpRankIndex] = None
+_rank_index_lock = threading.Lock()
+
+
+def get_rank_index(db: Session) -> Optional[ExpRankIndex]:
+    """Return the in-memory index when enabled, (re)loading it when missing or stale."""
+    global _rank_index
+    if not config.RANK_INDEX_ENABLED:
+        return None
+
+    index = _rank_index
+    if index is not None and time.monotonic() - index.loaded_at < config.RANK_INDEX_REFRESH_SECONDS:
+        return index
+
+    with _rank_index_lock:
+        index = _rank_index
+        if index is None or time.monotonic() - index.loaded_at >= config.RANK_INDEX_REFRESH_SECONDS:
+            # Periodic reload bounds drift from writes made by other instances
+            rows = db.execute(select(User.id, User.current_exp).where(User.is_active == True)).all()
+            index = ExpRankIndex.from_rows(rows, bucket_size=config.RANK_INDEX_BUCKET_SIZE)
+            _rank_index = index
+            logger.info(f"Rank index loaded with {index.total} active users")
+    return index
+
+
+def reset_rank_index() -> None:
+    global _rank_index
+    with _rank_index_lock:
+        _rank_index = None
+
+
+def record_exp_change(user: User) -> None:
+    """Keep the in-memory index in step with a committed EXP or status change."""
+    index = _rank_index
+    if index is None:
+        return
+    if getattr(user, 'is_active', True):
+        index.update(user.id, getattr(user, 'current_exp', 0))
+    else:
+        index.remove(user.id)
+
+
+def get_user_rank(db: Session, user: User) -> dict:
+    """
+    Rank of a user among active users (1 + users with strictly more EXP) and the total.
+
+    Uses the in-memory index when enabled; otherwise two COUNT subqueries in a
+    single round trip, served by the (is_active, current_exp) index.
+    """
+    exp = getattr(user, 'current_exp', 0) or 0
+
+    index = get_rank_index(db)
+    if index is not None:
+        return {"rank": index.rank_of(exp), "total_users": index.total}
+
+    higher = select(func.count()).select_from(User).where(
+        User.is_active == True, User.current_exp > exp
+    ).scalar_subquery()
+    total = select(func.count()).select_from(User).where(User.is_active == True).scalar_subquery()
+    higher_count, total_users = db.execute(select(higher, total)).one()
+
+    return {"rank": higher_count + 1, "total_users": total_users}
@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# 0 when the standby has replayed everything it received, otherwise the age of the last replayed commit.
+# NULL on a primary, which is never behind itself.
+POSTGRES_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+@dataclass
+class DatabaseEndpoint:
+    name: str
+    engine: Engine
+    async_engine: Any = None
+
+
+def replica_lag_seconds(endpoint: DatabaseEndpoint) -> float:
+    """Replication lag of ``endpoint`` in seconds; raises if it cannot be reached."""
+    with endpoint.engine.connect() as conn:
+        if conn.dialect.name != "postgresql":
+            return 0.0
+        return float(conn.execute(POSTGRES_LAG_QUERY).scalar() or 0.0)
+
+
+@dataclass
+class _ReplicaState:
+    healthy: bool = False
+    lag_seconds: Optional[float] = None
+    failed_until: float = 0.0
+    error: Optional[str] = None
+
+
+class ReplicaRouter:
+    """
+    Chooses the database a read-only session is bound to.
+
+    Replicas are probed at most every ``check_interval_seconds`` (connectivity
+    and replication lag); one that is unreachable or more than
+    ``max_lag_seconds`` behind gets no reads until a later probe passes, and
+    one whose connection drops mid-request is skipped for
+    ``retry_after_seconds``. Healthy replicas take reads in turn; with none
+    left, reads go to the primary.
+
+    ``note_write`` keeps reads for the written keys (user ids) on the primary
+    long enough for any replica still in rotation to have caught up, so a
+    cache refilled right after a write never stores the old row. Pins live in
+    this process only: another worker or instance does not see them and may
+    serve the key from a replica up to ``max_lag_seconds`` behind.
+    """
+
+    def __init__(
+        self,
+        primary: DatabaseEndpoint,
+        replicas: Sequence[DatabaseEndpoint] = (),
+        probe: Callable[[DatabaseEndpoint], float] = replica_lag_seconds,
+        max_lag_seconds: float = 5,
+        check_interval_seconds: float = 5,
+        retry_after_seconds: float = 30,
+        max_pinned_keys: int = 100000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.probe = probe
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.retry_after_seconds = retry_after_seconds
+        # A replica is at most max_lag behind when probed and may fall further behind until the next probe
+        self.pin_seconds = max_lag_seconds + check_interval_seconds
+        self.max_pinned_keys = max_pinned_keys
+        self._clock = clock
+        self._states: List[_ReplicaState] = [_ReplicaState() for _ in self.replicas]
+        self._pinned: "OrderedDict[str, float]" = OrderedDict()
+        self._checked_at: Optional[float] = None
+        self._next = 0
+        self._lock = threading.Lock()
+        self._check_lock = threading.Lock()
+        for index, replica in enumerate(self.replicas):
+            self._watch(index, replica.engine)
+            if replica.async_engine is not None:
+                self._watch(index, replica.async_engine.sync_engine)
+
+    def _watch(self, index: int, engine: Engine) -> None:
+        @event.listens_for(engine, "handle_error")
+        def _on_error(context):
+            # A failed connect has no connection yet; pre-ping failures are recovered by the pool itself
+            if (context.is_disconnect or context.connection is None) and not context.is_pre_ping:
+                self.mark_failed(index, str(context.original_exception))
+
+    def is_stale(self) -> bool:
+        return bool(self.replicas) and (
+            self._checked_at is None or self._clock() - self._checked_at >= self.check_interval_seconds
+        )
+
+    def refresh(self) -> None:
+        """Probe every replica now (blocking)."""
+        results = []
+        for replica in self.replicas:
+            try:
+                results.append((self.probe(replica), None))
+            except Exception as e:
+                results.append((None, str(e)))
+
+        now = self._clock()
+        with self._lock:
+            for replica, state, (lag, error) in zip(self.replicas, self._states, results):
+                healthy = error is None and lag <= self.max_lag_seconds
+                if state.healthy and not healthy:
+                    logger.warning(f"Replica {replica.name} removed from reads: {error or f'{lag:.1f}s behind'}")
+                elif healthy and not state.healthy and state.error is not None:
+                    logger.info(f"Replica {replica.name} back in rotation ({lag:.1f}s behind)")
+                state.healthy, state.lag_seconds = healthy, lag
+                state.error = error if error is not None else (None if healthy else f"{lag:.1f}s behind")
+            self._checked_at = now
+
+    def refresh_if_stale(self) -> None:
+        """Probe when the last check is older than the interval; concurrent callers don't wait for it."""
+        if not self.is_stale() or not self._check_lock.acquire(blocking=False):
+            return
+        try:
+            if self.is_stale():
+                self.refresh()
+        finally:
+            self._check_lock.release()
+
+    def mark_failed(self, index: int, reason: str = "connection error") -> None:
+        with self._lock:
+            state = self._states[index]
+            if state.healthy:
+                logger.warning(f"Replica {self.replicas[index].name} failed, retrying in {self.retry_after_seconds}s: {reason}")
+            state.healthy = False
+            state.error = reason
+            state.failed_until = self._clock() + self.retry_after_seconds
+
+    def note_write(self, *keys) -> None:
+        if not self.replicas:
+            return
+        until = self._clock() + self.pin_seconds
+        with self._lock:
+            for key in keys:
+                key = str(key)
+                self._pinned[key] = until
+                self._pinned.move_to_end(key)
+            while len(self._pinned) > self.max_pinned_keys:
+                self._pinned.popitem(last=False)
+
+    def _is_pinned(self, keys: Iterable, now: float) -> bool:
+        for key in keys:
+            until = self._pinned.get(str(key))
+            if until is not None:
+                if now < until:
+                    return True
+                self._pinned.pop(str(key), None)
+        return False
+
+    def choose(self, keys: Iterable = ()) -> DatabaseEndpoint:
+        """Endpoint for a read of ``keys`` (no I/O; call ``refresh_if_stale`` first to keep health current)."""
+        if not self.replicas:
+            return self.primary
+        now = self._clock()
+        with self._lock:
+            if self._is_pinned(keys, now):
+                return self.primary
+            for offset in range(len(self.replicas)):
+                index = (self._next + offset) % len(self.replicas)
+                state = self._states[index]
+                if state.healthy and now >= state.failed_until:
+                    self._next = index + 1
+                    return self.replicas[index]
+        return self.primary
+
+    def status(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "name": replica.name,
+                    "healthy": state.healthy and self._clock() >= state.failed_until,
+                    "lag_seconds": state.lag_seconds,
+                    "error": state.error,
+                }
+                for replica, state in zip(self.replicas, self._states)
+            ]
@@ -0,0 +1,8 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def upsert_insert(db: Session, model):
+    """INSERT supporting ``on_conflict_do_update`` for the session's dialect (PostgreSQL, else SQLite)."""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(model)
@@ -0,0 +1,161 @@
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, fields
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from models import UserStreak
+from services.local_time import local_day, today_local
+from services.sql_utils import upsert_insert
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StreakState:
+    current_streak: int = 0
+    longest_streak: int = 0
+    last_active_day: Optional[date] = None
+    daily_goal_minutes: int = 0
+    progress_day: Optional[date] = None
+    progress_seconds: int = 0
+
+
+_STATE_FIELDS = [field.name for field in fields(StreakState)]
+
+
+def advance(state: StreakState, day: date, duration_seconds: int) -> StreakState:
+    """
+    Apply one activity on local ``day`` - constant work regardless of history length.
+
+    The day counts once its progress reaches the daily goal; a day directly after
+    the last counted one extends the streak, any later day restarts it at 1.
+    Events for a day before the current progress day (late offline syncs) are
+    not replayed into the streak.
+    """
+    if state.progress_day is not None and day < state.progress_day:
+        return state
+    if state.progress_day != day:
+        state.progress_day = day
+        state.progress_seconds = 0
+    state.progress_seconds += max(duration_seconds, 0)
+
+    if state.last_active_day != day and state.progress_seconds >= state.daily_goal_minutes * 60:
+        if state.last_active_day is not None and state.last_active_day == day - timedelta(days=1):
+            state.current_streak += 1
+        else:
+            state.current_streak = 1
+        state.last_active_day = day
+        state.longest_streak = max(state.longest_streak, state.current_streak)
+    return state
+
+
+def _load_states(db: Session, user_ids: Iterable[str]) -> Dict[str, StreakState]:
+    user_ids = sorted(user_ids)
+    # Create missing rows first: FOR UPDATE cannot lock a row that does not exist yet, so two
+    # first-ever batches for one user would otherwise both start from an empty state
+    db.execute(upsert_insert(db, UserStreak).on_conflict_do_nothing(index_elements=[UserStreak.user_id]),
+               [{"user_id": user_id} for user_id in user_ids])
+    stmt = select(UserStreak).where(UserStreak.user_id.in_(user_ids)).order_by(UserStreak.user_id)
+    # Rows are written with Core upserts, so never trust an identity-map copy
+    stmt = stmt.execution_options(populate_existing=True)
+    if db.get_bind().dialect.name == "postgresql":
+        # Concurrent batches for the same user serialize here instead of losing an update
+        stmt = stmt.with_for_update()
+    return {
+        row.user_id: StreakState(**{name: getattr(row, name) for name in _STATE_FIELDS})
+        for row in db.execute(stmt).scalars()
+    }
+
+
+def _save_states(db: Session, states: Dict[str, StreakState]) -> None:
+    if not states:
+        return
+    stmt = upsert_insert(db, UserStreak)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserStreak.user_id],
+        set_={name: stmt.excluded[name] for name in _STATE_FIELDS}
+    )
+    db.execute(stmt, [
+        {"user_id": user_id, **{name: getattr(state, name) for name in _STATE_FIELDS}}
+        for user_id, state in sorted(states.items())
+    ])
+
+
+def apply_activity(db: Session, events: Iterable) -> None:
+    """
+    Fold a batch of activity events (objects with ``user_id``, ``occurred_at`` and
+    ``duration_seconds``) into the users' streaks, in the caller's transaction.
+    """
+    by_user = defaultdict(list)
+    for event in events:
+        by_user[event.user_id].append(event)
+    if not by_user:
+        return
+
+    states = _load_states(db, by_user)
+    for user_id, user_events in by_user.items():
+        state = states.setdefault(user_id, StreakState())
+        for event in sorted(user_events, key=lambda e: e.occurred_at):
+            advance(state, local_day(event.occurred_at), event.duration_seconds)
+    _save_states(db, states)
+
+
+def effective_streak(state: StreakState, today: date) -> int:
+    """A streak is only alive while its last counted day is today or yesterday."""
+    if state.last_active_day is None or state.last_active_day < today - timedelta(days=1):
+        return 0
+    return state.current_streak
+
+
+def get_streak(db: Session, user_id: str, today: Optional[date] = None) -> dict:
+    today = today or today_local()
+    row = db.get(UserStreak, user_id, populate_existing=True)
+    state = StreakState(**{name: getattr(row, name) for name in _STATE_FIELDS}) if row is not None else StreakState()
+    progress_seconds = state.progress_seconds if state.progress_day == today else 0
+    return {
+        "current_streak": effective_streak(state, today),
+        "longest_streak": state.longest_streak,
+        "last_active_day": state.last_active_day.isoformat() if state.last_active_day else None,
+        "daily_goal_minutes": state.daily_goal_minutes,
+        "today_minutes": progress_seconds // 60,
+        "goal_met_today": state.last_active_day == today,
+    }
+
+
+def set_daily_goal(db: Session, user_id: str, minutes: int) -> None:
+    stmt = upsert_insert(db, UserStreak).values(user_id=user_id, daily_goal_minutes=minutes)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserStreak.user_id],
+        set_={"daily_goal_minutes": stmt.excluded.daily_goal_minutes}
+    ))
+
+
+def close_out_streaks(session_factory: Callable[[], Session], today: Optional[date] = None) -> int:
+    """
+    Reset every streak whose last counted day is before yesterday, in one UPDATE.
+
+    Idempotent, so it can run nightly after local midnight or more often.
+    Returns the number of streaks closed.
+    """
+    yesterday = (today or today_local()) - timedelta(days=1)
+    db = session_factory()
+    try:
+        closed = db.execute(
+            update(UserStreak)
+            .where(UserStreak.current_streak > 0, UserStreak.last_active_day < yesterday)
+            .values(current_streak=0)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if closed:
+        logger.info(f"Closed {closed} broken streaks (last active before {yesterday.isoformat()})")
+    return closed
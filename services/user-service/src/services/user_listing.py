@@ -0,0 +1,185 @@
+import base64
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Select, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from models import User
+from services.avatar_url_service import avatar_link, public_avatar_id
+
+logger = logging.getLogger(__name__)
+
+# Response field -> columns it needs
+LISTING_FIELDS: Dict[str, tuple] = {
+    "user_id": (User.id,),
+    "email": (User.email,),
+    "family_name": (User.family_name,),
+    "given_name": (User.given_name,),
+    "dob": (User.dob,),
+    "avatar_id": (User.avatar_url,),
+    "avatar_url": (User.avatar_url, User.id),
+    "level": (User.level,),
+    "current_exp": (User.current_exp,),
+    "require_exp": (User.require_exp,),
+    "sex": (User.sex,),
+    "bio": (User.bio,),
+    "remind_time": (User.remind_time,),
+    "created_at": (User.created_at,),
+}
+
+# Fields returned when none are requested (the original /all payload)
+DEFAULT_FIELDS = [
+    "user_id", "family_name", "given_name", "dob", "avatar_id", "avatar_url",
+    "level", "current_exp", "require_exp", "sex", "bio", "remind_time",
+]
+
+SORT_COLUMNS = {
+    "created_at": User.created_at,
+    "current_exp": User.current_exp,
+    "level": User.level,
+}
+
+
+@dataclass
+class UserListQuery:
+    fields: Optional[List[str]] = None
+    q: Optional[str] = None
+    min_level: Optional[int] = None
+    max_level: Optional[int] = None
+    sex: Optional[str] = None
+    sort: str = "created_at"
+    order: str = "asc"
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+
+
+def parse_fields(raw: Optional[str]) -> List[str]:
+    if not raw:
+        return list(DEFAULT_FIELDS)
+    fields = [field.strip() for field in raw.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in LISTING_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def encode_cursor(sort_value, user_id: str) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, user_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[object, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, user_id = json.loads(raw)
+        if sort == "created_at":
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, str(user_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def build_statement(query: UserListQuery) -> Select:
+    """Projected, filtered, keyset-paginated SELECT over active users."""
+    fields = query.fields or DEFAULT_FIELDS
+    sort_column = SORT_COLUMNS.get(query.sort)
+    if sort_column is None:
+        raise ValueError(f"Unknown sort: {query.sort}")
+    descending = query.order == "desc"
+
+    columns = {}
+    for field in fields:
+        for column in LISTING_FIELDS[field]:
+            columns[column.key] = column
+    # The keyset columns are always needed to build the next cursor
+    columns.setdefault(sort_column.key, sort_column)
+    columns.setdefault(User.id.key, User.id)
+
+    statement = select(*columns.values()).where(User.is_active == True)
+
+    if query.q:
+        pattern = f"%{query.q}%"
+        statement = statement.where(or_(
+            User.given_name.ilike(pattern),
+            User.family_name.ilike(pattern),
+            User.email.ilike(pattern)
+        ))
+    if query.min_level is not None:
+        statement = statement.where(User.level >= query.min_level)
+    if query.max_level is not None:
+        statement = statement.where(User.level <= query.max_level)
+    if query.sex is not None:
+        statement = statement.where(User.sex == query.sex)
+
+    if query.cursor:
+        after = tuple_(sort_column, User.id)
+        position = tuple_(*decode_cursor(query.cursor, query.sort))
+        statement = statement.where(after < position if descending else after > position)
+
+    if descending:
+        statement = statement.order_by(sort_column.desc(), User.id.desc())
+    else:
+        statement = statement.order_by(sort_column.asc(), User.id.asc())
+
+    if query.limit is not None:
+        # One extra row tells whether there is a next page
+        statement = statement.limit(query.limit + 1)
+    return statement
+
+
+def row_to_info(row, fields: List[str]) -> dict:
+    info = {}
+    for field in fields:
+        if field == "user_id":
+            info[field] = row.id
+        elif field == "dob":
+            info[field] = row.dob.strftime("%d/%m/%Y") if row.dob else None
+        elif field == "avatar_id":
+            info[field] = public_avatar_id(row.avatar_url)
+        elif field == "avatar_url":
+            info[field] = avatar_link(row.id, row.avatar_url)
+        elif field == "created_at":
+            info[field] = row.created_at.isoformat() if row.created_at else None
+        else:
+            info[field] = getattr(row, field)
+    return info
+
+
+def list_users(db: Session, query: UserListQuery) -> Tuple[List[dict], Optional[str]]:
+    """One page of users plus the cursor for the next page (None on the last page)."""
+    fields = query.fields or DEFAULT_FIELDS
+    rows = db.execute(build_statement(query)).all()
+
+    next_cursor = None
+    if query.limit is not None and len(rows) > query.limit:
+        rows = rows[:query.limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, query.sort), last.id)
+    return [row_to_info(row, fields) for row in rows], next_cursor
+
+
+def iter_users_ndjson(session_factory: Callable[[], Session], query: UserListQuery, batch_size: int = 1000) -> Iterator[bytes]:
+    """
+    Yield matching users as NDJSON lines from a server-side cursor.
+
+    Uses its own session, since the response body is produced after the
+    request handler returns; rows are fetched ``batch_size`` at a time so
+    memory stays flat regardless of the number of users.
+    """
+    fields = query.fields or DEFAULT_FIELDS
+    statement = build_statement(query).execution_options(stream_results=True, yield_per=batch_size)
+    db = session_factory()
+    try:
+        exported = 0
+        for row in db.execute(statement):
+            yield (json.dumps(row_to_info(row, fields), ensure_ascii=False, default=str) + "\n").encode("utf-8")
+            exported += 1
+        logger.info(f"Exported {exported} users as NDJSON")
+    finally:
+        db.close()
@@ -1,12 +1,15 @@
 import logging
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt as jose_jwt
 
 from config import config
-from database import get_db
+from database import async_read_session, get_async_db, get_db
 from models import User
+from services.principal_cache import principal_cache
 
 logger = logging.getLogger(__name__)
 security = HTTPBearer()
@@ -15,44 +18,86 @@ security = HTTPBearer()
 JWT_SECRET_KEY = config.JWT_SECRET_KEY
 JWT_ALGORITHM = config.JWT_ALGORITHM
 
+def _access_token_subject(credentials: HTTPAuthorizationCredentials):
+    token = credentials.credentials
+    try:
+        payload = jose_jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+    except JWTError as e:
+        logger.error(f"JWT Error: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Token expired or invalid: {str(e)}")
+    if payload.get("type") != "access":
+        logger.error(f"Invalid token type: {payload.get('type')}")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid token type: {payload.get('type')}")
+    user_id = payload.get("sub")
+    if user_id is None:
+        logger.error("No user ID in token")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token: no user id")
+    return user_id, payload.get("jti")
+
+def _verify_user(user: User, user_id: str) -> User:
+    if not user:
+        logger.error(f"User not found in database: {user_id}")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    is_email_verified = getattr(user, 'is_email_verified', False)
+    is_active = getattr(user, 'is_active', True)
+    if not is_email_verified:
+        logger.error(f"Email not verified for user: {user.email}")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not verified")
+    if not is_active:
+        logger.error(f"User account inactive: {user.email}")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User account is inactive")
+    return user
+
+def _unexpected_auth_error(e: Exception) -> HTTPException:
+    logger.error(f"Unexpected error: {str(e)}")
+    import traceback
+    logger.error(f"Traceback: {traceback.format_exc()}")
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid token: {str(e)}")
+
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
     try:
-        token = credentials.credentials
-        try:
-            payload = jose_jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        except JWTError as e:
-            logger.error(f"JWT Error: {str(e)}")
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Token expired or invalid: {str(e)}")
-        if payload.get("type") != "access":
-            logger.error(f"Invalid token type: {payload.get('type')}")
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid token type: {payload.get('type')}")
-        user_id = payload.get("sub")
-        if user_id is None:
-            logger.error("No user ID in token")
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token: no user id")
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            logger.error(f"User not found in database: {user_id}")
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-        is_email_verified = getattr(user, 'is_email_verified', False)
-        is_active = getattr(user, 'is_active', True)
-        if not is_email_verified:
-            logger.error(f"Email not verified for user: {user.email}")
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not verified")
-        if not is_active:
-            logger.error(f"User account inactive: {user.email}")
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User account is inactive")
+        user_id, jti = _access_token_subject(credentials)
+        cached_user = principal_cache.load(db, user_id, jti)
+        if cached_user is not None:
+            return cached_user
+        user = _verify_user(db.query(User).filter(User.id == user_id).first(), user_id)
+        principal_cache.put(user, jti)
         return user
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid token: {str(e)}")
+        raise _unexpected_auth_error(e)
+
+async def get_current_user_async(credentials: HTTPAuthorizationCredentials = Depends(security),
+                                 db: AsyncSession = Depends(get_async_db)):
+    """``get_current_user`` for handlers on the async session; the user is attached to ``db``."""
+    try:
+        user_id, jti = _access_token_subject(credentials)
+        cached_user = await principal_cache.load_async(db, user_id, jti)
+        if cached_user is not None:
+            return cached_user
+        user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+        user = _verify_user(user, user_id)
+        principal_cache.put(user, jti)
+        return user
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise _unexpected_auth_error(e)
+
+async def get_current_user_for_update(current_user: User = Depends(get_current_user_async),
+                                      db: AsyncSession = Depends(get_async_db)):
+    """``get_current_user_async`` re-read from the database, for handlers that compute the user's new values
+    from the current ones (a cached principal can be up to PRINCIPAL_CACHE_TTL_SECONDS old)."""
+    await db.refresh(current_user)
+    return current_user
+
+async def get_current_user_async_read_db(current_user: User = Depends(get_current_user_async)):
+    async with await async_read_session(current_user.id) as db:
+        yield db
 
-def get_current_admin_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get current authenticated admin user"""
+async def get_current_admin_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Get current authenticated admin user (from the token alone - no session is opened)"""
     try:
         token = credentials.credentials
         try:
@@ -4,8 +4,27 @@ Test configuration and fixtures for user service tests
 
 import pytest
 import os
+import sys
 from unittest.mock import Mock
 
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models import Base, User
+
+
+def pytest_collection_modifyitems(config, items):
+    """Benchmarks assert on wall-clock timings, so they only run on request (RUN_BENCHMARKS=1)"""
+    if os.getenv("RUN_BENCHMARKS") == "1":
+        return
+    skip_benchmark = pytest.mark.skip(reason="benchmark: set RUN_BENCHMARKS=1 to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
 # Mock environment variables for testing
 @pytest.fixture(scope="session", autouse=True)
 def mock_env_vars():
@@ -53,3 +72,82 @@ def sample_user_data():
         'average_score': 0.85,
         'daily_streak': 7
     }
+
+
+class FakeClock:
+    """Hand-driven time source: pass the clock itself or ``clock.monotonic`` where a service takes one"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def sqlite_engine(path=None):
+    """SQLite with every table; a file database gives each thread its own connection, as in production"""
+    if path is None:
+        engine = create_engine("sqlite://")
+    else:
+        engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 30, "check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def engine():
+    """In-memory database"""
+    engine = sqlite_engine()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def Session(tmp_path):
+    """Session factory on a file database, for code that opens its own sessions or threads"""
+    engine = sqlite_engine(tmp_path / "test.db")
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def make_profile_db(tmp_path_factory):
+    """
+    Builds a file database of ``count`` users u0..u<count-1> with Vietnamese
+    names, varied levels and EXP, and an uploaded avatar on every odd user;
+    the ids in ``inactive`` are deactivated
+    """
+    engines = []
+
+    def make(count, inactive=()):
+        engine = sqlite_engine(tmp_path_factory.mktemp("profiles") / "profiles.db")
+        engines.append(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            db.add_all([
+                User(id=f"u{i}", email=f"u{i}@example.com", family_name="Trần", given_name=f"Bình{i}",
+                     level=1 + i % 30, current_exp=i * 10, avatar_url=f"u{i}:v1" if i % 2 else None,
+                     is_active=f"u{i}" not in inactive)
+                for i in range(count)
+            ])
+            db.commit()
+        return Session
+
+    yield make
+    for engine in engines:
+        engine.dispose()
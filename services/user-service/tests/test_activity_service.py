@@ -0,0 +1,171 @@
+"""
+Test the activity event log: local-day bucketing, rollups maintained on write,
+heatmap reads, compaction and the batching buffer
+"""
+
+import asyncio
+import sys
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models import ActivityDaily, ActivityEvent, ActivityWeekly, User
+from services.activity_service import (
+    ActivityEventBuffer, ActivityRecord, compact_events, get_daily_activity, get_weekly_activity,
+    get_year_heatmap, local_day, normalize_record, record_events, week_start
+)
+from services.learner_stats_service import get_learner_stats
+
+UTC = timezone.utc
+
+
+@pytest.fixture
+def Session(Session):
+    with Session() as db:
+        db.add_all([User(id="u1", email="u1@example.com"), User(id="u2", email="u2@example.com")])
+        db.commit()
+    return Session
+
+
+def at(*args):
+    return datetime(*args, tzinfo=UTC)
+
+
+class TestDayBoundaries:
+    """Test Vietnam-time bucketing"""
+
+    def test_local_day_uses_utc_plus_7(self):
+        """Test 17:00 UTC is already the next local day"""
+        assert local_day(at(2026, 3, 1, 16, 59)) == date(2026, 3, 1)
+        assert local_day(at(2026, 3, 1, 17, 0)) == date(2026, 3, 2)
+        assert local_day(datetime(2026, 3, 1, 17, 0)) == date(2026, 3, 2)
+
+    def test_week_starts_on_monday(self):
+        """Test weekly buckets are keyed by the local Monday"""
+        assert week_start(date(2026, 10, 18)) == date(2026, 10, 12)
+        assert week_start(date(2026, 10, 19)) == date(2026, 10, 19)
+
+    def test_normalize_rejects_bad_events(self):
+        """Test unknown types and out-of-range timestamps are refused"""
+        now = at(2026, 10, 19, 12)
+        with pytest.raises(ValueError):
+            normalize_record(ActivityRecord("u1", "dance"), now=now)
+        with pytest.raises(ValueError):
+            normalize_record(ActivityRecord("u1", "study", occurred_at=now + timedelta(hours=1)), now=now)
+        with pytest.raises(ValueError):
+            normalize_record(ActivityRecord("u1", "study", occurred_at=now - timedelta(days=30)), now=now)
+        assert normalize_record(ActivityRecord("u1", "study"), now=now).occurred_at == now
+
+
+class TestActivityRollups:
+    """Test rollups stay equal to the event log"""
+
+    def test_rollups_maintained_on_write(self, Session):
+        """Test a batch lands in the event log and both rollups"""
+        with Session() as db:
+            record_events(db, [
+                ActivityRecord("u1", "study", at(2026, 10, 18, 16, 0), exp=10, duration_seconds=600),
+                ActivityRecord("u1", "study", at(2026, 10, 18, 18, 0), exp=5),      # 01:00 local on the 19th
+                ActivityRecord("u1", "lesson_completed", at(2026, 10, 19, 2, 0)),
+                ActivityRecord("u2", "study", at(2026, 10, 19, 2, 0)),
+            ])
+            db.commit()
+            record_events(db, [ActivityRecord("u1", "study", at(2026, 10, 19, 3, 0), duration_seconds=60)])
+            db.commit()
+
+            assert db.query(ActivityEvent).count() == 5
+            daily = get_daily_activity(db, "u1", date(2026, 10, 1), date(2026, 10, 31))
+            assert daily == [
+                {"date": "2026-10-18", "count": 1, "exp": 10, "duration_seconds": 600},
+                {"date": "2026-10-19", "count": 3, "exp": 5, "duration_seconds": 60},
+            ]
+            weekly = get_weekly_activity(db, "u1", date(2026, 10, 1), date(2026, 10, 31))
+            assert weekly == [
+                {"week_start": "2026-10-12", "count": 1, "exp": 10, "duration_seconds": 600},
+                {"week_start": "2026-10-19", "count": 3, "exp": 5, "duration_seconds": 60},
+            ]
+            assert get_year_heatmap(db, "u1", 2026) == {"2026-10-18": 1, "2026-10-19": 3}
+            assert get_year_heatmap(db, "u1", 2025) == {}
+
+    def test_completion_events_update_learner_stats(self, Session):
+        """Test course and quiz completions increment the learner counters"""
+        with Session() as db:
+            record_events(db, [
+                ActivityRecord("u1", "course_completed", at(2026, 10, 19, 2)),
+                ActivityRecord("u1", "quiz_completed", at(2026, 10, 19, 2), quiz_score=0.6),
+                ActivityRecord("u1", "quiz_completed", at(2026, 10, 19, 3), quiz_score=1.0),
+            ])
+            db.commit()
+            stats = get_learner_stats(db, "u1")
+        assert stats["completed_courses"] == 1
+        assert stats["completed_quizzes"] == 2
+        assert stats["average_score"] == pytest.approx(0.8)
+
+    def test_compaction_keeps_rollups(self, Session):
+        """Test old raw events are deleted in batches while rollups are untouched"""
+        now = at(2026, 10, 19, 12)
+        with Session() as db:
+            record_events(db, [ActivityRecord("u1", "study", now - timedelta(days=100, minutes=i)) for i in range(7)])
+            record_events(db, [ActivityRecord("u1", "study", now - timedelta(days=1))])
+            db.commit()
+
+        assert compact_events(Session, retention_days=90, batch_size=3, now=now) == 7
+        with Session() as db:
+            assert db.query(ActivityEvent).count() == 1
+            assert sum(row.event_count for row in db.query(ActivityDaily)) == 8
+            assert sum(row.event_count for row in db.query(ActivityWeekly)) == 8
+
+
+class TestActivityEventBuffer:
+    """Test concurrent requests share one write"""
+
+    def test_concurrent_adds_share_a_transaction(self, Session):
+        """Test events arriving within the window are written together"""
+        commits = []
+        buffer = ActivityEventBuffer(Session, linger_seconds=0.01, on_commit=commits.append)
+
+        async def run():
+            await asyncio.gather(*(
+                buffer.add([ActivityRecord(f"u{1 + i % 2}", "study", at(2026, 10, 19, 2))])
+                for i in range(20)
+            ))
+
+        asyncio.run(run())
+        assert len(commits) == 1
+        with Session() as db:
+            assert db.query(ActivityEvent).count() == 20
+            assert get_year_heatmap(db, "u1", 2026) == {"2026-10-19": 10}
+
+    def test_max_batch_splits_flushes(self, Session):
+        """Test a flush never exceeds max_batch events"""
+        commits = []
+        buffer = ActivityEventBuffer(Session, linger_seconds=0.01, max_batch=4, on_commit=commits.append)
+
+        async def run():
+            await asyncio.gather(*(
+                buffer.add([ActivityRecord("u1", "study", at(2026, 10, 19, 2))] * 2) for _ in range(5)
+            ))
+
+        asyncio.run(run())
+        assert [len(records) for records in commits] == [4, 4, 2]
+
+    def test_failed_flush_reaches_callers(self, Session):
+        """Test a failed write is raised to every waiting caller"""
+        def broken_session():
+            raise RuntimeError("database down")
+
+        buffer = ActivityEventBuffer(broken_session, linger_seconds=0.01)
+
+        async def run():
+            return await asyncio.gather(
+                buffer.add([ActivityRecord("u1", "study", at(2026, 10, 19, 2))]),
+                buffer.add([ActivityRecord("u2", "study", at(2026, 10, 19, 2))]),
+                return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(result, RuntimeError) for result in results)
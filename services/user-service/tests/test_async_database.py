@@ -0,0 +1,192 @@
+"""
+Test the async engine path: URL mapping to async drivers, the async principal
+dependency and a load test of concurrent throughput on sync vs async sessions
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt as jose_jwt
+from sqlalchemy import create_engine, event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from config import config, to_async_database_url
+
+if not config.DATABASE_URL:
+    config.DATABASE_URL = "sqlite:///./test.db"
+
+import database
+from models import Base, User
+from services import user_service_auth
+from services.principal_cache import principal_cache
+
+SECRET = "async-database-test-secret"
+
+# Simulated network round trip per query, so blocking and non-blocking waits differ as they would on RDS
+ROUND_TRIP_SECONDS = 0.005
+
+
+def add_round_trip(sync_engine):
+    @event.listens_for(sync_engine, "connect")
+    def register(dbapi_connection, connection_record):
+        dbapi_connection.create_function("round_trip", 0, lambda: time.sleep(ROUND_TRIP_SECONDS) or 1)
+
+
+@pytest.fixture
+def engines(tmp_path):
+    path = tmp_path / "users.db"
+    # Unlimited overflow: with the old max_overflow=0 a blocked checkout stalls the event loop that
+    # would release the connections, so the baseline would measure pool timeouts instead of throughput
+    sync_engine = create_engine(f"sqlite:///{path}", pool_size=20, max_overflow=-1,
+                                connect_args={"check_same_thread": False})
+    add_round_trip(sync_engine)
+    Base.metadata.create_all(bind=sync_engine)
+    with sessionmaker(bind=sync_engine)() as db:
+        db.add_all([
+            User(id=f"user-{i}", email=f"user{i}@example.com", is_email_verified=True, is_active=True)
+            for i in range(50)
+        ])
+        db.commit()
+    async_engine = create_async_engine(to_async_database_url(f"sqlite:///{path}"), pool_size=20, max_overflow=0)
+    add_round_trip(async_engine.sync_engine)
+    yield sync_engine, async_engine
+    asyncio.run(async_engine.dispose())
+    sync_engine.dispose()
+
+
+def credentials_for(user_id, jti="token-1"):
+    token = jose_jwt.encode({"sub": user_id, "type": "access", "jti": jti}, SECRET, algorithm=config.JWT_ALGORITHM)
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+class TestAsyncDatabaseUrl:
+    """Test sync URLs map to the matching async driver"""
+
+    def test_drivers(self):
+        """Test Postgres goes to asyncpg (with ssl instead of sslmode) and SQLite to aiosqlite"""
+        assert to_async_database_url("postgresql://u:p@host:5432/db?sslmode=require") == \
+            "postgresql+asyncpg://u:p@host:5432/db?ssl=require"
+        assert to_async_database_url("postgresql+psycopg2://u:p@host/db") == "postgresql+asyncpg://u:p@host/db"
+        assert to_async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+        assert to_async_database_url("sqlite+aiosqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+
+
+class TestAsyncPrincipal:
+    """Test get_current_user_async against an aiosqlite session"""
+
+    def test_cached_user_is_attached_and_writable(self, engines, monkeypatch):
+        """Test a cache hit is merged into the async session and its writes commit and invalidate"""
+        _, async_engine = engines
+        Session = async_sessionmaker(async_engine, expire_on_commit=False)
+        monkeypatch.setattr(user_service_auth, "JWT_SECRET_KEY", SECRET)
+        principal_cache.clear()
+
+        async def run():
+            async with Session() as db:
+                first = await user_service_auth.get_current_user_async(credentials_for("user-1"), db)
+            assert len(principal_cache) == 1
+
+            async with Session() as db:
+                user = await user_service_auth.get_current_user_async(credentials_for("user-1"), db)
+                assert user is not first and user in db
+                user.given_name = "Changed"
+                await db.commit()
+            assert len(principal_cache) == 0
+
+            async with Session() as db:
+                return (await db.execute(select(User.given_name).where(User.id == "user-1"))).scalar_one()
+
+        try:
+            assert asyncio.run(run()) == "Changed"
+        finally:
+            principal_cache.clear()
+
+    def test_handlers_that_update_read_the_current_row(self, engines, monkeypatch):
+        """Test get_current_user_for_update sees a write the cache missed (e.g. another instance's EXP)"""
+        sync_engine, async_engine = engines
+        Session = async_sessionmaker(async_engine, expire_on_commit=False)
+        monkeypatch.setattr(user_service_auth, "JWT_SECRET_KEY", SECRET)
+        principal_cache.clear()
+
+        async def run():
+            async with Session() as db:
+                await user_service_auth.get_current_user_async(credentials_for("user-2"), db)
+            with sync_engine.begin() as conn:
+                conn.execute(update(User).where(User.id == "user-2").values(current_exp=70))
+
+            async with Session() as db:
+                cached = await user_service_auth.get_current_user_async(credentials_for("user-2"), db)
+                stale_exp = cached.current_exp
+                fresh = await user_service_auth.get_current_user_for_update(cached, db)
+                return stale_exp, fresh.current_exp
+
+        try:
+            assert asyncio.run(run()) == (0, 70)
+        finally:
+            principal_cache.clear()
+
+    def test_unknown_user_is_rejected(self, engines, monkeypatch):
+        """Test a token for a missing user gets 401"""
+        _, async_engine = engines
+        Session = async_sessionmaker(async_engine)
+        monkeypatch.setattr(user_service_auth, "JWT_SECRET_KEY", SECRET)
+
+        async def run():
+            async with Session() as db:
+                await user_service_auth.get_current_user_async(credentials_for("missing"), db)
+
+        with pytest.raises(user_service_auth.HTTPException) as exc:
+            asyncio.run(run())
+        assert exc.value.status_code == 401
+
+
+@pytest.mark.benchmark
+class TestConcurrentThroughput:
+    """Load test: the same handler on get_db (blocking) vs get_async_db"""
+
+    REQUESTS = 200
+
+    def test_async_sessions_serve_concurrent_requests(self, engines, monkeypatch):
+        sync_engine, async_engine = engines
+        monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=sync_engine, autoflush=False))
+        monkeypatch.setattr(database, "AsyncSessionLocal",
+                            async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False))
+        lookup = select(User.email, func.round_trip()).where(User.id == "user-7")
+
+        app = FastAPI()
+
+        @app.get("/sync")
+        async def with_sync_session(db: Session = Depends(database.get_db)):
+            return {"email": db.execute(lookup).first().email}
+
+        @app.get("/async")
+        async def with_async_session(db: AsyncSession = Depends(database.get_async_db)):
+            return {"email": (await db.execute(lookup)).first().email}
+
+        async def load(path):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                await client.get(path)
+                start = time.perf_counter()
+                responses = await asyncio.gather(*(client.get(path) for _ in range(self.REQUESTS)))
+                elapsed = time.perf_counter() - start
+            assert all(response.json() == {"email": "user7@example.com"} for response in responses)
+            return elapsed
+
+        async def run():
+            return await load("/sync"), await load("/async")
+
+        sync_elapsed, async_elapsed = asyncio.run(run())
+        print(f"\n{self.REQUESTS} concurrent requests, {ROUND_TRIP_SECONDS * 1000:.0f}ms per query: "
+              f"get_db {self.REQUESTS / sync_elapsed:.0f} req/s, get_async_db {self.REQUESTS / async_elapsed:.0f} req/s")
+        # Blocking sessions serialize every round trip on the event loop; async ones overlap up to the pool size
+        assert async_elapsed < sync_elapsed / 2
@@ -0,0 +1,81 @@
+"""
+Test avatar variant rendering and concurrent upload
+"""
+
+import asyncio
+import io
+import sys
+import os
+import threading
+
+import pytest
+from PIL import Image
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.avatar_service import (
+    AvatarProcessingError, AvatarProcessor, avatar_variant_key, render_avatar_variants
+)
+
+
+def encode(image, fmt):
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class RecordingS3Client:
+    def __init__(self):
+        self.objects = {}
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket, Key, Body, ContentType, CacheControl, Metadata):
+        with self._lock:
+            self.objects[Key] = (ContentType, Body)
+            self.threads.add(threading.get_ident())
+
+
+class TestAvatarService:
+    """Avatar variants"""
+
+    def test_renders_every_size_and_format(self):
+        variants = render_avatar_variants(encode(Image.new('RGB', (2400, 1800), (200, 30, 30)), 'JPEG'))
+
+        assert sorted((v.size, v.extension) for v in variants) == sorted(
+            (size, ext) for size in (400, 96, 40) for ext in ("jpg", "webp")
+        )
+        for variant in variants:
+            with Image.open(io.BytesIO(variant.data)) as decoded:
+                assert decoded.size == (variant.size, variant.size)
+                assert decoded.format == ("JPEG" if variant.extension == "jpg" else "WEBP")
+
+    def test_transparent_png_is_flattened_on_white(self):
+        variants = render_avatar_variants(encode(Image.new('RGBA', (500, 500), (0, 0, 0, 0)), 'PNG'))
+        jpeg = next(v for v in variants if v.extension == "jpg" and v.size == 40)
+        with Image.open(io.BytesIO(jpeg.data)) as decoded:
+            assert decoded.convert('RGB').getpixel((20, 20)) >= (250, 250, 250)
+
+    def test_invalid_image(self):
+        with pytest.raises(AvatarProcessingError):
+            render_avatar_variants(b"not an image")
+
+    def test_render_and_upload_off_the_event_loop(self):
+        processor = AvatarProcessor(max_workers=2)
+        client = RecordingS3Client()
+        contents = encode(Image.new('RGB', (800, 800), (10, 120, 200)), 'PNG')
+
+        async def scenario():
+            variants = await processor.render(contents)
+            await processor.upload(client, "bucket", "user-1", variants, {"user_id": "user-1"})
+            return variants
+
+        try:
+            variants = asyncio.run(scenario())
+        finally:
+            processor.shutdown()
+
+        assert threading.get_ident() not in client.threads
+        assert set(client.objects) == {avatar_variant_key("user-1", v.size, v.extension) for v in variants} | {"avatars/user-1"}
+        assert client.objects["avatars/user-1"][0] == "image/jpeg"
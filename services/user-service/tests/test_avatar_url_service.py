@@ -0,0 +1,140 @@
+"""
+Test presigned avatar URL caching, versioned avatar links and cache headers
+"""
+
+import sys
+import os
+
+import pytest
+from botocore.exceptions import ClientError
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from config import config
+from services.avatar_url_service import (
+    AvatarNotFound, AvatarUrlService, avatar_link, avatar_object_key, etag_matches,
+    format_avatar_value, parse_avatar_value
+)
+
+
+class CountingS3Client:
+    def __init__(self, existing=()):
+        self.existing = set(existing)
+        self.heads = 0
+        self.signs = 0
+
+    def head_object(self, Bucket, Key):
+        self.heads += 1
+        if Key not in self.existing:
+            raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        self.signs += 1
+        return f"https://s3.example/{Params['Key']}?sig={self.signs}&expires={ExpiresIn}"
+
+
+class TestAvatarUrlService:
+    """Test the presigned URL cache"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, clock):
+        clock.now = 1_000_000.0
+        self.clock = clock
+        self.service = AvatarUrlService(expires_in=3600, refresh_margin=300, clock=self.clock)
+        self.s3 = CountingS3Client(existing={"avatars/u1"})
+
+    def test_url_reused_until_refresh_margin(self):
+        """Test one signature is served until shortly before it expires"""
+        first = self.service.get_url(self.s3, "bucket", "avatars/u1", "v1")
+        self.clock.now += 3600 - 301
+        assert self.service.get_url(self.s3, "bucket", "avatars/u1", "v1") is first
+        assert self.s3.signs == 1
+
+        self.clock.now += 1
+        second = self.service.get_url(self.s3, "bucket", "avatars/u1", "v1")
+        assert second.url != first.url
+        assert second.etag != first.etag
+        assert self.s3.signs == 2
+
+    def test_head_only_when_verifying(self):
+        """Test HEAD is skipped for recorded avatars and done once for unrecorded ones"""
+        self.service.get_url(self.s3, "bucket", "avatars/u1", "v1")
+        assert self.s3.heads == 0
+
+        self.service.get_url(self.s3, "bucket", "avatars/u1", None, verify=True)
+        self.service.get_url(self.s3, "bucket", "avatars/u1", None, verify=True)
+        assert self.s3.heads == 1
+
+        with pytest.raises(AvatarNotFound):
+            self.service.get_url(self.s3, "bucket", "avatars/missing", None, verify=True)
+
+    def test_new_version_is_signed_separately(self):
+        """Test a new upload version never reuses the previous URL"""
+        old = self.service.get_url(self.s3, "bucket", "avatars/u1", "v1")
+        new = self.service.get_url(self.s3, "bucket", "avatars/u1", "v2")
+        assert old.url != new.url
+
+    def test_invalidate_drops_legacy_and_variants(self):
+        """Test invalidation covers every key of one avatar only"""
+        self.service.get_url(self.s3, "bucket", "avatars/u1", "v1")
+        self.service.get_url(self.s3, "bucket", "avatars/u1/96.webp", "v1")
+        self.service.get_url(self.s3, "bucket", "avatars/u10", "v1")
+        self.service.invalidate("u1")
+        self.service.get_url(self.s3, "bucket", "avatars/u10", "v1")
+        assert self.s3.signs == 3
+
+        self.service.get_url(self.s3, "bucket", "avatars/u1", "v1")
+        assert self.s3.signs == 4
+
+    def test_lru_bound(self):
+        """Test the cache stays within max_entries"""
+        service = AvatarUrlService(max_entries=2, clock=self.clock)
+        for key in ("a", "b", "c"):
+            service.get_url(self.s3, "bucket", key)
+        assert len(service._entries) == 2
+
+    def test_cache_headers(self):
+        """Test versioned redirects are long-lived and unversioned ones short"""
+        entry = self.service.get_url(self.s3, "bucket", "avatars/u1", "v1")
+        versioned = self.service.cache_headers(entry, versioned=True)
+        assert versioned["Cache-Control"] == "public, max-age=3300, immutable"
+        assert versioned["ETag"] == entry.etag
+
+        unversioned = self.service.cache_headers(entry, versioned=False)
+        assert unversioned["Cache-Control"] == f"public, max-age={self.service.unversioned_max_age}"
+
+        self.clock.now += 3400
+        assert self.service.cache_headers(entry, versioned=True)["Cache-Control"].startswith("public, max-age=0")
+
+
+class TestAvatarValues:
+    """Test avatar value helpers"""
+
+    def test_value_round_trip(self):
+        """Test stored values split into id and version"""
+        assert parse_avatar_value(format_avatar_value("u1", "abc")) == ("u1", "abc")
+        assert parse_avatar_value("u1") == ("u1", None)
+
+    def test_avatar_link(self):
+        """Test links carry the version and external avatars pass through"""
+        base = f"{config.USER_SERVICE_URL}/avatar/?user_id=u1"
+        assert avatar_link("u1", "u1:abc") == f"{base}&v=abc"
+        assert avatar_link("u1", "u1") == base
+        assert avatar_link("u1", "https://lh3.googleusercontent.com/a/x") == "https://lh3.googleusercontent.com/a/x"
+        assert avatar_link("u1", None) is None
+
+    def test_object_key(self):
+        """Test variants are only used for versioned uploads and known sizes"""
+        assert avatar_object_key("u1", "abc", 96, "webp") == "avatars/u1/96.webp"
+        assert avatar_object_key("u1", "abc", 123, "webp") == "avatars/u1"
+        assert avatar_object_key("u1", None, 96, "webp") == "avatars/u1"
+        assert avatar_object_key("u1", "abc") == "avatars/u1"
+
+    def test_etag_matches(self):
+        """Test If-None-Match parsing"""
+        assert etag_matches('"a", "b"', '"b"')
+        assert etag_matches('W/"b"', '"b"')
+        assert etag_matches('*', '"b"')
+        assert not etag_matches('"a"', '"b"')
+        assert not etag_matches(None, '"b"')
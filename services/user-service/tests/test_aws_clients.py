@@ -0,0 +1,79 @@
+"""
+Test the shared AWS client registry
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.aws_clients import AwsClientRegistry
+
+
+class FakeClient:
+    def __init__(self, service_name, config):
+        self.service_name = service_name
+        self.config = config
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    created = 0
+
+    def __init__(self, **kwargs):
+        FakeSession.created += 1
+        self.kwargs = kwargs
+        self.clients = 0
+
+    def client(self, service_name, config):
+        self.clients += 1
+        time.sleep(0.01)  # widen the window for racing callers
+        return FakeClient(service_name, config)
+
+
+class TestAwsClientRegistry:
+    """Test client reuse, thread safety and shutdown"""
+
+    def setup_method(self):
+        FakeSession.created = 0
+
+    def test_one_client_per_service_across_threads(self):
+        """Test concurrent first calls create a single session and client"""
+        registry = AwsClientRegistry("ap-northeast-1", session_factory=FakeSession)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get("s3"))) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(client) for client in results}) == 1
+        assert FakeSession.created == 1
+        assert registry._session.clients == 1
+
+    def test_client_config_and_credentials(self):
+        """Test pool size, keep-alive and explicit credentials are applied"""
+        registry = AwsClientRegistry("ap-northeast-1", "key", "secret", max_pool_connections=32, session_factory=FakeSession)
+        client = registry.get("s3")
+        assert client.config.max_pool_connections == 32
+        assert client.config.tcp_keepalive is True
+        assert registry._session.kwargs == {
+            "region_name": "ap-northeast-1", "aws_access_key_id": "key", "aws_secret_access_key": "secret"
+        }
+
+    def test_close_releases_clients(self):
+        """Test shutdown closes clients and a later call recreates them"""
+        registry = AwsClientRegistry("ap-northeast-1", session_factory=FakeSession)
+        registry.warm("s3")
+        first = registry.get("s3")
+        registry.close()
+        assert first.closed
+
+        assert registry.get("s3") is not first
+        assert FakeSession.created == 2
@@ -0,0 +1,128 @@
+"""
+Test the per-user dashboard snapshot cache (stale-while-revalidate)
+"""
+
+import asyncio
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.dashboard_cache import DashboardCache
+
+
+def counting_builder(delay=0, partial=None):
+    calls = []
+
+    async def build():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return {"version": len(calls), "stats_partial": partial or []}
+
+    return build, calls
+
+
+class TestDashboardCache:
+    """Snapshot freshness, revalidation and invalidation"""
+
+    def test_fresh_snapshot_is_served_from_cache(self, clock):
+        cache = DashboardCache(ttl_seconds=30, max_stale_seconds=300, clock=clock.monotonic)
+        build, calls = counting_builder()
+
+        async def scenario():
+            first = await cache.get("u1", build)
+            clock.now += 10
+            second = await cache.get("u1", build)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first == second == {"version": 1, "stats_partial": []}
+        assert len(calls) == 1
+
+    def test_stale_snapshot_served_while_one_refresh_runs(self, clock):
+        cache = DashboardCache(ttl_seconds=30, max_stale_seconds=300, clock=clock.monotonic)
+        build, calls = counting_builder(delay=0.05)
+
+        async def scenario():
+            await cache.get("u1", build)
+            clock.now += 60
+            stale = [await cache.get("u1", build) for _ in range(5)]
+            await asyncio.sleep(0.1)
+            refreshed = await cache.get("u1", build)
+            return stale, refreshed
+
+        stale, refreshed = asyncio.run(scenario())
+        assert all(info["version"] == 1 for info in stale)
+        assert len(calls) == 2
+        assert refreshed["version"] == 2 and refreshed is not stale[0]
+
+    def test_expired_snapshot_is_rebuilt_inline(self, clock):
+        cache = DashboardCache(ttl_seconds=30, max_stale_seconds=300, clock=clock.monotonic)
+        build, calls = counting_builder()
+
+        async def scenario():
+            await cache.get("u1", build)
+            clock.now += 301
+            return await cache.get("u1", build)
+
+        assert asyncio.run(scenario())["version"] == 2
+        assert len(calls) == 2
+
+    def test_concurrent_misses_share_one_build(self):
+        cache = DashboardCache()
+        build, calls = counting_builder(delay=0.05)
+
+        async def scenario():
+            return await asyncio.gather(*(cache.get("u1", build) for _ in range(20)))
+
+        results = asyncio.run(scenario())
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+
+    def test_invalidate_drops_snapshot_and_discards_inflight_build(self):
+        cache = DashboardCache()
+        build, calls = counting_builder(delay=0.05)
+
+        async def scenario():
+            pending = asyncio.ensure_future(cache.get("u1", build))
+            await asyncio.sleep(0.01)
+            cache.invalidate("u1")
+            await pending
+            # Built before the invalidation, so it must not be served now
+            return await cache.get("u1", build)
+
+        assert asyncio.run(scenario())["version"] == 2
+        assert len(calls) == 2
+
+    def test_invalidations_keep_no_state(self):
+        cache = DashboardCache()
+        build, _ = counting_builder()
+        asyncio.run(cache.get("u1", build))
+        for i in range(1000):
+            cache.invalidate(f"u{i}")
+        assert not cache._snapshots and not cache._building
+
+    def test_partial_snapshots_revalidate_sooner(self, clock):
+        cache = DashboardCache(ttl_seconds=30, max_stale_seconds=300, partial_ttl_seconds=5, clock=clock.monotonic)
+        build, calls = counting_builder(partial=["quizzes"])
+
+        async def scenario():
+            await cache.get("u1", build)
+            clock.now += 10
+            await cache.get("u1", build)
+            await asyncio.sleep(0)
+
+        asyncio.run(scenario())
+        assert len(calls) == 2
+
+    def test_size_is_bounded(self):
+        cache = DashboardCache(max_entries=3)
+        build, _ = counting_builder()
+
+        async def scenario():
+            for i in range(5):
+                await cache.get(f"u{i}", build)
+
+        asyncio.run(scenario())
+        assert list(cache._snapshots) == ["u2", "u3", "u4"]
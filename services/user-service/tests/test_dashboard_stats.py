@@ -0,0 +1,145 @@
+"""
+Test the concurrent dashboard stats fan-out against mocked downstream services
+"""
+
+import asyncio
+import sys
+import os
+
+import httpx
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services import dashboard_stats
+
+COURSES = {"courses": [{"id": 1}, {"id": 2}, {"id": 3}]}
+LESSONS = {1: 4, 2: 2, 3: 0}
+
+
+def make_handler(delays=None, batch_endpoint=True, calls=None):
+    delays = delays or {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if calls is not None:
+            calls.append((request.method, path))
+        await asyncio.sleep(delays.get(path, 0))
+
+        if path.endswith("/courses"):
+            return httpx.Response(200, json=COURSES)
+        if path.endswith("/user/test-results"):
+            return httpx.Response(200, json={"results": [{"test_id": 1}, {"test_id": 1}, {"test_id": 2}]})
+        if path.endswith("/lessons/counts"):
+            if not batch_endpoint:
+                return httpx.Response(404)
+            return httpx.Response(200, json={"counts": {str(k): v for k, v in LESSONS.items()}})
+        if "/courses/" in path and path.endswith("/lessons"):
+            course_id = int(path.split("/")[-2])
+            return httpx.Response(200, json={"lessons": [{}] * LESSONS[course_id]})
+        if path.endswith("/quizzes"):
+            return httpx.Response(200, json={"quizzes": [{}, {}]})
+        if path.endswith("/user/quiz-attempts"):
+            return httpx.Response(200, json={"attempts": [{"score": 80}, {"score": 60}]})
+        return httpx.Response(404)
+
+    return handler
+
+
+@pytest.fixture
+def use_transport(monkeypatch):
+    clients = []
+
+    def install(handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        clients.append(client)
+        monkeypatch.setattr(dashboard_stats, "get_http_client", lambda: client)
+
+    yield install
+    for client in clients:
+        asyncio.run(client.aclose())
+
+
+class TestDashboardStats:
+    """Concurrent course/quiz stats with a total deadline"""
+
+    def test_full_results(self, use_transport):
+        calls = []
+        use_transport(make_handler(calls=calls))
+
+        course_stats, quiz_stats, partial = asyncio.run(dashboard_stats.fetch_dashboard_stats({}, timeout=2))
+
+        assert course_stats == {"total_courses": 3, "completed_courses": 2, "total_lessons": 6}
+        assert quiz_stats == {"total_quizzes": 2, "completed_quizzes": 2, "average_score": 0.7}
+        assert partial == []
+        # One batch lesson count instead of a call per course
+        assert ("POST", "/api/v1/lessons/counts") in calls
+        assert not any(path.endswith("/lessons") for _, path in calls)
+
+    def test_falls_back_to_per_course_lessons(self, use_transport):
+        use_transport(make_handler(batch_endpoint=False))
+
+        course_stats, _, partial = asyncio.run(dashboard_stats.fetch_dashboard_stats({}, timeout=2))
+
+        assert course_stats["total_lessons"] == 6
+        assert partial == []
+
+    def test_calls_run_concurrently(self, use_transport):
+        delays = {"/api/v1/courses": 0.2, "/api/v1/user/test-results": 0.2,
+                  "/api/v1/quizzes": 0.2, "/api/v1/user/quiz-attempts": 0.2}
+        use_transport(make_handler(delays=delays))
+
+        async def timed():
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            result = await dashboard_stats.fetch_dashboard_stats({}, timeout=2)
+            return result, loop.time() - started
+
+        (_, _, partial), elapsed = asyncio.run(timed())
+        assert partial == []
+        assert elapsed < 0.6
+
+    def test_slow_service_returns_partial_results(self, use_transport):
+        use_transport(make_handler(delays={"/api/v1/user/quiz-attempts": 5}))
+
+        async def timed():
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            result = await dashboard_stats.fetch_dashboard_stats({}, timeout=0.3)
+            return result, loop.time() - started
+
+        (course_stats, quiz_stats, partial), elapsed = asyncio.run(timed())
+        assert elapsed < 1
+        assert partial == ["quizzes"]
+        assert course_stats["total_lessons"] == 6
+        assert quiz_stats["total_quizzes"] == 2
+        assert quiz_stats["completed_quizzes"] == 0
+
+    def test_unreachable_service_is_partial(self, use_transport):
+        def handler(request):
+            raise httpx.ConnectError("connection refused", request=request)
+
+        use_transport(handler)
+        course_stats, quiz_stats, partial = asyncio.run(dashboard_stats.fetch_dashboard_stats({}, timeout=1))
+
+        assert course_stats == dashboard_stats.EMPTY_COURSE_STATS
+        assert quiz_stats == dashboard_stats.EMPTY_QUIZ_STATS
+        assert partial == ["courses", "quizzes"]
+
+
+class TestSharedClient:
+    """Pooled client lifecycle"""
+
+    def test_client_reused_within_loop_and_closed(self):
+        from services import http_client
+
+        async def scenario():
+            first = http_client.get_http_client()
+            second = http_client.get_http_client()
+            await http_client.close_http_client()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first is second
+        assert first.is_closed
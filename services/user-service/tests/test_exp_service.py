@@ -0,0 +1,81 @@
+"""
+Test the bulk EXP award against per-user level computation
+"""
+
+import sys
+import os
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models import ActivityWeekly, User
+from services import exp_service
+from services.exp_service import award_exp_bulk, values_increment_statement, values_update_statement
+from services.level_service import calculate_level_from_exp
+
+
+@pytest.fixture
+def engine(engine):
+    session = sessionmaker(bind=engine)()
+    for i in range(300):
+        session.add(User(id=f"user-{i:03d}", email=f"user{i}@example.com", current_exp=i * 40,
+                         level=calculate_level_from_exp(i * 40)[0], is_active=i != 7))
+    session.commit()
+    session.close()
+    return engine
+
+
+class TestBulkExpAward:
+    """Batched EXP awards"""
+
+    def test_awards_levels_and_level_ups(self, engine):
+        db = sessionmaker(bind=engine)()
+        awards = [(f"user-{i:03d}", 150) for i in range(0, 300, 3)]
+        awards += [("user-000", 50), ("user-007", 100), ("missing", 10)]
+
+        outcome = award_exp_bulk(db, awards)
+        db.commit()
+
+        by_id = {result["user_id"]: result for result in outcome.results}
+        assert outcome.not_found == ["user-007", "missing"]
+        assert by_id["user-000"]["exp_gained"] == 200
+        assert len(by_id) == 100
+
+        for user in db.query(User).all():
+            original = int(user.id.split("-")[1]) * 40
+            if user.id in by_id:
+                result = by_id[user.id]
+                level, _, next_exp = calculate_level_from_exp(original + result["exp_gained"])
+                assert (user.current_exp, user.level, user.require_exp) == (result["new_exp"], level, next_exp)
+                assert result["new_level"] == level
+                assert result["level_increased"] == (level > calculate_level_from_exp(original)[0])
+            else:
+                assert user.current_exp == original
+
+        # Gains feed this week's rollup, the weekly leaderboard's source
+        weekly = {row.user_id: row.exp for row in db.query(ActivityWeekly).all()}
+        assert weekly == {user_id: result["exp_gained"] for user_id, result in by_id.items()}
+
+    def test_chunks_share_one_transaction(self, engine, monkeypatch):
+        monkeypatch.setattr(exp_service, "EXP_BULK_CHUNK_SIZE", 100)
+        db = sessionmaker(bind=engine)()
+        outcome = award_exp_bulk(db, [(f"user-{i:03d}", 10) for i in range(250)])
+        db.rollback()
+
+        assert len(outcome.results) == 249
+        assert sessionmaker(bind=engine)().query(User).filter(User.id == "user-001").one().current_exp == 40
+
+    def test_postgres_uses_values_join(self):
+        sql = str(values_update_statement([
+            {"id": "a", "current_exp": 10, "level": 1, "require_exp": 100}
+        ]).compile(dialect=postgresql.dialect()))
+        assert "FROM (VALUES" in sql
+        assert "users.id = awards.id" in sql
+
+        sql = str(values_increment_statement({"a": 10}).compile(dialect=postgresql.dialect()))
+        assert "current_exp=(users.current_exp + deltas.delta)" in sql
+        assert "RETURNING" in sql
@@ -0,0 +1,153 @@
+"""
+Test the opt-in fast JSON response path: same body as the response-model path,
+the stdlib fallback, and a benchmark of serialization time and allocations for
+1k, 10k and 100k /all rows
+
+tracemalloc only sees the Python heap. Newer FastAPI releases dump response
+models to JSON inside pydantic-core, whose buffers it cannot see, so the
+"default" peak is understated there; the "encoder" variant is the
+jsonable_encoder + json.dumps path of the FastAPI version pinned in
+requirements.txt.
+"""
+
+import asyncio
+import gc
+import json
+import sys
+import os
+import time
+import tracemalloc
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from schemas.user_schemas import DashboardResponse, UsersListResponse
+from services import fast_json
+from services.fast_json import fast_json_response
+
+
+def make_rows(count):
+    """Rows shaped like list_users output for the default fields."""
+    return [
+        {
+            "user_id": f"user-{i}", "family_name": "Nguyễn", "given_name": f"An {i}", "dob": "01/02/2000",
+            "avatar_id": f"user-{i}:a1b2c3" if i % 2 else None,
+            "avatar_url": f"http://localhost:8004/avatar/?user_id=user-{i}&v=a1b2c3" if i % 2 else None,
+            "level": 1 + i % 40, "current_exp": i * 37, "require_exp": 100 + i % 40 * 50,
+            "sex": "Female" if i % 3 else "Male", "bio": None if i % 5 else "Học mỗi ngày", "remind_time": "20:00",
+        }
+        for i in range(count)
+    ]
+
+
+def make_app(rows):
+    """The /all success response as a response model (default), through jsonable_encoder and on the fast path."""
+    app = FastAPI()
+
+    @app.get("/default", response_model=UsersListResponse)
+    async def default_path():
+        return UsersListResponse(status=200, infos=rows, next_cursor=None)
+
+    @app.get("/encoder", response_model=UsersListResponse)
+    async def encoder_path():
+        return JSONResponse(jsonable_encoder(UsersListResponse(status=200, infos=rows, next_cursor=None)))
+
+    @app.get("/fast", response_model=UsersListResponse)
+    async def fast_path():
+        return fast_json_response(UsersListResponse, status=200, infos=rows, next_cursor=None)
+
+    return app
+
+
+async def fetch(app, path):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get(path)
+
+
+def measure(app, path, runs=3, trace=True):
+    """(best seconds, peak traced bytes, body) to serve ``path``; allocations are traced in a separate run."""
+    elapsed = None
+    for _ in range(runs):
+        gc.collect()
+        started = time.perf_counter()
+        body = asyncio.run(fetch(app, path)).content
+        elapsed = min(elapsed or float("inf"), time.perf_counter() - started)
+    if not trace:
+        return elapsed, None, body
+
+    gc.collect()
+    tracemalloc.start()
+    asyncio.run(fetch(app, path))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, body
+
+
+class TestFastJsonResponse:
+    """Test the fast path renders what the response model would"""
+
+    def test_body_matches_response_model_path(self):
+        """Test key order, None defaults and non-ASCII text come out byte-for-byte the same"""
+        app = make_app(make_rows(50))
+        default = asyncio.run(fetch(app, "/default"))
+        fast = asyncio.run(fetch(app, "/fast"))
+
+        assert fast.headers["content-type"] == "application/json"
+        assert fast.content == default.content
+        assert list(json.loads(fast.content)) == ["status", "infos", "next_cursor", "message"]
+
+    def test_dashboard_fields_and_defaults(self):
+        """Test fields not passed get the model default"""
+        response = fast_json_response(DashboardResponse, status=200, info={"level": 3, "user_top_rank": []})
+        assert json.loads(response.body) == {"status": 200, "info": {"level": 3, "user_top_rank": []}, "message": None}
+
+    def test_stdlib_fallback_without_orjson(self, monkeypatch):
+        """Test the same body is produced when orjson is not installed"""
+        rows = make_rows(20)
+        expected = fast_json_response(UsersListResponse, status=200, infos=rows).body
+        monkeypatch.setattr(fast_json, "orjson", None)
+        assert fast_json_response(UsersListResponse, status=200, infos=rows).body == expected
+
+    def test_non_finite_floats_are_rejected_by_the_fallback(self, monkeypatch):
+        """Test the fallback refuses NaN like the default JSONResponse instead of emitting invalid JSON"""
+        monkeypatch.setattr(fast_json, "orjson", None)
+        with pytest.raises(ValueError):
+            fast_json.dumps({"average_score": float("nan")})
+
+
+@pytest.mark.benchmark
+class TestFastJsonBenchmark:
+    """/all with 1k, 10k and 100k rows: response model, jsonable_encoder and the fast path"""
+
+    @pytest.mark.parametrize("count", [1000, 10000, 100000])
+    def test_serialization(self, count):
+        app = make_app(make_rows(count))
+        asyncio.run(fetch(app, "/fast"))  # warm up routing and imports
+
+        # The encoder path takes seconds at 100k rows (a minute under tracemalloc), so it is timed once
+        slow = count >= 100000
+        results = {
+            "default": measure(app, "/default"),
+            "encoder": measure(app, "/encoder", runs=1, trace=not slow),
+            "fast": measure(app, "/fast"),
+        }
+
+        print(f"\n{count} rows: " + ", ".join(
+            f"{path} {elapsed * 1000:.1f}ms / peak " + (f"{peak / 2**20:.1f}MiB" if peak is not None else "n/a")
+            for path, (elapsed, peak, _) in results.items()
+        ))
+        fast_elapsed, fast_peak, fast_body = results["fast"]
+        assert fast_body == results["default"][2]
+        assert json.loads(results["encoder"][2]) == json.loads(fast_body)
+        if count >= 10000:
+            # At 1k rows request handling dominates and the gap is within noise
+            assert fast_elapsed < results["default"][0]
+        assert fast_elapsed < results["encoder"][0]
+        if results["encoder"][1] is not None:
+            assert fast_peak < results["encoder"][1]
@@ -0,0 +1,124 @@
+"""
+Test the materialized leaderboard against a direct top-N query
+"""
+
+import json
+import random
+from datetime import date
+import sys
+import os
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models import ActivityWeekly, User
+from services.activity_service import record_weekly_exp
+from services.leaderboard_service import LeaderboardService, SortedSetStore, current_week_key
+from services.local_time import today_local, week_start
+
+
+def expected_top(db, n=10):
+    users = db.query(User).filter(User.is_active == True).all()
+    users.sort(key=lambda u: (-u.current_exp, u.id))
+    return [(str(u.id), u.current_exp) for u in users[:n]]
+
+
+@pytest.fixture
+def db(db):
+    rng = random.Random(3)
+    for i in range(200):
+        db.add(User(id=f"user-{i:03d}", email=f"user{i}@example.com", given_name=f"User{i}",
+                         current_exp=rng.randint(0, 5000), is_active=True))
+    db.commit()
+    return db
+
+
+class TestSortedSetStore:
+    """Sorted set semantics mirror Redis"""
+
+    def test_zadd_zincrby_zrevrange(self):
+        store = SortedSetStore()
+        store.zadd("k", "a", 10)
+        store.zadd("k", "b", 30)
+        store.zincrby("k", "a", 25)
+        store.zadd("k", "c", 5)
+        assert store.zrevrange("k", 0, 1) == [("a", 35), ("b", 30)]
+        store.ztrim("k", 2)
+        assert store.zcard("k") == 2
+        store.zrem("k", "a")
+        assert store.zrevrange("k", 0, -1) == [("b", 30)]
+
+
+class TestLeaderboardService:
+    """Incremental updates keep the snapshot equal to a fresh query"""
+
+    def test_incremental_updates_match_query(self, db):
+        service = LeaderboardService(top_n=10, margin=5)
+        service.get_leaderboard(db)
+        users = db.query(User).all()
+        rng = random.Random(5)
+
+        for _ in range(300):
+            user = rng.choice(users)
+            delta = rng.choice([rng.randint(1, 800), -user.current_exp])  # gains and resets
+            user.current_exp += delta
+            db.commit()
+            service.record_exp_change(user, delta)
+
+            board = service.get_leaderboard(db)
+            assert [(e["id"], e["experience"]) for e in board] == expected_top(db)
+
+    def test_snapshot_is_cached_and_preserialized(self, db):
+        service = LeaderboardService(top_n=5)
+        first = service.get_leaderboard_bytes(db)
+        assert service.get_leaderboard_bytes(db) is first
+        assert [e["rank"] for e in json.loads(first)] == [1, 2, 3, 4, 5]
+
+        # A change below the top N leaves the cached payload untouched
+        low_user = db.query(User).order_by(User.current_exp.asc()).first()
+        low_user.current_exp += 1
+        db.commit()
+        service.record_exp_change(low_user, 1)
+        assert service.get_leaderboard_bytes(db) is first
+
+    def test_weekly_board_ranks_exp_gained(self, db):
+        service = LeaderboardService(top_n=3)
+        service.get_leaderboard(db, "weekly")
+        users = db.query(User).limit(4).all()
+        for user, gained in zip(users, [50, 400, 10, 200]):
+            user.current_exp += gained
+            record_weekly_exp(db, {user.id: gained})
+            db.commit()
+            service.record_exp_change(user, gained)
+
+        weekly = service.get_leaderboard(db, "weekly")
+        assert [(e["id"], e["experience"]) for e in weekly] == [
+            (users[1].id, 400), (users[3].id, 200), (users[0].id, 50)
+        ]
+        # A new instance (or a restart) loads the same board from activity_weekly
+        assert LeaderboardService(top_n=3).get_leaderboard(db, "weekly") == weekly
+
+    def test_weekly_board_is_seeded_from_this_weeks_rollup(self, db):
+        """Test the board reads only the current week and places untracked gains after a reload"""
+        this_week = week_start(today_local())
+        last_week = date.fromordinal(this_week.toordinal() - 7)
+        db.add_all(
+            [ActivityWeekly(user_id=f"user-{i:03d}", week_start=this_week, exp=100 + i) for i in range(20)]
+            + [ActivityWeekly(user_id="user-150", week_start=last_week, exp=10**6)]
+        )
+        db.commit()
+        service = LeaderboardService(top_n=3, margin=2)
+
+        board = service.get_leaderboard(db, "weekly")
+        assert [(e["id"], e["experience"]) for e in board] == [("user-019", 119), ("user-018", 118), ("user-017", 117)]
+        assert service.store.keys() == [current_week_key()]
+
+        # user-003 is not tracked (margin of 2): its gain is placed by reloading, not guessed
+        user = db.get(User, "user-003")
+        record_weekly_exp(db, {user.id: 50})
+        db.commit()
+        service.record_exp_change(user, 50)
+        board = service.get_leaderboard(db, "weekly")
+        assert [(e["id"], e["experience"]) for e in board] == [("user-003", 153), ("user-019", 119), ("user-018", 118)]
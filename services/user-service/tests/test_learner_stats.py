@@ -0,0 +1,167 @@
+"""
+Test the learner_stats table: upserts, atomic increments and the bio backfill migration
+"""
+
+import importlib.util
+import json
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, text
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models import LearnerStats, User
+from services.learner_stats_service import (
+    EMPTY_LEARNER_STATS, get_learner_stats, increment_learner_stats, reset_learner_stats, set_learner_stats
+)
+
+MIGRATION_PATH = os.path.join(
+    os.path.dirname(__file__), '..', 'alembic', 'versions', 'd4b8f1e6c2a9_add_learner_stats_table.py'
+)
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("learner_stats_migration", MIGRATION_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def db(db):
+    db.add(User(id="u1", email="u1@example.com"))
+    db.commit()
+    return db
+
+
+class TestLearnerStatsService:
+    """Test reads, upserts and increments"""
+
+    def test_missing_row_reads_as_zeros(self, db):
+        """Test a user without stats gets the empty counters"""
+        assert get_learner_stats(db, "u1") == EMPTY_LEARNER_STATS
+
+    def test_set_overwrites_only_given_fields(self, db):
+        """Test set is an upsert of the passed fields"""
+        set_learner_stats(db, "u1", {"total_courses": 5, "average_score": 0.8, "total_lessons": None})
+        set_learner_stats(db, "u1", {"completed_courses": 2})
+        db.commit()
+
+        stats = get_learner_stats(db, "u1")
+        assert stats["total_courses"] == 5
+        assert stats["completed_courses"] == 2
+        assert stats["average_score"] == pytest.approx(0.8)
+        assert db.query(LearnerStats).count() == 1
+
+    def test_increment_and_running_average(self, db):
+        """Test increments add to counters and quiz scores fold into the average"""
+        increment_learner_stats(db, "u1", {"total_lessons": 3}, quiz_score=1.0)
+        increment_learner_stats(db, "u1", {"total_lessons": 2}, quiz_score=0.5)
+        increment_learner_stats(db, "u1", {"unknown_field": 9, "completed_courses": 0})
+        db.commit()
+
+        stats = get_learner_stats(db, "u1")
+        assert stats["total_lessons"] == 5
+        assert stats["completed_quizzes"] == 2
+        assert stats["average_score"] == pytest.approx(0.75)
+
+    def test_reset_deletes_row(self, db):
+        """Test reset returns the user to zeros"""
+        set_learner_stats(db, "u1", {"total_courses": 5})
+        reset_learner_stats(db, "u1")
+        db.commit()
+        assert get_learner_stats(db, "u1") == EMPTY_LEARNER_STATS
+
+    def test_concurrent_increments_are_not_lost(self, Session):
+        """Test concurrent writers on separate connections never lose an increment"""
+        with Session() as session:
+            session.add(User(id="u1", email="u1@example.com"))
+            session.commit()
+
+        def work(_):
+            with Session() as session:
+                increment_learner_stats(session, "u1", {"total_lessons": 1})
+                session.commit()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(work, range(200)))
+
+        with Session() as session:
+            assert get_learner_stats(session, "u1")["total_lessons"] == 200
+
+
+class TestLearnerStatsMigration:
+    """Test the [TEST_DATA] bio backfill"""
+
+    def test_parse_bio(self):
+        """Test [TEST_DATA] lines are removed and later values win"""
+        migration = load_migration()
+        bio = "\n".join([
+            "Hello there",
+            "[TEST_DATA] " + json.dumps({"test_total_courses": 3, "test_average_score": 0.5}),
+            "[TEST_DATA] not json",
+            "[TEST_DATA] " + json.dumps({"test_total_courses": 4}),
+        ])
+        assert migration.parse_bio(bio) == ("Hello there", {"total_courses": 4, "average_score": 0.5})
+
+    def test_upgrade_backfills_in_batches(self, monkeypatch):
+        """Test every user with test data gets a row and a cleaned bio"""
+        migration = load_migration()
+        monkeypatch.setattr(migration, "BATCH_SIZE", 3)
+
+        engine = create_engine("sqlite:///:memory:")
+        User.__table__.create(bind=engine)
+        with engine.begin() as conn:
+            for i in range(8):
+                bio = f"bio {i}" if i % 2 else f"bio {i}\n[TEST_DATA] " + json.dumps({"test_total_lessons": i})
+                conn.execute(User.__table__.insert().values(id=f"u{i}", email=f"u{i}@example.com", bio=bio))
+            conn.execute(User.__table__.insert().values(id="only-data", email="o@example.com",
+                                                        bio='[TEST_DATA] {"test_completed_quizzes": 2}'))
+
+            with Operations.context(MigrationContext.configure(conn)):
+                migration.upgrade()
+
+            stats = dict(conn.execute(text("SELECT user_id, total_lessons FROM learner_stats")).all())
+            bios = dict(conn.execute(text("SELECT id, bio FROM users")).all())
+
+        assert stats == {"u0": 0, "u2": 2, "u4": 4, "u6": 6, "only-data": 0}
+        assert bios["u2"] == "bio 2"
+        assert bios["u3"] == "bio 3"
+        assert bios["only-data"] is None
+
+    def test_downgrade_writes_counters_back_to_bio(self, monkeypatch):
+        """Test a downgrade restores the [TEST_DATA] lines the upgrade moved out"""
+        migration = load_migration()
+        monkeypatch.setattr(migration, "BATCH_SIZE", 2)
+
+        engine = create_engine("sqlite:///:memory:")
+        User.__table__.create(bind=engine)
+        with engine.begin() as conn:
+            for i in range(5):
+                bio = f"bio {i}\n[TEST_DATA] " + json.dumps({"test_total_lessons": i, "test_average_score": 0.5})
+                conn.execute(User.__table__.insert().values(id=f"u{i}", email=f"u{i}@example.com", bio=bio))
+            conn.execute(User.__table__.insert().values(id="only-data", email="o@example.com",
+                                                        bio='[TEST_DATA] {"test_completed_quizzes": 2}'))
+            conn.execute(User.__table__.insert().values(id="plain", email="p@example.com", bio="just a bio"))
+
+            with Operations.context(MigrationContext.configure(conn)):
+                migration.upgrade()
+                migration.downgrade()
+
+            bios = dict(conn.execute(text("SELECT id, bio FROM users")).all())
+            tables = conn.execute(text("SELECT name FROM sqlite_master WHERE name = 'learner_stats'")).all()
+
+        assert not tables
+        assert migration.parse_bio(bios["u3"]) == ("bio 3", {
+            "total_courses": 0, "completed_courses": 0, "total_lessons": 3,
+            "total_quizzes": 0, "completed_quizzes": 0, "average_score": 0.5
+        })
+        assert migration.parse_bio(bios["only-data"])[1]["completed_quizzes"] == 2
+        assert bios["only-data"].startswith("[TEST_DATA] ")
+        assert bios["plain"] == "just a bio"
@@ -0,0 +1,82 @@
+"""
+Test the precomputed level engine against the original level-by-level loop
+"""
+
+import random
+import sys
+import os
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services import level_service
+from services.level_service import (
+    calculate_level_from_exp, calculate_levels, get_exp_for_level, level_for_exp, MAX_LEVEL
+)
+
+THRESHOLDS = [0, 100, 300, 600, 1000, 1500, 2100, 2800, 3600, 4500, 5500, 6600, 7800, 9100, 10500]
+
+
+def reference_exp_for_level(level):
+    if level <= 1:
+        return 0
+    if level - 1 < len(THRESHOLDS):
+        return THRESHOLDS[level - 1]
+    additional_exp = 10500 * (1.3 ** (level - 15)) - 10500
+    return int(10500 + additional_exp)
+
+
+def reference_level_from_exp(current_exp):
+    if current_exp <= 0:
+        return 1, 0, reference_exp_for_level(2)
+    level = 1
+    while True:
+        if current_exp < reference_exp_for_level(level + 1):
+            break
+        level += 1
+        if level > 1000:
+            break
+    return level, reference_exp_for_level(level), reference_exp_for_level(level + 1)
+
+
+def sample_exps():
+    rng = random.Random(11)
+    exps = [-5, 0, 1, 99, 100, 101, 10499, 10500, 10501, 10 ** 9, 10 ** 15]
+    for level in range(2, 130):
+        threshold = reference_exp_for_level(level)
+        exps += [threshold - 1, threshold, threshold + 1]
+    exps += [rng.randint(0, 10 ** 7) for _ in range(2000)]
+    return exps
+
+
+class TestLevelService:
+    """Level engine parity and vectorized path"""
+
+    def test_thresholds_match_original_formula(self):
+        for level in range(0, MAX_LEVEL + 10):
+            assert get_exp_for_level(level) == reference_exp_for_level(level)
+
+    def test_scalar_lookup_matches_original_loop(self):
+        for exp in sample_exps():
+            assert calculate_level_from_exp(exp) == reference_level_from_exp(exp), exp
+
+    def test_cap_matches_original_loop(self):
+        huge = reference_exp_for_level(MAX_LEVEL + 5)
+        assert level_for_exp(huge) == MAX_LEVEL
+        assert calculate_level_from_exp(huge) == reference_level_from_exp(huge)
+
+    def test_vectorized_matches_scalar(self):
+        pytest.importorskip("numpy")
+        exps = [exp for exp in sample_exps() if exp < 2 ** 53]
+        levels, next_exps = calculate_levels(exps)
+        expected = [calculate_level_from_exp(exp) for exp in exps]
+        assert list(levels) == [level for level, _, _ in expected]
+        assert list(next_exps) == [next_exp for _, _, next_exp in expected]
+
+    def test_fallback_without_numpy(self, monkeypatch):
+        monkeypatch.setattr(level_service, "np", None)
+        levels, next_exps = calculate_levels([0, 150, 10500])
+        assert levels == [1, 2, 15]
+        assert next_exps == [100, 300, reference_exp_for_level(16)]
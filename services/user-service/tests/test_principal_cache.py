@@ -0,0 +1,125 @@
+"""
+Test the authenticated principal cache used by get_current_user
+"""
+
+import sys
+import os
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt as jose_jwt
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from config import config
+
+if not config.DATABASE_URL:
+    config.DATABASE_URL = "sqlite:///./test.db"
+
+from models import User
+from services import user_service_auth
+from services.principal_cache import PrincipalCache, principal_cache
+
+SECRET = "principal-cache-test-secret"
+
+
+@pytest.fixture
+def env(engine, monkeypatch):
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    Session = sessionmaker(bind=engine)
+    setup = Session()
+    setup.add(User(id="user-1", email="user1@example.com", is_email_verified=True, is_active=True, current_exp=10))
+    setup.commit()
+    setup.close()
+
+    monkeypatch.setattr(user_service_auth, "JWT_SECRET_KEY", SECRET)
+    principal_cache.clear()
+    yield Session, statements
+    principal_cache.clear()
+
+
+def authenticate(db, jti="token-1"):
+    token = jose_jwt.encode({"sub": "user-1", "type": "access", "jti": jti}, SECRET, algorithm=config.JWT_ALGORITHM)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return user_service_auth.get_current_user(credentials=credentials, db=db)
+
+
+def selects(statements):
+    return [statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]
+
+
+class TestPrincipalCache:
+    """Skip the per-request user lookup while keeping writes correct"""
+
+    def test_second_request_skips_user_query(self, env):
+        Session, statements = env
+        first = authenticate(Session())
+        before = len(selects(statements))
+        db = Session()
+        second = authenticate(db)
+
+        assert len(selects(statements)) == before
+        assert second.email == first.email == "user1@example.com"
+        assert second in db
+
+    def test_writes_through_cached_user_are_committed_and_invalidate(self, env):
+        Session, statements = env
+        authenticate(Session())
+
+        db = Session()
+        user = authenticate(db)
+        user.current_exp += 5
+        db.commit()
+        assert len(principal_cache) == 0
+
+        check = Session()
+        assert check.query(User).filter(User.id == "user-1").one().current_exp == 15
+        assert authenticate(Session()).current_exp == 15
+
+    def test_deactivation_is_seen_on_next_request(self, env):
+        Session, _ = env
+        authenticate(Session())
+
+        db = Session()
+        db.query(User).filter(User.id == "user-1").one().is_active = False
+        db.commit()
+
+        with pytest.raises(HTTPException) as exc:
+            authenticate(Session())
+        assert exc.value.status_code == 401
+
+    def test_rolled_back_changes_do_not_invalidate(self, env):
+        Session, _ = env
+        authenticate(Session())
+
+        db = Session()
+        db.query(User).filter(User.id == "user-1").one().given_name = "Changed"
+        db.flush()
+        db.rollback()
+        assert len(principal_cache) == 1
+
+    def test_entries_are_per_token(self, env):
+        Session, statements = env
+        authenticate(Session(), jti="token-1")
+        before = len(selects(statements))
+        authenticate(Session(), jti="token-2")
+        assert len(selects(statements)) > before
+
+    def test_ttl_and_size_bound(self, clock):
+        cache = PrincipalCache(ttl_seconds=30, max_entries=2, clock=clock.monotonic)
+        for i in range(3):
+            cache.put(User(id=f"user-{i}", email=f"user{i}@example.com"), jti="t")
+
+        assert cache.get("user-0", "t") is None
+        assert cache.get("user-2", "t").email == "user2@example.com"
+        clock.now += 31
+        assert cache.get("user-2", "t") is None
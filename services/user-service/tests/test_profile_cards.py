@@ -0,0 +1,146 @@
+"""
+Test the profile_cards projection: rendering, upkeep on name and avatar
+changes, the backfill of missing cards and the byte-spliced leaderboard
+"""
+
+import asyncio
+import json
+import sys
+import os
+import time
+
+import pytest
+from sqlalchemy import update
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models import ProfileCard, User
+from services import profile_cards
+from services.leaderboard_service import LeaderboardService
+from services.profile_cards import backfill_profile_cards, build_profile_card, refresh_profile_cards
+from services.profile_lookup import ProfileLookup, join_fragments, load_active_profile_rows, serialize_card_fragment
+
+
+@pytest.fixture
+def Session(make_profile_db):
+    return make_profile_db(20)
+
+
+def lookup_cards(Session, user_ids):
+    return json.loads(asyncio.run(ProfileLookup().get_cards_json(Session, user_ids)))
+
+
+class TestProfileCards:
+    """Test the stored projection and its fallbacks"""
+
+    def test_missing_cards_are_rendered_from_users(self, Session):
+        """Test a user without a stored card still gets the full card"""
+        with Session() as db:
+            user = db.get(User, "u3")
+            assert lookup_cards(Session, ["u3"]) == {"u3": build_profile_card(user)}
+            assert db.query(ProfileCard).count() == 0
+
+    def test_stored_fragment_is_spliced_with_the_current_level(self, Session):
+        """Test reads use the stored fragment as is and take the level from users"""
+        with Session() as db:
+            refresh_profile_cards(db, [db.get(User, "u3")])
+            db.execute(update(ProfileCard).values(fragment='"id":"u3","name":"Stored"'))
+            db.execute(update(User).where(User.id == "u3").values(level=42))
+            db.commit()
+        assert lookup_cards(Session, ["u3"]) == {"u3": {"id": "u3", "name": "Stored", "level": 42}}
+
+    def test_cards_with_an_old_format_are_re_rendered(self, Session, monkeypatch):
+        """Test a change of layout version or link base ignores the stored fragments"""
+        with Session() as db:
+            refresh_profile_cards(db, [db.get(User, "u3")])
+            db.execute(update(ProfileCard).values(fragment='"id":"u3","name":"Stored"'))
+            db.commit()
+        monkeypatch.setattr(profile_cards, "CARD_LAYOUT_VERSION", profile_cards.CARD_LAYOUT_VERSION + 1)
+        assert lookup_cards(Session, ["u3"])["u3"]["name"] == "Trần Bình3"
+
+        assert backfill_profile_cards(Session, batch_size=7) == 20
+        assert backfill_profile_cards(Session, batch_size=7) == 0
+
+    def test_source_changes_made_elsewhere_are_not_served_stale(self, Session):
+        """Test a users row changed without a card refresh (auth-service sign-in) is re-rendered and backfilled"""
+        backfill_profile_cards(Session)
+        with Session() as db:
+            db.execute(update(User).where(User.id == "u5").values(given_name="Google", avatar_url="https://lh3.example/u5.jpg"))
+            db.commit()
+
+        card = lookup_cards(Session, ["u5"])["u5"]
+        assert (card["name"], card["avatar_url"]) == ("Trần Google", "https://lh3.example/u5.jpg")
+        assert backfill_profile_cards(Session, batch_size=7) == 1
+        with Session() as db:
+            assert db.get(ProfileCard, "u5").name == "Trần Google"
+
+    def test_refresh_follows_name_and_avatar_changes(self, Session):
+        """Test the upsert rewrites name, initials and avatar link"""
+        with Session() as db:
+            user = db.get(User, "u4")
+            refresh_profile_cards(db, [user])
+            db.commit()
+            user.family_name, user.given_name, user.avatar_url = None, "Zoe", "u4:v9"
+            refresh_profile_cards(db, [user])
+            db.commit()
+            card = db.get(ProfileCard, "u4")
+            assert (card.name, card.initials) == ("Zoe", "Z")
+            assert card.avatar_url.endswith("/avatar/?user_id=u4&v=v9")
+        assert lookup_cards(Session, ["u4"])["u4"]["name"] == "Zoe"
+
+    def test_non_ascii_names_round_trip(self, Session):
+        """Test fragments are UTF-8 JSON that parses back to the rendered card"""
+        backfill_profile_cards(Session)
+        rows = load_active_profile_rows(Session, ["u1", "u2"])
+        payload = json.loads(join_fragments(serialize_card_fragment(row) for row in rows))
+        with Session() as db:
+            assert payload == {user.id: build_profile_card(user) for user in db.query(User).filter(User.id.in_(["u1", "u2"]))}
+
+
+class TestLeaderboardCards:
+    """Test the leaderboard reuses the projection"""
+
+    def test_bytes_match_entries_and_follow_profile_changes(self, Session):
+        """Test the spliced payload equals the entry list, including after a rename"""
+        backfill_profile_cards(Session)
+        service = LeaderboardService(top_n=5)
+        with Session() as db:
+            entries = service.get_leaderboard(db)
+            assert json.loads(service.get_leaderboard_bytes(db)) == entries
+            assert [entry["id"] for entry in entries] == ["u19", "u18", "u17", "u16", "u15"]
+            assert entries[0] == {"rank": 1, **build_profile_card(db.get(User, "u19")), "experience": 190}
+
+            user = db.get(User, "u18")
+            user.given_name = "Renamed"
+            db.commit()
+            service.record_profile_change(user)
+            service.record_profile_change(db.get(User, "u1"))  # not on the board: no-op
+            payload = json.loads(service.get_leaderboard_bytes(db))
+            assert payload[1]["name"] == "Trần Renamed"
+            assert payload == service.get_leaderboard(db)
+
+
+@pytest.mark.benchmark
+class TestProfileCardBenchmark:
+    """10k cold lookups: cards rendered per row vs spliced from the projection"""
+
+    def test_10k_ids(self, make_profile_db):
+        count = 10000
+        Session = make_profile_db(count)
+        ids = [f"u{i}" for i in range(count)]
+
+        def cold_lookup():
+            started = time.perf_counter()
+            payload = asyncio.run(ProfileLookup(load_rows=load_active_profile_rows).get_cards_json(Session, ids))
+            return payload, time.perf_counter() - started
+
+        rendered, rendered_elapsed = cold_lookup()
+        started = time.perf_counter()
+        backfill_profile_cards(Session)
+        backfill_elapsed = time.perf_counter() - started
+        spliced, spliced_elapsed = cold_lookup()
+
+        print(f"\n10k cold lookups: rendered {rendered_elapsed * 1000:.1f}ms, "
+              f"from projection {spliced_elapsed * 1000:.1f}ms (one-off backfill {backfill_elapsed * 1000:.1f}ms)")
+        assert spliced == rendered
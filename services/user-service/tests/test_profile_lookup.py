@@ -0,0 +1,188 @@
+"""
+Test the /users-by-ids profile lookup: read-through cache, chunking, request
+coalescing, and a 10k-id benchmark against the uncached query path.
+"""
+
+import asyncio
+import json
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models import User
+from services.profile_cards import build_profile_card
+from services.profile_lookup import ProfileLookup, load_active_profile_rows
+
+
+class RecordingLoader:
+    """The default row loader, recording every query's ids."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, session_factory, user_ids):
+        with self._lock:
+            self.calls.append(list(user_ids))
+        time.sleep(self.delay)
+        return load_active_profile_rows(session_factory, user_ids)
+
+
+@pytest.fixture
+def Session(make_profile_db):
+    return make_profile_db(50, inactive=[f"u{i}" for i in range(9, 50, 10)])
+
+
+class TestProfileLookup:
+    """Test caching, chunking and coalescing"""
+
+    def test_cards_match_rows_and_skip_inactive(self, Session):
+        """Test the response is the id -> card object for active users only"""
+        lookup = ProfileLookup(load_rows=RecordingLoader())
+        payload = json.loads(asyncio.run(lookup.get_cards_json(Session, ["u1", "u3", "u9", "nope", "u1"])))
+
+        assert list(payload) == ["u1", "u3"]
+        db = Session()
+        user = db.query(User).filter(User.id == "u3").one()
+        assert payload["u3"] == build_profile_card(user)
+        assert payload["u3"]["avatar_url"].endswith("/avatar/?user_id=u3&v=v1")
+        db.close()
+
+    def test_read_through_and_ttl(self, Session, clock):
+        """Test repeated lookups are served from cache until the TTL passes"""
+        loader = RecordingLoader()
+        lookup = ProfileLookup(load_rows=loader, ttl_seconds=60, negative_ttl_seconds=5, clock=clock)
+
+        async def run():
+            await lookup.get_fragments(Session, ["u1", "u2", "missing"])
+            await lookup.get_fragments(Session, ["u2", "u1", "missing"])
+            assert len(loader.calls) == 1
+
+            clock.now = 10
+            await lookup.get_fragments(Session, ["u1", "missing"])
+            assert loader.calls[-1] == ["missing"]
+
+            clock.now = 61
+            await lookup.get_fragments(Session, ["u1"])
+            assert loader.calls[-1] == ["u1"]
+
+        asyncio.run(run())
+
+    def test_chunks_large_id_lists(self, Session):
+        """Test misses are queried in bounded chunks"""
+        loader = RecordingLoader()
+        lookup = ProfileLookup(load_rows=loader, chunk_size=16)
+        fragments = asyncio.run(lookup.get_fragments(Session, [f"u{i}" for i in range(50)]))
+
+        assert sorted(len(call) for call in loader.calls) == [2, 16, 16, 16]
+        assert len(fragments) == 45
+
+    def test_concurrent_overlapping_requests_share_queries(self, Session):
+        """Test each id is queried once across concurrent overlapping requests"""
+        loader = RecordingLoader(delay=0.05)
+        lookup = ProfileLookup(load_rows=loader)
+
+        async def run():
+            return await asyncio.gather(
+                lookup.get_cards_json(Session, ["u1", "u2", "u3"]),
+                lookup.get_cards_json(Session, ["u2", "u3", "u4"]),
+                lookup.get_cards_json(Session, ["u1", "u4"]),
+            )
+
+        first, second, third = [json.loads(payload) for payload in asyncio.run(run())]
+        queried = [user_id for call in loader.calls for user_id in call]
+        assert sorted(queried) == ["u1", "u2", "u3", "u4"]
+        assert list(second) == ["u2", "u3", "u4"]
+        assert third["u1"] == first["u1"]
+
+    def test_invalidate_during_load_is_not_cached(self, Session):
+        """Test a card invalidated while loading is reloaded on the next lookup"""
+        loader = RecordingLoader(delay=0.05)
+        lookup = ProfileLookup(load_rows=loader)
+
+        async def run():
+            pending = asyncio.ensure_future(lookup.get_fragments(Session, ["u1"]))
+            await asyncio.sleep(0.01)
+            lookup.invalidate("u1")
+            await pending
+            await lookup.get_fragments(Session, ["u1"])
+
+        asyncio.run(run())
+        assert loader.calls == [["u1"], ["u1"]]
+
+    def test_invalidating_uncached_ids_keeps_no_state(self, Session):
+        """Test invalidations of ids that were never looked up leave nothing behind"""
+        lookup = ProfileLookup(load_rows=RecordingLoader())
+        asyncio.run(lookup.get_fragments(Session, ["u1"]))
+        for i in range(1000):
+            lookup.invalidate(f"other-{i}")
+        assert list(lookup._entries) == ["u1"] and not lookup._inflight
+
+    def test_loads_left_on_a_previous_event_loop_are_not_awaited(self, Session):
+        """Test a load frozen with an earlier loop (Lambda invocation) does not block the next one"""
+        loader = RecordingLoader()
+        lookup = ProfileLookup(load_rows=loader)
+
+        async def interrupted():
+            lookup._inflight["u1"] = asyncio.get_running_loop().create_future()
+
+        asyncio.run(interrupted())
+        assert len(asyncio.run(asyncio.wait_for(lookup.get_fragments(Session, ["u1"]), 1))) == 1
+        assert loader.calls == [["u1"]]
+
+    def test_load_failure_propagates_and_is_not_cached(self, Session):
+        """Test errors reach every waiter and the next lookup retries"""
+        calls = []
+
+        def failing(session_factory, user_ids):
+            calls.append(user_ids)
+            raise RuntimeError("database down")
+
+        lookup = ProfileLookup(load_rows=failing)
+        with pytest.raises(RuntimeError):
+            asyncio.run(lookup.get_fragments(Session, ["u1"]))
+        lookup.load_rows = load_active_profile_rows
+        assert len(asyncio.run(lookup.get_fragments(Session, ["u1"]))) == 1
+
+
+@pytest.mark.benchmark
+class TestProfileLookupBenchmark:
+    """10k-id lookups: uncached query + dict build vs cold and warm lookups"""
+
+    def test_10k_ids(self, make_profile_db):
+        count = 10000
+        Session = make_profile_db(count, inactive=[f"u{i}" for i in range(9, count, 10)])
+        ids = [f"u{i}" for i in range(count)]
+
+        started = time.perf_counter()
+        db = Session()
+        users = db.query(User).filter(User.id.in_(ids), User.is_active == True).all()
+        baseline = json.dumps({str(user.id): build_profile_card(user) for user in users}, ensure_ascii=False).encode()
+        db.close()
+        baseline_elapsed = time.perf_counter() - started
+
+        loader = RecordingLoader()
+        lookup = ProfileLookup(load_rows=loader, chunk_size=500)
+
+        started = time.perf_counter()
+        cold = asyncio.run(lookup.get_cards_json(Session, ids))
+        cold_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        warm = asyncio.run(lookup.get_cards_json(Session, ids))
+        warm_elapsed = time.perf_counter() - started
+
+        print(f"\n10k ids: uncached {baseline_elapsed * 1000:.1f}ms, "
+              f"cold {cold_elapsed * 1000:.1f}ms ({len(loader.calls)} chunks), warm {warm_elapsed * 1000:.1f}ms")
+
+        assert json.loads(cold) == json.loads(baseline)
+        assert warm == cold
+        assert len(loader.calls) == count // 500
+        assert warm_elapsed < baseline_elapsed
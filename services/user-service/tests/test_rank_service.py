@@ -0,0 +1,74 @@
+"""
+Test rank lookups against the database and the in-memory EXP index
+"""
+
+import random
+import sys
+import os
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models import User
+from services import rank_service
+from services.rank_service import ExpRankIndex, get_user_rank, record_exp_change
+
+
+def naive_rank(users, user):
+    active = [u for u in users if u.is_active]
+    return {"rank": 1 + sum(1 for u in active if u.current_exp > user.current_exp), "total_users": len(active)}
+
+
+@pytest.fixture
+def db(db):
+    rng = random.Random(7)
+    for i in range(300):
+        db.add(User(
+            id=f"user-{i}",
+            email=f"user{i}@example.com",
+            current_exp=rng.choice([0, 50, 100, rng.randint(0, 20000)]),
+            is_active=(i % 10 != 0)
+        ))
+    db.commit()
+    yield db
+    rank_service.reset_rank_index()
+
+
+class TestRankService:
+    """Rank of user X is 1 + active users with strictly more EXP"""
+
+    def test_count_query_matches_linear_scan(self, db):
+        users = db.query(User).all()
+        for user in users[::17]:
+            assert get_user_rank(db, user) == naive_rank(users, user)
+
+    def test_in_memory_index_tracks_exp_changes(self, db, monkeypatch):
+        monkeypatch.setattr(rank_service.config, "RANK_INDEX_ENABLED", True, raising=False)
+        monkeypatch.setattr(rank_service.config, "RANK_INDEX_BUCKET_SIZE", 100, raising=False)
+        monkeypatch.setattr(rank_service.config, "RANK_INDEX_REFRESH_SECONDS", 3600, raising=False)
+        users = db.query(User).all()
+        assert get_user_rank(db, users[1]) == naive_rank(users, users[1])
+
+        rng = random.Random(11)
+        for _ in range(200):
+            user = rng.choice(users)
+            user.current_exp = rng.randint(0, 500000)  # far beyond the initial capacity too
+            if rng.random() < 0.05:
+                user.is_active = not user.is_active
+            db.commit()
+            record_exp_change(user)
+
+        for user in users[::13]:
+            assert get_user_rank(db, user) == naive_rank(users, user)
+
+    def test_index_ties_and_buckets(self):
+        index = ExpRankIndex.from_rows([("a", 150), ("b", 150), ("c", 199), ("d", 10)], bucket_size=100)
+        assert index.rank_of(199) == 1
+        assert index.rank_of(150) == 2
+        assert index.rank_of(10) == 4
+        assert index.rank_of(0) == 5
+        index.remove("c")
+        assert index.rank_of(150) == 1
+        assert index.total == 3
@@ -0,0 +1,135 @@
+"""
+Test read-replica routing with two SQLite files standing in for the primary
+and a replica: health and lag checks, failover and read-your-writes pinning
+"""
+
+import asyncio
+import sys
+import os
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from config import to_async_database_url
+from models import Base, User
+from services.replica_router import DatabaseEndpoint, ReplicaRouter
+
+
+def make_endpoint(name, url, given_name=None):
+    endpoint = DatabaseEndpoint(name, create_engine(url), create_async_engine(to_async_database_url(url)))
+    if given_name is not None:
+        Base.metadata.create_all(bind=endpoint.engine)
+        with sessionmaker(bind=endpoint.engine)() as db:
+            db.add(User(id="u1", email="u1@example.com", given_name=given_name))
+            db.commit()
+    return endpoint
+
+
+@pytest.fixture
+def endpoints(tmp_path):
+    # The "replica" still has the old name, as it would while replication catches up
+    primary = make_endpoint("primary", f"sqlite:///{tmp_path / 'primary.db'}", "New")
+    replica = make_endpoint("replica", f"sqlite:///{tmp_path / 'replica.db'}", "Old")
+    yield primary, replica
+    for endpoint in (primary, replica):
+        endpoint.engine.dispose()
+        asyncio.run(endpoint.async_engine.dispose())
+
+
+def read_name(router, *keys):
+    router.refresh_if_stale()
+    with sessionmaker(bind=router.choose(keys).engine)() as db:
+        return db.execute(select(User.given_name).where(User.id == "u1")).scalar_one()
+
+
+class TestReplicaRouter:
+    """Test which database a read lands on"""
+
+    def test_reads_use_replica_and_writes_pin_to_primary(self, endpoints, clock):
+        """Test a written user is read from the primary until the pin expires"""
+        primary, replica = endpoints
+        router = ReplicaRouter(primary, [replica], max_lag_seconds=5, check_interval_seconds=5, clock=clock)
+
+        assert read_name(router) == "Old"
+        router.note_write("u1")
+        assert read_name(router, "u1") == "New"
+        assert read_name(router, "u2") == "Old"
+
+        clock.now += router.pin_seconds
+        assert read_name(router, "u1") == "Old"
+
+    def test_lagging_replica_is_skipped_until_it_catches_up(self, endpoints, clock):
+        """Test lag above the limit removes a replica at the next check"""
+        primary, replica = endpoints
+        lag = {"replica": 0.0}
+        router = ReplicaRouter(primary, [replica], probe=lambda endpoint: lag[endpoint.name],
+                               max_lag_seconds=5, check_interval_seconds=5, clock=clock)
+        assert read_name(router) == "Old"
+
+        lag["replica"] = 12.0
+        clock.now += 5
+        assert read_name(router) == "New"
+        assert router.status()[0]["lag_seconds"] == 12.0
+
+        lag["replica"] = 0.5
+        clock.now += 5
+        assert read_name(router) == "Old"
+
+    def test_unreachable_replica_falls_back_to_primary(self, endpoints, tmp_path, clock):
+        """Test a replica that cannot be opened is marked unhealthy and reads go to the primary"""
+        primary, _ = endpoints
+        broken = make_endpoint("broken", f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+        router = ReplicaRouter(primary, [broken], clock=clock)
+
+        assert read_name(router) == "New"
+        status = router.status()[0]
+        assert status["healthy"] is False and status["error"]
+        broken.engine.dispose()
+
+    def test_connection_errors_take_a_replica_out_of_rotation(self, endpoints, clock):
+        """Test a failed replica waits retry_after_seconds even if its probe passes"""
+        primary, replica = endpoints
+        router = ReplicaRouter(primary, [replica], probe=lambda endpoint: 0.0,
+                               check_interval_seconds=5, retry_after_seconds=30, clock=clock)
+        assert read_name(router) == "Old"
+
+        router.mark_failed(0, "server closed the connection")
+        clock.now += 5
+        assert read_name(router) == "New"
+        clock.now += 30
+        assert read_name(router) == "Old"
+
+    def test_healthy_replicas_share_reads(self, endpoints, tmp_path, clock):
+        """Test reads rotate across healthy replicas"""
+        primary, replica = endpoints
+        second = make_endpoint("second", f"sqlite:///{tmp_path / 'second.db'}", "Second")
+        router = ReplicaRouter(primary, [replica, second], clock=clock)
+        assert [read_name(router) for _ in range(4)] == ["Old", "Second", "Old", "Second"]
+        second.engine.dispose()
+        asyncio.run(second.async_engine.dispose())
+
+    def test_without_replicas_everything_reads_the_primary(self, endpoints):
+        """Test the default single-database deployment is unchanged"""
+        primary, _ = endpoints
+        router = ReplicaRouter(primary)
+        assert not router.is_stale()
+        assert read_name(router) == "New"
+
+    def test_async_sessions_follow_the_same_choice(self, endpoints, clock):
+        """Test the async engine of the chosen endpoint serves async reads"""
+        primary, replica = endpoints
+        router = ReplicaRouter(primary, [replica], clock=clock)
+        router.refresh()
+
+        async def run(*keys):
+            async with async_sessionmaker(bind=router.choose(keys).async_engine)() as db:
+                return (await db.execute(select(User.given_name).where(User.id == "u1"))).scalar_one()
+
+        assert asyncio.run(run()) == "Old"
+        router.note_write("u1")
+        assert asyncio.run(run("u1")) == "New"
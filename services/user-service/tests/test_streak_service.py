@@ -0,0 +1,129 @@
+"""
+Test study streaks: per-event advancement on local days, daily goals and the
+set-based nightly close-out
+"""
+
+import sys
+import os
+from datetime import date, datetime, timezone
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models import User, UserStreak
+from services.activity_service import ActivityRecord, record_events
+from services.streak_service import (
+    StreakState, advance, close_out_streaks, effective_streak, get_streak, set_daily_goal
+)
+
+UTC = timezone.utc
+
+
+@pytest.fixture
+def Session(Session):
+    with Session() as db:
+        db.add_all([User(id=f"u{i}", email=f"u{i}@example.com") for i in range(1, 4)])
+        db.commit()
+    return Session
+
+
+def at(*args):
+    return datetime(*args, tzinfo=UTC)
+
+
+class TestAdvance:
+    """Test the O(1) per-event transition"""
+
+    def test_consecutive_days_extend_and_gaps_restart(self):
+        """Test yesterday extends, same day is a no-op and a gap restarts at 1"""
+        state = StreakState()
+        for day in (date(2026, 10, 1), date(2026, 10, 2), date(2026, 10, 2), date(2026, 10, 3)):
+            advance(state, day, 60)
+        assert (state.current_streak, state.longest_streak) == (3, 3)
+
+        advance(state, date(2026, 10, 6), 60)
+        assert (state.current_streak, state.longest_streak) == (1, 3)
+        assert state.last_active_day == date(2026, 10, 6)
+
+    def test_daily_goal_counts_only_once_met(self):
+        """Test a day with a goal counts when its accumulated minutes reach it"""
+        state = StreakState(daily_goal_minutes=10)
+        advance(state, date(2026, 10, 1), 300)
+        assert state.current_streak == 0
+        advance(state, date(2026, 10, 1), 300)
+        assert state.current_streak == 1
+
+        # Progress does not carry over to the next day
+        advance(state, date(2026, 10, 2), 599)
+        assert state.current_streak == 1
+        assert state.progress_seconds == 599
+
+    def test_late_events_for_past_days_are_ignored(self):
+        """Test an event for a day before the progress day leaves the state alone"""
+        state = StreakState()
+        advance(state, date(2026, 10, 5), 60)
+        advance(state, date(2026, 10, 4), 60)
+        assert state.current_streak == 1
+        assert state.progress_day == date(2026, 10, 5)
+
+    def test_effective_streak_expires_after_a_missed_day(self):
+        """Test a streak shows as 0 once yesterday was missed, before any close-out ran"""
+        state = StreakState(current_streak=4, last_active_day=date(2026, 10, 17))
+        assert effective_streak(state, date(2026, 10, 18)) == 4
+        assert effective_streak(state, date(2026, 10, 19)) == 0
+
+
+class TestStreakStorage:
+    """Test streaks maintained by the activity write path"""
+
+    def test_activity_events_advance_streaks(self, Session):
+        """Test batches across local midnight update current and longest streaks"""
+        with Session() as db:
+            record_events(db, [
+                ActivityRecord("u1", "study", at(2026, 10, 17, 3)),
+                ActivityRecord("u1", "study", at(2026, 10, 17, 18)),     # 01:00 on the 18th locally
+                ActivityRecord("u2", "study", at(2026, 10, 18, 3)),
+            ])
+            db.commit()
+            record_events(db, [ActivityRecord("u1", "lesson_completed", at(2026, 10, 19, 2))])
+            db.commit()
+
+            streak = get_streak(db, "u1", today=date(2026, 10, 19))
+            assert streak["current_streak"] == 3
+            assert streak["longest_streak"] == 3
+            assert streak["goal_met_today"] is True
+            assert get_streak(db, "u2", today=date(2026, 10, 19))["current_streak"] == 1
+            assert get_streak(db, "u3", today=date(2026, 10, 19))["current_streak"] == 0
+
+    def test_daily_goal_is_applied_to_activity(self, Session):
+        """Test study time accumulates towards the goal set by the user"""
+        with Session() as db:
+            set_daily_goal(db, "u1", 15)
+            db.commit()
+            record_events(db, [ActivityRecord("u1", "study", at(2026, 10, 19, 2), duration_seconds=600)])
+            db.commit()
+            streak = get_streak(db, "u1", today=date(2026, 10, 19))
+            assert (streak["current_streak"], streak["today_minutes"]) == (0, 10)
+
+            record_events(db, [ActivityRecord("u1", "study", at(2026, 10, 19, 3), duration_seconds=300)])
+            db.commit()
+            streak = get_streak(db, "u1", today=date(2026, 10, 19))
+            assert (streak["current_streak"], streak["daily_goal_minutes"]) == (1, 15)
+
+    def test_close_out_resets_only_broken_streaks(self, Session):
+        """Test one UPDATE zeroes streaks older than yesterday and keeps the longest"""
+        with Session() as db:
+            db.add_all([
+                UserStreak(user_id="u1", current_streak=5, longest_streak=7, last_active_day=date(2026, 10, 16)),
+                UserStreak(user_id="u2", current_streak=2, longest_streak=2, last_active_day=date(2026, 10, 18)),
+                UserStreak(user_id="u3", current_streak=1, longest_streak=1, last_active_day=date(2026, 10, 19)),
+            ])
+            db.commit()
+
+        assert close_out_streaks(Session, today=date(2026, 10, 19)) == 1
+        assert close_out_streaks(Session, today=date(2026, 10, 19)) == 0
+        with Session() as db:
+            streaks = {row.user_id: (row.current_streak, row.longest_streak) for row in db.query(UserStreak)}
+        assert streaks == {"u1": (0, 7), "u2": (2, 2), "u3": (1, 1)}
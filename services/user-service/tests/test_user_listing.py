@@ -0,0 +1,114 @@
+"""
+Test keyset pagination, filtering, projection and NDJSON export of the admin user listing
+"""
+
+import json
+import random
+import sys
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models import User
+from services.user_listing import (
+    UserListQuery, build_statement, iter_users_ndjson, list_users, parse_fields
+)
+
+
+@pytest.fixture
+def session_factory(engine):
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    rng = random.Random(7)
+    start = datetime(2025, 1, 1)
+    for i in range(250):
+        session.add(User(
+            id=f"user-{i:03d}", email=f"user{i}@example.com", given_name=f"Name{i}",
+            password="secret-hash", bio="x" * 200,
+            level=rng.randint(1, 10), current_exp=rng.randint(0, 5000),
+            sex=rng.choice(["Male", "Female"]), is_active=i % 10 != 0,
+            # Several users share a timestamp so the id tiebreak matters
+            created_at=start + timedelta(minutes=i // 3)
+        ))
+    session.commit()
+    session.close()
+    return Session
+
+
+def paginate(db, **kwargs):
+    pages, cursor = [], None
+    while True:
+        infos, cursor = list_users(db, UserListQuery(cursor=cursor, **kwargs))
+        pages.append(infos)
+        if cursor is None:
+            return pages
+
+
+class TestUserListing:
+    """Admin /all listing"""
+
+    def test_keyset_pages_cover_every_active_user_once(self, session_factory):
+        db = session_factory()
+        pages = paginate(db, limit=37, fields=["user_id"])
+        ids = [info["user_id"] for page in pages for info in page]
+
+        expected = [u.id for u in db.query(User).filter(User.is_active == True).order_by(User.created_at, User.id)]
+        assert ids == expected
+        assert all(len(page) == 37 for page in pages[:-1])
+
+    def test_sort_by_exp_descending(self, session_factory):
+        db = session_factory()
+        pages = paginate(db, limit=50, sort="current_exp", order="desc", fields=["user_id", "current_exp"])
+        rows = [(info["current_exp"], info["user_id"]) for page in pages for info in page]
+        assert rows == sorted(rows, reverse=True)
+        assert len(rows) == 225
+
+    def test_filters(self, session_factory):
+        db = session_factory()
+        infos, cursor = list_users(db, UserListQuery(min_level=3, max_level=5, sex="Female", fields=["user_id", "level", "sex"]))
+        expected = db.query(User).filter(User.is_active == True, User.level.between(3, 5), User.sex == "Female").count()
+        assert cursor is None
+        assert len(infos) == expected
+        assert all(3 <= info["level"] <= 5 and info["sex"] == "Female" for info in infos)
+
+        infos, _ = list_users(db, UserListQuery(q="name12", fields=["user_id", "given_name"]))
+        assert {info["given_name"] for info in infos} == {f"Name{i}" for i in [12] + list(range(121, 130))}
+
+    def test_projection_selects_only_needed_columns(self):
+        sql = str(build_statement(UserListQuery(fields=["user_id", "given_name"])))
+        selected = sql.split("FROM")[0]
+        assert "given_name" in selected
+        assert "password" not in selected and "bio" not in selected
+
+    def test_default_fields_match_original_payload(self, session_factory):
+        infos, cursor = list_users(session_factory(), UserListQuery())
+        assert cursor is None
+        assert len(infos) == 225
+        assert list(infos[0]) == parse_fields(None)
+        assert "password" not in infos[0]
+
+    def test_avatar_id_keeps_its_unversioned_format(self, session_factory):
+        db = session_factory()
+        db.get(User, "user-001").avatar_url = "user-001:3f9a2c"
+        db.get(User, "user-002").avatar_url = "https://lh3.example/a.jpg"
+        db.commit()
+        infos, _ = list_users(db, UserListQuery(limit=3, fields=["user_id", "avatar_id"]))
+        assert [info["avatar_id"] for info in infos] == ["user-001", "https://lh3.example/a.jpg", None]
+
+    def test_ndjson_export_streams_all_rows(self, session_factory):
+        lines = list(iter_users_ndjson(session_factory, UserListQuery(fields=["user_id", "email"]), batch_size=16))
+        rows = [json.loads(line) for line in lines]
+        assert len(rows) == 225
+        assert all(line.endswith(b"\n") for line in lines)
+        assert set(rows[0]) == {"user_id", "email"}
+
+    def test_invalid_input(self):
+        with pytest.raises(ValueError):
+            parse_fields("user_id,password")
+        with pytest.raises(ValueError):
+            build_statement(UserListQuery(cursor="not-a-cursor", limit=10))